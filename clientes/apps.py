@@ -1,5 +1,24 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _garantir_indice_texto(sender, using, **kwargs):
+    from django.db import connections
+
+    from .busca import criar_indice_texto
+
+    conexao = connections[using]
+    with conexao.cursor() as cursor:
+        if "clientes_cliente" not in conexao.introspection.table_names(cursor):
+            return
+        colunas = {c.name for c in conexao.introspection.get_table_description(cursor, "clientes_cliente")}
+    if "chave_busca" in colunas:
+        criar_indice_texto(conexao)
 
 
 class ClientesConfig(AppConfig):
     name = 'clientes'
+
+    def ready(self):
+        # Triggers do FTS5 somem quando o SQLite recria a tabela numa migração
+        post_migrate.connect(_garantir_indice_texto, sender=self)
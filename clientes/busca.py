@@ -0,0 +1,497 @@
+"""
+Busca de clientes: autocomplete e busca ranqueada.
+
+Os selects de cliente das telas não carregam mais a base inteira: o
+Select2 consulta /clientes/autocomplete/?q=... conforme o usuário digita.
+
+A busca usa uma única coluna normalizada do Cliente, a chave_busca
+(montar_chave_busca): "nome cpf telefone", com o nome sem acento,
+minúsculo e com espaços simples e os números só com dígitos
+("JOÃO  da Silva", "123.456.789-00" → "joao da silva 12345678900 ...").
+Ela tem dois índices: B-tree (o início da chave é o nome, para o
+autocomplete) e texto — FTS5 no SQLite (tabela clientes_cliente_fts
+mantida por triggers) e trigrama (pg_trgm, GIN) no PostgreSQL.
+
+O autocomplete procura pelo início do CPF (termos numéricos, índice do
+cpf) ou do nome (prefixo da chave → busca por faixa no índice) e
+completa com a busca ranqueada.
+
+buscar_clientes(termo) é a busca ranqueada usada na listagem: cada
+palavra do termo precisa aparecer na chave (início de palavra no FTS5,
+trecho no trigrama), sem diferenciar acento/caixa, e o resultado vem
+ordenado por relevância (ver pontuar; para termos muito comuns, só o
+topo é ranqueado, ver ResultadoBusca).
+
+O autocomplete fica no cache compartilhado (core.cache, namespace
+"clientes_autocomplete"), com validade curta; qualquer save de Cliente
+invalida o namespace inteiro.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from core import cache
+
+from .models import Cliente
+
+
+LIMITE_PADRAO = 20
+TAMANHO_MINIMO = 2
+JANELA_RANKING = 500    # candidatos ranqueados em Python; acima disso, top-k por faixa
+PREFIXO_FTS = 8         # maior prefixo com índice próprio no FTS5 (prefix='2 ... 8')
+
+CACHE_NAMESPACE = "clientes_autocomplete"
+CACHE_VALIDADE = 60  # segundos
+
+NAO_DIGITO = re.compile(r"\D")
+NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+# ==============================================================================
+# NORMALIZAÇÃO
+# ==============================================================================
+
+def normalizar_nome(texto):
+    """Remove acentos, deixa minúsculo e troca pontuação/espaços por um espaço."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return NAO_ALFANUMERICO.sub(" ", texto.lower()).strip()
+
+
+def somente_digitos(texto):
+    return NAO_DIGITO.sub("", texto or "")
+
+
+def montar_chave_busca(nome, cpf, telefone):
+    """chave_busca do cliente: "nome normalizado cpf telefone" (só dígitos)."""
+    partes = (normalizar_nome(nome)[:120], somente_digitos(cpf)[:11], somente_digitos(telefone))
+    return " ".join(parte for parte in partes if parte)[:160]
+
+
+def formatar_prefixo_cpf(digitos):
+    """ "1234567" → "123.456.7": início do CPF na máscara xxx.xxx.xxx-xx."""
+    formatado = ""
+    for posicao, digito in enumerate(digitos[:11]):
+        if posicao in (3, 6):
+            formatado += "."
+        elif posicao == 9:
+            formatado += "-"
+        formatado += digito
+    return formatado
+
+
+def termo_numerico(termo):
+    """ "123.456", "(11) 9876" → busca por dígitos; qualquer letra → por nome."""
+    return bool(somente_digitos(termo)) and not re.search(r"[^\d.\-\s/()+]", termo)
+
+
+def _prefixo(campo, valor):
+    """
+    Filtro "começa com" que usa o índice da coluna.
+
+    No PostgreSQL o índice é varchar_pattern_ops, que atende LIKE 'x%'.
+    No SQLite o LIKE não usa índice, então vira a faixa
+    [valor, valor + U+FFFF), que desce direto no B-tree (collation binária).
+    """
+    if connection.vendor == "postgresql":
+        return Q(**{f"{campo}__startswith": valor})
+    return Q(**{f"{campo}__gte": valor, f"{campo}__lt": valor + "\uffff"})
+
+
+# ==============================================================================
+# CACHE DO AUTOCOMPLETE
+# ==============================================================================
+
+def invalidar_cache():
+    """Descarta o autocomplete em cache de todos os workers."""
+    cache.invalidar(CACHE_NAMESPACE)
+
+
+# ==============================================================================
+# BUSCA
+# ==============================================================================
+
+def _serializar(linhas):
+    return [
+        {"id": pk, "nome": nome, "cpf": cpf, "text": f"{nome} ({cpf})"}
+        for pk, nome, cpf in linhas
+    ]
+
+
+def autocompletar(termo, limite=LIMITE_PADRAO):
+    """
+    Lista de até `limite` clientes para o termo digitado:
+    [{"id", "nome", "cpf", "text"}, ...]. Termos curtos devolvem [].
+    """
+    termo = (termo or "").strip()
+    digitos = somente_digitos(termo)
+    nome = normalizar_nome(termo)
+
+    # "123.456" ou "12345" → busca por CPF; qualquer letra → busca por nome
+    por_cpf = termo_numerico(termo)
+    chave = ("cpf", digitos, limite) if por_cpf else ("nome", nome, limite)
+    if len(chave[1]) < TAMANHO_MINIMO:
+        return []
+
+    return cache.obter(
+        CACHE_NAMESPACE, chave, lambda: _autocompletar(termo, por_cpf, digitos, nome, limite),
+        timeout=CACHE_VALIDADE,
+    )
+
+
+def _autocompletar(termo, por_cpf, digitos, nome, limite):
+    campos = ("id", "nome_completo", "cpf")
+    if por_cpf:
+        # CPF gravado com máscara; cadastros antigos podem ter só os dígitos
+        filtro = _prefixo("cpf", formatar_prefixo_cpf(digitos)) | _prefixo("cpf", digitos)
+        linhas = list(Cliente.objects.filter(filtro).order_by("cpf").values_list(*campos)[:limite])
+    else:
+        linhas = list(
+            Cliente.objects.filter(_prefixo("chave_busca", nome))
+            .order_by("chave_busca", "id").values_list(*campos)[:limite]
+        )
+
+    if len(linhas) < limite:
+        # Sobrenome / nome do meio / telefone: completa pela busca ranqueada
+        vistos = {pk for pk, _, _ in linhas}
+        for cliente in buscar_clientes(termo)[:limite]:
+            if cliente.pk not in vistos and len(linhas) < limite:
+                linhas.append((cliente.pk, cliente.nome_completo, cliente.cpf))
+
+    return _serializar(linhas)
+
+
+# ==============================================================================
+# BUSCA RANQUEADA
+# ==============================================================================
+
+def _palavras(termo):
+    """Palavras do termo já normalizadas (termo numérico vira uma palavra só)."""
+    termo = (termo or "").strip()
+    if termo_numerico(termo):
+        return [somente_digitos(termo)]
+    return normalizar_nome(termo).split()[:8]
+
+
+def pontuar(palavras, chave):
+    """
+    Relevância (0 a 1) de uma chave_busca para as palavras do termo.
+
+    Por palavra: token igual > começo de token > trecho (só no trigrama),
+    com bônus quando aparece na mesma posição do termo ("maria silva"
+    antes de "ana maria da silva"). Chave que começa pelo termo inteiro
+    ganha bônus extra.
+    """
+    if not palavras:
+        return 0.0
+    tokens = chave.split()
+    pontos = 0
+    for posicao, palavra in enumerate(palavras):
+        # nota do token (3/2/1) + 1 na mesma posição; do melhor caso ao pior
+        no_lugar = tokens[posicao] if posicao < len(tokens) else ""
+        if no_lugar == palavra:
+            pontos += 4
+        elif palavra in tokens or no_lugar.startswith(palavra):
+            pontos += 3
+        elif palavra in no_lugar or any(token.startswith(palavra) for token in tokens):
+            pontos += 2
+        elif palavra in chave:      # palavra sem espaço: trecho de algum token
+            pontos += 1
+    if chave.startswith(" ".join(palavras)):
+        pontos += 3
+    return pontos / (4 * len(palavras) + 3)
+
+
+class ResultadoBusca:
+    """
+    Resultado preguiçoso de buscar_clientes(): aceita len()/count() e
+    fatias, então pode ir direto para o Paginator. Os clientes vêm com o
+    atributo `relevancia` (ver pontuar).
+
+    Os candidatos saem do índice numa única consulta — até
+    JANELA_RANKING + 1 clientes que casam com o termo, só
+    (id, chave_busca) — e, cabendo na janela, são todos ordenados por
+    relevância em Python.
+
+    Termos muito comuns ("silva") casam com dezenas de milhares de
+    cadastros e não cabem na janela (`truncado` fica True). Aí o topo
+    vem de um top-k limitado: cada faixa de relevância é uma consulta
+    com LIMIT JANELA_RANKING no índice (ver _candidatos_janela), e a
+    união é ordenada por pontuar — as primeiras JANELA_RANKING posições.
+    Do fim da janela em diante seguem os demais, do mais recente ao mais
+    antigo, com count() exato. Nenhum cliente que casa com o termo fica
+    de fora; dentro de uma mesma faixa, a ordem é a do índice.
+    """
+
+    def __init__(self, termo):
+        self.termo = (termo or "").strip()
+        self.palavras = _palavras(self.termo)
+
+    def _expressao_fts(self):
+        # Palavras só têm [a-z0-9]: aspas bastam para escapar a sintaxe do FTS5.
+        # Prefixos até PREFIXO_FTS letras têm índice próprio e são lidos sob
+        # demanda; palavras maiores vão truncadas e conferidas em Python.
+        return " AND ".join(f'"{p[:PREFIXO_FTS]}"*' for p in self.palavras)
+
+    def _expressao_fts_completa(self):
+        # Mesmo conjunto, com as palavras inteiras: sem conferência em Python
+        return " AND ".join(f'"{p}"*' for p in self.palavras)
+
+    def _expressao_fts_inicio(self):
+        # A chave começa pelo termo: frase no início (^), a última palavra como prefixo
+        return f'^"{" ".join(self.palavras)}"*'
+
+    def _expressao_fts_exata(self, inicio=False):
+        # Só tokens iguais às palavras; com `inicio`, a primeira abre a chave (^)
+        termos = [f'"{p}"' for p in self.palavras]
+        if inicio:
+            termos[0] = "^" + termos[0]
+        return " AND ".join(termos)
+
+    def _filtro_trigrama(self):
+        # PostgreSQL: LIKE '%x%' usa o índice GIN pg_trgm (outros bancos: varredura)
+        qs = Cliente.objects.all()
+        for palavra in self.palavras:
+            qs = qs.filter(chave_busca__contains=palavra)
+        return qs
+
+    def _consulta_fts(self, expressao, limite, inicio=0, excluir=()):
+        """
+        [(id, chave_busca)] que casam com a expressão, do mais recente ao
+        mais antigo. ORDER BY rowid + LIMIT: o FTS5 percorre as listas de
+        forma preguiçosa e para no limite, sem ler todos os documentos.
+        """
+        filtro = f"AND f.rowid NOT IN ({', '.join(['%s'] * len(excluir))}) " if excluir else ""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT c.id, c.chave_busca FROM {TABELA_FTS} f "
+                "JOIN clientes_cliente c ON c.id = f.rowid "
+                f"WHERE f.{TABELA_FTS} MATCH %s {filtro}"
+                "ORDER BY f.rowid DESC LIMIT %s OFFSET %s",
+                [expressao, *excluir, limite, inicio],
+            )
+            return cursor.fetchall()
+
+    def _buscar_candidatos(self):
+        if connection.vendor == "sqlite":
+            return self._consulta_fts(self._expressao_fts(), JANELA_RANKING + 1)
+        return list(self._filtro_trigrama().order_by("-id").values_list("id", "chave_busca")[:JANELA_RANKING + 1])
+
+    def _candidatos_janela(self, recentes):
+        """
+        [(id, chave_busca)] do topo de um termo comum: até JANELA_RANKING
+        clientes, tirados das faixas de relevância em ordem, cada uma numa
+        consulta com LIMIT — chave que começa pelo termo; tokens iguais,
+        com a primeira palavra no início da chave; tokens iguais; e, por
+        fim, os prefixos mais recentes (`recentes`, já lidos por
+        _buscar_candidatos). As faixas vêm da mais para a menos relevante
+        (ver pontuar): com a janela cheia, as seguintes nem são consultadas.
+        """
+        candidatos = {}
+        if connection.vendor == "sqlite":
+            faixas = [self._expressao_fts_exata()]
+            if len(self.palavras) > 1:
+                # com uma palavra só, essa faixa está contida na primeira
+                faixas.insert(0, self._expressao_fts_exata(inicio=True))
+            # O ^ confere a posição em cada documento que casa: antes, o
+            # B-tree da chave_busca diz se alguma chave começa pelo termo
+            if Cliente.objects.filter(_prefixo("chave_busca", " ".join(self.palavras))).exists():
+                faixas.insert(0, self._expressao_fts_inicio())
+            for expressao in faixas:
+                if len(candidatos) >= JANELA_RANKING:
+                    break
+                candidatos.update(
+                    self._consulta_fts(expressao, JANELA_RANKING - len(candidatos), excluir=list(candidatos))
+                )
+        else:
+            # início da chave pelo B-tree (varchar_pattern_ops)
+            candidatos.update(
+                Cliente.objects.filter(_prefixo("chave_busca", " ".join(self.palavras)))
+                .order_by("chave_busca", "id").values_list("id", "chave_busca")[:JANELA_RANKING]
+            )
+
+        for pk, chave in recentes:
+            if len(candidatos) >= JANELA_RANKING:
+                break
+            candidatos.setdefault(pk, chave)
+
+        if len(candidatos) < JANELA_RANKING and connection.vendor == "sqlite":
+            # a conferência das palavras longas descartou parte dos recentes
+            candidatos.update(self._consulta_fts(
+                self._expressao_fts_completa(), JANELA_RANKING - len(candidatos), excluir=list(candidatos),
+            ))
+        return list(candidatos.items())
+
+    def _ordenar(self, candidatos):
+        """[(relevancia, id)] do mais para o menos relevante (empate: chave curta, mais recente)."""
+        ranking = [
+            (pontuar(self.palavras, chave), len(chave), -pk, pk)
+            for pk, chave in candidatos
+        ]
+        ranking.sort(key=lambda item: (-item[0], item[1], item[2]))
+        return [(relevancia, pk) for relevancia, _, _, pk in ranking]
+
+    @cached_property
+    def _ranking(self):
+        """
+        [(relevancia, id)] ordenados por relevância: todos os que casam
+        com o termo ou, quando não couberam na janela, só as primeiras
+        JANELA_RANKING posições (ver _candidatos_janela).
+        """
+        if not self.palavras:
+            self._truncado = False
+            return []
+        candidatos = self._buscar_candidatos()
+        self._truncado = len(candidatos) > JANELA_RANKING
+
+        longas = [p for p in self.palavras if len(p) > PREFIXO_FTS]
+        if longas and connection.vendor == "sqlite":
+            # o FTS5 só conferiu os PREFIXO_FTS primeiros caracteres
+            candidatos = [
+                (pk, chave) for pk, chave in candidatos
+                if all(any(t.startswith(p) for t in chave.split()) for p in longas)
+            ]
+        if self._truncado:
+            return self._ordenar(self._candidatos_janela(candidatos))[:JANELA_RANKING]
+        return self._ordenar(candidatos)
+
+    # ------------------------------------------------------------------
+    # Além da janela (termos comuns)
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def _total_indice(self):
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {TABELA_FTS} f WHERE f.{TABELA_FTS} MATCH %s",
+                    [self._expressao_fts_completa()],
+                )
+                return cursor.fetchone()[0]
+        return self._filtro_trigrama().count()
+
+    def _alem_da_janela(self, inicio, fim):
+        """[(relevancia, id)] das posições [inicio:fim] contadas do fim da janela."""
+        janela = [pk for _, pk in self._ranking]
+        if connection.vendor == "sqlite":
+            linhas = self._consulta_fts(
+                self._expressao_fts_completa(), -1 if fim is None else fim - inicio, inicio, janela,
+            )
+        else:
+            qs = self._filtro_trigrama().exclude(id__in=janela).order_by("-id")
+            linhas = list(qs.values_list("id", "chave_busca")[inicio:fim])
+        return [(pontuar(self.palavras, chave), pk) for pk, chave in linhas]
+
+    @property
+    def truncado(self):
+        self._ranking
+        return self._truncado
+
+    def count(self):
+        if self.truncado:
+            return self._total_indice
+        return len(self._ranking)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        pagina = self._ranking[item]
+        if self.truncado:
+            if (item.start or 0) < 0 or (item.stop or 0) < 0 or item.step:
+                raise ValueError("ResultadoBusca só aceita fatias positivas sem passo.")
+            tamanho = len(self._ranking)
+            if item.stop is None or item.stop > tamanho:
+                pagina += self._alem_da_janela(
+                    max((item.start or 0) - tamanho, 0), None if item.stop is None else item.stop - tamanho,
+                )
+        clientes = Cliente.objects.in_bulk([pk for _, pk in pagina])
+        resultado = []
+        for relevancia, pk in pagina:
+            if pk in clientes:
+                clientes[pk].relevancia = relevancia
+                resultado.append(clientes[pk])
+        return resultado
+
+
+def buscar_clientes(termo):
+    """
+    Busca ranqueada por nome, CPF ou telefone, sem diferenciar acento e
+    caixa ("joao sil" acha "JOÃO DA SILVA"). Devolve um ResultadoBusca.
+    """
+    return ResultadoBusca(termo)
+
+
+# ==============================================================================
+# ÍNDICE DE TEXTO (FTS5 / pg_trgm)
+# ==============================================================================
+
+TABELA_FTS = "clientes_cliente_fts"
+INDICE_TRIGRAMA = "cliente_chave_busca_trgm_idx"
+
+TRIGGERS_FTS = {
+    "clientes_cliente_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_ai AFTER INSERT ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}(rowid, chave_busca) VALUES (new.id, new.chave_busca);
+        END""",
+    "clientes_cliente_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_ad AFTER DELETE ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, chave_busca) VALUES ('delete', old.id, old.chave_busca);
+        END""",
+    "clientes_cliente_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_au AFTER UPDATE OF chave_busca ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, chave_busca) VALUES ('delete', old.id, old.chave_busca);
+            INSERT INTO {TABELA_FTS}(rowid, chave_busca) VALUES (new.id, new.chave_busca);
+        END""",
+}
+
+
+def criar_indice_texto(conexao):
+    """
+    Cria (ou recria) o índice de texto da chave_busca. Idempotente.
+
+    SQLite: tabela FTS5 de conteúdo externo + triggers. Como o SQLite
+    recria a tabela em qualquer AlterField (e os triggers somem junto),
+    o post_migrate do app chama esta função de novo e reconstrói o FTS
+    quando algum trigger estava faltando.
+
+    PostgreSQL: extensão pg_trgm (exige permissão de CREATE EXTENSION na
+    primeira vez) e índice GIN gin_trgm_ops.
+    """
+    with conexao.cursor() as cursor:
+        if conexao.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                list(TRIGGERS_FTS),
+            )
+            faltando = set(TRIGGERS_FTS) - {nome for (nome,) in cursor.fetchall()}
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+                "chave_busca, content='clientes_cliente', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6 7 8')"
+            )
+            for sql in TRIGGERS_FTS.values():
+                cursor.execute(sql)
+            if faltando:
+                cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+        elif conexao.vendor == "postgresql":
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {INDICE_TRIGRAMA} "
+                "ON clientes_cliente USING gin (chave_busca gin_trgm_ops)"
+            )
+
+
+def remover_indice_texto(conexao):
+    with conexao.cursor() as cursor:
+        if conexao.vendor == "sqlite":
+            for nome in TRIGGERS_FTS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            cursor.execute(f"DROP TABLE IF EXISTS {TABELA_FTS}")
+        elif conexao.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {INDICE_TRIGRAMA}")
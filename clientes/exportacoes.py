@@ -0,0 +1,28 @@
+"""Exportações do módulo de clientes (ver core.exportacao)."""
+from core.exportacao import Coluna, data_iso, registrar_exportacao
+
+from .models import Cliente
+
+
+# Mesmo layout lido por importar_clientes_csv — o CSV serve de backup
+registrar_exportacao(
+    "clientes",
+    titulo="Clientes",
+    modulo="CLIENTES",
+    nome_arquivo="clientes_backup",
+    queryset=lambda request: Cliente.objects.order_by("id"),
+    colunas=[
+        Coluna("nome_completo", "nome_completo", largura=40),
+        Coluna("cpf", "cpf"),
+        Coluna("telefone", "telefone"),
+        Coluna("data_nascimento", "data_nascimento", data_iso),
+        Coluna("cep", "cep"),
+        Coluna("logradouro", "logradouro", largura=35),
+        Coluna("numero", "numero"),
+        Coluna("complemento", "complemento"),
+        Coluna("bairro", "bairro"),
+        Coluna("cidade", "cidade"),
+        Coluna("uf", "uf"),
+        Coluna("doc", "doc"),
+    ],
+)
@@ -0,0 +1,249 @@
+"""
+Importação em lote de clientes (CSV no layout da exportação/backup).
+
+O arquivo é lido em streaming e processado em lotes:
+
+1. cada linha é validada em memória (CPF com dígitos verificadores,
+   CEP, data de nascimento, UF, tamanhos) — linhas inválidas vão para
+   o arquivo de erros com o motivo, sem interromper a importação;
+2. os CPFs do lote são buscados com uma única consulta `cpf IN (...)`;
+3. clientes novos entram via bulk_create e os existentes via
+   bulk_update, cada lote na sua própria transação.
+
+Usado pela tela de importação e pelo comando `importar_clientes`.
+"""
+import csv
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Cliente
+
+
+# Ordem das colunas — a mesma do CSV de exportação (clientes_backup.csv)
+CAMPOS = [
+    "nome_completo", "cpf", "telefone", "data_nascimento",
+    "cep", "logradouro", "numero", "complemento",
+    "bairro", "cidade", "uf", "doc",
+]
+
+# Campos copiados para o cliente já existente (CPF é a chave)
+CAMPOS_ATUALIZAVEIS = [c for c in CAMPOS if c != "cpf"]
+
+TAMANHO_LOTE = 1000
+
+NAO_DIGITO = re.compile(r"\D")
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+# ==============================================================================
+# VALIDAÇÃO EM MEMÓRIA
+# ==============================================================================
+
+def validar_cpf(valor):
+    """Valida os dígitos verificadores e devolve no formato xxx.xxx.xxx-xx."""
+    cpf = NAO_DIGITO.sub("", valor or "")
+    if len(cpf) != 11 or cpf == cpf[0] * 11:
+        raise LinhaInvalida(f"CPF inválido: {valor!r}")
+
+    for tamanho in (9, 10):
+        soma = sum(int(d) * peso for d, peso in zip(cpf[:tamanho], range(tamanho + 1, 1, -1)))
+        digito = (soma * 10) % 11 % 10
+        if digito != int(cpf[tamanho]):
+            raise LinhaInvalida(f"CPF inválido: {valor!r}")
+
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+def validar_cep(valor):
+    """Devolve o CEP no formato xxxxx-xxx. CEP em branco é aceito (cadastro legado)."""
+    cep = NAO_DIGITO.sub("", valor or "")
+    if not cep:
+        return ""
+    if len(cep) != 8:
+        raise LinhaInvalida(f"CEP inválido: {valor!r}")
+    return f"{cep[:5]}-{cep[5:]}"
+
+
+def _validar_data(valor):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            data = datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+        if data > date.today():
+            raise LinhaInvalida(f"data de nascimento no futuro: {valor!r}")
+        return data
+    raise LinhaInvalida(f"data de nascimento inválida: {valor!r}")
+
+
+def validar_linha(colunas):
+    """Converte uma linha do CSV em dict de campos do Cliente (ou LinhaInvalida)."""
+    if len(colunas) < len(CAMPOS):
+        raise LinhaInvalida(f"esperadas {len(CAMPOS)} colunas, encontradas {len(colunas)}")
+
+    dados = {campo: (valor or "").strip() for campo, valor in zip(CAMPOS, colunas)}
+
+    if not dados["nome_completo"]:
+        raise LinhaInvalida("nome em branco")
+
+    dados["cpf"] = validar_cpf(dados["cpf"])
+    dados["cep"] = validar_cep(dados["cep"])
+    dados["data_nascimento"] = _validar_data(dados["data_nascimento"])
+
+    dados["uf"] = dados["uf"].upper()
+    if dados["uf"] and not re.fullmatch(r"[A-Z]{2}", dados["uf"]):
+        raise LinhaInvalida(f"UF inválida: {dados['uf']!r}")
+
+    for campo in CAMPOS:
+        limite = Cliente._meta.get_field(campo).max_length
+        if limite and isinstance(dados[campo], str) and len(dados[campo]) > limite:
+            raise LinhaInvalida(f"{campo} com mais de {limite} caracteres")
+
+    return dados
+
+
+# ==============================================================================
+# IMPORTAÇÃO
+# ==============================================================================
+
+@dataclass
+class ResultadoImportacao:
+    lidos: int = 0
+    criados: int = 0
+    atualizados: int = 0
+    ignorados: int = 0
+    rejeitados: int = 0
+
+
+class _ArquivoErros:
+    """Grava as linhas rejeitadas (colunas originais + linha + motivo)."""
+
+    def __init__(self, destino):
+        self.writer = csv.writer(destino, delimiter=";") if destino is not None else None
+        self.cabecalho = False
+
+    def registrar(self, numero_linha, colunas, motivo):
+        if self.writer is None:
+            return
+        if not self.cabecalho:
+            self.writer.writerow(CAMPOS + ["linha", "erro"])
+            self.cabecalho = True
+        colunas = list(colunas)[:len(CAMPOS)]
+        colunas += [""] * (len(CAMPOS) - len(colunas))
+        self.writer.writerow(colunas + [numero_linha, motivo])
+
+
+def _gravar_lote(lote, resultado, erros, atualizar_existentes):
+    """lote: lista de (numero_linha, colunas, dados) já validados."""
+    # Cadastros antigos podem ter o CPF gravado sem máscara: busca as duas formas
+    cpfs = [dados["cpf"] for _, _, dados in lote]
+    existentes = {
+        NAO_DIGITO.sub("", c.cpf): c
+        for c in Cliente.objects.filter(cpf__in=cpfs + [NAO_DIGITO.sub("", cpf) for cpf in cpfs])
+    }
+
+    novos, alterados = [], []
+    agora = timezone.now()
+    for numero_linha, colunas, dados in lote:
+        cliente = existentes.get(NAO_DIGITO.sub("", dados["cpf"]))
+        if cliente is None:
+            cliente = Cliente(**dados)
+            cliente.atualizar_chaves_busca()
+            novos.append(cliente)
+        elif atualizar_existentes:
+            # Colunas em branco no arquivo não apagam o que já está cadastrado
+            for campo in CAMPOS_ATUALIZAVEIS:
+                if dados[campo] not in ("", None):
+                    setattr(cliente, campo, dados[campo])
+            cliente.atualizar_chaves_busca()
+            cliente.atualizado_em = agora
+            alterados.append(cliente)
+        else:
+            resultado.ignorados += 1
+
+    try:
+        with transaction.atomic():
+            Cliente.objects.bulk_create(novos, batch_size=TAMANHO_LOTE)
+            if alterados:
+                Cliente.objects.bulk_update(
+                    alterados, CAMPOS_ATUALIZAVEIS + ["chave_busca", "atualizado_em"], batch_size=TAMANHO_LOTE,
+                )
+    except IntegrityError as e:
+        # CPF criado por outro usuário durante a importação: o lote volta inteiro
+        for numero_linha, colunas, _ in lote:
+            erros.registrar(numero_linha, colunas, f"lote não gravado: {e}")
+        resultado.rejeitados += len(lote)
+        return
+
+    resultado.criados += len(novos)
+    resultado.atualizados += len(alterados)
+
+
+def importar_clientes(
+    linhas,
+    arquivo_erros=None,
+    atualizar_existentes=True,
+    tamanho_lote=TAMANHO_LOTE,
+    pular_cabecalho=True,
+    progresso=None,
+):
+    """
+    Importa clientes de um iterável de linhas CSV (separador ';').
+
+    Args:
+        linhas: arquivo texto aberto (ou qualquer iterável de str).
+        arquivo_erros: arquivo texto opcional que recebe as linhas rejeitadas.
+        atualizar_existentes: se False, CPFs já cadastrados são ignorados.
+        progresso: callback opcional chamado com o resultado a cada lote.
+    """
+    resultado = ResultadoImportacao()
+    erros = _ArquivoErros(arquivo_erros)
+    vistos = {}   # CPF → linha em que apareceu primeiro
+    lote = []
+
+    leitor = csv.reader(linhas, delimiter=";")
+    if pular_cabecalho:
+        next(leitor, None)
+
+    for colunas in leitor:
+        numero_linha = leitor.line_num
+        if not any(c.strip() for c in colunas):
+            continue
+        resultado.lidos += 1
+
+        try:
+            dados = validar_linha(colunas)
+            if dados["cpf"] in vistos:
+                raise LinhaInvalida(f"CPF repetido no arquivo (linha {vistos[dados['cpf']]})")
+        except LinhaInvalida as e:
+            erros.registrar(numero_linha, colunas, str(e))
+            resultado.rejeitados += 1
+            continue
+
+        vistos[dados["cpf"]] = numero_linha
+        lote.append((numero_linha, colunas, dados))
+
+        if len(lote) >= tamanho_lote:
+            _gravar_lote(lote, resultado, erros, atualizar_existentes)
+            lote = []
+            if progresso:
+                progresso(resultado)
+
+    if lote:
+        _gravar_lote(lote, resultado, erros, atualizar_existentes)
+        if progresso:
+            progresso(resultado)
+
+    from .busca import invalidar_cache
+    invalidar_cache()
+    return resultado
@@ -0,0 +1,189 @@
+"""
+Benchmark da busca de clientes (FTS5 / pg_trgm) numa base sintética.
+
+Uso:
+    python manage.py benchmark_busca_clientes
+    python manage.py benchmark_busca_clientes --total 200000 --repeticoes 50
+
+Os clientes sintéticos são gravados (commit por lote, como numa base
+real) com doc = MARCA e apagados no final pelo ORM — só os marcados,
+com as exclusões em cascata e os triggers do FTS — mesmo se o comando
+for interrompido, a menos que se passe --manter (sobras de uma execução
+anterior saem na próxima). Use numa base de desenvolvimento: os
+cadastros reais não são alterados, mas a tabela fica com 1 milhão de
+linhas a mais durante a medição.
+
+Cada consulta é medida com o cache do autocomplete limpo.
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from clientes.busca import autocompletar, buscar_clientes, invalidar_cache
+from clientes.models import Cliente
+
+
+NOMES = [
+    "João", "José", "Maria", "Ana", "Antônio", "Francisco", "Carlos", "Paulo",
+    "Pedro", "Lucas", "Luíz", "Marcos", "Luís", "Gabriel", "Rafael", "Daniel",
+    "Márcio", "Fábio", "Mônica", "Adriana", "Juliana", "Márcia", "Fernanda",
+    "Patrícia", "Aline", "Sandra", "Camila", "Amanda", "Bruna", "Jéssica",
+    "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana", "Gustavo", "Vitória",
+    "Thiago", "Sebastião", "Conceição", "Raimundo", "Benedito", "Inês", "Íris",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Ribeiro", "Carvalho", "Araújo", "Melo",
+    "Barbosa", "Cardoso", "Rocha", "Dias", "Nascimento", "Andrade", "Moreira",
+    "Nunes", "Marques", "Machado", "Mendes", "Freitas", "Conceição", "Falcão",
+    "Brandão", "Guimarães", "Magalhães", "Simões", "Gonçalves", "Damásio",
+]
+CONECTORES = ["", "", "", "da ", "de ", "dos "]
+
+MARCA = "BENCHMARK-BUSCA"     # Cliente.doc dos sintéticos (não entra na chave_busca)
+
+# (rótulo, termo) — termos sem acento acham nomes acentuados
+CONSULTAS = [
+    ("nome curto", "jo"),
+    ("nome sem acento", "joao"),
+    ("nome + sobrenome", "maria silva"),
+    ("prefixos", "seb conc"),
+    ("sobrenome raro", "damasio"),
+    ("sobrenome com acento", "Guimarães"),
+    ("nome completo", "Sebastião Falcão Brandão"),
+    ("inexistente", "xyzabc"),
+    ("telefone (prefixo)", "(11) 98"),
+]
+
+
+def _cpf(i):
+    # multiplicação módulo 10^11 por primo: permutação, nunca repete
+    n = (i * 7919 + 10 ** 9) % 10 ** 11
+    d = f"{n:011d}"
+    return f"{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}"
+
+
+def _cliente(i, rnd):
+    nome = " ".join(
+        [rnd.choice(NOMES)]
+        + [rnd.choice(CONECTORES) + rnd.choice(SOBRENOMES) for _ in range(rnd.randint(1, 3))]
+    )
+    cliente = Cliente(
+        nome_completo=nome[:120],
+        cpf=_cpf(i),
+        telefone=f"({rnd.randint(11, 99)}) 9{rnd.randint(0, 9999):04d}-{rnd.randint(0, 9999):04d}",
+        doc=MARCA,
+    )
+    cliente.atualizar_chaves_busca()
+    return cliente
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        invalidar_cache()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "mediana": statistics.median(tempos),
+        "p95": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        "max": tempos[-1],
+    }
+
+
+class Command(BaseCommand):
+    help = "Mede a busca de clientes numa base sintética (default 1 milhão de clientes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--total", type=int, default=1_000_000, help="Clientes sintéticos (default 1.000.000).")
+        parser.add_argument("--repeticoes", type=int, default=30, help="Execuções por consulta (default 30).")
+        parser.add_argument("--lote", type=int, default=5000, help="Tamanho do bulk_create (default 5000).")
+        parser.add_argument("--limite-ms", type=float, default=20.0, help="Meta de p95 em ms (default 20).")
+        parser.add_argument("--manter", action="store_true", help="Não apaga os clientes sintéticos no final.")
+
+    def handle(self, *args, **options):
+        if Cliente.objects.filter(doc=MARCA).exists():
+            self._apagar(options["lote"])
+        ultimo_id = Cliente.objects.aggregate(m=Max("id"))["m"] or 0
+        try:
+            self._gerar(ultimo_id, options["total"], options["lote"])
+            consultas = CONSULTAS + [("CPF (prefixo)", _cpf(ultimo_id + options["total"] // 2)[:7])]
+            self._medir_consultas(consultas, options["repeticoes"], options["limite_ms"])
+        finally:
+            if not options["manter"]:
+                self._apagar(options["lote"])
+
+    def _gerar(self, ultimo_id, total, tamanho_lote):
+        rnd = random.Random(42)
+        inicio = time.perf_counter()
+        for offset in range(0, total, tamanho_lote):
+            with transaction.atomic():
+                Cliente.objects.bulk_create(
+                    [
+                        _cliente(ultimo_id + 1 + i, rnd)
+                        for i in range(offset, min(offset + tamanho_lote, total))
+                    ],
+                    batch_size=tamanho_lote,
+                )
+            if (offset // tamanho_lote) % 20 == 0:
+                self.stdout.write(f"  {min(offset + tamanho_lote, total):,} clientes gerados...")
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+                cursor.execute("INSERT INTO clientes_cliente_fts(clientes_cliente_fts) VALUES ('optimize')")
+        elif connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE clientes_cliente")
+
+        self.stdout.write(
+            f"{total:,} clientes gerados em {time.perf_counter() - inicio:.1f}s "
+            f"(base total: {Cliente.objects.count():,}; banco: {connection.vendor})\n"
+        )
+
+    def _apagar(self, tamanho_lote):
+        # Pelo ORM e em lotes de pk: o collector segue as cascatas e o
+        # DELETE dispara os triggers do FTS; nada além dos marcados é tocado
+        self.stdout.write("\nApagando clientes sintéticos...")
+        apagados = 0
+        while True:
+            lote = list(Cliente.objects.filter(doc=MARCA).values_list("pk", flat=True)[:tamanho_lote])
+            if not lote:
+                break
+            with transaction.atomic():
+                Cliente.objects.filter(pk__in=lote).delete()
+            apagados += len(lote)
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO clientes_cliente_fts(clientes_cliente_fts) VALUES ('optimize')")
+        invalidar_cache()
+        self.stdout.write(f"{apagados:,} clientes sintéticos apagados.")
+
+    def _medir_consultas(self, consultas, repeticoes, limite_ms):
+        cabecalho = f"{'consulta':<22} {'termo':<26} {'achados':>9}  {'top 20 (med/p95)':>18}  {'autocomplete (med/p95)':>22}"
+        self.stdout.write(cabecalho)
+        self.stdout.write("-" * len(cabecalho))
+
+        piores = []
+        for rotulo, termo in consultas:
+            resultado = buscar_clientes(termo)
+            achados = f"{resultado.count():,}{'*' if resultado.truncado else ''}"
+            top = _medir(lambda: buscar_clientes(termo)[:20], repeticoes)
+            auto = _medir(lambda: autocompletar(termo), repeticoes)
+            piores += [top["p95"], auto["p95"]]
+            self.stdout.write(
+                f"{rotulo:<22} {termo!r:<26} {achados:>9}  "
+                f"{top['mediana']:>7.2f} / {top['p95']:>6.2f} ms  "
+                f"{auto['mediana']:>9.2f} / {auto['p95']:>6.2f} ms"
+            )
+
+        self.stdout.write("* acima da janela de ranking: topo ranqueado a partir de um top-k por faixa")
+        pior = max(piores)
+        estilo = self.style.SUCCESS if pior < limite_ms else self.style.WARNING
+        self.stdout.write(estilo(f"\nPior p95: {pior:.2f} ms (meta: < {limite_ms:.0f} ms)"))
@@ -0,0 +1,68 @@
+"""
+Importação em lote de clientes a partir de CSV (layout do clientes_backup.csv).
+
+Uso:
+    python manage.py importar_clientes clientes.csv
+    python manage.py importar_clientes clientes.csv --erros rejeitados.csv --somente-novos
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.importacao import TAMANHO_LOTE, importar_clientes
+
+
+class Command(BaseCommand):
+    help = "Importa clientes de um CSV (separador ';') em lotes, validando CPF/CEP"
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", type=str, help="Caminho do CSV.")
+        parser.add_argument(
+            "--erros", type=str, default="",
+            help="CSV de saída com as linhas rejeitadas. Default: <arquivo>_erros.csv",
+        )
+        parser.add_argument(
+            "--somente-novos", action="store_true",
+            help="Não atualiza clientes cujo CPF já está cadastrado.",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE,
+            help=f"Linhas por lote (default {TAMANHO_LOTE}).",
+        )
+        parser.add_argument(
+            "--encoding", type=str, default="utf-8-sig",
+            help="Codificação do arquivo (default utf-8-sig; use latin-1 para exportações antigas).",
+        )
+
+    def handle(self, *args, **options):
+        origem = Path(options["arquivo"])
+        if not origem.is_file():
+            raise CommandError(f"Arquivo não encontrado: {origem}")
+        destino_erros = Path(options["erros"] or origem.with_name(f"{origem.stem}_erros.csv"))
+
+        def progresso(resultado):
+            self.stdout.write(
+                f"  {resultado.lidos} lidas · {resultado.criados} criados · "
+                f"{resultado.atualizados} atualizados · {resultado.rejeitados} rejeitadas"
+            )
+
+        with open(origem, encoding=options["encoding"], newline="") as linhas, \
+                open(destino_erros, "w", encoding="utf-8-sig", newline="") as erros:
+            resultado = importar_clientes(
+                linhas,
+                arquivo_erros=erros,
+                atualizar_existentes=not options["somente_novos"],
+                tamanho_lote=options["lote"],
+                progresso=progresso,
+            )
+
+        if not resultado.rejeitados:
+            destino_erros.unlink()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nImportação concluída: {resultado.criados} criados, "
+            f"{resultado.atualizados} atualizados, {resultado.ignorados} ignorados, "
+            f"{resultado.rejeitados} rejeitados."
+        ))
+        if resultado.rejeitados:
+            self.stdout.write(self.style.WARNING(f"Linhas rejeitadas em: {destino_erros}"))
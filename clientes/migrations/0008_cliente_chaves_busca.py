@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:43
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def preencher_chaves_busca(apps, schema_editor):
+    Cliente = apps.get_model("clientes", "Cliente")
+
+    def normalizar(texto):
+        texto = unicodedata.normalize("NFKD", texto or "")
+        texto = "".join(c for c in texto if not unicodedata.combining(c))
+        return re.sub(r"[^a-z0-9]+", " ", texto.lower()).strip()
+
+    lote = []
+    for cliente in Cliente.objects.only("id", "nome_completo", "cpf").iterator(chunk_size=2000):
+        cliente.nome_busca = normalizar(cliente.nome_completo)[:120]
+        cliente.cpf_digitos = re.sub(r"\D", "", cliente.cpf or "")[:11]
+        lote.append(cliente)
+        if len(lote) >= 2000:
+            Cliente.objects.bulk_update(lote, ["nome_busca", "cpf_digitos"])
+            lote = []
+    if lote:
+        Cliente.objects.bulk_update(lote, ["nome_busca", "cpf_digitos"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0007_consultacredito_restricaocredito'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='cpf_digitos',
+            field=models.CharField(blank=True, default='', editable=False, max_length=11),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nome_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=120),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['nome_busca'], name='cliente_nome_busca_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['cpf_digitos'], name='cliente_cpf_digitos_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(preencher_chaves_busca, migrations.RunPython.noop),
+    ]
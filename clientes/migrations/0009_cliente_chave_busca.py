@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:10
+
+import re
+
+from django.db import migrations, models
+
+
+def preencher_chave_busca(apps, schema_editor):
+    Cliente = apps.get_model("clientes", "Cliente")
+
+    lote = []
+    for cliente in Cliente.objects.only("id", "nome_busca", "cpf_digitos", "telefone").iterator(chunk_size=2000):
+        telefone = re.sub(r"\D", "", cliente.telefone or "")
+        cliente.chave_busca = " ".join(
+            parte for parte in (cliente.nome_busca, cliente.cpf_digitos, telefone) if parte
+        )[:160]
+        lote.append(cliente)
+        if len(lote) >= 2000:
+            Cliente.objects.bulk_update(lote, ["chave_busca"])
+            lote = []
+    if lote:
+        Cliente.objects.bulk_update(lote, ["chave_busca"])
+
+
+def criar_indice_texto(apps, schema_editor):
+    from clientes.busca import criar_indice_texto
+    criar_indice_texto(schema_editor.connection)
+
+
+def remover_indice_texto(apps, schema_editor):
+    from clientes.busca import remover_indice_texto
+    remover_indice_texto(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0008_cliente_chaves_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='chave_busca',
+            field=models.CharField(blank=True, default='', editable=False, max_length=160),
+        ),
+        migrations.RunPython(preencher_chave_busca, migrations.RunPython.noop),
+        # FTS5 (SQLite) / GIN pg_trgm (PostgreSQL) — fora do estado do model
+        migrations.RunPython(criar_indice_texto, remover_indice_texto),
+    ]
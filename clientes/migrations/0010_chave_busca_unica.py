@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_cliente_chave_busca'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cliente',
+            name='clientes_cl_cpf_e6905f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cliente',
+            name='cliente_nome_busca_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cliente',
+            name='cliente_cpf_digitos_idx',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='cpf_digitos',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='nome_busca',
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['cpf'], name='cliente_cpf_prefixo_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['chave_busca'], name='cliente_chave_busca_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -92,21 +92,52 @@ class Cliente(models.Model):
     criado_em = models.DateTimeField(default=timezone.now, editable=False)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    # Chave de busca (ver clientes.busca) — mantida no save().
+    # "nome normalizado cpf telefone": o início atende o autocomplete por
+    # nome (B-tree) e o todo é indexado por FTS5 (SQLite) ou pg_trgm (PostgreSQL)
+    chave_busca = models.CharField(max_length=160, blank=True, default="", editable=False)
+
+    # campos editados que alteram a chave de busca
+    CAMPOS_BUSCA = {"nome_completo", "cpf", "telefone"}
+
     class Meta:
         ordering = ["nome_completo"]
         indexes = [
-            models.Index(fields=["cpf"]),
+            # início do CPF no autocomplete (a unicidade já indexa a igualdade)
+            models.Index(fields=["cpf"], name="cliente_cpf_prefixo_idx", opclasses=["varchar_pattern_ops"]),
             models.Index(fields=["nome_completo"]),
+            # varchar_pattern_ops: LIKE 'prefixo%' no PostgreSQL (ignorado no SQLite)
+            models.Index(fields=["chave_busca"], name="cliente_chave_busca_idx", opclasses=["varchar_pattern_ops"]),
         ]
 
     def __str__(self):
         return f"{self.nome_completo} ({self.cpf})"
 
+    def atualizar_chaves_busca(self):
+        from .busca import montar_chave_busca
+        self.chave_busca = montar_chave_busca(self.nome_completo, self.cpf, self.telefone)
+
+    def save(self, *args, **kwargs):
+        self.atualizar_chaves_busca()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            if self.CAMPOS_BUSCA.intersection(update_fields):
+                kwargs["update_fields"] = set(update_fields) | {"chave_busca"}
+        super().save(*args, **kwargs)
+
+        from .busca import invalidar_cache
+        invalidar_cache()
+
     @property
     def documentos_dict(self):
         """Retorna dict {tipo: documento_mais_recente} para acesso rápido."""
+        if "documentos" in getattr(self, "_prefetched_objects_cache", {}):
+            # Já carregados via prefetch_related: ordena em memória
+            recentes = sorted(self.documentos.all(), key=lambda d: d.criado_em, reverse=True)
+        else:
+            recentes = self.documentos.order_by("-criado_em")
         docs = {}
-        for doc in self.documentos.order_by("-criado_em"):
+        for doc in recentes:
             if doc.tipo not in docs:
                 docs[doc.tipo] = doc
         return docs
@@ -1,3 +1,102 @@
+from unittest import mock
+
+from django.core.paginator import Paginator
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .busca import autocompletar, buscar_clientes, invalidar_cache
+from .models import Cliente
+
+
+class BuscaRanqueadaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # O mais antigo é o único "silva" exato; os recentes são só prefixo
+        cls.exato = Cliente.objects.create(nome_completo="Maria Silva", cpf="529.982.247-25")
+        cls.prefixos = [
+            Cliente.objects.create(nome_completo=f"João Silvana {i}", cpf=f"111.222.333-{i:02d}")
+            for i in range(6)
+        ]
+
+    def test_dentro_da_janela_ordena_por_relevancia(self):
+        resultado = buscar_clientes("silva")
+
+        self.assertFalse(resultado.truncado)
+        self.assertEqual(resultado.count(), 7)
+        self.assertEqual(resultado[0], self.exato)
+
+    @mock.patch("clientes.busca.JANELA_RANKING", 3)
+    def test_acima_da_janela_nao_perde_o_mais_antigo(self):
+        resultado = buscar_clientes("silva")
+
+        self.assertTrue(resultado.truncado)
+        self.assertEqual(resultado.count(), 7)
+        self.assertEqual(resultado[0], self.exato)
+        self.assertGreater(resultado[0].relevancia, resultado[1].relevancia)
+
+        paginas = Paginator(buscar_clientes("silva"), 3)
+        ids = [c.pk for n in paginas.page_range for c in paginas.page(n).object_list]
+        self.assertCountEqual(ids, [self.exato.pk] + [c.pk for c in self.prefixos])
+
+    @mock.patch("clientes.busca.JANELA_RANKING", 3)
+    def test_acima_da_janela_chave_que_comeca_pelo_termo_primeiro(self):
+        inicio = Cliente.objects.create(nome_completo="Silvana Souza", cpf="333.444.555-01")
+        for i in range(4):
+            Cliente.objects.create(nome_completo=f"Pedro Silvana {i}", cpf=f"333.444.555-{i + 10}")
+
+        resultado = buscar_clientes("silvana")
+
+        self.assertTrue(resultado.truncado)
+        self.assertEqual(resultado[0], inicio)
+        self.assertEqual(len({c.pk for c in resultado[:resultado.count()]}), resultado.count())
+
+    @mock.patch("clientes.busca.JANELA_RANKING", 3)
+    def test_acima_da_janela_com_palavra_longa(self):
+        Cliente.objects.create(nome_completo="Ana Guimaraesx", cpf="222.333.444-05")
+        for i in range(4):
+            Cliente.objects.create(nome_completo=f"Ana Guimaraes {i}", cpf=f"222.333.444-{i:02d}")
+
+        resultado = buscar_clientes("ana guimaraes")
+
+        self.assertTrue(resultado.truncado)
+        self.assertEqual(resultado.count(), 5)
+        self.assertEqual(resultado[0].nome_completo, "Ana Guimaraes 3")
+
+
+class AutocompleteTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joao = Cliente.objects.create(nome_completo="JOÃO  da Silva", cpf="529.982.247-25", telefone="(11) 98765-4321")
+        # cadastro antigo, CPF sem máscara
+        cls.antigo = Cliente.objects.create(nome_completo="Pedro Souza", cpf="52911122233")
+
+    def setUp(self):
+        invalidar_cache()
+
+    def test_chave_busca_unica(self):
+        self.assertEqual(self.joao.chave_busca, "joao da silva 52998224725 11987654321")
+
+        self.joao.nome_completo = "Joana Lima"
+        self.joao.save(update_fields=["nome_completo"])
+        self.joao.refresh_from_db()
+        self.assertEqual(self.joao.chave_busca, "joana lima 52998224725 11987654321")
+
+    def test_por_nome_sem_acento(self):
+        self.assertEqual([c["id"] for c in autocompletar("joao da")], [self.joao.pk])
+
+    def test_por_inicio_do_cpf_com_e_sem_mascara(self):
+        self.assertEqual([c["id"] for c in autocompletar("529.98")], [self.joao.pk])
+        self.assertEqual([c["id"] for c in autocompletar("5291112")], [self.antigo.pk])
+        self.assertCountEqual([c["id"] for c in autocompletar("529")], [self.joao.pk, self.antigo.pk])
+
+    def test_cache_compartilhado_invalidado_no_save(self):
+        autocompletar("joao")
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual([c["id"] for c in autocompletar("JOÃO")], [self.joao.pk])
+        self.assertEqual(len(consultas), 0)
 
-# Create your tests here.
+        Cliente.objects.create(nome_completo="Joao Pereira", cpf="111.444.777-35")
+        self.assertEqual(len(autocompletar("joao")), 2)
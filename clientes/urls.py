@@ -9,6 +9,7 @@ urlpatterns = [
     path("", views.clientes_lista, name="cliente_list"),
     
     path("novo/", views.novo_cliente, name="novo"),
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
     path("<int:cliente_id>/", views.clientes_detalhe, name="detalhe"),
     path("<int:cliente_id>/editar/", views.clientes_editar, name="editar"),
     path("<int:cliente_id>/excluir/", views.clientes_excluir, name="excluir"),
@@ -16,6 +17,7 @@ urlpatterns = [
     # --- CORREÇÃO 2: Adicionamos as rotas de Importar/Exportar ---
     path("exportar/", views.exportar_clientes_csv, name="exportar_clientes"),
     path("importar/", views.importar_clientes_csv, name="importar_clientes"),
+    path("importar/erros/", views.importar_clientes_erros, name="importar_clientes_erros"),
 
     # Documentos
     path("<int:cliente_id>/documento/upload/", views.upload_documento, name="upload_documento"),
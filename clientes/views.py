@@ -1,11 +1,9 @@
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 
-import csv
 import io
-from django.http import HttpResponse
+
 from django.contrib.auth.decorators import login_required
 
 from .forms import ClienteForm
@@ -17,17 +15,22 @@ from core.validators import validar_upload
 def clientes_lista(request):
     q = (request.GET.get("q") or "").strip()
 
-    qs = Cliente.objects.all()
     if q:
-        qs = qs.filter(Q(nome_completo__icontains=q) | Q(cpf__icontains=q))
-
-    qs = qs.order_by("nome_completo")
+        # Nome/CPF/telefone sem acento, pelo índice de texto, mais relevantes primeiro
+        from .busca import buscar_clientes
+        qs = buscar_clientes(q)
+    else:
+        qs = Cliente.objects.order_by("nome_completo")
 
     paginator = Paginator(qs, 10)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
-    return render(request, "clientes/lista.html", {"page_obj": page_obj, "q": q})
+    return render(request, "clientes/lista.html", {
+        "page_obj": page_obj,
+        "q": q,
+        "busca_truncada": getattr(qs, "truncado", False),
+    })
 
 
 @login_required
@@ -112,90 +115,85 @@ def clientes_excluir(request, cliente_id: int):
     return render(request, "clientes/excluir.html", {"cliente": cliente})
 
 
+@login_required
+def autocomplete(request):
+    """Busca de clientes para os selects (Select2): ?q=nome ou CPF"""
+    from django.http import JsonResponse
+    from .busca import autocompletar
+
+    return JsonResponse({"resultados": autocompletar(request.GET.get("q", ""))})
+
+
 @login_required
 def exportar_clientes_csv(request):
-    """Gera um CSV com todos os dados dos clientes"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="clientes_backup.csv"'
-    
-    response.write(u'\ufeff'.encode('utf8')) 
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    writer.writerow([
-        'nome_completo', 'cpf', 'telefone', 'data_nascimento', 
-        'cep', 'logradouro', 'numero', 'complemento', 
-        'bairro', 'cidade', 'uf', 'doc'
-    ])
-    
-    for cliente in Cliente.objects.all():
-        writer.writerow([
-            cliente.nome_completo,
-            cliente.cpf,
-            cliente.telefone,
-            cliente.data_nascimento.strftime('%Y-%m-%d') if cliente.data_nascimento else '',
-            cliente.cep,
-            cliente.logradouro,
-            cliente.numero,
-            cliente.complemento,
-            cliente.bairro,
-            cliente.cidade,
-            cliente.uf,
-            cliente.doc
-        ])
-        
-    return response
+    """Gera um CSV com todos os dados dos clientes (em streaming)"""
+    from core.exportacao import exportar
+
+    return exportar(request, "clientes", "csv")
 
 
 @login_required
 def importar_clientes_csv(request):
-    """Lê um CSV e cria os clientes no banco"""
+    """Importa clientes de um CSV em lotes; linhas rejeitadas viram um arquivo de erros"""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.utils.crypto import get_random_string
+    from .importacao import importar_clientes
+
     if request.method == "POST" and request.FILES.get('arquivo_csv'):
         csv_file = request.FILES['arquivo_csv']
-        
+
         if not csv_file.name.endswith('.csv'):
             messages.error(request, 'Por favor, envie um arquivo .csv')
             return redirect('clientes:importar_clientes')
-            
-        data_set = csv_file.read().decode('utf-8-sig')
-        io_string = io.StringIO(data_set)
-        
-        next(io_string) 
-        
-        sucesso = 0
-        erros = 0
-        
-        for column in csv.reader(io_string, delimiter=';'):
-            try:
-                if Cliente.objects.filter(cpf=column[1]).exists():
-                    erros += 1
-                    continue
-
-                data_nasc = column[3] if column[3] else None
-                
-                Cliente.objects.create(
-                    nome_completo=column[0],
-                    cpf=column[1],
-                    telefone=column[2],
-                    data_nascimento=data_nasc,
-                    cep=column[4],
-                    logradouro=column[5],
-                    numero=column[6],
-                    complemento=column[7],
-                    bairro=column[8],
-                    cidade=column[9],
-                    uf=column[10],
-                    doc=column[11]
-                )
-                sucesso += 1
-            except Exception as e:
-                print(f"Erro na linha: {e}")
-                erros += 1
-                
-        messages.success(request, f"Importação concluída! {sucesso} criados, {erros} ignorados/erros.")
+
+        linhas = io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline='')
+        erros = io.StringIO()
+        try:
+            resultado = importar_clientes(
+                linhas,
+                arquivo_erros=erros,
+                atualizar_existentes=bool(request.POST.get('atualizar_existentes')),
+            )
+        except UnicodeDecodeError:
+            messages.error(request, 'Arquivo não está em UTF-8. Salve o CSV como "CSV UTF-8" e tente novamente.')
+            return redirect('clientes:importar_clientes')
+
+        request.session.pop('importacao_clientes_erros', None)
+        if resultado.rejeitados:
+            nome = default_storage.save(
+                f"importacoes/clientes/erros_{get_random_string(12)}.csv",
+                ContentFile(('\ufeff' + erros.getvalue()).encode('utf-8')),
+            )
+            request.session['importacao_clientes_erros'] = nome
+
+        messages.success(
+            request,
+            f"Importação concluída! {resultado.criados} criados, {resultado.atualizados} atualizados, "
+            f"{resultado.ignorados} ignorados, {resultado.rejeitados} rejeitados."
+        )
+        if resultado.rejeitados:
+            return redirect('clientes:importar_clientes')
         return redirect('clientes:cliente_list')
 
-    return render(request, 'clientes/importar.html')
+    return render(request, 'clientes/importar.html', {
+        'tem_erros': bool(request.session.get('importacao_clientes_erros')),
+    })
+
+
+@login_required
+def importar_clientes_erros(request):
+    """Download do arquivo de linhas rejeitadas da última importação"""
+    from django.core.files.storage import default_storage
+    from django.http import FileResponse, Http404
+
+    nome = request.session.get('importacao_clientes_erros')
+    if not nome or not default_storage.exists(nome):
+        raise Http404("Nenhum arquivo de erros disponível.")
+    return FileResponse(
+        default_storage.open(nome, 'rb'), as_attachment=True,
+        filename='clientes_rejeitados.csv', content_type='text/csv',
+    )
 
 # ==============================================================================
 # UPLOAD DE DOCUMENTOS
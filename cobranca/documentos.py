@@ -0,0 +1,101 @@
+"""
+Construtor da carta de cobrança (ver core.documentos).
+
+A emissão e a reimpressão montam os mesmos dados a partir da
+CartaCobranca gravada, então a reimpressão é servida do storage.
+"""
+from io import BytesIO
+
+from core.documentos import data_extenso, estilo, logo, moeda, valor_extenso
+
+
+def carta_cobranca_pdf(dados, timbre):
+    """Carta de cobrança das parcelas em atraso de um contrato."""
+    from num2words import num2words
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    saida = BytesIO()
+    doc = SimpleDocTemplate(
+        saida, pagesize=A4,
+        topMargin=25*mm, bottomMargin=25*mm,
+        leftMargin=25*mm, rightMargin=25*mm,
+    )
+    elements = []
+
+    estilo_nome = estilo("Nome", fontSize=12, fontName="Helvetica-Bold")
+    estilo_numero = estilo("Numero", fontSize=11, fontName="Helvetica-Bold", alignment=TA_RIGHT)
+    estilo_ref = estilo("Ref", fontSize=11, fontName="Helvetica-Bold", spaceAfter=12)
+    estilo_corpo = estilo("Corpo", fontSize=11, leading=18, alignment=TA_JUSTIFY, spaceAfter=12)
+    estilo_data = estilo("Data", fontSize=11, alignment=TA_RIGHT, spaceBefore=30)
+    estilo_assinatura = estilo("Assinatura", fontSize=11, alignment=TA_CENTER, spaceBefore=50)
+    estilo_endereco = estilo("Endereco", fontSize=9, textColor=colors.HexColor("#444444"))
+
+    imagem = logo(timbre)
+    if imagem is not None:
+        elements.append(imagem)
+        elements.append(Spacer(1, 4*mm))
+
+    # CABEÇALHO: nome à esquerda, número à direita
+    header_data = [[
+        [Paragraph(dados["cliente"], estilo_nome), Paragraph(dados["endereco"], estilo_endereco)],
+        Paragraph(f"Nº {dados['numero']}", estilo_numero),
+    ]]
+    header_table = Table(header_data, colWidths=[110*mm, 50*mm])
+    header_table.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LINEBELOW", (0, 0), (-1, 0), 1, colors.black),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+    ]))
+    elements.append(header_table)
+    elements.append(Spacer(1, 15*mm))
+
+    # REF
+    contrato = dados["codigo_contrato"]
+    elements.append(Paragraph(f"<b>Ref:</b> Carta de cobrança referente ao contrato {contrato}", estilo_ref))
+    elements.append(Spacer(1, 5*mm))
+    elements.append(Paragraph("Prezado(a) Senhor(a),", estilo_corpo))
+
+    # CORPO
+    qtd, valor = dados["qtd_parcelas"], dados["valor"]
+    elements.append(Paragraph(
+        f"Informamos que Vossa Senhoria possui <b>{qtd} ({num2words(qtd, lang='pt_BR')}) "
+        f"parcela{'s' if qtd > 1 else ''}</b> em atraso referente{'s' if qtd > 1 else ''} "
+        f"ao contrato <b>{contrato}</b>, totalizando o valor de "
+        f"<b>{moeda(valor)} ({valor_extenso(valor)})</b>, não acrescido de juros e multa contratuais.",
+        estilo_corpo,
+    ))
+
+    elements.append(Paragraph(
+        "Solicitamos a regularização do débito no prazo de <b>15 (quinze) dias</b> "
+        "a contar do recebimento desta correspondência. O não pagamento dentro do prazo "
+        "estipulado acarretará as seguintes medidas:",
+        estilo_corpo,
+    ))
+
+    for i, medida in enumerate([
+        "Inscrição nos sistemas de proteção ao crédito (SPC/Serasa);",
+        "Protesto do título em Cartório de Protestos;",
+        "Execução judicial do débito, com acréscimo de custas processuais e honorários advocatícios.",
+    ], 1):
+        elements.append(Paragraph(f"&nbsp;&nbsp;&nbsp;&nbsp;<b>{i}.</b> {medida}", estilo_corpo))
+
+    elements.append(Paragraph(
+        "Colocamo-nos à disposição para negociação e esclarecimentos que se fizerem necessários.",
+        estilo_corpo,
+    ))
+    elements.append(Paragraph("Atenciosamente,", estilo_corpo))
+
+    # DATA E LOCAL
+    elements.append(Paragraph(f"{dados['local']}, {data_extenso(dados['data_emissao'])}.", estilo_data))
+
+    # ASSINATURA
+    elements.append(Spacer(1, 20*mm))
+    elements.append(Paragraph("_" * 40, estilo_assinatura))
+    elements.append(Paragraph("<b>Diretor Financeiro</b>", estilo_assinatura))
+
+    doc.build(elements)
+    return saida.getvalue()
@@ -92,11 +92,18 @@ class CartaCobranca(models.Model):
 
     @classmethod
     def proximo_numero(cls, ano=None):
-        """Retorna o próximo número sequencial para o ano."""
+        """
+        Reserva o próximo número sequencial do ano (contador em
+        core.Sequencia; cada chamada consome um número).
+        """
+        from core.sequencias import proximo
+
         if ano is None:
             ano = timezone.localdate().year
-        ultimo = cls.objects.filter(ano=ano).order_by("-numero").first()
-        return (ultimo.numero + 1) if ultimo else 1
+        return proximo(
+            f"carta_cobranca:{ano}",
+            inicial=lambda: cls.objects.filter(ano=ano).aggregate(m=models.Max("numero"))["m"] or 0,
+        )
 
     @classmethod
     def gerar_numero_formatado(cls, numero, ano):
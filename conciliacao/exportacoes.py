@@ -0,0 +1,46 @@
+"""Exportações da conciliação bancária (ver core.exportacao)."""
+from datetime import date
+
+from core.exportacao import Coluna, escolhas, registrar_exportacao
+
+from .models import LancamentoExtrato
+
+
+def _lancamentos(request):
+    qs = LancamentoExtrato.objects.all()
+    extrato = request.GET.get("extrato", "")
+    conta = request.GET.get("conta", "")
+    if extrato.isdigit():
+        qs = qs.filter(extrato_id=int(extrato))
+    if conta.isdigit():
+        qs = qs.filter(extrato__conta_id=int(conta))
+    try:
+        if request.GET.get("data_inicio"):
+            qs = qs.filter(data__gte=date.fromisoformat(request.GET["data_inicio"]))
+        if request.GET.get("data_fim"):
+            qs = qs.filter(data__lte=date.fromisoformat(request.GET["data_fim"]))
+    except ValueError:
+        pass
+    return qs.order_by("data", "id")
+
+
+registrar_exportacao(
+    "lancamentos-extrato",
+    titulo="Lançamentos do Extrato",
+    modulo="CONCILIACAO",
+    queryset=_lancamentos,
+    colunas=[
+        Coluna("ID", "id", largura=8),
+        Coluna("Data", "data", largura=12),
+        Coluna("Conta", "extrato__conta__nome", largura=25),
+        Coluna("Arquivo", "extrato__arquivo_nome", largura=30),
+        Coluna("Documento", "documento"),
+        Coluna("Descrição", "descricao", largura=45),
+        Coluna("Tipo", "tipo", escolhas(LancamentoExtrato, "tipo"), largura=10),
+        Coluna("Valor", "valor"),
+        Coluna("Status", "status", escolhas(LancamentoExtrato, "status"), largura=20),
+        Coluna("Transação Vinculada", "transacao_id", largura=10),
+        Coluna("Conciliado por", "conciliado_por__username"),
+        Coluna("Conciliado em", "conciliado_em", largura=17),
+    ],
+)
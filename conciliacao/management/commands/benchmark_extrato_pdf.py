@@ -0,0 +1,109 @@
+"""
+Benchmark do PDF de extrato (conciliacao.relatorios) num extrato sintético.
+
+Uso:
+    python manage.py benchmark_extrato_pdf
+    python manage.py benchmark_extrato_pdf --total 250000
+
+Cria uma conta bancária e um extrato importado com `--total` lançamentos
+(commit por lote), gera o PDF do extrato importado (com status) e o do
+extrato da conta por período, e mede tempo, crescimento do pico de
+memória do processo (ru_maxrss; com tracemalloc o ReportLab fica lento
+demais para medir o tempo) e tamanho do arquivo. A conta sintética e
+tudo o que foi gerado são apagados no final, a menos que se passe
+--manter.
+"""
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from conciliacao.models import ContaBancaria, ExtratoImportado, LancamentoExtrato
+from conciliacao.relatorios import RelatorioExtrato, escrever_extrato_pdf
+
+
+HISTORICOS = [
+    "PIX RECEBIDO", "PIX ENVIADO", "TED RECEBIDA", "BOLETO PAGO", "TARIFA PACOTE",
+    "DEP DINHEIRO", "PAGTO FORNECEDOR", "LIQUIDACAO EMPRESTIMO", "RENDIMENTO APLIC",
+]
+STATUS = [codigo for codigo, _ in LancamentoExtrato.STATUS_CHOICES]
+
+
+class Command(BaseCommand):
+    help = "Mede a geração do PDF de extrato com muitos lançamentos (default 100 mil)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--total", type=int, default=100_000, help="Lançamentos sintéticos (default 100.000).")
+        parser.add_argument("--lote", type=int, default=5000, help="Tamanho do bulk_create (default 5000).")
+        parser.add_argument("--manter", action="store_true", help="Não apaga a conta sintética no final.")
+
+    def handle(self, *args, **options):
+        total = options["total"]
+        conta = ContaBancaria.objects.create(nome="Benchmark extrato PDF", banco="999", saldo_inicial=Decimal("1000.00"))
+        try:
+            extrato = self._gerar(conta, total, options["lote"])
+            inicio, fim = extrato.periodo_inicio, extrato.periodo_fim
+            subtitulo = f"Período: {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}"
+
+            self.stdout.write(f"{'relatório':<28} {'páginas':>8} {'tempo':>9} {'pico mem.':>11} {'arquivo':>10}")
+            self._medir(
+                "extrato importado (status)",
+                RelatorioExtrato(titulo=conta.nome, subtitulo=subtitulo, saldo_anterior=conta.saldo_inicial, com_status=True),
+                extrato.lancamentos.order_by("data", "id"),
+            )
+            self._medir(
+                "extrato da conta (período)",
+                RelatorioExtrato(titulo=conta.nome, subtitulo=subtitulo, saldo_anterior=conta.saldo_inicial),
+                LancamentoExtrato.objects.filter(
+                    extrato__conta=conta, data__gte=inicio, data__lte=fim,
+                ).order_by("data", "id"),
+            )
+        finally:
+            if not options["manter"]:
+                # Lançamentos sem dependentes: um DELETE direto, sem o collector do ORM
+                LancamentoExtrato.objects.filter(extrato__conta=conta).delete()
+                conta.delete()
+                self.stdout.write("\nConta sintética apagada.")
+
+    def _gerar(self, conta, total, tamanho_lote):
+        rnd = random.Random(42)
+        inicio_periodo = date.today() - timedelta(days=365)
+        extrato = ExtratoImportado.objects.create(
+            conta=conta, arquivo_nome="benchmark.ofx", formato="OFX", status="IMPORTADO",
+            total_lancamentos=total, periodo_inicio=inicio_periodo, periodo_fim=date.today(),
+        )
+        inicio = time.perf_counter()
+        for offset in range(0, total, tamanho_lote):
+            with transaction.atomic():
+                LancamentoExtrato.objects.bulk_create([
+                    LancamentoExtrato(
+                        extrato=extrato,
+                        data=inicio_periodo + timedelta(days=i * 365 // total),
+                        valor=Decimal(rnd.randint(100, 5_000_000)) / 100,
+                        tipo=rnd.choice("CD"),
+                        descricao=f"{rnd.choice(HISTORICOS)} {rnd.randint(1, 10 ** 8):08d}",
+                        documento=str(rnd.randint(1, 10 ** 6)),
+                        status=rnd.choice(STATUS),
+                    )
+                    for i in range(offset, min(offset + tamanho_lote, total))
+                ], batch_size=tamanho_lote)
+        self.stdout.write(f"{total:,} lançamentos gerados em {time.perf_counter() - inicio:.1f}s\n")
+        return extrato
+
+    def _medir(self, rotulo, relatorio, lancamentos):
+        with tempfile.TemporaryFile() as arquivo:
+            pico_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            inicio = time.perf_counter()
+            paginas = escrever_extrato_pdf(relatorio, lancamentos, arquivo)
+            tempo = time.perf_counter() - inicio
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - pico_antes   # KB no Linux
+            tamanho = arquivo.seek(0, os.SEEK_END)
+        self.stdout.write(
+            f"{rotulo:<28} {paginas:>8,} {tempo:>8.1f}s +{pico / 1024:>7.1f} MB {tamanho / 2 ** 20:>7.1f} MB"
+        )
@@ -0,0 +1,260 @@
+"""
+PDF de extrato bancário em páginas (extrato da conta por período e
+extrato importado).
+
+Os lançamentos são lidos com values_list(...).iterator(chunk_size) e
+desenhados página a página direto no canvas: cada página é uma tabela
+própria, com o saldo transportado da página anterior na primeira linha e
+o saldo a transportar na última. Só uma página de linhas fica em memória
+de cada vez — não há um Table com o ano inteiro para o ReportLab medir e
+dividir. Os totais do resumo (primeira página) vêm de um aggregate no
+banco, antes de desenhar.
+
+O PDF é gravado num SpooledTemporaryFile (em memória até LIMITE_MEMORIA,
+depois em disco) e enviado com FileResponse.
+
+    from .relatorios import RelatorioExtrato, resposta_extrato_pdf
+
+    relatorio = RelatorioExtrato(titulo="Extrato Bancário — Itaú", subtitulo="...", saldo_anterior=saldo)
+    return resposta_extrato_pdf(relatorio, lancamentos, "extrato.pdf")
+"""
+import math
+import tempfile
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs
+from django.http import FileResponse
+from django.utils import timezone
+
+from core.documentos import estilo, moeda
+
+from .models import LancamentoExtrato
+
+
+CHUNK_SIZE = 2000
+LIMITE_MEMORIA = 8 * 1024 * 1024        # acima disso o SpooledTemporaryFile vai para disco
+
+# Geometria (pontos; A4 paisagem)
+ALTURA_LINHA = 12.5                     # fonte 7 + padding 2/2: uma linha de texto por célula
+MARGEM_VERTICAL = 42.5                  # 15 mm
+ALTURA_RODAPE = 28.3                    # 10 mm: rodapé desenhado dentro da margem inferior
+LINHAS_FIXAS = 3                        # cabeçalho, saldo transportado, saldo a transportar
+
+CENTAVO = Decimal("0.01")
+STATUS = dict(LancamentoExtrato.STATUS_CHOICES)
+
+
+@dataclass
+class RelatorioExtrato:
+    titulo: str
+    subtitulo: str                      # banco / agência / conta / período
+    saldo_anterior: Decimal
+    rotulo_saldo_anterior: str = "Saldo Anterior"
+    rodape: str = ""
+    com_status: bool = False
+
+
+def totais_extrato(lancamentos):
+    """Créditos, débitos e quantidade dos lançamentos numa consulta."""
+    resultado = lancamentos.order_by().aggregate(
+        creditos=Sum(Abs("valor"), filter=Q(tipo="C")),
+        debitos=Sum(Abs("valor"), filter=~Q(tipo="C")),
+        quantidade=Count("id"),
+    )
+    return (
+        Decimal(resultado["creditos"] or 0).quantize(CENTAVO),
+        Decimal(resultado["debitos"] or 0).quantize(CENTAVO),
+        resultado["quantidade"],
+    )
+
+
+# ==============================================================================
+# DESENHO
+# ==============================================================================
+
+def _larguras(com_status):
+    from reportlab.lib.units import mm
+
+    if com_status:
+        return [22*mm, 95*mm, 25*mm, 28*mm, 28*mm, 30*mm, 22*mm]
+    return [22*mm, 110*mm, 25*mm, 30*mm, 30*mm, 32*mm]
+
+
+def _resumo(relatorio, creditos, debitos):
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Table, TableStyle
+
+    periodo = creditos - debitos
+    tabela = Table([
+        [relatorio.rotulo_saldo_anterior, "Créditos", "Débitos", "Saldo Período", "Saldo Final"],
+        [moeda(relatorio.saldo_anterior), moeda(creditos), moeda(debitos), moeda(periodo),
+         moeda(relatorio.saldo_anterior + periodo)],
+    ], colWidths=[45*mm]*5)
+    tabela.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0d6efd")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTNAME", (0, 1), (-1, 1), "Helvetica-Bold"),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 1), (-1, 1), colors.HexColor("#f0f0f0")),
+    ]))
+    return tabela
+
+
+def _tabela_pagina(bloco, saldo, rotulo_entrada, ultima, com_status):
+    """Table de uma página e o saldo ao fim dela."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    cabecalho = ["Data", "Descrição", "Doc", "Crédito", "Débito", "Saldo"] + (["Status"] if com_status else [])
+    vazio = [""] * (len(cabecalho) - 3)
+    linhas = [cabecalho, ["", rotulo_entrada] + vazio + [moeda(saldo)]]
+    cmds = [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#343a40")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 7),
+        ("FONTSIZE", (0, 0), (-1, 0), 8),
+        ("ALIGN", (3, 0), (5, -1), "RIGHT"),
+        ("ALIGN", (0, 0), (0, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
+        ("ROWBACKGROUNDS", (0, 2), (-1, -2), [colors.white, colors.HexColor("#f8f9fa")]),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        # Saldos transportados
+        ("FONTNAME", (0, 1), (-1, 1), "Helvetica-Bold"),
+        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ("BACKGROUND", (0, 1), (-1, 1), colors.HexColor("#e9ecef")),
+        ("BACKGROUND", (0, -1), (-1, -1), colors.HexColor("#e9ecef")),
+    ]
+    if com_status:
+        cmds.append(("ALIGN", (6, 0), (6, -1), "CENTER"))
+
+    verde, vermelho = colors.HexColor("#198754"), colors.HexColor("#dc3545")
+    for i, (data, descricao, documento, tipo, valor, status) in enumerate(bloco, start=2):
+        valor = abs(valor)
+        if tipo == "C":
+            saldo += valor
+            credito, debito = moeda(valor), ""
+            cmds.append(("TEXTCOLOR", (3, i), (3, i), verde))
+        else:
+            saldo -= valor
+            credito, debito = "", moeda(valor)
+            cmds.append(("TEXTCOLOR", (4, i), (4, i), vermelho))
+        linha = [data.strftime("%d/%m/%Y"), descricao[:55], documento[:15], credito, debito, moeda(saldo)]
+        if com_status:
+            linha.append(STATUS.get(status, status))
+        linhas.append(linha)
+
+    linhas.append(["", "Saldo final" if ultima else "Saldo a transportar"] + vazio + [moeda(saldo)])
+    tabela = Table(linhas, colWidths=_larguras(com_status), rowHeights=ALTURA_LINHA)
+    tabela.setStyle(TableStyle(cmds))
+    return tabela, saldo
+
+
+def _altura(flowables, largura):
+    return sum(
+        f.wrap(largura, 10_000)[1] + f.getSpaceBefore() + f.getSpaceAfter()
+        for f in flowables
+    )
+
+
+def escrever_extrato_pdf(relatorio, lancamentos, destino):
+    """
+    Desenha o extrato em `destino` (arquivo binário aberto).
+
+    Args:
+        lancamentos: queryset de LancamentoExtrato já filtrado e ordenado.
+
+    Returns:
+        Número de páginas.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Paragraph, Spacer
+
+    creditos, debitos, quantidade = totais_extrato(lancamentos)
+    largura_pagina, altura_pagina = landscape(A4)
+    largura = sum(_larguras(relatorio.com_status))
+    esquerda = (largura_pagina - largura) / 2
+    area = altura_pagina - 2 * MARGEM_VERTICAL
+
+    # Cabeçalho: completo (com o resumo) na primeira página, uma linha nas demais
+    primeira = [
+        Paragraph(relatorio.titulo, estilo("T", "Title", fontSize=14, spaceAfter=4)),
+        Paragraph(relatorio.subtitulo, estilo("I", fontSize=9, spaceAfter=3)),
+        Spacer(1, 11),
+        _resumo(relatorio, creditos, debitos),
+        Spacer(1, 17),
+    ]
+    demais = [
+        Paragraph(
+            f"{relatorio.titulo} — {relatorio.subtitulo}",
+            estilo("Continuacao", fontSize=8, textColor=colors.grey, spaceAfter=6),
+        ),
+    ]
+    capacidade_primeira = int((area - _altura(primeira, largura)) // ALTURA_LINHA) - LINHAS_FIXAS
+    capacidade = int((area - _altura(demais, largura)) // ALTURA_LINHA) - LINHAS_FIXAS
+    total_paginas = 1 + max(0, math.ceil((quantidade - capacidade_primeira) / capacidade))
+
+    canvas = Canvas(destino, pagesize=(largura_pagina, altura_pagina), pageCompression=1)
+    canvas.setTitle(relatorio.titulo)
+    geracao = timezone.localtime().strftime("%d/%m/%Y %H:%M")
+    rodape = relatorio.rodape or f"{quantidade} lançamentos"
+
+    linhas = lancamentos.values_list(
+        "data", "descricao", "documento", "tipo", "valor", "status",
+    ).iterator(chunk_size=CHUNK_SIZE)
+    proxima = next(linhas, None)
+    saldo, pagina = relatorio.saldo_anterior, 1
+
+    while True:
+        cabecalho, limite = (primeira, capacidade_primeira) if pagina == 1 else (demais, capacidade)
+        bloco = []
+        while proxima is not None and len(bloco) < limite:
+            bloco.append(proxima)
+            proxima = next(linhas, None)
+        ultima = proxima is None
+
+        topo = altura_pagina - MARGEM_VERTICAL
+        for flowable in cabecalho:
+            topo -= flowable.getSpaceBefore()
+            # Parágrafos ocupam a largura da tabela; o resumo (mais estreito) fica centralizado
+            largura_item, altura = flowable.wrapOn(canvas, largura, topo)
+            flowable.drawOn(canvas, (largura_pagina - largura_item) / 2, topo - altura)
+            topo -= altura + flowable.getSpaceAfter()
+
+        rotulo = relatorio.rotulo_saldo_anterior if pagina == 1 else "Saldo transportado"
+        tabela, saldo = _tabela_pagina(bloco, saldo, rotulo, ultima, relatorio.com_status)
+        _, altura = tabela.wrapOn(canvas, largura, topo)
+        tabela.drawOn(canvas, esquerda, topo - altura)
+
+        canvas.setFont("Helvetica", 7)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(esquerda, ALTURA_RODAPE, f"Gerado em {geracao} | {rodape}")
+        canvas.drawRightString(
+            esquerda + largura, ALTURA_RODAPE, f"Página {pagina} de {max(total_paginas, pagina)}",
+        )
+        canvas.showPage()
+
+        if ultima:
+            break
+        pagina += 1
+
+    canvas.save()
+    return pagina
+
+
+def resposta_extrato_pdf(relatorio, lancamentos, nome_arquivo):
+    """FileResponse com o extrato, gerado num arquivo temporário."""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA)
+    escrever_extrato_pdf(relatorio, lancamentos, arquivo)
+    arquivo.seek(0)
+    return FileResponse(arquivo, as_attachment=True, filename=nome_arquivo, content_type="application/pdf")
@@ -135,15 +135,9 @@ def extrato_conta(request, conta_id):
 
 @login_required
 def extrato_conta_pdf(request, conta_id):
-    """Gera PDF do extrato de uma conta por período."""
-    from django.http import HttpResponse
+    """Gera PDF do extrato de uma conta por período (paginado, em streaming)."""
     from datetime import date, timedelta
-    from dateutil.relativedelta import relativedelta
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from .relatorios import RelatorioExtrato, resposta_extrato_pdf
 
     conta = get_object_or_404(ContaBancaria, id=conta_id)
 
@@ -188,111 +182,17 @@ def extrato_conta_pdf(request, conta_id):
     ).aggregate(s=Sum("valor"))["s"] or Decimal("0.00")
     saldo_anterior = conta.saldo_inicial + saldo_anterior_agg
 
-    fmt = lambda v: f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-    total_creditos = Decimal("0.00")
-    total_debitos = Decimal("0.00")
-    saldo_corrido = saldo_anterior
-    linhas = []
-
-    for l in lancamentos:
-        if l.tipo == "C":
-            total_creditos += abs(l.valor)
-            saldo_corrido += abs(l.valor)
-            cred = fmt(abs(l.valor))
-            deb = ""
-        else:
-            total_debitos += abs(l.valor)
-            saldo_corrido -= abs(l.valor)
-            cred = ""
-            deb = fmt(abs(l.valor))
-        linhas.append([
-            l.data.strftime("%d/%m/%Y"),
-            l.descricao[:55],
-            l.documento[:15],
-            cred, deb,
-            fmt(saldo_corrido),
-        ])
-
-    saldo_final = saldo_anterior + total_creditos - total_debitos
-
-    # PDF
-    response = HttpResponse(content_type="application/pdf")
-    nome = f"extrato_{conta.nome}_{data_inicio}_{data_fim}.pdf".replace(" ", "_")
-    response["Content-Disposition"] = f'attachment; filename="{nome}"'
-
-    doc = SimpleDocTemplate(response, pagesize=landscape(A4), topMargin=15*mm, bottomMargin=15*mm)
-    styles = getSampleStyleSheet()
-    els = []
-
-    titulo = ParagraphStyle("T", parent=styles["Title"], fontSize=14, spaceAfter=4)
-    info = ParagraphStyle("I", parent=styles["Normal"], fontSize=9, spaceAfter=3)
-
     banco_nome = dict(ContaBancaria.BANCOS_COMUNS).get(conta.banco, conta.banco)
-    els.append(Paragraph(f"Extrato Bancário — {conta.nome}", titulo))
-    els.append(Paragraph(
-        f"Banco: {banco_nome} | Ag: {conta.agencia} | Conta: {conta.conta} | "
-        f"Período: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}",
-        info,
-    ))
-    els.append(Spacer(1, 4*mm))
-
-    # Resumo
-    res = [
-        ["Saldo Anterior", "Créditos", "Débitos", "Saldo Período", "Saldo Final"],
-        [fmt(saldo_anterior), fmt(total_creditos), fmt(total_debitos),
-         fmt(total_creditos - total_debitos), fmt(saldo_final)],
-    ]
-    rt = Table(res, colWidths=[45*mm]*5)
-    rt.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0d6efd")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTSIZE", (0, 0), (-1, -1), 8),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTNAME", (0, 1), (-1, 1), "Helvetica-Bold"),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 1), (-1, 1), colors.HexColor("#f0f0f0")),
-    ]))
-    els.append(rt)
-    els.append(Spacer(1, 6*mm))
-
-    # Tabela
-    header = ["Data", "Descrição", "Doc", "Crédito", "Débito", "Saldo"]
-    data_tab = [header] + linhas
-    cw = [22*mm, 110*mm, 25*mm, 30*mm, 30*mm, 32*mm]
-    tab = Table(data_tab, colWidths=cw, repeatRows=1)
-    cmds = [
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#343a40")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 7),
-        ("FONTSIZE", (0, 0), (-1, 0), 8),
-        ("ALIGN", (3, 0), (5, -1), "RIGHT"),
-        ("ALIGN", (0, 0), (0, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]
-    for i, row in enumerate(linhas, start=1):
-        if row[3]:
-            cmds.append(("TEXTCOLOR", (3, i), (3, i), colors.HexColor("#198754")))
-        if row[4]:
-            cmds.append(("TEXTCOLOR", (4, i), (4, i), colors.HexColor("#dc3545")))
-    tab.setStyle(TableStyle(cmds))
-    els.append(tab)
-
-    els.append(Spacer(1, 6*mm))
-    rod = ParagraphStyle("R", parent=styles["Normal"], fontSize=7, textColor=colors.grey)
-    els.append(Paragraph(
-        f"Gerado em {timezone.now().strftime('%d/%m/%Y %H:%M')} | {len(linhas)} lançamentos",
-        rod,
-    ))
-
-    doc.build(els)
-    return response
+    relatorio = RelatorioExtrato(
+        titulo=f"Extrato Bancário — {conta.nome}",
+        subtitulo=(
+            f"Banco: {banco_nome} | Ag: {conta.agencia} | Conta: {conta.conta} | "
+            f"Período: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+        ),
+        saldo_anterior=saldo_anterior,
+    )
+    nome = f"extrato_{conta.nome}_{data_inicio}_{data_fim}.pdf".replace(" ", "_")
+    return resposta_extrato_pdf(relatorio, lancamentos, nome)
 
 
 # ==============================================================================
@@ -600,140 +500,25 @@ def reconciliar(request, extrato_id):
 
 @login_required
 def exportar_pdf(request, extrato_id):
-    """Gera PDF do extrato com saldo corrido e totais."""
-    from django.http import HttpResponse
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+    """Gera PDF do extrato com saldo corrido e totais (paginado, em streaming)."""
+    from .relatorios import RelatorioExtrato, resposta_extrato_pdf
 
     extrato = get_object_or_404(
         ExtratoImportado.objects.select_related("conta"),
         id=extrato_id,
     )
-    lancamentos = extrato.lancamentos.all().order_by("data", "id")
-
-    # Calcula totais
-    total_creditos = Decimal("0.00")
-    total_debitos = Decimal("0.00")
-    saldo_corrido = extrato.conta.saldo_inicial
-
-    linhas_dados = []
-    for l in lancamentos:
-        if l.tipo == "C":
-            total_creditos += abs(l.valor)
-            saldo_corrido += abs(l.valor)
-            credito_str = f"R$ {abs(l.valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            debito_str = ""
-        else:
-            total_debitos += abs(l.valor)
-            saldo_corrido -= abs(l.valor)
-            credito_str = ""
-            debito_str = f"R$ {abs(l.valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-        saldo_str = f"R$ {saldo_corrido:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        status_txt = dict(LancamentoExtrato.STATUS_CHOICES).get(l.status, l.status)
-
-        linhas_dados.append([
-            l.data.strftime("%d/%m/%Y"),
-            l.descricao[:55],
-            l.documento[:15],
-            credito_str,
-            debito_str,
-            saldo_str,
-            status_txt,
-        ])
-
-    saldo_periodo = total_creditos - total_debitos
-    saldo_final = extrato.conta.saldo_inicial + saldo_periodo
-
-    # === GERA PDF ===
-    response = HttpResponse(content_type="application/pdf")
-    nome_arquivo = f"extrato_{extrato.conta.nome}_{extrato.periodo_inicio}_{extrato.periodo_fim}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
-
-    doc = SimpleDocTemplate(response, pagesize=landscape(A4), topMargin=15*mm, bottomMargin=15*mm)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Título
-    titulo_style = ParagraphStyle("Titulo", parent=styles["Title"], fontSize=14, spaceAfter=6)
-    elements.append(Paragraph(f"Extrato Bancário — {extrato.conta.nome}", titulo_style))
-
-    # Info
-    info_style = ParagraphStyle("Info", parent=styles["Normal"], fontSize=9, spaceAfter=3)
-    banco_nome = dict(ContaBancaria.BANCOS_COMUNS).get(extrato.conta.banco, extrato.conta.banco)
-    elements.append(Paragraph(
-        f"Banco: {banco_nome} | Ag: {extrato.conta.agencia} | Conta: {extrato.conta.conta} | "
-        f"Período: {extrato.periodo_inicio.strftime('%d/%m/%Y')} a {extrato.periodo_fim.strftime('%d/%m/%Y')}",
-        info_style,
-    ))
-    elements.append(Spacer(1, 4*mm))
-
-    # Resumo
-    fmt = lambda v: f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    resumo_data = [
-        ["Saldo Inicial", "Total Créditos", "Total Débitos", "Saldo do Período", "Saldo Final"],
-        [fmt(extrato.conta.saldo_inicial), fmt(total_creditos), fmt(total_debitos), fmt(saldo_periodo), fmt(saldo_final)],
-    ]
-    resumo_table = Table(resumo_data, colWidths=[45*mm, 45*mm, 45*mm, 45*mm, 45*mm])
-    resumo_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0d6efd")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTSIZE", (0, 0), (-1, -1), 8),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 1), (-1, 1), colors.HexColor("#f0f0f0")),
-        ("FONTNAME", (0, 1), (-1, 1), "Helvetica-Bold"),
-    ]))
-    elements.append(resumo_table)
-    elements.append(Spacer(1, 6*mm))
-
-    # Tabela de lançamentos
-    header = ["Data", "Descrição", "Doc", "Crédito", "Débito", "Saldo", "Status"]
-    tabela_data = [header] + linhas_dados
-
-    col_widths = [22*mm, 95*mm, 25*mm, 28*mm, 28*mm, 30*mm, 22*mm]
-    tabela = Table(tabela_data, colWidths=col_widths, repeatRows=1)
-
-    style_cmds = [
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#343a40")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 7),
-        ("FONTSIZE", (0, 0), (-1, 0), 8),
-        ("ALIGN", (3, 0), (5, -1), "RIGHT"),
-        ("ALIGN", (0, 0), (0, -1), "CENTER"),
-        ("ALIGN", (6, 0), (6, -1), "CENTER"),
-        ("GRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]
-
-    # Colorir créditos e débitos
-    for i, row in enumerate(linhas_dados, start=1):
-        if row[3]:  # Crédito
-            style_cmds.append(("TEXTCOLOR", (3, i), (3, i), colors.HexColor("#198754")))
-        if row[4]:  # Débito
-            style_cmds.append(("TEXTCOLOR", (4, i), (4, i), colors.HexColor("#dc3545")))
-
-    tabela.setStyle(TableStyle(style_cmds))
-    elements.append(tabela)
-
-    # Rodapé
-    elements.append(Spacer(1, 6*mm))
-    rodape_style = ParagraphStyle("Rodape", parent=styles["Normal"], fontSize=7, textColor=colors.grey)
-    elements.append(Paragraph(
-        f"Gerado em {timezone.now().strftime('%d/%m/%Y %H:%M')} | "
-        f"Arquivo: {extrato.arquivo_nome} | "
-        f"Total de lançamentos: {extrato.total_lancamentos}",
-        rodape_style,
-    ))
-
-    doc.build(elements)
-    return response
+    conta = extrato.conta
+    banco_nome = dict(ContaBancaria.BANCOS_COMUNS).get(conta.banco, conta.banco)
+    relatorio = RelatorioExtrato(
+        titulo=f"Extrato Bancário — {conta.nome}",
+        subtitulo=(
+            f"Banco: {banco_nome} | Ag: {conta.agencia} | Conta: {conta.conta} | "
+            f"Período: {extrato.periodo_inicio.strftime('%d/%m/%Y')} a {extrato.periodo_fim.strftime('%d/%m/%Y')}"
+        ),
+        saldo_anterior=conta.saldo_inicial,
+        rotulo_saldo_anterior="Saldo Inicial",
+        rodape=f"Arquivo: {extrato.arquivo_nome} | Total de lançamentos: {extrato.total_lancamentos}",
+        com_status=True,
+    )
+    nome_arquivo = f"extrato_{conta.nome}_{extrato.periodo_inicio}_{extrato.periodo_fim}.pdf"
+    return resposta_extrato_pdf(relatorio, extrato.lancamentos.order_by("data", "id"), nome_arquivo)
@@ -3,7 +3,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metricas_cache
+
 urlpatterns = [
+    path("admin/cache/", admin.site.admin_view(metricas_cache), name="admin_metricas_cache"),
     path("admin/", admin.site.urls),
     path("usuarios/", include("usuarios.urls")),   # <-- NOVO
     path("clientes/", include("clientes.urls")),
@@ -0,0 +1,36 @@
+"""Exportações da conta corrente (ver core.exportacao)."""
+from core.exportacao import Coluna, escolhas, registrar_exportacao
+
+from .models import MovimentacaoConta
+
+
+def _movimentacoes(request):
+    qs = MovimentacaoConta.objects.all()
+    conta = request.GET.get("conta", "")
+    cliente = request.GET.get("cliente", "")
+    if conta.isdigit():
+        qs = qs.filter(conta_id=int(conta))
+    if cliente.isdigit():
+        qs = qs.filter(conta__cliente_id=int(cliente))
+    return qs.order_by("data", "id")
+
+
+registrar_exportacao(
+    "movimentacoes-conta",
+    titulo="Extrato de Conta Corrente",
+    modulo="CLIENTES",
+    queryset=_movimentacoes,
+    colunas=[
+        Coluna("ID", "id", largura=8),
+        Coluna("Data", "data", largura=17),
+        Coluna("Cliente", "conta__cliente__nome_completo", largura=35),
+        Coluna("CPF", "conta__cliente__cpf"),
+        Coluna("Tipo", "tipo", escolhas(MovimentacaoConta, "tipo"), largura=30),
+        Coluna("Origem", "origem", escolhas(MovimentacaoConta, "origem"), largura=25),
+        Coluna("Descrição", "descricao", largura=45),
+        Coluna("Contrato", "emprestimo__codigo_contrato"),
+        Coluna("Valor", "valor"),
+        Coluna("Alínea", "alinea", largura=8),
+        Coluna("Estornado", "estornado", largura=10),
+    ],
+)
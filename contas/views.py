@@ -15,8 +15,9 @@ def operacao_saque(request):
     O usuário seleciona o cliente e o valor.
     Afeta: Saldo do Cliente (Débito) e Caixa da Empresa (Saída).
     """
-    # Busca todos os clientes para o Select2/Dropdown
-    clientes = Cliente.objects.all().order_by('nome_completo')
+    # O cliente é buscado por autocomplete (clientes:autocomplete); só o
+    # selecionado volta para a tela em caso de erro
+    contexto = {}
     
     if request.method == 'POST':
         cliente_id = request.POST.get('cliente_id')
@@ -28,13 +29,14 @@ def operacao_saque(request):
             valor = Decimal(valor_str.replace('.', '').replace(',', '.'))
         except:
             messages.error(request, "Valor inválido.")
-            return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+            return render(request, 'contas/operacao_saque.html', contexto)
         
         if not cliente_id:
             messages.error(request, "Selecione um cliente.")
-            return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+            return render(request, 'contas/operacao_saque.html', contexto)
 
         cliente = get_object_or_404(Cliente, id=cliente_id)
+        contexto['cliente_selecionado'] = cliente
         
         # Garante que a conta existe
         conta, created = ContaCorrente.objects.get_or_create(cliente=cliente)
@@ -42,18 +44,18 @@ def operacao_saque(request):
         # 1. Validação: Valor Positivo
         if valor <= 0:
             messages.error(request, "O valor do saque deve ser positivo.")
-            return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+            return render(request, 'contas/operacao_saque.html', contexto)
 
         # 2. Validação: Saldo do Cliente
         if conta.saldo < valor:
             messages.error(request, f"Saldo insuficiente na conta do cliente {cliente.nome_completo}. Saldo atual: R$ {conta.saldo:,.2f}")
-            return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+            return render(request, 'contas/operacao_saque.html', contexto)
             
         # 3. Validação: Saldo do Caixa da Empresa (Tem dinheiro físico?)
         saldo_caixa = calcular_saldo_atual()
         if saldo_caixa < valor:
              messages.error(request, f"Caixa da empresa insuficiente para realizar este saque. Disponível em caixa: R$ {saldo_caixa:,.2f}")
-             return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+             return render(request, 'contas/operacao_saque.html', contexto)
 
         # Execução Atômica (Segurança Financeira)
         try:
@@ -84,9 +86,9 @@ def operacao_saque(request):
             
         except Exception as e:
             messages.error(request, f"Erro ao processar transação: {str(e)}")
-            return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+            return render(request, 'contas/operacao_saque.html', contexto)
 
-    return render(request, 'contas/operacao_saque.html', {'clientes': clientes})
+    return render(request, 'contas/operacao_saque.html', contexto)
 
 def realizar_saque(request, cliente_id):
     """
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Cada app registra suas exportações em <app>/exportacoes.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules("exportacoes")
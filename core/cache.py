@@ -0,0 +1,211 @@
+"""
+Cache compartilhado entre os workers (settings.CACHES["default"]).
+
+Chaves com namespace e versão: "<namespace>:<versão>:<partes>". Cada
+namespace tem um número de versão guardado no próprio cache;
+invalidar(namespace) incrementa a versão e as chaves antigas deixam de
+ser lidas (expiram sozinhas pelo timeout) — sem varrer chaves, igual no
+Redis, em arquivo e em memória. A versão inicial é o relógio em
+milissegundos, para que uma versão despejada do cache não volte a ler
+valores velhos.
+
+obter() é single-flight: na falta, só um worker recalcula (trava com
+cache.add); os demais esperam o valor aparecer por até ESPERA_MAXIMA
+segundos e, se não aparecer, calculam por conta própria. No backend de
+arquivos o add não é atômico: em corrida, dois workers podem recalcular.
+
+Métricas por namespace (acertos, faltas, tempo de leitura e de cálculo)
+são acumuladas no processo e somadas no cache compartilhado a cada
+INTERVALO_METRICAS segundos; metricas() devolve o total de todos os
+workers (página /admin/cache/).
+
+    from core import cache
+
+    resumo = cache.obter("dashboard", [empresa_id, hoje], lambda: calcular_resumo(hoje), timeout=300)
+    cache.invalidar("dashboard")
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache as cache_django
+
+
+TIMEOUT_PADRAO = 300                # segundos
+TRAVA_TIMEOUT = 30                  # validade da trava de recálculo
+ESPERA_MAXIMA = 5.0                 # quanto os demais esperam o recálculo
+INTERVALO_ESPERA = 0.05
+INTERVALO_METRICAS = 5.0            # envio das métricas locais ao cache
+
+CHAVE_SEGURA = re.compile(r"[\w.:-]{1,150}")
+CHAVE_NAMESPACES = "cache:namespaces"
+CAMPOS_METRICAS = ("acertos", "faltas", "leitura_us", "calculo_us")
+
+
+# ==============================================================================
+# CHAVES E VERSÕES
+# ==============================================================================
+
+def _chave_versao(namespace):
+    return f"{namespace}:versao"
+
+
+def versao(namespace):
+    """Versão atual do namespace (criada no primeiro uso)."""
+    chave = _chave_versao(namespace)
+    atual = cache_django.get(chave)
+    if atual is None:
+        cache_django.add(chave, int(time.time() * 1000), timeout=None)
+        atual = cache_django.get(chave)
+    return atual
+
+
+def chave(namespace, partes=()):
+    """Chave versionada do namespace. Partes longas ou com espaços viram um hash."""
+    bruto = ":".join(str(parte) for parte in partes)
+    if bruto and not CHAVE_SEGURA.fullmatch(bruto):
+        bruto = hashlib.sha256(bruto.encode()).hexdigest()
+    return f"{namespace}:{versao(namespace)}:{bruto}"
+
+
+def invalidar(namespace):
+    """Descarta todos os valores do namespace (incrementa a versão)."""
+    try:
+        cache_django.incr(_chave_versao(namespace))
+    except ValueError:          # versão ainda não existe (ou foi despejada)
+        cache_django.set(_chave_versao(namespace), int(time.time() * 1000), timeout=None)
+
+
+# ==============================================================================
+# LEITURA COM RECÁLCULO (single-flight)
+# ==============================================================================
+
+def obter(namespace, partes, calcular, timeout=TIMEOUT_PADRAO):
+    """
+    Valor em cache para (namespace, partes); na falta, calcular() e guarda.
+
+    Args:
+        partes: lista de valores que identificam o item (str/int/date...).
+        calcular: função sem argumentos que produz o valor (pode ser None).
+    """
+    inicio = time.perf_counter()
+    chave_item = chave(namespace, partes)
+    item = cache_django.get(chave_item)
+    if item is not None:
+        _registrar(namespace, acerto=True, segundos=time.perf_counter() - inicio)
+        return item[0]
+
+    trava = f"{chave_item}:calculando"
+    travou = cache_django.add(trava, 1, timeout=TRAVA_TIMEOUT)
+    if not travou:
+        # Outro worker está recalculando: espera o valor dele
+        limite = time.monotonic() + ESPERA_MAXIMA
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            item = cache_django.get(chave_item)
+            if item is not None:
+                _registrar(namespace, acerto=True, segundos=time.perf_counter() - inicio)
+                return item[0]
+
+    try:
+        valor = calcular()
+        cache_django.set(chave_item, (valor,), timeout)   # tupla: None também fica em cache
+    finally:
+        if travou:
+            cache_django.delete(trava)
+    _registrar(namespace, acerto=False, segundos=time.perf_counter() - inicio)
+    return valor
+
+
+def apagar(namespace, partes):
+    """Remove um item do namespace."""
+    cache_django.delete(chave(namespace, partes))
+
+
+# ==============================================================================
+# MÉTRICAS
+# ==============================================================================
+
+_metricas = defaultdict(lambda: dict.fromkeys(CAMPOS_METRICAS, 0))
+_metricas_lock = threading.Lock()
+_ultimo_envio = time.monotonic()
+
+
+def _registrar(namespace, acerto, segundos):
+    global _ultimo_envio
+    with _metricas_lock:
+        local = _metricas[namespace]
+        if acerto:
+            local["acertos"] += 1
+            local["leitura_us"] += int(segundos * 1_000_000)
+        else:
+            local["faltas"] += 1
+            local["calculo_us"] += int(segundos * 1_000_000)
+        if time.monotonic() - _ultimo_envio < INTERVALO_METRICAS:
+            return
+        _ultimo_envio = time.monotonic()
+    enviar_metricas()
+
+
+def _chave_metrica(namespace, campo):
+    return f"cache:metricas:{namespace}:{campo}"
+
+
+def enviar_metricas():
+    """Soma as métricas acumuladas neste processo às do cache compartilhado."""
+    with _metricas_lock:
+        locais = dict(_metricas)
+        _metricas.clear()
+    if not locais:
+        return
+
+    for namespace, campos in locais.items():
+        for campo, valor in campos.items():
+            if not valor:
+                continue
+            chave_metrica = _chave_metrica(namespace, campo)
+            try:
+                cache_django.incr(chave_metrica, valor)
+            except ValueError:
+                if not cache_django.add(chave_metrica, valor, timeout=None):
+                    cache_django.incr(chave_metrica, valor)
+
+    conhecidos = cache_django.get(CHAVE_NAMESPACES) or set()
+    if not conhecidos.issuperset(locais):
+        cache_django.set(CHAVE_NAMESPACES, conhecidos | set(locais), timeout=None)
+
+
+def metricas():
+    """Métricas de todos os workers, por namespace (lista de dicts, ordem alfabética)."""
+    enviar_metricas()
+    namespaces = sorted(cache_django.get(CHAVE_NAMESPACES) or ())
+    valores = cache_django.get_many([
+        _chave_metrica(namespace, campo) for namespace in namespaces for campo in CAMPOS_METRICAS
+    ])
+
+    resultado = []
+    for namespace in namespaces:
+        m = {campo: valores.get(_chave_metrica(namespace, campo), 0) for campo in CAMPOS_METRICAS}
+        total = m["acertos"] + m["faltas"]
+        resultado.append({
+            "namespace": namespace,
+            "versao": cache_django.get(_chave_versao(namespace)),
+            "acertos": m["acertos"],
+            "faltas": m["faltas"],
+            "taxa_acerto": 100 * m["acertos"] / total if total else 0,
+            "leitura_ms": m["leitura_us"] / m["acertos"] / 1000 if m["acertos"] else 0,
+            "calculo_ms": m["calculo_us"] / m["faltas"] / 1000 if m["faltas"] else 0,
+        })
+    return resultado
+
+
+def zerar_metricas():
+    """Zera as métricas (deste processo e as compartilhadas)."""
+    with _metricas_lock:
+        _metricas.clear()
+    namespaces = cache_django.get(CHAVE_NAMESPACES) or ()
+    cache_django.delete_many([
+        _chave_metrica(namespace, campo) for namespace in namespaces for campo in CAMPOS_METRICAS
+    ])
@@ -0,0 +1,325 @@
+"""
+Renderização de documentos PDF (ReportLab) compartilhada pelos apps.
+
+- estilo()/folha_estilos(): estilos de parágrafo montados uma vez por
+  processo (cache em memória);
+- timbre(): dados da empresa e logo de ConfiguracaoEmpresa (do cache de
+  get_config()), remontados só quando a configuração muda (versão =
+  atualizado_em);
+- renderizar(): roda o construtor do documento num pool limitado de
+  processos (settings.DOCUMENTOS_PDF_WORKERS; 0 = no próprio processo);
+- gerar_documento(): cache endereçado por conteúdo. O nome do arquivo é
+  o SHA-256 dos dados do documento + timbre + versão do layout, então a
+  reimpressão de um documento que não mudou é servida do storage, sem
+  renderizar de novo.
+
+Os construtores ficam em <app>/documentos.py: funções de módulo que
+recebem só dados simples (dict, str, Decimal, date) e o Timbre e devolvem
+os bytes do PDF — nada de ORM, para poderem rodar no pool.
+
+    from core.documentos import gerar_documento, resposta_pdf, timbre
+    from .documentos import contrato_pdf
+
+    nome = gerar_documento("contrato", contrato_pdf, dados)
+    return resposta_pdf(nome, "contrato.pdf")
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TempoEsgotado
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import Optional
+
+from django.conf import settings
+
+
+MESES = {
+    1: "janeiro", 2: "fevereiro", 3: "março", 4: "abril",
+    5: "maio", 6: "junho", 7: "julho", 8: "agosto",
+    9: "setembro", 10: "outubro", 11: "novembro", 12: "dezembro",
+}
+
+# Espera por uma vaga no pool; lotado, o documento é renderizado no processo
+ESPERA_VAGA = 1
+# Espera pelo worker (settings.DOCUMENTOS_PDF_TIMEOUT): bem abaixo do timeout
+# do servidor (30 s no gunicorn), e sem nova renderização depois dela
+TIMEOUT_RENDER_PADRAO = 10
+
+logger = logging.getLogger("django")
+
+
+# ==============================================================================
+# FORMATAÇÃO E ESTILOS (cache por processo)
+# ==============================================================================
+
+def moeda(valor):
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def data_extenso(dia):
+    return f"{dia.day} de {MESES.get(dia.month, '')} de {dia.year}"
+
+
+def valor_extenso(valor):
+    """1234.5 → "mil, duzentos e trinta e quatro reais e cinquenta centavos"."""
+    from num2words import num2words
+
+    inteiro, centavos = int(valor), int((valor % 1) * 100)
+    extenso = num2words(inteiro, lang="pt_BR") + " reais"
+    if centavos > 0:
+        extenso += f" e {num2words(centavos, lang='pt_BR')} centavos"
+    return extenso
+
+
+@lru_cache(maxsize=1)
+def folha_estilos():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=256)
+def _estilo(nome, pai, atributos):
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(nome, parent=folha_estilos()[pai], **dict(atributos))
+
+
+def estilo(nome, pai="Normal", **atributos):
+    """ParagraphStyle com cache: o mesmo (nome, pai, atributos) devolve o mesmo objeto."""
+    return _estilo(nome, pai, tuple(sorted(atributos.items())))
+
+
+# ==============================================================================
+# TIMBRE (ConfiguracaoEmpresa)
+# ==============================================================================
+
+@dataclass(frozen=True)
+class Timbre:
+    nome: str
+    cnpj: str
+    endereco: str
+    cidade: str
+    foro: str
+    rodape: tuple
+    logo: Optional[bytes]
+    versao: str
+
+
+_timbre = None
+_timbre_lock = threading.Lock()
+
+
+def timbre():
+    """
+    Timbre da empresa, a partir de ConfiguracaoEmpresa.get_config() (sem
+    consulta no caminho comum); o logo só é relido quando a configuração
+    foi alterada.
+    """
+    global _timbre
+    from .models import ConfiguracaoEmpresa
+
+    cfg = ConfiguracaoEmpresa.get_config()
+    versao = cfg.atualizado_em.isoformat()
+    if _timbre is not None and _timbre.versao == versao:
+        return _timbre
+
+    with _timbre_lock:
+        if _timbre is not None and _timbre.versao == versao:
+            return _timbre
+        logo = None
+        if cfg.logo:
+            try:
+                with cfg.logo.open("rb") as arquivo:
+                    logo = arquivo.read()
+            except (OSError, ValueError):
+                logo = None
+        _timbre = Timbre(
+            nome=cfg.nome_fantasia or cfg.nome_empresa or "EMPRESA",
+            cnpj=cfg.cnpj,
+            endereco=cfg.endereco_completo,
+            cidade=cfg.cidade or "Rio de Janeiro",
+            foro=cfg.foro_comarca or "Rio de Janeiro/RJ",
+            rodape=tuple(linha for linha in (cfg.rodape_linha1, cfg.rodape_linha2) if linha),
+            logo=logo,
+            versao=versao,
+        )
+        return _timbre
+
+
+def logo(timbre_atual, largura_mm=40):
+    """Flowable com o logo da empresa (ou None, sem logo configurado)."""
+    if not timbre_atual.logo:
+        return None
+    from io import BytesIO
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Image
+
+    largura, altura = ImageReader(BytesIO(timbre_atual.logo)).getSize()
+    return Image(
+        BytesIO(timbre_atual.logo), width=largura_mm * mm, height=largura_mm * mm * altura / largura, hAlign="CENTER",
+    )
+
+
+# ==============================================================================
+# POOL DE RENDERIZAÇÃO
+# ==============================================================================
+
+_pool = None
+_vagas = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    """Pool de processos (criado no primeiro uso) ou None se desligado."""
+    global _pool, _vagas
+    workers = getattr(settings, "DOCUMENTOS_PDF_WORKERS", 0)
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: o worker não herda conexões de banco nem threads do servidor
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            # Fila limitada: no máximo 2 documentos por worker aguardando
+            _vagas = threading.BoundedSemaphore(workers * 2)
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class DocumentoIndisponivel(Exception):
+    """O pool não devolveu o documento no prazo (ver renderizar)."""
+
+
+def renderizar(construtor, *args):
+    """
+    Executa construtor(*args) → bytes no pool. Com o pool desligado,
+    lotado (sem vaga em ESPERA_VAGA) ou quebrado, renderiza no próprio
+    processo. Se o worker não devolver o documento em
+    DOCUMENTOS_PDF_TIMEOUT segundos, levanta DocumentoIndisponivel — o
+    request não renderiza de novo depois de já ter esperado.
+    """
+    pool = _executor()
+    if pool is None or not _vagas.acquire(timeout=ESPERA_VAGA):
+        return construtor(*args)
+    timeout = getattr(settings, "DOCUMENTOS_PDF_TIMEOUT", TIMEOUT_RENDER_PADRAO)
+    try:
+        futuro = pool.submit(construtor, *args)
+        try:
+            return futuro.result(timeout=timeout)
+        except TempoEsgotado:
+            futuro.cancel()
+            logger.warning("Pool de PDF sem resposta em %ss (%s).",
+                           timeout, getattr(construtor, "__name__", construtor))
+            raise DocumentoIndisponivel(
+                f"O documento não foi gerado em {timeout}s. Tente novamente em instantes."
+            ) from None
+    except BrokenProcessPool:
+        _descartar_pool()
+    finally:
+        _vagas.release()
+    return construtor(*args)
+
+
+def documento_pdf(view_func):
+    """
+    Decorator das views que geram PDF: DocumentoIndisponivel vira 503 com
+    Retry-After. Fica por fora de @transaction.atomic, para que o que a
+    view gravou antes de renderizar seja desfeito.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except DocumentoIndisponivel as erro:
+            from django.http import HttpResponse
+
+            return HttpResponse(
+                str(erro), status=503, content_type="text/plain; charset=utf-8",
+                headers={"Retry-After": "30"},
+            )
+    return wrapper
+
+
+# ==============================================================================
+# CACHE ENDEREÇADO POR CONTEÚDO
+# ==============================================================================
+
+def chave_documento(tipo, dados, timbre_atual, versao_layout="1"):
+    conteudo = json.dumps(
+        [tipo, versao_layout, dados, timbre_atual.versao], sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def gerar_documento(tipo, construtor, dados, versao_layout="1"):
+    """
+    Nome no storage do PDF de `tipo` para `dados`; renderiza (no pool) e
+    grava só se esse conteúdo ainda não foi gerado.
+
+    Args:
+        construtor: função de <app>/documentos.py chamada como
+            construtor(dados, timbre).
+        versao_layout: mude quando o layout do documento mudar, para não
+            servir PDFs antigos do cache.
+    """
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    timbre_atual = timbre()
+    chave = chave_documento(tipo, dados, timbre_atual, versao_layout)
+    nome = f"documentos/{tipo}/{chave[:2]}/{chave}.pdf"
+    if default_storage.exists(nome):
+        return nome
+    pdf = renderizar(construtor, dados, timbre_atual)
+    return default_storage.save(nome, ContentFile(pdf))
+
+
+def sha256_arquivo(nome):
+    """SHA-256 (hex) do arquivo no storage, lido em blocos."""
+    from django.core.files.storage import default_storage
+
+    resumo = hashlib.sha256()
+    with default_storage.open(nome, "rb") as arquivo:
+        for bloco in arquivo.chunks():
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def resposta_pdf(nome, nome_download, inline=False, etag="", request=None):
+    """
+    FileResponse do PDF gravado. O arquivo não é carregado em memória: o
+    FileResponse entrega o objeto de arquivo ao wsgi.file_wrapper do
+    servidor (sendfile no gunicorn/uWSGI) e informa o Content-Length.
+
+    Com `etag` (ex.: o SHA-256 de uma via imutável), a resposta leva ETag
+    e cache privado, e um If-None-Match igual devolve 304 sem abrir o arquivo.
+    """
+    from django.core.files.storage import default_storage
+    from django.http import FileResponse
+    from django.utils.cache import get_conditional_response
+
+    if etag and request is not None:
+        nao_modificado = get_conditional_response(request, etag=f'"{etag}"')
+        if nao_modificado is not None:
+            return nao_modificado
+
+    resposta = FileResponse(
+        default_storage.open(nome, "rb"), as_attachment=not inline,
+        filename=nome_download, content_type="application/pdf",
+    )
+    if etag:
+        resposta["ETag"] = f'"{etag}"'
+        resposta["Cache-Control"] = "private, max-age=86400, immutable"
+    return resposta
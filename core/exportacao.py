@@ -0,0 +1,229 @@
+"""
+Exportação em streaming (CSV / XLSX) para listagens grandes.
+
+Cada app registra suas exportações num módulo `exportacoes.py`, que é
+carregado automaticamente no startup (CoreConfig.ready):
+
+    from core.exportacao import Coluna, registrar_exportacao
+
+    registrar_exportacao(
+        "transacoes", titulo="Transações", modulo="FINANCEIRO",
+        queryset=lambda request: Transacao.objects.order_by("-data", "-id"),
+        colunas=[
+            Coluna("Data", "data"),
+            Coluna("Usuário", "usuario__username"),
+            Coluna("Valor", "valor"),
+        ],
+    )
+
+O download fica em /sistema/exportar/<nome>/<csv|xlsx>/ (a querystring é
+repassada ao `queryset` para os filtros).
+
+- Os dados são lidos com values_list(...).iterator(chunk_size) — sem
+  instanciar models e sem carregar o queryset inteiro.
+- CSV sai em StreamingHttpResponse: o primeiro bloco é enviado assim
+  que o primeiro chunk volta do banco.
+- XLSX usa o modo constant_memory do XlsxWriter (uma linha por vez em
+  arquivo temporário) e é enviado com FileResponse.
+"""
+import csv
+import io
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+
+CHUNK_SIZE = 2000
+LINHAS_POR_BLOCO = 500
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@dataclass(frozen=True)
+class Coluna:
+    titulo: str
+    campo: str                                  # caminho do values_list (ex.: "usuario__username")
+    formatar: Optional[Callable] = None         # valor bruto → valor exportado
+    largura: int = 15                           # largura da coluna no XLSX
+
+
+@dataclass
+class Exportacao:
+    nome: str
+    titulo: str
+    modulo: str                                 # módulo de PermissaoModulo exigido
+    queryset: Callable                          # request → QuerySet
+    colunas: List[Coluna]
+    nome_arquivo: str = ""
+    delimitador: str = ";"
+
+    def arquivo(self, formato):
+        base = self.nome_arquivo or self.nome
+        return f"{base}.{formato}"
+
+
+_registro: Dict[str, Exportacao] = {}
+
+
+def registrar_exportacao(nome, *, titulo, modulo, queryset, colunas, nome_arquivo="", delimitador=";"):
+    _registro[nome] = Exportacao(
+        nome=nome, titulo=titulo, modulo=modulo, queryset=queryset,
+        colunas=list(colunas), nome_arquivo=nome_arquivo, delimitador=delimitador,
+    )
+    return _registro[nome]
+
+
+def obter_exportacao(nome) -> Optional[Exportacao]:
+    return _registro.get(nome)
+
+
+def exportacoes_registradas():
+    return sorted(_registro.values(), key=lambda e: e.titulo)
+
+
+# ==============================================================================
+# FORMATADORES
+# ==============================================================================
+
+def escolhas(model, campo):
+    """Formatador que troca o código do choice pelo rótulo."""
+    rotulos = dict(model._meta.get_field(campo).flatchoices)
+    return lambda valor: rotulos.get(valor, valor)
+
+
+def data_iso(valor):
+    return valor.strftime("%Y-%m-%d") if valor else ""
+
+
+def _texto_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime("%d/%m/%Y %H:%M")
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, Decimal):
+        return str(valor).replace(".", ",")
+    if isinstance(valor, bool):
+        return "Sim" if valor else "Não"
+    return valor
+
+
+def _valor_xlsx(valor):
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None)
+    if isinstance(valor, bool):
+        return "Sim" if valor else "Não"
+    return valor
+
+
+# ==============================================================================
+# GERAÇÃO
+# ==============================================================================
+
+def iterar_linhas(exportacao, queryset, chunk_size=CHUNK_SIZE):
+    """Gera as linhas (já formatadas) direto do cursor do banco."""
+    campos = [c.campo for c in exportacao.colunas]
+    formatadores = [c.formatar for c in exportacao.colunas]
+    for bruto in queryset.values_list(*campos).iterator(chunk_size=chunk_size):
+        yield [
+            fmt(valor) if fmt else valor
+            for fmt, valor in zip(formatadores, bruto)
+        ]
+
+
+def _gerar_csv(exportacao, linhas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=exportacao.delimitador)
+
+    buffer.write("\ufeff")  # BOM para o Excel abrir em UTF-8
+    writer.writerow([c.titulo for c in exportacao.colunas])
+
+    pendentes = 0
+    for linha in linhas:
+        writer.writerow([_texto_csv(v) for v in linha])
+        pendentes += 1
+        if pendentes >= LINHAS_POR_BLOCO:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def resposta_csv(exportacao, queryset):
+    response = StreamingHttpResponse(
+        _gerar_csv(exportacao, iterar_linhas(exportacao, queryset)),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{exportacao.arquivo("csv")}"'
+    return response
+
+
+def escrever_xlsx(exportacao, linhas, destino):
+    """Grava as linhas em `destino` (caminho ou arquivo binário) com memória constante."""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,
+        "default_date_format": "dd/mm/yyyy",
+    })
+    planilha = workbook.add_worksheet(exportacao.titulo[:31])
+    negrito = workbook.add_format({"bold": True, "bg_color": "#DDEBF7"})
+    formato_datahora = workbook.add_format({"num_format": "dd/mm/yyyy hh:mm"})
+    formato_moeda = workbook.add_format({"num_format": "#,##0.00"})
+
+    for col, coluna in enumerate(exportacao.colunas):
+        planilha.set_column(col, col, coluna.largura)
+        planilha.write(0, col, coluna.titulo, negrito)
+    planilha.freeze_panes(1, 0)
+
+    # constant_memory exige escrita linha a linha, em ordem
+    for lin, linha in enumerate(linhas, start=1):
+        for col, valor in enumerate(linha):
+            valor = _valor_xlsx(valor)
+            if valor is None:
+                continue
+            if isinstance(valor, datetime):
+                planilha.write_datetime(lin, col, valor, formato_datahora)
+            elif isinstance(valor, Decimal):
+                planilha.write_number(lin, col, valor, formato_moeda)
+            else:
+                planilha.write(lin, col, valor)
+
+    workbook.close()
+
+
+def resposta_xlsx(exportacao, queryset):
+    # O zip do .xlsx só fica pronto no close(); gera em arquivo temporário
+    # (apagado quando o FileResponse fecha o arquivo) e envia em blocos.
+    arquivo = tempfile.TemporaryFile(suffix=".xlsx")
+    escrever_xlsx(exportacao, iterar_linhas(exportacao, queryset), arquivo)
+    arquivo.seek(0)
+    return FileResponse(
+        arquivo, as_attachment=True,
+        filename=exportacao.arquivo("xlsx"), content_type=CONTENT_TYPE_XLSX,
+    )
+
+
+FORMATOS = {
+    "csv": resposta_csv,
+    "xlsx": resposta_xlsx,
+}
+
+
+def exportar(request, nome, formato):
+    """Monta a resposta de download; devolve None se a exportação não existir."""
+    exportacao = obter_exportacao(nome)
+    gerar = FORMATOS.get(formato)
+    if exportacao is None or gerar is None:
+        return None
+    return gerar(exportacao, exportacao.queryset(request))
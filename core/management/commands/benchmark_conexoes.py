@@ -0,0 +1,119 @@
+"""
+Teste de carga das conexões com o banco (config/banco.py).
+
+Uso:
+    python manage.py benchmark_conexoes
+    python manage.py benchmark_conexoes --requisicoes 5000 --threads 16 --consultas 5
+
+Simula requisições em várias threads, com o mesmo ciclo de conexão do
+Django num request de verdade (sinais request_started/request_finished,
+que fecham conexões vencidas): cada requisição faz `--consultas`
+consultas leves (SELECT 1). Roda três vezes sobre o banco configurado:
+
+- sem persistência (CONN_MAX_AGE=0): uma conexão nova por requisição,
+  como era antes;
+- persistente (CONN_MAX_AGE=600);
+- persistente com health check (CONN_HEALTH_CHECKS).
+
+Mostra vazão, latência (média, p50, p95, p99) e quantas conexões foram
+abertas. Com PostgreSQL a diferença é o custo do handshake (TCP, TLS,
+autenticação) a cada request; com SQLite é só a abertura do arquivo.
+"""
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+
+MODOS = [
+    ("sem persistência", {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}),
+    ("persistente", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False}),
+    ("persistente + health", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}),
+]
+
+
+class Command(BaseCommand):
+    help = "Mede a latência por requisição com e sem conexões persistentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições por modo (default 2000).")
+        parser.add_argument("--threads", type=int, default=8, help="Requisições simultâneas (default 8).")
+        parser.add_argument("--consultas", type=int, default=3, help="Consultas por requisição (default 3).")
+
+    def handle(self, *args, **options):
+        config = connections.settings["default"]
+        original = {chave: config[chave] for chave in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")}
+        self.stdout.write(
+            f"Banco: {config['ENGINE'].rsplit('.', 1)[-1]} {config.get('HOST') or config['NAME']} | "
+            f"{options['requisicoes']} requisições, {options['threads']} threads, "
+            f"{options['consultas']} consultas cada\n"
+        )
+        self.stdout.write(
+            f"{'modo':<22} {'req/s':>8} {'média':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'conexões':>9}"
+        )
+
+        abertas = []
+        contar = lambda **kwargs: abertas.append(1)
+        connection_created.connect(contar)
+        try:
+            for rotulo, ajuste in MODOS:
+                # As conexões de cada thread leem o mesmo dict de settings
+                config.update(ajuste)
+                connections.close_all()
+                abertas.clear()
+                latencias, total = self._rodar(options)
+                self._linha(rotulo, latencias, total, len(abertas))
+        finally:
+            connection_created.disconnect(contar)
+            config.update(original)
+            connections.close_all()
+
+    def _rodar(self, options):
+        por_thread, resto = divmod(options["requisicoes"], options["threads"])
+        latencias = []
+        lock = threading.Lock()
+
+        def trabalhador(quantidade):
+            locais = []
+            try:
+                for _ in range(quantidade):
+                    inicio = time.perf_counter()
+                    request_started.send(sender=self.__class__)
+                    try:
+                        for _ in range(options["consultas"]):
+                            with connection.cursor() as cursor:
+                                cursor.execute("SELECT 1")
+                                cursor.fetchone()
+                    finally:
+                        request_finished.send(sender=self.__class__)
+                    locais.append(time.perf_counter() - inicio)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencias.extend(locais)
+
+        threads = [
+            threading.Thread(target=trabalhador, args=(por_thread + (1 if i < resto else 0),))
+            for i in range(options["threads"])
+        ]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencias, time.perf_counter() - inicio
+
+    def _linha(self, rotulo, latencias, total, conexoes):
+        ms = sorted(latencia * 1000 for latencia in latencias)
+        if not ms:
+            self.stdout.write(f"{rotulo:<22} sem requisições concluídas")
+            return
+        percentil = lambda p: ms[min(len(ms) - 1, int(len(ms) * p))]
+        self.stdout.write(
+            f"{rotulo:<22} {len(ms) / total:>8.0f} {statistics.fmean(ms):>7.2f}ms "
+            f"{percentil(0.50):>7.2f}ms {percentil(0.95):>7.2f}ms {percentil(0.99):>7.2f}ms {conexoes:>9}"
+        )
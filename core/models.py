@@ -1,9 +1,85 @@
-from django.db import models
+import threading
+import time
+
+from django.db import models, transaction
 from django.utils import timezone
 from decimal import Decimal
 
 
-class ConfiguracaoEmpresa(models.Model):
+# ==============================================================================
+# SINGLETONS DE CONFIGURAÇÃO (cache no processo)
+# ==============================================================================
+
+VALIDADE_CONFIG = 1.0   # segundos entre conferências da versão no banco
+
+_configs = {}           # classe -> (instância, conferida_em)
+_configs_lock = threading.Lock()
+
+
+class ConfiguracaoSingleton(models.Model):
+    """
+    Configuração de linha única (pk=1) memorizada no processo.
+
+    get_config() devolve a instância do cache sem ir ao banco. No máximo
+    uma vez a cada VALIDADE_CONFIG segundos confere a versão da linha
+    (atualizado_em) numa consulta leve e só relê a configuração se ela
+    mudou — um save feito em outro worker chega a todos em até um segundo.
+    O save() limpa o cache do próprio processo na hora (e de novo no
+    commit).
+
+    A instância de get_config() é compartilhada entre requisições: só
+    leitura. Para alterar e salvar, use para_edicao().
+    """
+
+    PADROES = {}
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_config(cls):
+        """Retorna a configuração (singleton), do cache do processo. Cria se não existir."""
+        agora = time.monotonic()
+        memo = _configs.get(cls)
+        if memo is not None and agora - memo[1] < VALIDADE_CONFIG:
+            return memo[0]
+
+        with _configs_lock:
+            memo = _configs.get(cls)
+            if memo is not None:
+                if agora - memo[1] < VALIDADE_CONFIG:     # outra thread acabou de conferir
+                    return memo[0]
+                versao = cls.objects.filter(pk=1).values_list("atualizado_em", flat=True).first()
+                if versao is not None and versao == memo[0].atualizado_em:
+                    _configs[cls] = (memo[0], time.monotonic())
+                    return memo[0]
+            config = cls.para_edicao()
+            _configs[cls] = (config, time.monotonic())
+            return config
+
+    @classmethod
+    def para_edicao(cls):
+        """Instância lida do banco agora (fora do cache), para alterar e salvar."""
+        config, _ = cls.objects.get_or_create(pk=1, defaults=cls.PADROES)
+        return config
+
+    @classmethod
+    def limpar_cache(cls):
+        _configs.pop(cls, None)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.limpar_cache()
+        # Outra thread pode ter relido a versão antiga antes do commit
+        transaction.on_commit(self.limpar_cache)
+
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        self.limpar_cache()
+        return resultado
+
+
+class ConfiguracaoEmpresa(ConfiguracaoSingleton):
     """Configurações white-label da empresa para documentos e PDFs."""
 
     # Cabeçalho
@@ -39,6 +115,8 @@ class ConfiguracaoEmpresa(models.Model):
 
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    PADROES = {"nome_empresa": "Minha Empresa"}
+
     class Meta:
         verbose_name = "Configuração da Empresa"
         verbose_name_plural = "Configurações da Empresa"
@@ -64,14 +142,8 @@ class ConfiguracaoEmpresa(models.Model):
             partes.append(f"CEP: {self.cep}")
         return " — ".join(partes)
 
-    @classmethod
-    def get_config(cls):
-        """Retorna a configuração (singleton). Cria se não existir."""
-        config, _ = cls.objects.get_or_create(pk=1, defaults={"nome_empresa": "Minha Empresa"})
-        return config
-
 
-class ConfiguracaoScore(models.Model):
+class ConfiguracaoScore(ConfiguracaoSingleton):
     """Pesos e parâmetros do algoritmo de score de crédito."""
 
     # === PESOS (somam 100%) ===
@@ -103,7 +175,19 @@ class ConfiguracaoScore(models.Model):
     def __str__(self):
         return "Configuração do Score de Crédito"
 
-    @classmethod
-    def get_config(cls):
-        config, _ = cls.objects.get_or_create(pk=1)
-        return config
+
+class Sequencia(models.Model):
+    """
+    Contador de numeração (contratos, cartas, recebíveis...). Uma linha por
+    chave, ex.: "emprestimo:EMP:2026". Só é usado por core.sequencias.
+    """
+
+    chave = models.CharField("Chave", max_length=80, unique=True)
+    valor = models.PositiveBigIntegerField("Último número emitido", default=0)
+
+    class Meta:
+        verbose_name = "Sequência"
+        verbose_name_plural = "Sequências"
+
+    def __str__(self):
+        return f"{self.chave} = {self.valor}"
@@ -0,0 +1,145 @@
+"""
+Paginação por keyset (seek) para listagens grandes.
+
+Em vez de OFFSET, cada página parte da chave do último item visto
+(ex.: data + id). O banco desce direto no índice composto, então a
+página 1.000 custa o mesmo que a primeira.
+
+Uso:
+    pagina = paginar_keyset(qs, ["-data", "-id"], apos=request.GET.get("apos"),
+                            antes=request.GET.get("antes"), por_pagina=50)
+    pagina.itens, pagina.cursor_proximo, pagina.cursor_anterior
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db.models import Q
+
+
+@dataclass
+class PaginaKeyset:
+    itens: List = field(default_factory=list)
+    tem_proxima: bool = False
+    tem_anterior: bool = False
+    cursor_proximo: str = ""
+    cursor_anterior: str = ""
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def codificar_cursor(valores) -> str:
+    bruto = json.dumps([_serializar(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, model, campos) -> Optional[list]:
+    """Converte o cursor de volta nos tipos dos campos. None se inválido."""
+    if not cursor:
+        return None
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except ValueError:
+        return None
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+    try:
+        return [
+            model._meta.get_field(nome).to_python(valor)
+            for nome, valor in zip(_nomes(campos), valores)
+        ]
+    except Exception:
+        return None
+
+
+def _nomes(campos):
+    return [c.lstrip("-") for c in campos]
+
+
+def _inverter(campos):
+    return [c[1:] if c.startswith("-") else f"-{c}" for c in campos]
+
+
+def _condicao_seek(campos, valores, inclusivo=False):
+    """
+    Filtro "vem depois de `valores` na ordem `campos`".
+
+    Para ordem (a DESC, b DESC): a < va OR (a = va AND b < vb).
+    """
+    condicao = Q()
+    iguais = {}
+    for i, (campo, valor) in enumerate(zip(campos, valores)):
+        nome = campo.lstrip("-")
+        lookup = "lt" if campo.startswith("-") else "gt"
+        if inclusivo and i == len(campos) - 1:
+            lookup += "e"
+        condicao |= Q(**iguais, **{f"{nome}__{lookup}": valor})
+        iguais[nome] = valor
+    return condicao
+
+
+def _chave(obj, campos):
+    if isinstance(obj, dict):
+        return [obj[n] for n in _nomes(campos)]
+    return [getattr(obj, n) for n in _nomes(campos)]
+
+
+def paginar_keyset(queryset, campos, apos=None, antes=None, por_pagina=50):
+    """
+    Pagina `queryset` pela ordem `campos` (o último deve ser único, ex.: id).
+
+    - `apos`: cursor do último item da página anterior → próxima página.
+    - `antes`: cursor do primeiro item da página seguinte → página anterior.
+
+    A página é sempre buscada na ordem de exibição, então anotações com
+    Window(order_by=...) no queryset viram totais corridos da própria página.
+    """
+    model = queryset.model
+    ordenado = queryset.order_by(*campos)
+
+    valores_antes = decodificar_cursor(antes, model, campos)
+    valores_apos = decodificar_cursor(apos, model, campos) if valores_antes is None else None
+
+    pagina = PaginaKeyset()
+
+    if valores_antes is not None:
+        # Volta `por_pagina` chaves na ordem inversa e relê a página na ordem normal
+        chaves = list(
+            queryset.order_by(*_inverter(campos))
+            .filter(_condicao_seek(_inverter(campos), valores_antes))
+            .values_list(*_nomes(campos))[:por_pagina + 1]
+        )
+        if chaves:
+            pagina.tem_anterior = len(chaves) > por_pagina
+            inicio = list(chaves[min(por_pagina, len(chaves)) - 1])
+            itens = list(ordenado.filter(_condicao_seek(campos, inicio, inclusivo=True))[:por_pagina])
+            pagina.tem_proxima = True
+        else:
+            itens = list(ordenado[:por_pagina + 1])
+            pagina.tem_proxima = len(itens) > por_pagina
+            itens = itens[:por_pagina]
+    else:
+        if valores_apos is not None:
+            ordenado = ordenado.filter(_condicao_seek(campos, valores_apos))
+            pagina.tem_anterior = True
+        itens = list(ordenado[:por_pagina + 1])
+        pagina.tem_proxima = len(itens) > por_pagina
+        itens = itens[:por_pagina]
+
+    pagina.itens = itens
+    if itens:
+        if pagina.tem_proxima:
+            pagina.cursor_proximo = codificar_cursor(_chave(itens[-1], campos))
+        if pagina.tem_anterior:
+            pagina.cursor_anterior = codificar_cursor(_chave(itens[0], campos))
+    return pagina
@@ -0,0 +1,53 @@
+"""
+Numeração sequencial sem MAX() na tabela de destino.
+
+Cada série (prefixo/ano) tem uma linha em core.Sequencia. O próximo número
+sai de um UPDATE com F() sobre essa linha, travada com select_for_update:
+duas requisições simultâneas nunca recebem o mesmo número e o custo não
+depende do tamanho da tabela de contratos/cartas.
+
+    from core.sequencias import proximo, reservar
+
+    numero = proximo(f"carta_cobranca:{ano}")
+    for numero in reservar("emprestimo:EMP:2026", 500):  # carga em lote
+        ...
+
+A trava dura até o fim da transação de quem chamou (é isso que garante
+números sem duplicidade); dentro de um transaction.atomic longo, peça o
+número o mais perto possível do commit.
+
+Séries que já têm dados antes de existir o contador recebem `inicial`:
+uma função chamada uma única vez, na criação da linha, que devolve o
+último número já usado (normalmente um MAX() do legado).
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Sequencia
+
+
+def reservar(chave, quantidade=1, inicial=None):
+    """
+    Reserva um bloco de `quantidade` números consecutivos da série `chave`
+    e devolve um range com eles (um UPDATE só, qualquer que seja o tamanho).
+    """
+    if quantidade < 1:
+        raise ValueError("A quantidade reservada deve ser pelo menos 1.")
+
+    with transaction.atomic():
+        seq = Sequencia.objects.select_for_update().filter(chave=chave).first()
+        if seq is None:
+            Sequencia.objects.get_or_create(
+                chave=chave, defaults={"valor": inicial() if inicial else 0},
+            )
+            seq = Sequencia.objects.select_for_update().get(chave=chave)
+
+        Sequencia.objects.filter(pk=seq.pk).update(valor=F("valor") + quantidade)
+        ultimo = seq.valor + quantidade
+
+    return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+def proximo(chave, inicial=None):
+    """Próximo número da série `chave`."""
+    return reservar(chave, 1, inicial)[0]
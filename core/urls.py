@@ -5,4 +5,5 @@ app_name = "core"
 
 urlpatterns = [
     path("configuracoes/", views.configuracoes, name="configuracoes"),
+    path("exportar/<slug:nome>/<str:formato>/", views.exportar, name="exportar"),
 ]
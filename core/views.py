@@ -8,8 +8,9 @@ from .models import ConfiguracaoEmpresa, ConfiguracaoScore
 @login_required
 def configuracoes(request):
     """Tela de configuração white-label da empresa."""
-    config = ConfiguracaoEmpresa.get_config()
-    score_cfg = ConfiguracaoScore.get_config()
+    # Instâncias próprias: as de get_config() são compartilhadas (só leitura)
+    config = ConfiguracaoEmpresa.para_edicao()
+    score_cfg = ConfiguracaoScore.para_edicao()
 
     if request.method == "POST":
         secao = request.POST.get("secao", "empresa")
@@ -63,3 +64,47 @@ def configuracoes(request):
         return redirect("core:configuracoes")
 
     return render(request, "core/configuracoes.html", {"config": config, "score_cfg": score_cfg})
+
+
+@login_required
+def exportar(request, nome, formato):
+    """Download em streaming (CSV/XLSX) de uma exportação registrada."""
+    from django.http import Http404
+    from core.exportacao import obter_exportacao, exportar as gerar_exportacao
+
+    exportacao = obter_exportacao(nome)
+    if exportacao is None:
+        raise Http404("Exportação não encontrada.")
+
+    if not request.user.tem_permissao(exportacao.modulo, "VISUALIZAR"):
+        messages.error(request, "Você não tem permissão para exportar estes dados.")
+        return redirect("dashboard")
+
+    response = gerar_exportacao(request, nome, formato)
+    if response is None:
+        raise Http404("Formato de exportação não suportado.")
+    return response
+
+
+def metricas_cache(request):
+    """Página do admin com as métricas do cache compartilhado (core.cache), por namespace."""
+    from django.conf import settings
+    from django.contrib import admin
+    from core import cache
+
+    if request.method == "POST":
+        namespace = request.POST.get("invalidar")
+        if namespace:
+            cache.invalidar(namespace)
+            messages.success(request, f"Namespace '{namespace}' invalidado.")
+        elif "zerar" in request.POST:
+            cache.zerar_metricas()
+            messages.success(request, "Métricas zeradas.")
+        return redirect("admin_metricas_cache")
+
+    return render(request, "admin/core/metricas_cache.html", {
+        **admin.site.each_context(request),
+        "title": "Métricas do cache",
+        "backend": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+        "metricas": cache.metricas(),
+    })
@@ -0,0 +1,199 @@
+"""
+Construtores dos documentos da formalização (contrato e nota promissória).
+
+Recebem só dados simples (ver dados_contrato/dados_promissoria em
+views_esteira) e o Timbre, e devolvem os bytes do PDF: rodam no pool de
+core.documentos e o resultado fica no cache endereçado por conteúdo.
+"""
+from io import BytesIO
+
+from core.documentos import data_extenso, estilo, logo, moeda, valor_extenso
+
+
+def contrato_pdf(dados, timbre):
+    """Contrato de empréstimo (tabela Price)."""
+    from num2words import num2words
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    cli = dados["cliente"]
+    saida = BytesIO()
+    doc = SimpleDocTemplate(saida, pagesize=A4, topMargin=20*mm, bottomMargin=20*mm, leftMargin=25*mm, rightMargin=25*mm)
+    els = []
+
+    st_titulo = estilo("T", "Title", fontSize=14, spaceAfter=4)
+    st_sub = estilo("S", fontSize=10, alignment=TA_CENTER, spaceAfter=12)
+    st_corpo = estilo("C", fontSize=10, leading=16, alignment=TA_JUSTIFY, spaceAfter=8)
+    st_negrito = estilo("N", fontSize=10, leading=16, alignment=TA_JUSTIFY, spaceAfter=8, fontName="Helvetica-Bold")
+    st_data = estilo("D", fontSize=10, alignment=TA_RIGHT, spaceBefore=20)
+    st_assina = estilo("A", fontSize=10, alignment=TA_CENTER, spaceBefore=40)
+
+    imagem = logo(timbre)
+    if imagem is not None:
+        els.append(imagem)
+        els.append(Spacer(1, 4*mm))
+    els.append(Paragraph("CONTRATO DE EMPRÉSTIMO", st_titulo))
+    els.append(Paragraph(f"Nº {dados['numero']}", st_sub))
+    els.append(Spacer(1, 5*mm))
+
+    els.append(Paragraph(
+        f"Pelo presente instrumento particular, de um lado a <b>CREDORA</b>, doravante denominada "
+        f"simplesmente CREDORA, e de outro lado <b>{cli['nome']}</b>, inscrito(a) no CPF sob o "
+        f"nº <b>{cli['cpf']}</b>, residente e domiciliado(a) em <b>{cli['endereco']}</b>, "
+        f"doravante denominado(a) DEVEDOR(A), têm entre si justo e contratado o seguinte:",
+        st_corpo,
+    ))
+
+    # Cláusulas
+    clausulas = [
+        (
+            "CLÁUSULA PRIMEIRA — DO OBJETO",
+            f"A CREDORA concede ao(à) DEVEDOR(A) um empréstimo no valor de "
+            f"<b>{moeda(dados['valor'])} ({valor_extenso(dados['valor'])})</b>, que o(a) DEVEDOR(A) "
+            f"declara ter recebido nesta data, dando plena e irrevogável quitação.",
+        ),
+        (
+            "CLÁUSULA SEGUNDA — DOS JUROS E ENCARGOS",
+            f"Sobre o valor emprestado incidirão juros remuneratórios de <b>{dados['taxa_juros']}% "
+            f"ao mês</b> (tabela Price), totalizando <b>{moeda(dados['total_juros'])}</b> de juros "
+            f"e o montante final de <b>{moeda(dados['total_contrato'])}</b>.",
+        ),
+        (
+            "CLÁUSULA TERCEIRA — DO PAGAMENTO",
+            f"O(A) DEVEDOR(A) se obriga a pagar o valor total em <b>{dados['qtd_parcelas']} "
+            f"({num2words(dados['qtd_parcelas'], lang='pt_BR')}) parcelas</b> mensais, "
+            f"fixas e consecutivas, no valor de <b>{moeda(dados['valor_parcela'])}</b> cada, "
+            f"com primeiro vencimento em <b>{dados['primeiro_vencimento'].strftime('%d/%m/%Y')}</b>.",
+        ),
+        (
+            "CLÁUSULA QUARTA — DA MORA",
+            "Em caso de atraso no pagamento de qualquer parcela, incidirá multa de <b>2% (dois por cento)</b> "
+            "sobre o valor da parcela em atraso, acrescida de juros de mora de <b>1% (um por cento) ao mês</b>, "
+            "calculados pro rata die.",
+        ),
+        (
+            "CLÁUSULA QUINTA — DO VENCIMENTO ANTECIPADO",
+            "O não pagamento de qualquer parcela em seu vencimento acarretará o vencimento antecipado "
+            "de todas as demais parcelas, tornando-se a dívida integralmente exigível, podendo a CREDORA "
+            "inscrever o nome do(a) DEVEDOR(A) nos órgãos de proteção ao crédito, protestar o título "
+            "em cartório e promover a execução judicial do débito.",
+        ),
+        (
+            "CLÁUSULA SEXTA — DO FORO",
+            f"Fica eleito o foro da Comarca de <b>{timbre.foro}</b> para dirimir quaisquer questões "
+            "oriundas deste contrato, com renúncia expressa de qualquer outro, por mais privilegiado que seja.",
+        ),
+    ]
+
+    for titulo, texto in clausulas:
+        els.append(Paragraph(titulo, st_negrito))
+        els.append(Paragraph(texto, st_corpo))
+
+    els.append(Paragraph(
+        "E, por estarem assim justos e contratados, assinam o presente instrumento em "
+        "duas vias de igual teor e forma.",
+        st_corpo,
+    ))
+
+    els.append(Paragraph(f"{timbre.cidade}, {data_extenso(dados['data_emissao'])}.", st_data))
+
+    # Assinaturas
+    els.append(Spacer(1, 15*mm))
+    assin_data = [
+        [Paragraph("_" * 35, st_assina), Paragraph("_" * 35, st_assina)],
+        [Paragraph("<b>CREDORA</b>", st_assina), Paragraph(f"<b>DEVEDOR(A)</b><br/>{cli['nome']}<br/>CPF: {cli['cpf']}", st_assina)],
+    ]
+    assin_tab = Table(assin_data, colWidths=[80*mm, 80*mm])
+    assin_tab.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")]))
+    els.append(assin_tab)
+
+    # Testemunhas
+    els.append(Spacer(1, 15*mm))
+    els.append(Paragraph("<b>Testemunhas:</b>", st_corpo))
+    test_data = [
+        [Paragraph("_" * 30, st_assina), Paragraph("_" * 30, st_assina)],
+        [Paragraph("Nome:<br/>CPF:", st_assina), Paragraph("Nome:<br/>CPF:", st_assina)],
+    ]
+    els.append(Table(test_data, colWidths=[80*mm, 80*mm]))
+
+    doc.build(els)
+    return saida.getvalue()
+
+
+def promissoria_pdf(dados, timbre):
+    """Nota promissória vinculada ao contrato."""
+    from num2words import num2words
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    cli = dados["cliente"]
+    total = dados["total_contrato"]
+    saida = BytesIO()
+    doc = SimpleDocTemplate(saida, pagesize=A4, topMargin=25*mm, bottomMargin=25*mm, leftMargin=25*mm, rightMargin=25*mm)
+    els = []
+
+    st_titulo = estilo("T", "Title", fontSize=16, spaceAfter=4, fontName="Helvetica-Bold")
+    st_sub = estilo("S", fontSize=10, alignment=TA_CENTER, spaceAfter=15)
+    st_corpo = estilo("C", fontSize=11, leading=18, alignment=TA_JUSTIFY, spaceAfter=10)
+    st_campo = estilo("F", fontSize=10, leading=16, spaceAfter=4)
+    st_data = estilo("D", fontSize=10, alignment=TA_RIGHT, spaceBefore=20)
+    st_assina = estilo("A", fontSize=10, alignment=TA_CENTER, spaceBefore=30)
+
+    # Cabeçalho
+    els.append(Paragraph("NOTA PROMISSÓRIA", st_titulo))
+    els.append(Paragraph(f"Vinculada ao Contrato {dados['numero']}", st_sub))
+
+    # Dados em formato de tabela
+    info = [
+        ["Nº:", f"{dados['numero']}", "Vencimento:", f"{dados['ultimo_vencimento'].strftime('%d/%m/%Y')}"],
+        ["Valor:", f"{moeda(total)}", "", ""],
+    ]
+    info_tab = Table(info, colWidths=[20*mm, 60*mm, 25*mm, 55*mm])
+    info_tab.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+        ("FONTNAME", (2, 0), (2, -1), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
+        ("BACKGROUND", (2, 0), (2, 0), colors.HexColor("#f0f0f0")),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]))
+    els.append(info_tab)
+    els.append(Spacer(1, 8*mm))
+
+    # Corpo
+    els.append(Paragraph(
+        f"No vencimento acima indicado, pagarei por esta única via de NOTA PROMISSÓRIA "
+        f"a quantia de <b>{moeda(total)} ({valor_extenso(total)})</b> ao portador desta ou à sua ordem.",
+        st_corpo,
+    ))
+
+    els.append(Paragraph(
+        f"Pagável em <b>{dados['qtd_parcelas']} ({num2words(dados['qtd_parcelas'], lang='pt_BR')}) "
+        f"parcelas mensais</b> de <b>{moeda(dados['valor_parcela'])}</b>, a primeira com vencimento em "
+        f"<b>{dados['primeiro_vencimento'].strftime('%d/%m/%Y')}</b>.",
+        st_corpo,
+    ))
+
+    els.append(Spacer(1, 5*mm))
+
+    # Dados do emitente
+    els.append(Paragraph(f"<b>Emitente:</b> {cli['nome']}", st_campo))
+    els.append(Paragraph(f"<b>CPF:</b> {cli['cpf']}", st_campo))
+    els.append(Paragraph(f"<b>Endereço:</b> {cli['endereco']}", st_campo))
+
+    els.append(Paragraph(f"{timbre.cidade}, {data_extenso(dados['data_emissao'])}.", st_data))
+
+    # Assinatura
+    els.append(Spacer(1, 20*mm))
+    els.append(Paragraph("_" * 40, st_assina))
+    els.append(Paragraph(f"<b>{cli['nome']}</b><br/>CPF: {cli['cpf']}", st_assina))
+
+    doc.build(els)
+    return saida.getvalue()
@@ -0,0 +1,267 @@
+"""
+Indicadores da esteira de aprovação (vazão, duração das etapas, funil).
+
+Duas fases, para o relatório não pesar no banco operacional:
+
+1. consolidar(inicio, fim) — roda fora do horário (comando
+   consolidar_esteira). Uma passada sobre as etapas das propostas
+   que tiveram movimento no período, com funções de janela:
+   ROW_NUMBER por (proposta, etapa) marca as reentradas numa etapa
+   (retrabalho depois de uma devolução), LEAD(criado_em) fecha etapas
+   antigas sem finalizado_em e MIN(criado_em) da proposta dá o início
+   do ciclo. Grava um ResumoDiarioEsteira por (dia, etapa), com as
+   durações num histograma de tamanho fixo.
+
+2. relatorio(desde, ate) — lê só os resumos diários (algumas centenas
+   de linhas por ano), soma os histogramas e calcula percentis
+   (p50/p90/p99), taxas de aprovação e a conversão do funil.
+
+Histogramas: faixas logarítmicas de segundos, cada uma 10% maior que a
+anterior (FATOR_FAIXA), até FAIXAS faixas (~6 anos); guardados como
+{"faixa": contagem}. O tamanho do resumo e o custo do relatório não
+dependem do volume de eventos, e o percentil sai com erro relativo de
+no máximo ~5% (meio da faixa).
+"""
+import math
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Lead, RowNumber
+from django.utils import timezone
+
+from .models import EtapaProposta, ResumoDiarioEsteira, VotoComite
+
+
+ETAPAS = [codigo for codigo, _ in EtapaProposta.Etapa.choices]
+PERCENTIS = (50, 90, 99)
+
+FATOR_FAIXA = 1.1
+FAIXAS = 200                # FATOR_FAIXA ** 200 s ≈ 6 anos; acima disso, última faixa
+_LOG_FATOR = math.log(FATOR_FAIXA)
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def _dia(momento):
+    return timezone.localtime(momento).date()
+
+
+# ==============================================================================
+# HISTOGRAMAS (faixas logarítmicas de segundos)
+# ==============================================================================
+
+def faixa(segundos):
+    """Faixa do valor: 0 para < 1 s; i para [FATOR^(i-1), FATOR^i)."""
+    if segundos < 1:
+        return 0
+    return min(FAIXAS, int(math.log(segundos) / _LOG_FATOR) + 1)
+
+
+def valor_faixa(indice):
+    """Valor representativo da faixa (meio geométrico), em segundos."""
+    if indice == 0:
+        return 0
+    return round(FATOR_FAIXA ** (indice - 0.5))
+
+
+def somar(histograma, segundos, quantidade=1):
+    chave = str(faixa(segundos))
+    histograma[chave] = histograma.get(chave, 0) + quantidade
+
+
+def juntar(destino, histograma):
+    """Soma `histograma` em `destino` (os dois no formato {"faixa": contagem})."""
+    for chave, quantidade in histograma.items():
+        destino[chave] = destino.get(chave, 0) + quantidade
+
+
+def histograma(valores):
+    resultado = {}
+    for segundos in valores:
+        somar(resultado, segundos)
+    return resultado
+
+
+def total(histograma):
+    return sum(histograma.values())
+
+
+def percentis(histograma, ps=PERCENTIS):
+    """{p: segundos} pelo método nearest-rank sobre as faixas; None se vazio."""
+    n = total(histograma)
+    if not n:
+        return {p: None for p in ps}
+    faixas = sorted((int(chave), quantidade) for chave, quantidade in histograma.items())
+    resultado = {}
+    for p in ps:
+        posicao = max(1, math.ceil(p / 100 * n))
+        acumulado = 0
+        for indice, quantidade in faixas:
+            acumulado += quantidade
+            if acumulado >= posicao:
+                resultado[p] = valor_faixa(indice)
+                break
+    return resultado
+
+
+# ==============================================================================
+# 1. CONSOLIDAÇÃO (funções de janela numa passada → ResumoDiarioEsteira)
+# ==============================================================================
+
+def _linhas_etapas(inicio, fim):
+    """Etapas de todas as propostas com movimento em [inicio, fim), com as colunas de janela."""
+    janela = {
+        "partition_by": [F("proposta_id")],
+        "order_by": [F("criado_em").asc(), F("id").asc()],
+    }
+    movimentadas = EtapaProposta.objects.filter(
+        Q(criado_em__gte=inicio, criado_em__lt=fim) | Q(finalizado_em__gte=inicio, finalizado_em__lt=fim)
+    ).values("proposta_id")
+
+    return (
+        EtapaProposta.objects.filter(proposta_id__in=Subquery(movimentadas))
+        .annotate(
+            passagem=Window(RowNumber(), partition_by=[F("proposta_id"), F("etapa")], order_by=janela["order_by"]),
+            inicio_proxima=Window(Lead("criado_em"), **janela),
+            inicio_proposta=Window(Min("criado_em"), partition_by=[F("proposta_id")]),
+        )
+        .order_by()
+        .values(
+            "etapa", "resultado", "ativa", "criado_em", "finalizado_em",
+            "passagem", "inicio_proxima", "inicio_proposta",
+        )
+    )
+
+
+def _latencias_voto(inicio, fim):
+    """(data_voto, entrada no comitê) de cada voto do período."""
+    entrada_comite = EtapaProposta.objects.filter(
+        proposta=OuterRef("proposta"), etapa="COMITE", criado_em__lte=OuterRef("data_voto"),
+    ).order_by("-criado_em").values("criado_em")[:1]
+
+    return (
+        VotoComite.objects.filter(data_voto__gte=inicio, data_voto__lt=fim)
+        .annotate(entrada_comite=Subquery(entrada_comite))
+        .order_by()
+        .values_list("data_voto", "entrada_comite")
+    )
+
+
+def consolidar(inicio, fim):
+    """
+    Recalcula os resumos dos dias inicio..fim (inclusive) e devolve quantos
+    foram gravados. Pode rodar de novo sobre os mesmos dias (substitui).
+    """
+    ini, fim_exclusivo = _inicio_do_dia(inicio), _inicio_do_dia(fim + timedelta(days=1))
+    resumos = {}
+
+    def resumo(dia, etapa):
+        chave = (dia, etapa)
+        if chave not in resumos:
+            resumos[chave] = ResumoDiarioEsteira(data=dia, etapa=etapa)
+        return resumos[chave]
+
+    for linha in _linhas_etapas(ini, fim_exclusivo).iterator(chunk_size=5000):
+        etapa = linha["etapa"]
+        if ini <= linha["criado_em"] < fim_exclusivo:
+            r = resumo(_dia(linha["criado_em"]), etapa)
+            r.entradas += 1
+            if linha["passagem"] > 1:
+                r.retrabalho += 1
+
+        # Etapas antigas encerradas sem finalizado_em: vale o início da seguinte
+        fim_etapa = linha["finalizado_em"]
+        if fim_etapa is None and not linha["ativa"]:
+            fim_etapa = linha["inicio_proxima"]
+        if fim_etapa is None or not (ini <= fim_etapa < fim_exclusivo):
+            continue
+
+        r = resumo(_dia(fim_etapa), etapa)
+        somar(r.duracoes, (fim_etapa - linha["criado_em"]).total_seconds())
+        resultado = linha["resultado"]
+        if resultado == EtapaProposta.Resultado.APROVADO:
+            r.aprovadas += 1
+            if etapa == EtapaProposta.Etapa.LIBERACAO:
+                somar(r.ciclos, (fim_etapa - linha["inicio_proposta"]).total_seconds())
+        elif resultado == EtapaProposta.Resultado.DEVOLVIDO:
+            r.devolvidas += 1
+        elif resultado == EtapaProposta.Resultado.NEGADO:
+            r.negadas += 1
+
+    for data_voto, entrada_comite in _latencias_voto(ini, fim_exclusivo):
+        if entrada_comite is not None:
+            somar(
+                resumo(_dia(data_voto), EtapaProposta.Etapa.COMITE).latencias_voto,
+                (data_voto - entrada_comite).total_seconds(),
+            )
+
+    with transaction.atomic():
+        ResumoDiarioEsteira.objects.filter(data__gte=inicio, data__lte=fim).delete()
+        ResumoDiarioEsteira.objects.bulk_create(resumos.values(), batch_size=500)
+    return len(resumos)
+
+
+# ==============================================================================
+# 2. RELATÓRIO (só os resumos diários)
+# ==============================================================================
+
+def _horas(histograma):
+    """{"p50": h, "p90": h, "p99": h} em horas."""
+    return {f"p{p}": (v / 3600 if v is not None else None) for p, v in percentis(histograma).items()}
+
+
+def relatorio(desde, ate):
+    """
+    Indicadores do período [desde, ate] a partir de ResumoDiarioEsteira.
+
+    Returns:
+        dict com "etapas" (uma linha por etapa, na ordem do fluxo: entradas,
+        retrabalho, resultados, taxa de aprovação, conversão para a próxima
+        etapa e percentis de duração em horas), "ciclo" (percentis em horas
+        da captação à liberação), "latencia_voto" e "consolidado_ate".
+    """
+    por_etapa = {
+        etapa: {
+            "etapa": etapa, "nome": nome, "entradas": 0, "retrabalho": 0,
+            "aprovadas": 0, "devolvidas": 0, "negadas": 0, "duracoes": {},
+        }
+        for etapa, nome in EtapaProposta.Etapa.choices
+    }
+    ciclos, latencias = {}, {}
+
+    for r in ResumoDiarioEsteira.objects.filter(data__gte=desde, data__lte=ate):
+        linha = por_etapa.get(r.etapa)
+        if linha is None:
+            continue
+        for campo in ("entradas", "retrabalho", "aprovadas", "devolvidas", "negadas"):
+            linha[campo] += getattr(r, campo)
+        juntar(linha["duracoes"], r.duracoes)
+        juntar(ciclos, r.ciclos)
+        juntar(latencias, r.latencias_voto)
+
+    etapas = []
+    for etapa in ETAPAS:
+        linha = por_etapa[etapa]
+        decididas = linha["aprovadas"] + linha["devolvidas"] + linha["negadas"]
+        linha["primeiras_entradas"] = linha["entradas"] - linha["retrabalho"]
+        linha["taxa_aprovacao"] = round(linha["aprovadas"] / decididas * 100, 1) if decididas else None
+        linha["duracao_horas"] = _horas(linha.pop("duracoes"))
+        linha["finalizadas"] = decididas
+        etapas.append(linha)
+
+    # Funil: quantas propostas que entraram numa etapa chegaram à seguinte
+    for atual, seguinte in zip(etapas, etapas[1:]):
+        base = atual["primeiras_entradas"]
+        atual["conversao"] = round(seguinte["primeiras_entradas"] / base * 100, 1) if base else None
+    etapas[-1]["conversao"] = None
+
+    ultimo = ResumoDiarioEsteira.objects.order_by("-data").values_list("data", flat=True).first()
+    return {
+        "etapas": etapas,
+        "ciclo": {"quantidade": total(ciclos), **_horas(ciclos)},
+        "latencia_voto": {"quantidade": total(latencias), **_horas(latencias)},
+        "consolidado_ate": ultimo,
+    }
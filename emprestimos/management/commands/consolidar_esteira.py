@@ -0,0 +1,56 @@
+"""
+Consolidação diária dos indicadores da esteira (ResumoDiarioEsteira).
+Roda automaticamente (cron, de madrugada) ou manualmente:
+
+    python manage.py consolidar_esteira                    # ontem e hoje
+    python manage.py consolidar_esteira --dias 7
+    python manage.py consolidar_esteira --desde 2025-01-01 # carga inicial
+
+Os dias informados são recalculados por inteiro (pode rodar de novo).
+O relatório de indicadores lê só a tabela consolidada.
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from emprestimos.indicadores_esteira import consolidar
+
+
+class Command(BaseCommand):
+    help = "Consolida os indicadores diários da esteira de aprovação"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias", type=int, default=2,
+            help="Quantos dias até hoje recalcular (default 2: ontem e hoje).",
+        )
+        parser.add_argument(
+            "--desde", type=str, default="",
+            help="Recalcula desde esta data (YYYY-MM-DD) até hoje.",
+        )
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        if options["desde"]:
+            try:
+                inicio = date.fromisoformat(options["desde"])
+            except ValueError:
+                raise CommandError("Data inválida em --desde (use YYYY-MM-DD).")
+        else:
+            inicio = hoje - timedelta(days=max(1, options["dias"]) - 1)
+
+        # Em blocos de 90 dias: a carga inicial não monta um período enorme de uma vez
+        total = 0
+        comeco = time.perf_counter()
+        bloco_inicio = inicio
+        while bloco_inicio <= hoje:
+            bloco_fim = min(hoje, bloco_inicio + timedelta(days=89))
+            total += consolidar(bloco_inicio, bloco_fim)
+            bloco_inicio = bloco_fim + timedelta(days=1)
+
+        self.stdout.write(
+            f"Esteira consolidada de {inicio:%d/%m/%Y} a {hoje:%d/%m/%Y}: "
+            f"{total} resumo(s) diário(s) em {time.perf_counter() - comeco:.1f}s."
+        )
@@ -0,0 +1,91 @@
+"""
+Varredura de SLA da esteira de aprovação.
+Roda periodicamente (cron, ex.: a cada 15 minutos) ou manualmente:
+
+    python manage.py monitorar_sla
+    python manage.py monitorar_sla --antecedencia-horas 8 --dry-run
+
+Fluxo:
+1. Uma consulta por faixa no índice (ativa, prazo_sla): etapas em aberto
+   já estouradas ou que vencem dentro da antecedência
+2. Cada etapa que mudou de nível (→ próximo do prazo, → estourado) gera
+   um alerta no log (logs/django.log) e na saída do comando
+3. O nível alertado fica gravado na etapa (alerta_sla), então a mesma
+   etapa não é alertada de novo a cada execução
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from emprestimos.models import EtapaProposta
+from emprestimos.services_esteira import ANTECEDENCIA_ALERTA_SLA, etapas_sla_em_risco
+
+logger = logging.getLogger("django")
+
+Alerta = EtapaProposta.AlertaSla
+GRAVIDADE = {Alerta.NENHUM: 0, Alerta.PROXIMO: 1, Alerta.ESTOURADO: 2}
+
+
+class Command(BaseCommand):
+    help = "Alerta etapas da esteira com SLA estourado ou perto do prazo"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--antecedencia-horas", type=float,
+            default=ANTECEDENCIA_ALERTA_SLA.total_seconds() / 3600,
+            help="Alerta etapas que vencem dentro deste número de horas (default 4).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Lista os alertas sem gravar o nível alertado.",
+        )
+
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        antecedencia = timedelta(hours=options["antecedencia_horas"])
+        dry_run = options["dry_run"]
+
+        alertadas = []
+        estouradas = proximas = 0
+        for etapa in etapas_sla_em_risco(agora, antecedencia):
+            nivel = Alerta.ESTOURADO if etapa.prazo_sla < agora else Alerta.PROXIMO
+            if nivel == Alerta.ESTOURADO:
+                estouradas += 1
+            else:
+                proximas += 1
+
+            if GRAVIDADE[nivel] <= GRAVIDADE.get(etapa.alerta_sla, 0):
+                continue
+
+            self._alertar(etapa, nivel, agora)
+            etapa.alerta_sla = nivel
+            alertadas.append(etapa)
+
+        if alertadas and not dry_run:
+            EtapaProposta.objects.bulk_update(alertadas, ["alerta_sla"])
+
+        self.stdout.write(
+            f"SLA: {estouradas} estourada(s), {proximas} perto do prazo, "
+            f"{len(alertadas)} alerta(s) novo(s){' (dry-run)' if dry_run else ''}."
+        )
+
+    def _alertar(self, etapa, nivel, agora):
+        proposta = etapa.proposta
+        local = timezone.localtime(etapa.prazo_sla).strftime("%d/%m/%Y %H:%M")
+        if nivel == EtapaProposta.AlertaSla.ESTOURADO:
+            horas = (agora - etapa.prazo_sla).total_seconds() / 3600
+            situacao = f"SLA ESTOURADO há {horas:.1f}h (prazo {local})"
+        else:
+            horas = (etapa.prazo_sla - agora).total_seconds() / 3600
+            situacao = f"SLA vence em {horas:.1f}h (prazo {local})"
+
+        mensagem = (
+            f"Esteira: proposta #{proposta.id} ({proposta.cliente.nome_completo}) "
+            f"em {etapa.get_etapa_display()} — {situacao}"
+        )
+        if etapa.responsavel:
+            mensagem += f" — responsável: {etapa.responsavel}"
+        logger.warning(mensagem)
+        self.stdout.write(f"  {mensagem}")
@@ -14,6 +14,8 @@ Fluxo:
       - Saldo >= parcela → paga total
       - 0 < Saldo < parcela → paga parcial (cria registro)
       - Saldo = 0 → não faz nada
+3. Recalcula o status de todos os contratos ativos/atrasados em lote
+   (ATIVO ↔ ATRASADO ↔ QUITADO)
 """
 import logging
 from datetime import date, timedelta
@@ -24,7 +26,7 @@ from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
 
-from emprestimos.models import Emprestimo, Parcela, ParcelaStatus
+from emprestimos.models import Emprestimo, EmprestimoStatus, Parcela, ParcelaStatus, atualizar_status_em_lote
 from contas.models import ContaCorrente, MovimentacaoConta
 from financeiro.models import ChequeCustodia
 
@@ -104,6 +106,13 @@ class Command(BaseCommand):
             else:
                 sem_saldo += 1
 
+        # Status dos contratos (pagamentos de hoje + parcelas que venceram)
+        status_alterados = 0
+        if not dry_run:
+            status_alterados = atualizar_status_em_lote(
+                Emprestimo.objects.filter(status__in=[EmprestimoStatus.ATIVO, EmprestimoStatus.ATRASADO])
+            )
+
         # Resumo
         self.stdout.write(f"\n{'='*60}")
         self.stdout.write(f"  RESUMO:")
@@ -112,6 +121,7 @@ class Command(BaseCommand):
         self.stdout.write(f"    Cheques enviados:    {cheques_enviados}")
         self.stdout.write(f"    Aguardando cheque:   {aguardando_cheque}")
         self.stdout.write(f"    Sem saldo:           {sem_saldo}")
+        self.stdout.write(f"    Status atualizados:  {status_alterados}")
         self.stdout.write(f"{'='*60}\n")
 
     def _processar_cheque(self, parcela, cheque, cliente, dry_run):
@@ -132,7 +142,6 @@ class Command(BaseCommand):
                     parcela.status = ParcelaStatus.PAGA
                     parcela.data_pagamento = date.today()
                     parcela.save()
-                    parcela.emprestimo.atualizar_status()
             return "PAGO"
 
         elif cheque.status == "EM_CUSTODIA":
@@ -187,7 +196,6 @@ class Command(BaseCommand):
                     parcela.status = ParcelaStatus.PAGA
                     parcela.data_pagamento = date.today()
                     parcela.save()
-                    parcela.emprestimo.atualizar_status()
             return "TOTAL"
         else:
             # Pagamento parcial
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_cliente_chave_busca'),
+        ('emprestimos', '0009_propostaemprestimo_contrato_renegociado_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emprestimo',
+            index=models.Index(fields=['-criado_em', '-id'], name='emprestimo_criado_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emprestimo',
+            index=models.Index(fields=['status', '-criado_em', '-id'], name='emprestimo_status_criado_idx'),
+        ),
+    ]
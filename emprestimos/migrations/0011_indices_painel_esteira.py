@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_cliente_chave_busca'),
+        ('emprestimos', '0010_emprestimo_indices_listagem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='etapaproposta',
+            index=models.Index(fields=['proposta', 'ativa', '-criado_em'], name='etapa_proposta_ativa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propostaemprestimo',
+            index=models.Index(fields=['status', '-data_solicitacao', '-id'], name='proposta_status_data_idx'),
+        ),
+    ]
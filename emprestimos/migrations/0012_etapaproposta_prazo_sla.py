@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:28
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+# Cópia de EtapaProposta.SLA_HORAS na data da migração
+SLA_HORAS = {
+    "CAPTACAO": 4,
+    "DOCUMENTACAO": 24,
+    "ANALISE_CREDITO": 48,
+    "COMITE": 72,
+    "FORMALIZACAO": 24,
+    "LIBERACAO": 8,
+}
+
+
+def preencher_prazo_sla(apps, schema_editor):
+    """prazo_sla = criado_em + SLA da etapa — um UPDATE por etapa."""
+    EtapaProposta = apps.get_model("emprestimos", "EtapaProposta")
+    pendentes = EtapaProposta.objects.filter(prazo_sla__isnull=True)
+    for etapa, horas in SLA_HORAS.items():
+        pendentes.filter(etapa=etapa).update(prazo_sla=F("criado_em") + timedelta(hours=horas))
+    pendentes.update(prazo_sla=F("criado_em") + timedelta(hours=24))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emprestimos', '0011_indices_painel_esteira'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etapaproposta',
+            name='alerta_sla',
+            field=models.CharField(blank=True, choices=[('', 'Nenhum'), ('PROXIMO', 'Próximo do prazo'), ('ESTOURADO', 'Estourado')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='etapaproposta',
+            name='prazo_sla',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Prazo SLA'),
+        ),
+        migrations.RunPython(preencher_prazo_sla, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='etapaproposta',
+            index=models.Index(fields=['ativa', 'prazo_sla'], name='etapa_ativa_prazo_sla_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emprestimos', '0012_etapaproposta_prazo_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiarioEsteira',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('etapa', models.CharField(choices=[('CAPTACAO', 'Captação'), ('DOCUMENTACAO', 'Análise Documental'), ('ANALISE_CREDITO', 'Análise de Crédito'), ('COMITE', 'Comitê'), ('FORMALIZACAO', 'Formalização'), ('LIBERACAO', 'Liberação')], max_length=20)),
+                ('entradas', models.PositiveIntegerField(default=0)),
+                ('retrabalho', models.PositiveIntegerField(default=0)),
+                ('aprovadas', models.PositiveIntegerField(default=0)),
+                ('devolvidas', models.PositiveIntegerField(default=0)),
+                ('negadas', models.PositiveIntegerField(default=0)),
+                ('duracoes', models.JSONField(blank=True, default=list, help_text='Duração de cada etapa finalizada no dia')),
+                ('ciclos', models.JSONField(blank=True, default=list, help_text='LIBERACAO: captação → liberação, por proposta')),
+                ('latencias_voto', models.JSONField(blank=True, default=list, help_text='COMITE: entrada no comitê → voto')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário da Esteira',
+                'verbose_name_plural': 'Resumos Diários da Esteira',
+                'ordering': ['data', 'etapa'],
+                'unique_together': {('data', 'etapa')},
+            },
+        ),
+    ]
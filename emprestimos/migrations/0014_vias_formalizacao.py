@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emprestimos', '0013_resumodiarioesteira'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratoformalizado',
+            name='contrato_arquivo',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Arquivo do Contrato'),
+        ),
+        migrations.AddField(
+            model_name='contratoformalizado',
+            name='contrato_sha256',
+            field=models.CharField(blank=True, max_length=64, verbose_name='SHA-256 do Contrato'),
+        ),
+        migrations.AddField(
+            model_name='contratoformalizado',
+            name='promissoria_arquivo',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Arquivo da Promissória'),
+        ),
+        migrations.AddField(
+            model_name='contratoformalizado',
+            name='promissoria_sha256',
+            field=models.CharField(blank=True, max_length=64, verbose_name='SHA-256 da Promissória'),
+        ),
+        migrations.AlterField(
+            model_name='contratolog',
+            name='acao',
+            field=models.CharField(choices=[('CRIADO', 'Criado'), ('PAGO', 'Pago'), ('RENEGOCIADO', 'Renegociado'), ('CANCELADO', 'Cancelado'), ('REABERTO', 'Reaberto'), ('REEMITIDO', 'Documento reemitido')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:56
+
+import math
+
+from django.db import migrations, models
+
+
+# Cópia das faixas de indicadores_esteira (FATOR_FAIXA, FAIXAS) na data da migração
+FATOR_FAIXA = 1.1
+FAIXAS = 200
+
+
+def _histograma(valores):
+    resultado = {}
+    for segundos in valores:
+        faixa = 0 if segundos < 1 else min(FAIXAS, int(math.log(segundos) / math.log(FATOR_FAIXA)) + 1)
+        resultado[str(faixa)] = resultado.get(str(faixa), 0) + 1
+    return resultado
+
+
+def listas_para_histogramas(apps, schema_editor):
+    ResumoDiarioEsteira = apps.get_model("emprestimos", "ResumoDiarioEsteira")
+    campos = ("duracoes", "ciclos", "latencias_voto")
+    alterados = []
+    for resumo in ResumoDiarioEsteira.objects.iterator(chunk_size=500):
+        for campo in campos:
+            valor = getattr(resumo, campo)
+            if isinstance(valor, list):
+                setattr(resumo, campo, _histograma(valor))
+        alterados.append(resumo)
+    ResumoDiarioEsteira.objects.bulk_update(alterados, campos, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emprestimos', '0014_vias_formalizacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resumodiarioesteira',
+            name='ciclos',
+            field=models.JSONField(blank=True, default=dict, help_text='LIBERACAO: histograma captação → liberação'),
+        ),
+        migrations.AlterField(
+            model_name='resumodiarioesteira',
+            name='duracoes',
+            field=models.JSONField(blank=True, default=dict, help_text='Histograma da duração das etapas finalizadas no dia'),
+        ),
+        migrations.AlterField(
+            model_name='resumodiarioesteira',
+            name='latencias_voto',
+            field=models.JSONField(blank=True, default=dict, help_text='COMITE: histograma entrada no comitê → voto'),
+        ),
+        migrations.RunPython(listas_para_histogramas, migrations.RunPython.noop),
+    ]
@@ -104,59 +104,77 @@ class Emprestimo(models.Model):
         indexes = [
             models.Index(fields=["codigo_contrato"]),
             models.Index(fields=["status"]),
+            # Keyset da listagem de contratos (criado_em, id), com e sem filtro de status
+            models.Index(fields=["-criado_em", "-id"], name="emprestimo_criado_id_idx"),
+            models.Index(fields=["status", "-criado_em", "-id"], name="emprestimo_status_criado_idx"),
         ]
 
     def __str__(self):
         return f"{self.codigo_contrato} - {self.cliente.nome_completo}"
 
-    def atualizar_status(self):
+    def _parcelas(self):
+        """
+        Parcelas do contrato numa única leitura. Se a view fez
+        prefetch_related("parcelas"), usa o cache e não consulta o banco.
+        """
+        return list(self.parcelas.all())
+
+    @staticmethod
+    def _status_calculado(status_atual, total, abertas, vencidas):
+        """Regra de status a partir das contagens de parcelas."""
+        if status_atual == EmprestimoStatus.CANCELADO:
+            return status_atual
+        if not total:
+            return EmprestimoStatus.ATIVO
+        if not abertas:
+            return EmprestimoStatus.QUITADO
+        return EmprestimoStatus.ATRASADO if vencidas else EmprestimoStatus.ATIVO
+
+    def atualizar_status(self, parcelas=None):
         if self.status == EmprestimoStatus.CANCELADO:
             return
 
         hoje = timezone.localdate()
-        qs = self.parcelas.all()
-
-        if not qs.exists():
-            self.status = EmprestimoStatus.ATIVO
-            return
-
-        abertas = qs.filter(status=ParcelaStatus.ABERTA)
-        if not abertas.exists():
-            self.status = EmprestimoStatus.QUITADO
-            return
-
-        vencidas = abertas.filter(vencimento__lt=hoje)
-        self.status = EmprestimoStatus.ATRASADO if vencidas.exists() else EmprestimoStatus.ATIVO
+        parcelas = self._parcelas() if parcelas is None else parcelas
+        abertas = [p for p in parcelas if p.status == ParcelaStatus.ABERTA]
+        self.status = self._status_calculado(
+            self.status, len(parcelas), len(abertas),
+            sum(1 for p in abertas if p.vencimento < hoje),
+        )
 
     @property
     def parcelas_vencidas(self):
         """Quantidade de parcelas em atraso."""
         hoje = timezone.localdate()
+        if "parcelas" in getattr(self, "_prefetched_objects_cache", {}):
+            return sum(
+                1 for p in self.parcelas.all()
+                if p.status == ParcelaStatus.ABERTA and p.vencimento < hoje
+            )
         return self.parcelas.filter(
             status=ParcelaStatus.ABERTA, vencimento__lt=hoje
         ).count()
 
     @property
     def posicao_divida(self):
-        """Retorna posição de dívida atualizada com juros e multa."""
-        from decimal import Decimal
+        """Retorna posição de dívida atualizada com juros e multa (uma leitura das parcelas)."""
         hoje = timezone.localdate()
-        parcelas_abertas = self.parcelas.filter(status=ParcelaStatus.ABERTA)
-        parcelas_pagas_count = self.parcelas.filter(status=ParcelaStatus.PAGA).count()
-        total_parcelas = self.parcelas.count()
+        parcelas = self._parcelas()
         total_original = Decimal("0.00")
         total_multa = Decimal("0.00")
         total_juros = Decimal("0.00")
         total_atualizado = Decimal("0.00")
         parcelas_vencidas_lista = []
         parcelas_a_vencer_lista = []
-        qtd_vencidas = 0
-        qtd_a_vencer = 0
-        for p in parcelas_abertas:
+        parcelas_pagas_count = 0
+        for p in sorted(parcelas, key=lambda p: (p.vencimento, p.numero)):
+            if p.status == ParcelaStatus.PAGA:
+                parcelas_pagas_count += 1
+            if p.status != ParcelaStatus.ABERTA:
+                continue
             total_original += p.valor
             if p.vencimento < hoje:
-                qtd_vencidas += 1
-                dias = (hoje - p.vencimento).days
+                # p.emprestimo já é self (cache do related manager): sem consulta extra
                 dados = p.dados_atualizados
                 multa = dados.get("multa", Decimal("0.00"))
                 juros = dados.get("juros", Decimal("0.00"))
@@ -166,11 +184,10 @@ class Emprestimo(models.Model):
                 total_atualizado += total_p
                 parcelas_vencidas_lista.append({
                     "numero": p.numero, "vencimento": p.vencimento,
-                    "dias_atraso": dias, "valor_original": p.valor,
+                    "dias_atraso": (hoje - p.vencimento).days, "valor_original": p.valor,
                     "multa": multa, "juros": juros, "total": total_p,
                 })
             else:
-                qtd_a_vencer += 1
                 total_atualizado += p.valor
                 parcelas_a_vencer_lista.append({
                     "numero": p.numero, "vencimento": p.vencimento, "valor": p.valor,
@@ -180,13 +197,70 @@ class Emprestimo(models.Model):
             "total_multa": total_multa, "total_juros": total_juros,
             "total_encargos": total_multa + total_juros,
             "total_atualizado": total_atualizado,
-            "parcelas_pagas": parcelas_pagas_count, "total_parcelas": total_parcelas,
-            "qtd_vencidas": qtd_vencidas, "qtd_a_vencer": qtd_a_vencer,
+            "parcelas_pagas": parcelas_pagas_count, "total_parcelas": len(parcelas),
+            "qtd_vencidas": len(parcelas_vencidas_lista), "qtd_a_vencer": len(parcelas_a_vencer_lista),
             "parcelas_vencidas": parcelas_vencidas_lista,
             "parcelas_a_vencer": parcelas_a_vencer_lista,
         }
 
 
+def atualizar_status_em_lote(emprestimos, tamanho_lote=2000):
+    """
+    Recalcula o status de muitos contratos de uma vez: uma consulta
+    agrupada (contagens de parcelas por contrato) e um bulk_update só
+    dos que mudaram, por lote de `tamanho_lote` contratos.
+
+    `emprestimos`: iterável de Emprestimo (ex.: queryset). Retorna a
+    quantidade de contratos cujo status mudou.
+    """
+    from django.db.models import Count, Q
+
+    hoje = timezone.localdate()
+    agora = timezone.now()
+    alterados = 0
+
+    def processar(lote):
+        contagens = {
+            linha["emprestimo_id"]: linha
+            for linha in Parcela.objects.filter(emprestimo_id__in=[e.pk for e in lote])
+            .values("emprestimo_id")
+            .annotate(
+                total=Count("id"),
+                abertas=Count("id", filter=Q(status=ParcelaStatus.ABERTA)),
+                vencidas=Count("id", filter=Q(status=ParcelaStatus.ABERTA, vencimento__lt=hoje)),
+            )
+            .order_by()
+        }
+        mudaram = []
+        for emp in lote:
+            c = contagens.get(emp.pk, {})
+            novo = Emprestimo._status_calculado(
+                emp.status, c.get("total", 0), c.get("abertas", 0), c.get("vencidas", 0),
+            )
+            if novo != emp.status:
+                emp.status = novo
+                emp.atualizado_em = agora
+                mudaram.append(emp)
+        if mudaram:
+            Emprestimo.objects.bulk_update(mudaram, ["status", "atualizado_em"])
+        return len(mudaram)
+
+    if hasattr(emprestimos, "only"):
+        emprestimos = emprestimos.only("id", "status").iterator(chunk_size=tamanho_lote)
+
+    lote = []
+    for emp in emprestimos:
+        if emp.status == EmprestimoStatus.CANCELADO:
+            continue
+        lote.append(emp)
+        if len(lote) >= tamanho_lote:
+            alterados += processar(lote)
+            lote = []
+    if lote:
+        alterados += processar(lote)
+    return alterados
+
+
 class Parcela(models.Model):
     emprestimo = models.ForeignKey(Emprestimo, on_delete=models.CASCADE, related_name="parcelas")
     numero = models.PositiveIntegerField()
@@ -275,6 +349,7 @@ class ContratoLog(models.Model):
         RENEGOCIADO = "RENEGOCIADO", "Renegociado"
         CANCELADO = "CANCELADO", "Cancelado"
         REABERTO = "REABERTO", "Reaberto"
+        REEMITIDO = "REEMITIDO", "Documento reemitido"
 
     contrato = models.ForeignKey(Emprestimo, on_delete=models.CASCADE, related_name="logs")
     acao = models.CharField(max_length=50, choices=Acao.choices)
@@ -421,6 +496,12 @@ class PropostaEmprestimo(models.Model):
     score_calculado = models.IntegerField("Score de Crédito", null=True, blank=True)
     score_detalhamento = models.JSONField("Detalhamento Score", default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            # Colunas do painel da esteira (status + keyset data/id)
+            models.Index(fields=["status", "-data_solicitacao", "-id"], name="proposta_status_data_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         # Automacao: Se for criação (sem ID) e o cliente tiver parceiro padrão, puxa os dados
         if not self.pk and self.cliente:
@@ -471,6 +552,11 @@ class EtapaProposta(models.Model):
         DEVOLVIDO = "DEVOLVIDO", "Devolvido"
         NEGADO = "NEGADO", "Negado"
 
+    class AlertaSla(models.TextChoices):
+        NENHUM = "", "Nenhum"
+        PROXIMO = "PROXIMO", "Próximo do prazo"
+        ESTOURADO = "ESTOURADO", "Estourado"
+
     # Ordem das etapas (usado para avançar/voltar)
     ORDEM = {
         "CAPTACAO": 1,
@@ -526,30 +612,49 @@ class EtapaProposta(models.Model):
     criado_em = models.DateTimeField(auto_now_add=True)
     finalizado_em = models.DateTimeField(null=True, blank=True)
 
+    # SLA: prazo gravado na criação (criado_em + SLA_HORAS) e último alerta emitido
+    prazo_sla = models.DateTimeField("Prazo SLA", null=True, blank=True, editable=False)
+    alerta_sla = models.CharField(
+        max_length=10, choices=AlertaSla.choices, default=AlertaSla.NENHUM, blank=True, editable=False
+    )
+
     class Meta:
         ordering = ["criado_em"]
+        indexes = [
+            # Subquery da etapa ativa (painel da esteira)
+            models.Index(fields=["proposta", "ativa", "-criado_em"], name="etapa_proposta_ativa_idx"),
+            # Varredura de SLA (monitorar_sla): etapas abertas por prazo
+            models.Index(fields=["ativa", "prazo_sla"], name="etapa_ativa_prazo_sla_idx"),
+        ]
         verbose_name = "Etapa da Proposta"
         verbose_name_plural = "Etapas das Propostas"
 
     def __str__(self):
         return f"Prop. {self.proposta_id} — {self.get_etapa_display()} ({self.get_resultado_display()})"
 
+    def save(self, *args, **kwargs):
+        if self.prazo_sla is None:
+            self.prazo_sla = (self.criado_em or timezone.now()) + timezone.timedelta(hours=self.sla_horas)
+        super().save(*args, **kwargs)
+
     @property
     def sla_horas(self):
         return self.SLA_HORAS.get(self.etapa, 24)
 
+    @property
+    def limite_sla(self):
+        return self.prazo_sla or self.criado_em + timezone.timedelta(hours=self.sla_horas)
+
     @property
     def sla_estourado(self):
         if self.finalizado_em or not self.ativa:
             return False
-        limite = self.criado_em + timezone.timedelta(hours=self.sla_horas)
-        return timezone.now() > limite
+        return timezone.now() > self.limite_sla
 
     @property
     def tempo_restante(self):
         """Retorna timedelta restante do SLA (negativo = estourado)."""
-        limite = self.criado_em + timezone.timedelta(hours=self.sla_horas)
-        return limite - timezone.now()
+        return self.limite_sla - timezone.now()
 
     @property
     def cargo_minimo(self):
@@ -677,6 +782,43 @@ class VotoComite(models.Model):
         return f"Voto {self.get_decisao_display()} — {self.usuario} — Prop. {self.proposta_id}"
 
 
+class ResumoDiarioEsteira(models.Model):
+    """
+    Consolidação diária da esteira por etapa (comando consolidar_esteira).
+    O relatório de indicadores lê só esta tabela, nunca as etapas.
+
+    Durações em histogramas de faixas logarítmicas de segundos
+    ({"faixa": contagem}, ver indicadores_esteira): tamanho fixo, qualquer
+    que seja o volume do dia, e somáveis entre dias para os percentis.
+    """
+    data = models.DateField()
+    etapa = models.CharField(max_length=20, choices=EtapaProposta.Etapa.choices)
+
+    # Entradas na etapa no dia (retrabalho = reentradas depois de uma devolução)
+    entradas = models.PositiveIntegerField(default=0)
+    retrabalho = models.PositiveIntegerField(default=0)
+
+    # Etapas finalizadas no dia, por resultado
+    aprovadas = models.PositiveIntegerField(default=0)
+    devolvidas = models.PositiveIntegerField(default=0)
+    negadas = models.PositiveIntegerField(default=0)
+
+    duracoes = models.JSONField(default=dict, blank=True, help_text="Histograma da duração das etapas finalizadas no dia")
+    ciclos = models.JSONField(default=dict, blank=True, help_text="LIBERACAO: histograma captação → liberação")
+    latencias_voto = models.JSONField(default=dict, blank=True, help_text="COMITE: histograma entrada no comitê → voto")
+
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["data", "etapa"]
+        unique_together = [("data", "etapa")]
+        verbose_name = "Resumo Diário da Esteira"
+        verbose_name_plural = "Resumos Diários da Esteira"
+
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} — {self.get_etapa_display()}"
+
+
 class ContratoFormalizado(models.Model):
     """Controle de emissão de contrato e nota promissória na formalização."""
 
@@ -693,6 +835,13 @@ class ContratoFormalizado(models.Model):
     promissoria_emitida = models.BooleanField("Nota Promissória Emitida", default=False)
     promissoria_emitida_em = models.DateTimeField(null=True, blank=True)
 
+    # Via emitida: PDF gravado no storage na primeira emissão. A reimpressão
+    # serve sempre este arquivo; só a reemissão (explícita) gera outro.
+    contrato_arquivo = models.CharField("Arquivo do Contrato", max_length=255, blank=True)
+    contrato_sha256 = models.CharField("SHA-256 do Contrato", max_length=64, blank=True)
+    promissoria_arquivo = models.CharField("Arquivo da Promissória", max_length=255, blank=True)
+    promissoria_sha256 = models.CharField("SHA-256 da Promissória", max_length=64, blank=True)
+
     assinado_cliente = models.BooleanField("Assinado pelo Cliente", default=False)
     assinado_empresa = models.BooleanField("Assinado pela Empresa", default=False)
 
@@ -712,10 +861,18 @@ class ContratoFormalizado(models.Model):
 
     @classmethod
     def proximo_numero(cls, ano=None):
+        """
+        Reserva o próximo número sequencial do ano (contador em
+        core.Sequencia; cada chamada consome um número).
+        """
+        from core.sequencias import proximo
+
         if ano is None:
             ano = timezone.localdate().year
-        ultimo = cls.objects.filter(ano=ano).order_by("-numero").first()
-        return (ultimo.numero + 1) if ultimo else 1
+        return proximo(
+            f"contrato_formalizado:{ano}",
+            inicial=lambda: cls.objects.filter(ano=ano).aggregate(m=models.Max("numero"))["m"] or 0,
+        )
 
     @classmethod
     def gerar_numero_formatado(cls, numero, ano):
@@ -13,7 +13,7 @@ Retorna score + detalhamento de cada fator.
 from decimal import Decimal
 from datetime import date
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count, Q
 
 
 def calcular_score(cliente, proposta):
@@ -34,24 +34,28 @@ def calcular_score(cliente, proposta):
     # =========================================================================
     # FATOR 1: HISTÓRICO DE PAGAMENTO (0-1000 → ponderado)
     # =========================================================================
-    contratos = Emprestimo.objects.filter(cliente=cliente)
-    total_contratos = contratos.count()
-    quitados = contratos.filter(status="QUITADO").count()
-    ativos = contratos.filter(status__in=["ATIVO", "ATRASADO"]).count()
-    atrasados = contratos.filter(status="ATRASADO").count()
+    contratos = Emprestimo.objects.filter(cliente=cliente).aggregate(
+        total=Count("id"),
+        quitados=Count("id", filter=Q(status="QUITADO")),
+        atrasados=Count("id", filter=Q(status="ATRASADO")),
+    )
+    total_contratos = contratos["total"]
+    quitados = contratos["quitados"]
+    atrasados = contratos["atrasados"]
 
     parcelas_pagas = Parcela.objects.filter(
         emprestimo__cliente=cliente, status=ParcelaStatus.PAGA
-    )
-    total_pagas = parcelas_pagas.count()
+    ).values_list("vencimento", "data_pagamento")
+    total_pagas = 0
 
     pagas_em_dia = 0
     total_dias_atraso = 0
-    for p in parcelas_pagas:
-        if p.data_pagamento and p.data_pagamento <= p.vencimento:
+    for vencimento, data_pagamento in parcelas_pagas:
+        total_pagas += 1
+        if data_pagamento and data_pagamento <= vencimento:
             pagas_em_dia += 1
-        elif p.data_pagamento:
-            total_dias_atraso += (p.data_pagamento - p.vencimento).days
+        elif data_pagamento:
+            total_dias_atraso += (data_pagamento - vencimento).days
 
     if total_pagas > 0:
         pontualidade = (pagas_em_dia / total_pagas) * 100
@@ -194,13 +198,13 @@ def calcular_score(cliente, proposta):
     # =========================================================================
     # FATOR 4: GARANTIAS (0-1000)
     # =========================================================================
-    garantias = proposta.garantias.all()
+    tipos_garantia = set(proposta.garantias.values_list("tipo", flat=True))
     nota_garantia = 0
 
-    tem_cheque = garantias.filter(tipo="CHEQUE").exists()
-    tem_avalista = garantias.filter(tipo="AVALISTA").exists()
-    tem_movel = garantias.filter(tipo="BEM_MOVEL").exists()
-    tem_imovel = garantias.filter(tipo="BEM_IMOVEL").exists()
+    tem_cheque = "CHEQUE" in tipos_garantia
+    tem_avalista = "AVALISTA" in tipos_garantia
+    tem_movel = "BEM_MOVEL" in tipos_garantia
+    tem_imovel = "BEM_IMOVEL" in tipos_garantia
 
     if tem_imovel:
         nota_garantia += 500
@@ -211,7 +215,7 @@ def calcular_score(cliente, proposta):
     if tem_cheque:
         nota_garantia += 100
 
-    if not garantias.exists():
+    if not tipos_garantia:
         nota_garantia = 100  # sem garantia
         detalhe_garantia = "Sem garantias"
     else:
@@ -1,4 +1,4 @@
-from django.db.models import Sum, Avg, Count, Q
+from django.db.models import Sum, Avg, Count, F, Q
 from django.utils import timezone
 from .models import Emprestimo, Parcela, EmprestimoStatus, ParcelaStatus
 
@@ -9,15 +9,19 @@ def gerar_dossie_cliente(cliente):
     """
     hoje = timezone.localdate()
     
-    # 1. Contratos
-    todos_contratos = Emprestimo.objects.filter(cliente=cliente)
-    qtd_contratos = todos_contratos.count()
-    contratos_ativos = todos_contratos.filter(status__in=[EmprestimoStatus.ATIVO, EmprestimoStatus.ATRASADO]).count()
-    contratos_quitados = todos_contratos.filter(status=EmprestimoStatus.QUITADO).count()
-    
-    # 2. Valores
-    total_emprestado = todos_contratos.aggregate(soma=Sum('valor_emprestado'))['soma'] or 0
-    taxa_media = todos_contratos.aggregate(media=Avg('taxa_juros_mensal'))['media'] or 0
+    # 1 e 2. Contratos e valores (uma agregação)
+    contratos = Emprestimo.objects.filter(cliente=cliente).aggregate(
+        qtd=Count("id"),
+        ativos=Count("id", filter=Q(status__in=[EmprestimoStatus.ATIVO, EmprestimoStatus.ATRASADO])),
+        quitados=Count("id", filter=Q(status=EmprestimoStatus.QUITADO)),
+        total_emprestado=Sum("valor_emprestado"),
+        taxa_media=Avg("taxa_juros_mensal"),
+    )
+    qtd_contratos = contratos["qtd"]
+    contratos_ativos = contratos["ativos"]
+    contratos_quitados = contratos["quitados"]
+    total_emprestado = contratos["total_emprestado"] or 0
+    taxa_media = contratos["taxa_media"] or 0
     
     # 3. Comportamento de Pagamento
     todas_parcelas = Parcela.objects.filter(emprestimo__cliente=cliente)
@@ -26,16 +30,15 @@ def gerar_dossie_cliente(cliente):
     pagas = todas_parcelas.filter(status__in=[ParcelaStatus.PAGA, ParcelaStatus.LIQUIDADA_RENEGOCIACAO])
     qtd_pagas = pagas.count()
     
-    # Análise de Atrasos
+    # Análise de Atrasos: só as datas das pagas depois do vencimento
     pagas_com_atraso = 0
     dias_atraso_acumulado = 0
     
-    for p in pagas:
-        # Verifica se houve pagamento e se foi posterior ao vencimento
-        if p.data_pagamento and p.vencimento and p.data_pagamento > p.vencimento:
-            pagas_com_atraso += 1
-            dias = (p.data_pagamento - p.vencimento).days
-            dias_atraso_acumulado += dias
+    for vencimento, data_pagamento in pagas.filter(
+        data_pagamento__gt=F("vencimento")
+    ).values_list("vencimento", "data_pagamento"):
+        pagas_com_atraso += 1
+        dias_atraso_acumulado += (data_pagamento - vencimento).days
 
     # Média de atraso ponderada sobre TODAS as parcelas pagas.
     # Se o cliente paga em dia, conta como 0 na média, melhorando o score.
@@ -45,10 +48,11 @@ def gerar_dossie_cliente(cliente):
     qtd_pagas_em_dia = qtd_pagas - pagas_com_atraso
     
     # Em Atraso Hoje (Inadimplência Atual - Fator Crítico)
-    em_aberto_vencidas = todas_parcelas.filter(
+    # valor_atual lê multa/juros do contrato: vem junto no select_related
+    em_aberto_vencidas = list(todas_parcelas.filter(
         status=ParcelaStatus.ABERTA, 
         vencimento__lt=hoje
-    )
+    ).select_related("emprestimo"))
     valor_em_atraso = sum([p.valor_atual for p in em_aberto_vencidas])
     
     # 4. Classificação de Risco (Score)
@@ -91,7 +95,7 @@ def gerar_dossie_cliente(cliente):
             'percentual_pontualidade': round((qtd_pagas_em_dia/qtd_pagas * 100), 1) if qtd_pagas > 0 else 0
         },
         'risco': {
-            'atrasado_hoje_qtd': em_aberto_vencidas.count(),
+            'atrasado_hoje_qtd': len(em_aberto_vencidas),
             'atrasado_hoje_valor': valor_em_atraso,
             'score_texto': score_desc,
             'score_cor': cor_score
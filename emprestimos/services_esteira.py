@@ -0,0 +1,158 @@
+"""
+Consultas do painel (kanban) e do SLA da esteira de aprovação.
+
+A etapa ativa de cada proposta e o prazo de SLA dela são anotados no SQL
+(Subquery sobre EtapaProposta), então o painel nunca abre as etapas
+proposta a proposta:
+
+- contagens_painel(): total e SLA estourado de todas as colunas numa
+  única consulta agrupada;
+- pagina_coluna(): os cartões de uma coluna, por keyset
+  (data_solicitacao, id), carregados sob demanda pelo painel.
+
+O prazo de SLA fica gravado na etapa (EtapaProposta.prazo_sla), com
+índice em (ativa, prazo_sla):
+
+- etapas_sla_em_risco(): etapas estouradas ou perto do prazo, numa
+  consulta por faixa (usada pelo comando monitorar_sla);
+- resumo_sla(): indicadores por etapa ou por responsável, agregados
+  no banco a partir das durações das etapas.
+"""
+from datetime import timedelta
+
+from django.db.models import (
+    Avg, BooleanField, Case, Count, DateTimeField, DurationField, ExpressionWrapper,
+    F, Max, OuterRef, Q, Subquery, Value, When,
+)
+from django.utils import timezone
+
+from core.paginacao import paginar_keyset
+from .models import EtapaProposta, PropostaEmprestimo
+
+
+# Colunas do painel, na ordem do fluxo
+ETAPAS_PAINEL = [
+    ("CAPTACAO", "Captação"),
+    ("DOCUMENTACAO", "Documentação"),
+    ("ANALISE_CREDITO", "Análise de Crédito"),
+    ("COMITE", "Comitê"),
+    ("FORMALIZACAO", "Formalização"),
+    ("LIBERACAO", "Liberação"),
+]
+
+POR_PAGINA_COLUNA = 20
+
+# Etapas que vencem dentro deste intervalo já entram no alerta
+ANTECEDENCIA_ALERTA_SLA = timedelta(hours=4)
+
+
+def anotar_etapa_ativa(qs, agora=None):
+    """
+    Anota em cada proposta, via Subquery da etapa ativa mais recente
+    (a mesma de PropostaEmprestimo.etapa_atual_obj):
+
+    - etapa_ativa_codigo: código da etapa;
+    - sla_limite: prazo do SLA (nulo se não houver etapa em aberto);
+    - sla_estourado: prazo vencido em `agora`.
+    """
+    agora = agora or timezone.now()
+    etapa_ativa = EtapaProposta.objects.filter(
+        proposta=OuterRef("pk"), ativa=True
+    ).order_by("-criado_em", "-id")
+
+    return qs.annotate(
+        etapa_ativa_codigo=Subquery(etapa_ativa.values("etapa")[:1]),
+        sla_limite=Subquery(
+            etapa_ativa.annotate(limite=Case(
+                When(finalizado_em__isnull=True, then=F("prazo_sla")),
+                default=None,
+                output_field=DateTimeField(),
+            )).values("limite")[:1],
+            output_field=DateTimeField(),
+        ),
+        sla_estourado=Case(
+            When(sla_limite__lt=agora, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+
+
+def contagens_painel(agora=None):
+    """{codigo_etapa: {"total": n, "sla_estourado": n}} — uma consulta agrupada por status."""
+    agora = agora or timezone.now()
+    codigos = [codigo for codigo, _ in ETAPAS_PAINEL]
+
+    linhas = (
+        anotar_etapa_ativa(PropostaEmprestimo.objects.filter(status__in=codigos), agora)
+        .order_by()
+        .values("status")
+        .annotate(
+            total=Count("id"),
+            estourados=Count("id", filter=Q(sla_limite__lt=agora)),
+        )
+    )
+    contagens = {codigo: {"total": 0, "sla_estourado": 0} for codigo in codigos}
+    for linha in linhas:
+        contagens[linha["status"]] = {"total": linha["total"], "sla_estourado": linha["estourados"]}
+    return contagens
+
+
+def pagina_coluna(codigo, apos=None, por_pagina=POR_PAGINA_COLUNA, agora=None):
+    """Cartões de uma coluna (mais recentes primeiro), só com os campos do cartão."""
+    qs = (
+        PropostaEmprestimo.objects.filter(status=codigo)
+        .select_related("cliente")
+        .only(
+            "id", "status", "valor_solicitado", "qtd_parcelas", "taxa_juros",
+            "data_solicitacao", "cliente__nome_completo",
+        )
+    )
+    return paginar_keyset(
+        anotar_etapa_ativa(qs, agora), ["-data_solicitacao", "-id"],
+        apos=apos, por_pagina=por_pagina,
+    )
+
+
+# ==============================================================================
+# SLA
+# ==============================================================================
+
+def etapas_sla_em_risco(agora=None, antecedencia=ANTECEDENCIA_ALERTA_SLA):
+    """Etapas em aberto já estouradas ou que vencem até agora + antecedência (faixa em prazo_sla)."""
+    agora = agora or timezone.now()
+    return (
+        EtapaProposta.objects.filter(
+            ativa=True, prazo_sla__lte=agora + antecedencia, finalizado_em__isnull=True,
+        )
+        .select_related("proposta__cliente", "responsavel")
+        .order_by("prazo_sla")
+    )
+
+
+def resumo_sla(agrupar_por, desde, agora=None):
+    """
+    Indicadores de SLA agrupados por `agrupar_por` (campos de values()), numa consulta:
+
+    - etapas finalizadas desde `desde`: quantidade, duração média e máxima
+      (finalizado_em - criado_em) e quantas passaram do prazo;
+    - etapas em aberto agora: quantidade e quantas já estouraram.
+    """
+    agora = agora or timezone.now()
+    finalizada = Q(finalizado_em__gte=desde)
+    aberta = Q(ativa=True, finalizado_em__isnull=True)
+    duracao = ExpressionWrapper(F("finalizado_em") - F("criado_em"), output_field=DurationField())
+
+    return (
+        EtapaProposta.objects.filter(finalizada | aberta)
+        .order_by()
+        .values(*agrupar_por)
+        .annotate(
+            finalizadas=Count("id", filter=finalizada),
+            fora_do_prazo=Count("id", filter=finalizada & Q(finalizado_em__gt=F("prazo_sla"))),
+            duracao_media=Avg(duracao, filter=finalizada, output_field=DurationField()),
+            duracao_maxima=Max(duracao, filter=finalizada, output_field=DurationField()),
+            abertas=Count("id", filter=aberta),
+            estouradas=Count("id", filter=aberta & Q(prazo_sla__lt=agora)),
+        )
+    )
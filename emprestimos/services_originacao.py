@@ -0,0 +1,274 @@
+"""
+Originação de contratos (um ou muitos de uma vez).
+
+Todos os caminhos de aprovação (esteira, análise de proposta, empréstimo
+direto, aprovar_proposta) passam por originar_contratos(). Para N
+contratos, o número de idas ao banco é fixo (por lote de
+TAMANHO_LOTE linhas), dentro de uma transação:
+
+- códigos de contrato reservados de uma vez (core.sequencias);
+- bulk_create de Emprestimo, Parcela, Transacao, MovimentacaoConta
+  e ContratoLog;
+- contas correntes que faltam criadas num bulk_create e o saldo de todas
+  ajustado num único UPDATE;
+- propostas atualizadas num bulk_update.
+
+    from emprestimos.services_originacao import originar_propostas
+
+    contratos = originar_propostas(
+        PropostaEmprestimo.objects.filter(pk__in=ids), request.user
+    )
+
+Uso em migração de carteira (contratos que já foram liberados em outro
+sistema): PedidoOriginacao com codigo_contrato e parcelas prontos e
+movimentar=False, que grava contratos e parcelas sem mexer no caixa nem
+na conta do cliente.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from clientes.models import Cliente
+from contas.models import ContaCorrente, MovimentacaoConta
+from financeiro.models import Transacao
+
+from .models import (
+    ContratoLog, Emprestimo, EmprestimoStatus, Parcela, ParcelaStatus, PropostaEmprestimo,
+)
+from .services import ParcelaGerada, simular
+from .utils import reservar_codigos_contrato
+
+
+TAMANHO_LOTE = 500
+
+
+@dataclass
+class PedidoOriginacao:
+    """Um contrato a originar. Sem `parcelas`, usa a tabela Price de simular()."""
+    cliente: Cliente
+    valor: Decimal
+    qtd_parcelas: int
+    taxa_juros: Decimal
+    primeiro_vencimento: date
+    parceiro: Optional[Cliente] = None
+    percentual_comissao: Decimal = Decimal("10.00")
+    tem_multa: bool = True
+    multa_percent: Decimal = Decimal("2.00")
+    juros_mora_percent: Decimal = Decimal("1.00")
+    observacoes: str = ""
+    proposta: Optional[PropostaEmprestimo] = None
+    parcelas: List[ParcelaGerada] = field(default_factory=list)
+    codigo_contrato: str = ""
+    observacao_log: str = ""
+
+
+def pedido_da_proposta(proposta: PropostaEmprestimo, observacao_log: str = "") -> PedidoOriginacao:
+    """Pedido de originação com as condições (já aprovadas) da proposta."""
+    return PedidoOriginacao(
+        cliente=proposta.cliente,
+        valor=proposta.valor_solicitado,
+        qtd_parcelas=proposta.qtd_parcelas,
+        taxa_juros=proposta.taxa_juros,
+        primeiro_vencimento=proposta.primeiro_vencimento,
+        parceiro=proposta.parceiro,
+        percentual_comissao=proposta.percentual_comissao,
+        tem_multa=proposta.tem_multa,
+        multa_percent=proposta.multa_percent,
+        juros_mora_percent=proposta.juros_mora_percent,
+        proposta=proposta,
+        observacao_log=observacao_log or f"Gerado via Proposta #{proposta.id}",
+    )
+
+
+def _contrato(pedido, codigo):
+    """Emprestimo (ainda não salvo) e as parcelas do pedido."""
+    if pedido.parcelas:
+        parcelas = pedido.parcelas
+        total = sum((p.valor for p in parcelas), Decimal("0.00"))
+        valor_parcela, ajuste = parcelas[0].valor, Decimal("0.00")
+    else:
+        _, valor_parcela, total, ajuste, parcelas = simular(
+            pedido.valor, pedido.qtd_parcelas, pedido.taxa_juros, pedido.primeiro_vencimento,
+        )
+
+    emprestimo = Emprestimo(
+        cliente=pedido.cliente,
+        codigo_contrato=codigo,
+        valor_emprestado=pedido.valor,
+        qtd_parcelas=len(parcelas),
+        taxa_juros_mensal=pedido.taxa_juros,
+        primeiro_vencimento=pedido.primeiro_vencimento,
+        valor_parcela_aplicada=valor_parcela,
+        total_contrato=total,
+        total_juros=(total - pedido.valor).quantize(Decimal("0.01")),
+        ajuste_arredondamento=ajuste,
+        parceiro=pedido.parceiro,
+        percentual_comissao=pedido.percentual_comissao,
+        tem_multa_atraso=pedido.tem_multa,
+        multa_atraso_percent=pedido.multa_percent,
+        juros_mora_mensal_percent=pedido.juros_mora_percent,
+        observacoes=pedido.observacoes,
+        status=EmprestimoStatus.ATIVO,
+    )
+    return emprestimo, parcelas
+
+
+def _contas_dos_clientes(cliente_ids):
+    """{cliente_id: ContaCorrente}, criando de uma vez as contas que faltam."""
+    contas = {c.cliente_id: c for c in ContaCorrente.objects.filter(cliente_id__in=cliente_ids)}
+    faltando = [ContaCorrente(cliente_id=cid) for cid in cliente_ids if cid not in contas]
+    if faltando:
+        ContaCorrente.objects.bulk_create(faltando, batch_size=TAMANHO_LOTE, ignore_conflicts=True)
+        contas.update({
+            c.cliente_id: c
+            for c in ContaCorrente.objects.filter(cliente_id__in=[c.cliente_id for c in faltando])
+        })
+    return contas
+
+
+def _creditar_contas(creditos):
+    """Soma {conta_id: valor} ao saldo das contas num UPDATE por lote."""
+    ids = list(creditos)
+    for i in range(0, len(ids), TAMANHO_LOTE):
+        lote = ids[i:i + TAMANHO_LOTE]
+        ContaCorrente.objects.filter(pk__in=lote).update(
+            saldo=F("saldo") + Case(
+                *[When(pk=pk, then=Value(creditos[pk])) for pk in lote],
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            atualizado_em=timezone.now(),
+        )
+
+
+def _travar_propostas(propostas):
+    """
+    Trava as propostas no banco e confere que nenhuma gerou contrato: os
+    objetos do chamador podem ter sido lidos antes de outra aprovação
+    (duas aprovações simultâneas, lote de parceiro x aprovação manual).
+    """
+    ids = [p.pk for p in propostas]
+    livres = 0
+    for i in range(0, len(ids), TAMANHO_LOTE):
+        livres += len(
+            PropostaEmprestimo.objects.select_for_update()
+            .filter(pk__in=ids[i:i + TAMANHO_LOTE], emprestimo_gerado__isnull=True)
+            .values_list("pk", flat=True)
+        )
+    if livres != len(ids):
+        raise ValueError("Há proposta que já gerou um empréstimo.")
+
+
+@transaction.atomic
+def originar_contratos(pedidos, usuario, *, deposito_cc=True, movimentar=True, prefixo="EMP"):
+    """
+    Grava os contratos dos pedidos com as parcelas, a movimentação
+    financeira e o log, e marca as propostas como aprovadas.
+
+    Args:
+        deposito_cc: além da saída do caixa, lança o DEPOSITO_CC de
+            contrapartida (valor disponível para saque na conta).
+        movimentar: False só para migração de carteira (sem caixa nem
+            crédito na conta do cliente).
+        prefixo: prefixo dos códigos reservados para os pedidos sem código.
+
+    Returns:
+        Lista de Emprestimo, na ordem dos pedidos.
+    """
+    pedidos = list(pedidos)
+    if not pedidos:
+        return []
+
+    propostas = [p.proposta for p in pedidos if p.proposta is not None]
+    if any(p.emprestimo_gerado_id for p in propostas):
+        raise ValueError("Há proposta que já gerou um empréstimo.")
+    if len({p.pk for p in propostas}) != len(propostas):
+        raise ValueError("A mesma proposta aparece mais de uma vez no lote.")
+    _travar_propostas(propostas)
+
+    sem_codigo = sum(1 for p in pedidos if not p.codigo_contrato)
+    codigos = iter(reservar_codigos_contrato(sem_codigo, prefixo) if sem_codigo else [])
+    agora = timezone.now()
+
+    # 1. Contratos (bulk_create devolve os ids no PostgreSQL e no SQLite)
+    montados = [_contrato(p, p.codigo_contrato or next(codigos)) for p in pedidos]
+    emprestimos = Emprestimo.objects.bulk_create([e for e, _ in montados], batch_size=TAMANHO_LOTE)
+
+    # 2. Parcelas
+    Parcela.objects.bulk_create([
+        Parcela(emprestimo=emp, numero=p.numero, vencimento=p.vencimento, valor=p.valor, status=ParcelaStatus.ABERTA)
+        for emp, (_, parcelas) in zip(emprestimos, montados)
+        for p in parcelas
+    ], batch_size=TAMANHO_LOTE)
+
+    # 3. Movimentação financeira: caixa e conta do cliente
+    if movimentar:
+        transacoes = []
+        for emp in emprestimos:
+            valor = abs(emp.valor_emprestado)
+            transacoes.append(Transacao(
+                tipo="EMPRESTIMO_SAIDA", valor=-valor, data=agora, emprestimo=emp, usuario=usuario,
+                descricao=f"Liberação {emp.codigo_contrato} — {emp.cliente.nome_completo}",
+            ))
+            if deposito_cc:
+                transacoes.append(Transacao(
+                    tipo="DEPOSITO_CC", valor=valor, data=agora, emprestimo=emp, usuario=usuario,
+                    descricao=f"Depósito C/C (Disponível p/ Saque) - {emp.codigo_contrato}",
+                ))
+        Transacao.objects.bulk_create(transacoes, batch_size=TAMANHO_LOTE)
+
+        contas = _contas_dos_clientes({emp.cliente_id for emp in emprestimos})
+        creditos = {}
+        movimentacoes = []
+        for emp in emprestimos:
+            conta = contas[emp.cliente_id]
+            valor = abs(emp.valor_emprestado)
+            creditos[conta.pk] = creditos.get(conta.pk, Decimal("0.00")) + valor
+            movimentacoes.append(MovimentacaoConta(
+                conta=conta, tipo="CREDITO", origem="EMPRESTIMO", valor=valor, data=agora,
+                descricao=f"Liberação Empréstimo {emp.codigo_contrato}", emprestimo=emp,
+            ))
+        # bulk_create não passa pelo save() da movimentação: o saldo é ajustado aqui
+        MovimentacaoConta.objects.bulk_create(movimentacoes, batch_size=TAMANHO_LOTE)
+        _creditar_contas(creditos)
+
+    # 4. Log de auditoria
+    ContratoLog.objects.bulk_create([
+        ContratoLog(
+            contrato=emp, acao=ContratoLog.Acao.CRIADO, usuario=usuario,
+            observacao=pedido.observacao_log or "Originação em lote",
+        )
+        for emp, pedido in zip(emprestimos, pedidos)
+    ], batch_size=TAMANHO_LOTE)
+
+    # 5. Propostas
+    for emp, pedido in zip(emprestimos, pedidos):
+        if pedido.proposta is not None:
+            pedido.proposta.status = "APROVADO"
+            pedido.proposta.emprestimo_gerado = emp
+            pedido.proposta.usuario_aprovador = usuario
+            pedido.proposta.data_analise = agora
+    if propostas:
+        PropostaEmprestimo.objects.bulk_update(
+            propostas, ["status", "emprestimo_gerado", "usuario_aprovador", "data_analise"],
+            batch_size=TAMANHO_LOTE,
+        )
+
+    return emprestimos
+
+
+def originar_propostas(propostas, usuario, **opcoes):
+    """
+    Origina os contratos de várias propostas aprovadas (desembolso em lote
+    de parceiros). Aceita queryset ou lista; opções iguais às de
+    originar_contratos.
+    """
+    if hasattr(propostas, "select_related"):
+        propostas = propostas.select_related("cliente", "parceiro")
+    return originar_contratos([pedido_da_proposta(p) for p in propostas], usuario, **opcoes)
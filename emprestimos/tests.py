@@ -1,3 +1,273 @@
-from django.test import TestCase
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from contas.models import ContaCorrente, MovimentacaoConta
+from core.models import ConfiguracaoScore
+from clientes.models import BemImovel, BemMovel, Cliente, DocumentoCliente
+from financeiro.models import Transacao
+from usuarios.models import Usuario
+
+from .models import (
+    ContratoLog, Emprestimo, EtapaProposta, GarantiaProposta, Parcela, PropostaEmprestimo, VotoComite,
+)
+from . import indicadores_esteira
+from .models import ResumoDiarioEsteira
+from .services import aprovar_proposta
+from .services_originacao import originar_contratos, originar_propostas, pedido_da_proposta
+
+
+ARMAZENAMENTO_TESTE = {
+    "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(STORAGES=ARMAZENAMENTO_TESTE)
+class DetalhePropostaConsultasTest(TestCase):
+    """
+    A tela de trabalho da proposta (esteira) precisa ter um número fixo de
+    consultas: o histórico do cliente (contratos, parcelas, documentos,
+    avalistas) não pode multiplicar as idas ao banco.
+    """
+
+    # Orçamento da tela no comitê (a etapa que mais carrega dados),
+    # incluindo sessão e usuário. Se uma mudança precisar de mais
+    # consultas, o número sobe aqui, conscientemente.
+    MAX_CONSULTAS = 31
+
+    CPFS = iter([
+        "529.982.247-25", "111.444.777-35", "123.456.789-09", "987.654.321-00",
+        "222.333.444-05", "935.411.347-80", "714.602.380-01", "390.533.447-05",
+    ])
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser("analista", "analista@teste.com", "senha")
+        # A configuração do score é criada no primeiro acesso; fora da medição
+        ConfiguracaoScore.get_config()
+
+    def _cliente(self, nome):
+        return Cliente.objects.create(nome_completo=nome, cpf=next(self.CPFS), renda_mensal=Decimal("5000"))
+
+    def _historico(self, cliente, contratos, parcelas_por_contrato):
+        hoje = timezone.localdate()
+        for i in range(contratos):
+            emp = Emprestimo.objects.create(
+                cliente=cliente, codigo_contrato=f"T-{cliente.pk}-{i}",
+                valor_emprestado=Decimal("1000"), qtd_parcelas=parcelas_por_contrato,
+                taxa_juros_mensal=Decimal("3"), primeiro_vencimento=hoje,
+                status="ATRASADO" if i % 2 else "ATIVO",
+            )
+            Parcela.objects.bulk_create([
+                Parcela(
+                    emprestimo=emp, numero=n + 1, valor=Decimal("100"),
+                    vencimento=hoje + timedelta(days=30 * (n - parcelas_por_contrato // 2)),
+                    status="PAGA" if n < parcelas_por_contrato // 3 else "ABERTA",
+                    data_pagamento=hoje - timedelta(days=5) if n < parcelas_por_contrato // 3 else None,
+                )
+                for n in range(parcelas_por_contrato)
+            ])
+
+    def _documentos(self, cliente, quantidade):
+        hoje = timezone.localdate()
+        tipos = [t for t, _ in DocumentoCliente.TIPO_CHOICES]
+        for i in range(quantidade):
+            DocumentoCliente.objects.create(
+                cliente=cliente, tipo=tipos[i % len(tipos)],
+                arquivo=ContentFile(b"x", name=f"doc{i}.pdf"),
+                mes_referencia=hoje.month, ano_referencia=hoje.year,
+            )
+
+    def _proposta_no_comite(self, contratos, parcelas, documentos, avalistas):
+        cliente = self._cliente(f"Cliente {contratos}")
+        self._historico(cliente, contratos, parcelas)
+        self._documentos(cliente, documentos)
+        BemMovel.objects.create(cliente=cliente, tipo="CARRO", descricao="Carro")
+        BemImovel.objects.create(cliente=cliente, tipo="CASA")
+
+        proposta = PropostaEmprestimo.objects.create(
+            cliente=cliente, valor_solicitado=Decimal("5000"), qtd_parcelas=12,
+            taxa_juros=Decimal("3"), primeiro_vencimento=timezone.localdate() + timedelta(days=30),
+            status="COMITE", usuario_solicitante=self.usuario,
+        )
+        for etapa in ("CAPTACAO", "DOCUMENTACAO", "ANALISE_CREDITO"):
+            EtapaProposta.objects.create(
+                proposta=proposta, etapa=etapa, ativa=False, resultado="APROVADO",
+                responsavel=self.usuario, finalizado_em=timezone.now(),
+            )
+        EtapaProposta.objects.create(proposta=proposta, etapa="COMITE", ativa=True)
+
+        for i in range(avalistas):
+            avalista = self._cliente(f"Avalista {contratos}-{i}")
+            self._documentos(avalista, documentos)
+            BemMovel.objects.create(cliente=avalista, tipo="MOTO", descricao="Moto")
+            GarantiaProposta.objects.create(proposta=proposta, tipo="AVALISTA", avalista=avalista)
+        GarantiaProposta.objects.create(proposta=proposta, tipo="CHEQUE", cheque_numero="1")
+
+        VotoComite.objects.create(proposta=proposta, usuario=self.usuario, decisao="DEFERIDO")
+        return proposta
+
+    def _consultas(self, proposta):
+        self.client.force_login(self.usuario)
+        url = reverse("emprestimos:esteira_detalhe", args=[proposta.pk])
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url, secure=True)
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas)
+
+    def test_consultas_nao_dependem_do_historico_do_cliente(self):
+        pequena = self._proposta_no_comite(contratos=1, parcelas=3, documentos=2, avalistas=1)
+        grande = self._proposta_no_comite(contratos=4, parcelas=12, documentos=10, avalistas=2)
+
+        consultas_pequena = self._consultas(pequena)
+        consultas_grande = self._consultas(grande)
+
+        self.assertEqual(consultas_pequena, consultas_grande)
+        self.assertLessEqual(consultas_grande, self.MAX_CONSULTAS)
+
+
+class OriginacaoEmLoteTest(TestCase):
+    """
+    originar_contratos() grava as movimentações com bulk_create e ajusta o
+    saldo num UPDATE próprio: o resultado tem que ser o mesmo do caminho
+    antigo, um MovimentacaoConta.save() por contrato.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_superuser("gerente", "gerente@teste.com", "senha")
+        cls.ana = Cliente.objects.create(nome_completo="Ana", cpf="529.982.247-25", renda_mensal=Decimal("5000"))
+        cls.bia = Cliente.objects.create(nome_completo="Bia", cpf="111.444.777-35", renda_mensal=Decimal("5000"))
+        cls.referencia = Cliente.objects.create(nome_completo="Ref", cpf="123.456.789-09", renda_mensal=Decimal("5000"))
+
+    def _proposta(self, cliente, valor):
+        return PropostaEmprestimo.objects.create(
+            cliente=cliente, valor_solicitado=Decimal(valor), qtd_parcelas=6, taxa_juros=Decimal("3.50"),
+            primeiro_vencimento=timezone.localdate() + timedelta(days=30), status="EM_ANALISE",
+        )
+
+    def _saldo(self, cliente):
+        return ContaCorrente.objects.get(cliente=cliente).saldo
+
+    def test_saldo_igual_ao_caminho_linha_a_linha(self):
+        # Ana já tem conta com saldo; Bia ainda não tem conta
+        conta_ana = ContaCorrente.objects.create(cliente=self.ana)
+        MovimentacaoConta(conta=conta_ana, tipo="CREDITO", origem="DEPOSITO", valor=Decimal("50.00"), descricao="Dep").save()
+        valores = [("ana", "1000.00"), ("bia", "750.25"), ("ana", "333.33")]     # dois contratos da Ana no lote
+        clientes = {"ana": self.ana, "bia": self.bia}
+
+        emprestimos = originar_propostas(
+            [self._proposta(clientes[nome], valor) for nome, valor in valores], self.usuario,
+        )
+
+        # Caminho antigo: um save() por movimentação, numa conta de referência
+        conta_ref = ContaCorrente.objects.create(cliente=self.referencia)
+        MovimentacaoConta(conta=conta_ref, tipo="CREDITO", origem="DEPOSITO", valor=Decimal("50.00"), descricao="Dep").save()
+        for nome, valor in valores:
+            if nome == "ana":
+                MovimentacaoConta(conta=conta_ref, tipo="CREDITO", origem="EMPRESTIMO", valor=Decimal(valor), descricao="Ref").save()
+
+        self.assertEqual(len(emprestimos), 3)
+        self.assertEqual(self._saldo(self.ana), self._saldo(self.referencia))
+        self.assertEqual(self._saldo(self.ana), Decimal("1383.33"))
+        self.assertEqual(self._saldo(self.bia), Decimal("750.25"))
+        for cliente in (self.ana, self.bia):
+            conta = ContaCorrente.objects.get(cliente=cliente)
+            saldo = conta.saldo
+            conta.recalcular_saldo()            # razão das movimentações confere com o saldo
+            self.assertEqual(conta.saldo, saldo)
+        self.assertEqual(Transacao.objects.filter(tipo="EMPRESTIMO_SAIDA").count(), 3)
+        self.assertEqual(Transacao.objects.filter(tipo="DEPOSITO_CC").count(), 3)
+        self.assertEqual(ContratoLog.objects.filter(contrato__in=emprestimos).count(), 3)
+        self.assertEqual(Parcela.objects.filter(emprestimo__in=emprestimos).count(), 18)
+        self.assertFalse(PropostaEmprestimo.objects.filter(emprestimo_gerado__isnull=True).exists())
+
+    def test_sem_deposito_cc(self):
+        [emprestimo] = originar_propostas([self._proposta(self.ana, "500.00")], self.usuario, deposito_cc=False)
+
+        self.assertEqual(list(Transacao.objects.filter(emprestimo=emprestimo).values_list("tipo", "valor")),
+                         [("EMPRESTIMO_SAIDA", Decimal("-500.00"))])
+        self.assertEqual(self._saldo(self.ana), Decimal("500.00"))
+
+    def test_sem_movimentacao(self):
+        [emprestimo] = originar_propostas([self._proposta(self.ana, "500.00")], self.usuario, movimentar=False)
+
+        self.assertFalse(Transacao.objects.exists())
+        self.assertFalse(MovimentacaoConta.objects.exists())
+        self.assertFalse(ContaCorrente.objects.filter(cliente=self.ana).exists())
+        self.assertEqual(emprestimo.parcelas.count(), 6)
+
+    def test_aprovar_proposta_nao_movimenta(self):
+        proposta = self._proposta(self.ana, "800.00")
+
+        emprestimo = aprovar_proposta(proposta, self.usuario)
+
+        proposta.refresh_from_db()
+        self.assertEqual(proposta.emprestimo_gerado, emprestimo)
+        self.assertFalse(Transacao.objects.exists())
+        self.assertFalse(MovimentacaoConta.objects.exists())
+
+    def test_proposta_repetida_no_lote(self):
+        proposta = self._proposta(self.ana, "100.00")
+
+        with self.assertRaisesMessage(ValueError, "mais de uma vez"):
+            originar_contratos([pedido_da_proposta(proposta), pedido_da_proposta(proposta)], self.usuario)
+        self.assertFalse(Emprestimo.objects.exists())
+
+    def test_proposta_aprovada_por_outra_requisicao(self):
+        proposta = self._proposta(self.ana, "100.00")
+        copia_antiga = PropostaEmprestimo.objects.get(pk=proposta.pk)
+        originar_propostas([proposta], self.usuario)
+
+        # O lote do parceiro leu a proposta antes da aprovação manual
+        with self.assertRaisesMessage(ValueError, "já gerou"):
+            originar_propostas([copia_antiga], self.usuario)
+
+        self.assertEqual(Emprestimo.objects.count(), 1)
+        self.assertEqual(self._saldo(self.ana), Decimal("100.00"))
+
+
+class HistogramaEsteiraTest(TestCase):
+    """Os resumos guardam histogramas de tamanho fixo; percentis com erro de no máximo ~5%."""
+
+    def _exato(self, valores, p):
+        ordenados = sorted(valores)
+        return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+    def test_percentis_proximos_do_exato(self):
+        rnd = random.Random(7)
+        valores = [int(rnd.lognormvariate(9, 1.5)) + 1 for _ in range(20000)]
+
+        histograma = indicadores_esteira.histograma(valores)
+        aproximados = indicadores_esteira.percentis(histograma)
+
+        self.assertLessEqual(len(histograma), indicadores_esteira.FAIXAS + 1)
+        for p, valor in aproximados.items():
+            self.assertAlmostEqual(valor / self._exato(valores, p), 1, delta=0.055)
+
+    def test_relatorio_soma_os_dias(self):
+        dias = {date(2030, 1, 1): [60, 3600, 7200], date(2030, 1, 2): [0, 86400]}
+        for dia, duracoes in dias.items():
+            ResumoDiarioEsteira.objects.create(
+                data=dia, etapa="COMITE", aprovadas=len(duracoes),
+                duracoes=indicadores_esteira.histograma(duracoes),
+                latencias_voto=indicadores_esteira.histograma(duracoes[:1]),
+            )
+
+        relatorio = indicadores_esteira.relatorio(date(2030, 1, 1), date(2030, 1, 31))
+
+        comite = next(linha for linha in relatorio["etapas"] if linha["etapa"] == "COMITE")
+        self.assertEqual(comite["aprovadas"], 5)
+        self.assertAlmostEqual(comite["duracao_horas"]["p50"], 1, delta=0.05)     # 3600 s
+        self.assertAlmostEqual(comite["duracao_horas"]["p99"], 24, delta=24 * 0.05)
+        self.assertEqual(relatorio["latencia_voto"]["quantidade"], 2)
+        self.assertEqual(relatorio["ciclo"], {"quantidade": 0, "p50": None, "p90": None, "p99": None})
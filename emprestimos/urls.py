@@ -17,6 +17,7 @@ urlpatterns = [
     path("contratos/<int:pk>/cancelar/", views.cancelar_contrato, name="cancelar_contrato"),
     path("contratos/reimprimir/<int:contrato_f_id>/contrato/", views.reimprimir_contrato_pdf, name="reimprimir_contrato"),
     path("contratos/reimprimir/<int:contrato_f_id>/promissoria/", views.reimprimir_promissoria_pdf, name="reimprimir_promissoria"),
+    path("contratos/reemitir/<int:contrato_f_id>/<str:documento>/", views.reemitir_documento, name="reemitir_documento"),
 
     # Posição de dívida do cliente
     path("posicao-divida/<int:cliente_id>/", views.posicao_cliente, name="posicao_cliente"),
@@ -35,6 +36,9 @@ urlpatterns = [
 
     # --- ESTEIRA DE APROVAÇÃO (Workflow Multi-Etapa) ---
     path("esteira/", views_esteira.painel_esteira, name="painel_esteira"),
+    path("esteira/sla/", views_esteira.painel_sla, name="esteira_sla"),
+    path("esteira/indicadores/", views_esteira.indicadores_esteira, name="esteira_indicadores"),
+    path("esteira/coluna/<str:codigo>/", views_esteira.coluna_esteira, name="esteira_coluna"),
     path("esteira/nova/", views_esteira.nova_proposta, name="esteira_nova"),
     path("esteira/<int:proposta_id>/", views_esteira.detalhe_proposta, name="esteira_detalhe"),
     path("esteira/<int:proposta_id>/editar/", views_esteira.editar_proposta, name="esteira_editar"),
@@ -3,28 +3,116 @@ from django.utils import timezone
 from .models import Emprestimo
 
 
+def _ultimo_sequencial(prefixo_formatado):
+    """
+    Último sequencial já usado com o prefixo. Só roda uma vez por
+    prefixo/ano, quando o contador (core.Sequencia) ainda não existe.
+    """
+    ultimo = Emprestimo.objects.filter(codigo_contrato__startswith=prefixo_formatado).aggregate(m=Max("codigo_contrato"))["m"]
+    try:
+        return int(ultimo.split("-")[-1]) if ultimo else 0
+    except ValueError:
+        return 0
+
+
+def reservar_codigos_contrato(quantidade, prefixo="CTR"):
+    """
+    Reserva `quantidade` códigos consecutivos de uma vez (cargas em lote).
+    Ex: ["CTR-2026-000041", "CTR-2026-000042", ...]
+    """
+    from core.sequencias import reservar
+
+    ano = timezone.localdate().year
+    # Ajustando formato para garantir separação limpa com hífen
+    prefixo_formatado = f"{prefixo}-{ano}-".replace(" ", "-")
+
+    numeros = reservar(
+        f"emprestimo:{prefixo}:{ano}", quantidade,
+        inicial=lambda: _ultimo_sequencial(prefixo_formatado),
+    )
+    return [f"{prefixo_formatado}{seq:06d}" for seq in numeros]
+
+
 def gerar_codigo_contrato(prefixo="CTR") -> str:
     """
-    Gera códigos baseados no prefixo.
+    Gera códigos baseados no prefixo, a partir do contador da série
+    (sem varrer a tabela de contratos).
     Ex Padrão: CTR-2026-000001
     Ex Reneg:  RNG-EMP-2026-000001
     """
-    ano = timezone.localdate().year
-    
-    # Define a base do código para busca (ex: "CTR-2026-" ou "RNG-EMP-2026-")
-    # Ajustando formato para garantir separação limpa com hífen
-    prefixo_formatado = f"{prefixo}-{ano}-".replace(" ", "-") 
-    
-    # Busca o último contrato que começa com esse prefixo específico
-    ultimo = Emprestimo.objects.filter(codigo_contrato__startswith=prefixo_formatado).aggregate(m=Max("codigo_contrato"))["m"]
+    return reservar_codigos_contrato(1, prefixo)[0]
+
+# ==============================================================================
+# LISTAGEM DE CONTRATOS
+# ==============================================================================
+
+FILTROS_CONTRATO = ("status", "cliente", "parceiro", "data_inicio", "data_fim")
+
+
+def filtrar_contratos(queryset, filtros):
+    """
+    Aplica os filtros da listagem de contratos (status, cliente, parceiro,
+    período de criação) ao queryset de Emprestimo.
+
+    Retorna (queryset, data_invalida).
+    """
+    from datetime import date, datetime, time, timedelta
+
+    status = filtros.get("status", "")
+    cliente = filtros.get("cliente", "")
+    parceiro = filtros.get("parceiro", "")
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if cliente.isdigit():
+        queryset = queryset.filter(cliente_id=int(cliente))
+    if parceiro.isdigit():
+        queryset = queryset.filter(parceiro_id=int(parceiro))
+
+    # Período como intervalo de datetime (usa o índice; __date não usaria)
+    try:
+        if filtros.get("data_inicio"):
+            inicio = date.fromisoformat(filtros["data_inicio"])
+            queryset = queryset.filter(criado_em__gte=timezone.make_aware(datetime.combine(inicio, time.min)))
+        if filtros.get("data_fim"):
+            fim = date.fromisoformat(filtros["data_fim"]) + timedelta(days=1)
+            queryset = queryset.filter(criado_em__lt=timezone.make_aware(datetime.combine(fim, time.min)))
+    except ValueError:
+        return queryset, True
+
+    return queryset, False
+
+
+def anotar_posicao_contratos(queryset):
+    """
+    Anota cada contrato com parcelas pagas/total, parcelas vencidas e
+    saldo devedor (soma das parcelas em aberto).
+
+    São subconsultas correlacionadas (e não Count/Sum com JOIN + GROUP BY):
+    o banco só as calcula para as linhas que saem na página, então o custo
+    não cresce com o tamanho da carteira.
+    """
+    from decimal import Decimal
+    from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+    from .models import Parcela, ParcelaStatus
+
+    hoje = timezone.localdate()
+    parcelas = Parcela.objects.filter(emprestimo=OuterRef("pk")).order_by().values("emprestimo")
+
+    def agregado(qs, expressao, campo, vazio):
+        return Coalesce(
+            Subquery(qs.annotate(v=expressao).values("v")[:1], output_field=campo),
+            Value(vazio, output_field=campo),
+        )
 
-    if not ultimo:
-        seq = 1
-    else:
-        # Pega a parte final (número) após o último hífen
-        try:
-            seq = int(ultimo.split("-")[-1]) + 1
-        except ValueError:
-            seq = 1
+    inteiro = IntegerField()
+    dinheiro = DecimalField(max_digits=14, decimal_places=2)
+    abertas = parcelas.filter(status=ParcelaStatus.ABERTA)
 
-    return f"{prefixo_formatado}{seq:06d}"
\ No newline at end of file
+    return queryset.annotate(
+        parcelas_total=agregado(parcelas, Count("id"), inteiro, 0),
+        parcelas_pagas=agregado(parcelas.filter(status=ParcelaStatus.PAGA), Count("id"), inteiro, 0),
+        parcelas_em_atraso=agregado(abertas.filter(vencimento__lt=hoje), Count("id"), inteiro, 0),
+        saldo_devedor=agregado(abertas, Sum("valor"), dinheiro, Decimal("0.00")),
+    )
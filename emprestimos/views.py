@@ -17,13 +17,14 @@ from .models import (
     PropostaEmprestimo, ContratoLog
 )
 from .forms import EmprestimoForm, BuscaClienteForm
+from core.documentos import documento_pdf
 from clientes.models import Cliente
 from financeiro.models import Transacao
 from contas.models import MovimentacaoConta, ContaCorrente
 
 # === IMPORTS DE SERVIÇOS ===
 # Tenta importar dos arquivos corretos.
-# 'simular' e 'aprovar_proposta' estão em services.py
+# 'aprovar_proposta' está em services.py
 # 'gerar_dossie_cliente' está em services_analise.py
 
 
@@ -52,7 +53,7 @@ from contas.models import MovimentacaoConta, ContaCorrente
 
 # === IMPORTS DE SERVIÇOS ===
 try:
-    from .services import simular, aprovar_proposta
+    from .services import aprovar_proposta
 except ImportError:
     pass
 
@@ -96,17 +97,44 @@ def to_decimal(val_str):
 
 @login_required
 def listar_contratos(request):
-    """Lista todos os contratos ordenados por data"""
-    contratos = Emprestimo.objects.all().order_by('-criado_em')
-    return render(request, "emprestimos/contratos.html", {"contratos": contratos})
+    """Contratos — filtros no servidor, posição anotada no SQL e paginação por keyset (criado_em, id)."""
+    from urllib.parse import urlencode
+    from core.paginacao import paginar_keyset
+    from .utils import FILTROS_CONTRATO, anotar_posicao_contratos, filtrar_contratos
+
+    filtros = {campo: request.GET.get(campo, "").strip() for campo in FILTROS_CONTRATO}
+
+    qs, data_invalida = filtrar_contratos(
+        Emprestimo.objects.select_related("cliente", "parceiro"), filtros,
+    )
+    if data_invalida:
+        messages.error(request, "Data inválida no filtro.")
+
+    pagina = paginar_keyset(
+        anotar_posicao_contratos(qs), ["-criado_em", "-id"],
+        apos=request.GET.get("apos"), antes=request.GET.get("antes"),
+        por_pagina=50,
+    )
+
+    # Só os clientes já filtrados vão para os selects (o resto vem do autocomplete)
+    ids = {c: int(filtros[c]) for c in ("cliente", "parceiro") if filtros[c].isdigit()}
+    selecionados = Cliente.objects.in_bulk(ids.values()) if ids else {}
+
+    return render(request, "emprestimos/contratos.html", {
+        "pagina": pagina,
+        "contratos": pagina.itens,
+        "filtros": filtros,
+        "filtros_qs": urlencode({k: v for k, v in filtros.items() if v}),
+        "STATUS_CHOICES": EmprestimoStatus.choices,
+        "cliente_selecionado": selecionados.get(ids.get("cliente")),
+        "parceiro_selecionado": selecionados.get(ids.get("parceiro")),
+    })
 
 @login_required
 def contrato_detalhe(request, pk):
     """Exibe detalhes, parcelas e modal de parceiro"""
     contrato = get_object_or_404(Emprestimo, pk=pk)
     parcelas = contrato.parcelas.all().order_by('numero')
-    
-    todos_clientes = Cliente.objects.all().order_by('nome_completo')
 
     # Busca contrato formalizado (para reimpressão)
     from .models import ContratoFormalizado
@@ -120,7 +148,6 @@ def contrato_detalhe(request, pk):
     return render(request, "emprestimos/contrato_detalhe.html", {
         "contrato": contrato,
         "parcelas": parcelas,
-        "todos_clientes": todos_clientes,
         "hoje": timezone.localdate(),
         "contrato_formal": contrato_formal,
         "posicao": posicao,
@@ -256,8 +283,9 @@ def novo_emprestimo_busca(request):
     form = BuscaClienteForm(request.GET or None)
     clientes = None
     if form.is_valid():
-        q = form.cleaned_data.get('query')
-        clientes = Cliente.objects.filter(Q(nome_completo__icontains=q) | Q(cpf__icontains=q))
+        from clientes.busca import autocompletar
+        ids = [c["id"] for c in autocompletar(form.cleaned_data.get('query'), limite=50)]
+        clientes = Cliente.objects.filter(pk__in=ids).order_by('nome_completo')
     return render(request, "emprestimos/novo_busca.html", {"form": form, "clientes": clientes})
 
 @login_required
@@ -304,61 +332,36 @@ def novo_emprestimo_form(request, cliente_id):
 
             # --- AÇÃO: CONFIRMAR (CRIAR) ---
             elif 'confirmar_cadastro' in request.POST:
-                with transaction.atomic():
-                    # 1. Cria o Objeto Empréstimo
-                    emprestimo = form.save(commit=False)
-                    emprestimo.cliente = cliente
-                    emprestimo.usuario = request.user
-                    emprestimo.codigo_contrato = f"EMP{timezone.now().strftime('%Y%m%d%H%M')}"
-                    emprestimo.save() 
-
-                    # 2. Gera as Parcelas no Banco
-                    juros_total = valor * (taxa / 100) * qtd
-                    montante_final = valor + juros_total
-                    valor_parcela = montante_final / qtd
-                    
-                    data_atual = primeiro_venc
-                    for i in range(1, qtd + 1):
-                        Parcela.objects.create(
-                            emprestimo=emprestimo,
-                            numero=i,
-                            vencimento=data_atual,
-                            valor=valor_parcela
-                        )
-                        data_atual = data_atual + relativedelta(months=1)
-
-                    # 3. Saída do Caixa
-                    Transacao.objects.create(
-                        tipo='EMPRESTIMO_SAIDA',
-                        valor=-abs(valor), 
-                        descricao=f"Saída Empréstimo Direto - {emprestimo.codigo_contrato}",
-                        emprestimo=emprestimo,
-                        usuario=request.user
-                    )
-
-                    # 4. Depósito na Conta (Contra-partida)
-                    Transacao.objects.create(
-                        tipo='DEPOSITO_CC',
-                        valor=abs(valor),
-                        descricao=f"Depósito C/C (Disponível p/ Saque) - {emprestimo.codigo_contrato}",
-                        emprestimo=emprestimo,
-                        usuario=request.user
-                    )
-
-                    # 5. Crédito no App do Cliente
-                    conta_real, _ = ContaCorrente.objects.get_or_create(cliente=cliente)
-                    MovimentacaoConta.objects.create(
-                        conta=conta_real,
-                        tipo='CREDITO',
-                        origem='EMPRESTIMO',
-                        valor=abs(valor),
-                        descricao=f"Liberação Empréstimo {emprestimo.codigo_contrato}",
-                        data=timezone.now(),
-                        emprestimo=emprestimo
-                    )
+                from .services import ParcelaGerada
+                from .services_originacao import PedidoOriginacao, originar_contratos
 
-                    messages.success(request, f"Contrato {emprestimo.codigo_contrato} criado e valor creditado!")
-                    return redirect("emprestimos:contrato_detalhe", pk=emprestimo.id)
+                # Parcelas iguais (juros simples), como na simulação acima
+                juros_total = valor * (taxa / 100) * qtd
+                valor_parcela = ((valor + juros_total) / qtd).quantize(Decimal("0.01"))
+                parcelas = [
+                    ParcelaGerada(numero=i, vencimento=primeiro_venc + relativedelta(months=i - 1), valor=valor_parcela)
+                    for i in range(1, qtd + 1)
+                ]
+
+                # Contrato, parcelas, saída do caixa, depósito C/C e crédito no app do cliente
+                emprestimo = originar_contratos([PedidoOriginacao(
+                    cliente=cliente,
+                    valor=valor,
+                    qtd_parcelas=qtd,
+                    taxa_juros=taxa,
+                    primeiro_vencimento=primeiro_venc,
+                    parceiro=form.cleaned_data['parceiro'],
+                    percentual_comissao=form.cleaned_data['percentual_comissao'],
+                    tem_multa=form.cleaned_data['tem_multa_atraso'],
+                    multa_percent=form.cleaned_data['multa_atraso_percent'],
+                    juros_mora_percent=form.cleaned_data['juros_mora_mensal_percent'],
+                    observacoes=form.cleaned_data['observacoes'],
+                    parcelas=parcelas,
+                    observacao_log="Empréstimo direto",
+                )], request.user)[0]
+
+                messages.success(request, f"Contrato {emprestimo.codigo_contrato} criado e valor creditado!")
+                return redirect("emprestimos:contrato_detalhe", pk=emprestimo.id)
 
     else:
         form = EmprestimoForm()
@@ -480,8 +483,7 @@ def criar_proposta(request):
         except Exception as e:
             messages.error(request, f"Erro ao criar proposta: {e}")
     
-    clientes = Cliente.objects.all().order_by('nome_completo')
-    return render(request, 'emprestimos/propostas/form.html', {'clientes': clientes})
+    return render(request, 'emprestimos/propostas/form.html')
 
 @login_required
 @transaction.atomic
@@ -500,8 +502,6 @@ def analisar_proposta(request, proposta_id):
     except:
         dossie = None
     
-    todos_parceiros = Cliente.objects.all().order_by('nome_completo')
-
     if request.method == 'POST':
         acao = request.POST.get('acao')
         parecer = request.POST.get('parecer')
@@ -539,84 +539,13 @@ def analisar_proposta(request, proposta_id):
             proposta.percentual_comissao = nova_comissao
             proposta.status = 'APROVADO'
             
-            # 2. Gera Contrato (Cálculos)
-            if 'simular' in globals():
-                _, parc_aplicada, total_ctr, _, parcelas_simuladas = simular(
-                    valor_emprestado=novo_valor,
-                    qtd_parcelas=novo_qtd,
-                    taxa_juros_mensal=nova_taxa,
-                    primeiro_vencimento=proposta.primeiro_vencimento
-                )
-            else:
-                total_ctr = novo_valor * (1 + (nova_taxa/100 * novo_qtd))
-                parc_aplicada = total_ctr / novo_qtd
-                parcelas_simuladas = []
-
-            codigo_novo = f"EMP{timezone.now().strftime('%Y%m%d%H%M')}"
-            
-            emprestimo = Emprestimo.objects.create(
-                cliente=proposta.cliente,
-                codigo_contrato=codigo_novo,
-                valor_emprestado=novo_valor,
-                qtd_parcelas=novo_qtd,
-                taxa_juros_mensal=nova_taxa,
-                primeiro_vencimento=proposta.primeiro_vencimento,
-                valor_parcela_aplicada=parc_aplicada,
-                total_contrato=total_ctr,
-                parceiro=novo_parceiro,
-                percentual_comissao=nova_comissao
-            )
-            
-            # 3. Gera Parcelas
-            if parcelas_simuladas:
-                lista_parcelas_db = []
-                for p_simulada in parcelas_simuladas:
-                    num = p_simulada.numero if hasattr(p_simulada, 'numero') else p_simulada['numero']
-                    venc = p_simulada.vencimento if hasattr(p_simulada, 'vencimento') else p_simulada['vencimento']
-                    val = p_simulada.valor if hasattr(p_simulada, 'valor') else p_simulada['valor']
-
-                    lista_parcelas_db.append(Parcela(
-                        emprestimo=emprestimo,
-                        numero=num,
-                        vencimento=venc,
-                        valor=val
-                    ))
-                Parcela.objects.bulk_create(lista_parcelas_db)
-            
-            # 4. Movimentação Financeira
-            # A) Saída do Caixa
-            Transacao.objects.create(
-                tipo='EMPRESTIMO_SAIDA', 
-                valor=-abs(novo_valor), 
-                descricao=f"Liberação Contrato {codigo_novo} - {proposta.cliente.nome_completo}",
-                emprestimo=emprestimo,
-                usuario=request.user,
-                data=timezone.now()
-            )
+            # 2. Contrato, parcelas e movimentação financeira
+            # (saída do caixa, depósito C/C e crédito na conta do cliente)
+            from .services_originacao import originar_contratos, pedido_da_proposta
 
-            # B) Depósito na Conta Digital (Contra-partida)
-            Transacao.objects.create(
-                tipo='DEPOSITO_CC',
-                valor=abs(novo_valor), 
-                descricao=f"Depósito C/C (Disponível p/ Saque) - {codigo_novo}",
-                emprestimo=emprestimo,
-                usuario=request.user,
-                data=timezone.now()
-            )
+            emprestimo = originar_contratos([pedido_da_proposta(proposta)], request.user)[0]
+            codigo_novo = emprestimo.codigo_contrato
 
-            # C) Crédito na Conta Cliente (App)
-            conta_cli, _ = ContaCorrente.objects.get_or_create(cliente=proposta.cliente)
-            MovimentacaoConta.objects.create(
-                conta=conta_cli,
-                tipo='CREDITO',
-                origem='EMPRESTIMO',
-                valor=abs(novo_valor),
-                descricao=f"Liberação de Empréstimo {codigo_novo}",
-                data=timezone.now(),
-                emprestimo=emprestimo
-            )
-            
-            proposta.emprestimo_gerado = emprestimo
             proposta.save()
             
             messages.success(request, f"Contrato {codigo_novo} aprovado e valor creditado na conta do cliente.")
@@ -626,7 +555,6 @@ def analisar_proposta(request, proposta_id):
     return render(request, 'emprestimos/propostas/analise.html', {
         'p': proposta,
         'dossie': dossie,
-        'todos_parceiros': todos_parceiros
     })
 
 # ==============================================================================
@@ -667,23 +595,74 @@ def listar_contratos_formalizados(request):
 
 
 @login_required
+@documento_pdf
 def reimprimir_contrato_pdf(request, contrato_f_id):
-    """Reimprimir contrato PDF a partir do ContratoFormalizado."""
+    """Reimprimir contrato: entrega a via gravada na emissão, sem gerar de novo."""
     from .models import ContratoFormalizado
-    from .views_esteira import emitir_contrato_pdf
+    from .views_esteira import servir_via
 
-    cf = get_object_or_404(ContratoFormalizado, id=contrato_f_id)
-    return emitir_contrato_pdf(request, cf.proposta_id)
+    cf = get_object_or_404(ContratoFormalizado.objects.select_related("proposta__cliente"), id=contrato_f_id)
+    return servir_via(request, cf, "contrato")
 
 
 @login_required
+@documento_pdf
 def reimprimir_promissoria_pdf(request, contrato_f_id):
-    """Reimprimir nota promissória a partir do ContratoFormalizado."""
+    """Reimprimir nota promissória: entrega a via gravada na emissão."""
+    from .models import ContratoFormalizado
+    from .views_esteira import servir_via
+
+    cf = get_object_or_404(ContratoFormalizado.objects.select_related("proposta__cliente"), id=contrato_f_id)
+    return servir_via(request, cf, "promissoria")
+
+
+@login_required
+@documento_pdf
+@transaction.atomic
+def reemitir_documento(request, contrato_f_id, documento):
+    """
+    Reemite contrato ou promissória com os dados atuais do cliente e a data
+    de hoje. A via anterior continua no storage; o ContratoFormalizado passa
+    a apontar para a nova e a reemissão fica no log do contrato.
+    """
     from .models import ContratoFormalizado
-    from .views_esteira import emitir_promissoria_pdf
+    from .views_esteira import DOCUMENTOS_FORMALIZACAO, gravar_via
+
+    cf = get_object_or_404(
+        ContratoFormalizado.objects.select_for_update().select_related("proposta__cliente"), id=contrato_f_id
+    )
+    if request.method != "POST" or documento not in DOCUMENTOS_FORMALIZACAO:
+        return redirect("emprestimos:contratos_formalizados")
+    if not (request.user.is_gerente_ou_acima or request.user.is_superuser):
+        messages.error(request, "Reemissão de documentos exige cargo de Gerente ou superior.")
+        return redirect("emprestimos:contratos_formalizados")
+
+    nome_documento = "Contrato" if documento == "contrato" else "Nota promissória"
+    via_anterior = getattr(cf, f"{documento}_sha256")
+    agora = timezone.now()
+    gravar_via(cf, documento, timezone.localdate(agora))
+    if documento == "contrato":
+        cf.contrato_emitido, cf.contrato_emitido_em = True, agora
+        campos = ["contrato_emitido", "contrato_emitido_em"]
+    else:
+        cf.promissoria_emitida, cf.promissoria_emitida_em = True, agora
+        campos = ["promissoria_emitida", "promissoria_emitida_em"]
+    cf.save(update_fields=campos + [f"{documento}_arquivo", f"{documento}_sha256"])
+
+    emprestimo_id = cf.proposta.emprestimo_gerado_id
+    if emprestimo_id:
+        ContratoLog.objects.create(
+            contrato_id=emprestimo_id, acao=ContratoLog.Acao.REEMITIDO, usuario=request.user,
+            observacao=(
+                f"{nome_documento} {cf.numero_formatado} reemitido(a). "
+                f"Via anterior: {via_anterior[:12] or '-'}; nova: {getattr(cf, f'{documento}_sha256')[:12]}."
+            ),
+        )
 
-    cf = get_object_or_404(ContratoFormalizado, id=contrato_f_id)
-    return emitir_promissoria_pdf(request, cf.proposta_id)
+    messages.success(request, f"{nome_documento} {cf.numero_formatado} reemitido(a) com os dados atuais.")
+    if emprestimo_id:
+        return redirect("emprestimos:contrato_detalhe", pk=emprestimo_id)
+    return redirect("emprestimos:contratos_formalizados")
 
 
 @login_required
@@ -3,6 +3,7 @@ Views da Esteira de Aprovação — Workflow Multi-Etapa.
 
 Fluxo: Captação → Documentação → Análise de Crédito → Comitê → Formalização → Liberação
 """
+import logging
 from decimal import Decimal
 
 from django.shortcuts import render, get_object_or_404, redirect
@@ -16,15 +17,16 @@ from django.db.models import Q, Case, When, Value, IntegerField
 from .models import (
     PropostaEmprestimo, EtapaProposta, ChecklistItem,
     PoliticaCredito, Emprestimo, Parcela, EmprestimoStatus,
-    ParcelaStatus, ContratoLog, GarantiaProposta
+    ParcelaStatus, GarantiaProposta
 )
 from .services import simular
 from .services_analise import gerar_dossie_cliente
+from core.documentos import documento_pdf
 from clientes.models import Cliente, BemMovel, BemImovel
-from financeiro.models import Transacao
-from contas.models import ContaCorrente, MovimentacaoConta
 from usuarios.decorators import cargo_minimo
 
+logger = logging.getLogger("django")
+
 
 # ==============================================================================
 # CHECKLIST PADRÃO POR ETAPA
@@ -113,28 +115,19 @@ def _etapa_anterior(etapa_atual_str):
 
 @login_required
 def painel_esteira(request):
-    """Visão geral de todas as propostas organizadas por etapa."""
-    etapas_nomes = [
-        ("CAPTACAO", "Captação"),
-        ("DOCUMENTACAO", "Documentação"),
-        ("ANALISE_CREDITO", "Análise de Crédito"),
-        ("COMITE", "Comitê"),
-        ("FORMALIZACAO", "Formalização"),
-        ("LIBERACAO", "Liberação"),
-    ]
+    """
+    Visão geral de todas as propostas organizadas por etapa.
 
-    colunas = []
-    for codigo, nome in etapas_nomes:
-        propostas = PropostaEmprestimo.objects.filter(
-            status=codigo
-        ).select_related("cliente").order_by("-data_solicitacao")
+    Contagens e SLA estourado vêm de uma consulta agrupada; os cartões de
+    cada coluna são carregados sob demanda (coluna_esteira).
+    """
+    from .services_esteira import ETAPAS_PAINEL, contagens_painel
 
-        colunas.append({
-            "codigo": codigo,
-            "nome": nome,
-            "propostas": propostas,
-            "total": propostas.count(),
-        })
+    contagens = contagens_painel()
+    colunas = [
+        {"codigo": codigo, "nome": nome, **contagens[codigo]}
+        for codigo, nome in ETAPAS_PAINEL
+    ]
 
     # Propostas finalizadas (últimas 10)
     finalizadas = PropostaEmprestimo.objects.filter(
@@ -147,6 +140,115 @@ def painel_esteira(request):
     })
 
 
+@login_required
+def coluna_esteira(request, codigo):
+    """Cartões de uma coluna do painel em JSON, paginados por keyset (?apos=cursor)."""
+    from django.http import Http404
+    from django.urls import reverse
+    from django.utils import formats
+    from .services_esteira import ETAPAS_PAINEL, pagina_coluna
+
+    if codigo not in dict(ETAPAS_PAINEL):
+        raise Http404("Etapa inválida")
+
+    pagina = pagina_coluna(codigo, apos=request.GET.get("apos"))
+
+    cartoes = [
+        {
+            "id": p.id,
+            "url": reverse("emprestimos:esteira_detalhe", args=[p.id]),
+            "cliente": p.cliente.nome_completo,
+            "valor": formats.number_format(p.valor_solicitado, 2),
+            "data": formats.date_format(timezone.localtime(p.data_solicitacao), "d/m/Y"),
+            "qtd_parcelas": p.qtd_parcelas,
+            "taxa_juros": formats.number_format(p.taxa_juros, 2),
+            "sla_estourado": p.sla_estourado,
+        }
+        for p in pagina.itens
+    ]
+    return JsonResponse({"cartoes": cartoes, "proximo": pagina.cursor_proximo})
+
+
+@login_required
+def painel_sla(request):
+    """SLA da esteira por etapa e por responsável — indicadores agregados no banco."""
+    from datetime import timedelta
+    from .services_esteira import ETAPAS_PAINEL, etapas_sla_em_risco, resumo_sla
+
+    PERIODOS = (7, 30, 90, 365)
+    dias = request.GET.get("dias", "30")
+    dias = int(dias) if dias.isdigit() and int(dias) in PERIODOS else 30
+    agora = timezone.now()
+    desde = agora - timedelta(days=dias)
+
+    def indicadores(linha):
+        finalizadas = linha.get("finalizadas") or 0
+        fora = linha.get("fora_do_prazo") or 0
+        media = linha.get("duracao_media")
+        maxima = linha.get("duracao_maxima")
+        linha.update({
+            "finalizadas": finalizadas,
+            "fora_do_prazo": fora,
+            "abertas": linha.get("abertas") or 0,
+            "estouradas": linha.get("estouradas") or 0,
+            "horas_media": media.total_seconds() / 3600 if media is not None else None,
+            "horas_maxima": maxima.total_seconds() / 3600 if maxima is not None else None,
+            "pct_no_prazo": round((finalizadas - fora) / finalizadas * 100, 1) if finalizadas else None,
+        })
+        return linha
+
+    por_etapa = {linha["etapa"]: linha for linha in resumo_sla(["etapa"], desde, agora)}
+    etapas = [
+        indicadores({
+            **por_etapa.get(codigo, {}),
+            "codigo": codigo,
+            "nome": nome,
+            "sla_horas": EtapaProposta.SLA_HORAS.get(codigo, 24),
+        })
+        for codigo, nome in ETAPAS_PAINEL
+    ]
+
+    usuarios = []
+    for linha in resumo_sla(
+        ["responsavel_id", "responsavel__username", "responsavel__first_name", "responsavel__last_name"],
+        desde, agora,
+    ):
+        nome = f"{linha['responsavel__first_name'] or ''} {linha['responsavel__last_name'] or ''}".strip()
+        linha["nome"] = nome or linha["responsavel__username"] or "Sem responsável"
+        usuarios.append(indicadores(linha))
+    usuarios.sort(key=lambda u: (-u["fora_do_prazo"], -u["finalizadas"]))
+
+    return render(request, "emprestimos/esteira/sla.html", {
+        "dias": dias,
+        "periodos": PERIODOS,
+        "etapas": etapas,
+        "usuarios": usuarios,
+        "em_risco": list(etapas_sla_em_risco(agora)[:50]),
+        "agora": agora,
+    })
+
+
+@login_required
+def indicadores_esteira(request):
+    """Vazão, duração das etapas e funil — lidos só da consolidação diária (ResumoDiarioEsteira)."""
+    from datetime import timedelta
+    from .indicadores_esteira import relatorio
+
+    PERIODOS = (7, 30, 90, 365)
+    dias = request.GET.get("dias", "30")
+    dias = int(dias) if dias.isdigit() and int(dias) in PERIODOS else 30
+    ate = timezone.localdate()
+    desde = ate - timedelta(days=dias - 1)
+
+    return render(request, "emprestimos/esteira/indicadores.html", {
+        "dias": dias,
+        "periodos": PERIODOS,
+        "desde": desde,
+        "ate": ate,
+        **relatorio(desde, ate),
+    })
+
+
 # ==============================================================================
 # 2. CRIAR PROPOSTA (entrada na esteira)
 # ==============================================================================
@@ -286,10 +388,8 @@ def nova_proposta(request):
         except Exception as e:
             messages.error(request, f"Erro: {e}")
 
-    clientes = Cliente.objects.all().order_by("nome_completo")
     politica = PoliticaCredito.objects.filter(ativo=True).first()
     return render(request, "emprestimos/esteira/nova_proposta.html", {
-        "clientes": clientes,
         "politica": politica,
     })
 
@@ -300,39 +400,54 @@ def nova_proposta(request):
 
 @login_required
 def detalhe_proposta(request, proposta_id):
-    """Tela de trabalho da proposta — mostra etapa atual, checklist, timeline."""
+    """
+    Tela de trabalho da proposta — mostra etapa atual, checklist, timeline.
+
+    Plano de consultas: tudo o que a tela mostra é carregado aqui, com
+    select_related/prefetch e agregações, num número fixo de consultas —
+    o histórico do cliente (contratos, parcelas, documentos, avalistas)
+    não multiplica as idas ao banco. O teste em emprestimos/tests.py
+    trava esse orçamento.
+    """
+    from django.db.models import Prefetch, prefetch_related_objects
+    from clientes.models import DocumentoCliente
+
     proposta = get_object_or_404(
-        PropostaEmprestimo.objects.select_related("cliente"),
+        PropostaEmprestimo.objects.select_related("cliente", "emprestimo_gerado", "usuario_solicitante"),
         id=proposta_id
     )
+    cli = proposta.cliente
+    prefetch_related_objects([cli], "documentos", "bens_moveis", "bens_imoveis")
 
-    etapa_ativa = proposta.etapa_atual_obj
-    todas_etapas = proposta.etapas.all().order_by("criado_em")
+    # Etapas: uma leitura (com checklist) serve etapa ativa, progresso e timeline
+    todas_etapas = list(
+        proposta.etapas.select_related("responsavel").prefetch_related(
+            Prefetch("checklist", queryset=ChecklistItem.objects.select_related("concluido_por"))
+        ).order_by("criado_em", "id")
+    )
+    etapa_ativa = next((e for e in reversed(todas_etapas) if e.ativa), None)
     checklist = etapa_ativa.checklist.all() if etapa_ativa else []
 
     # Dossiê do cliente
     try:
-        dossie = gerar_dossie_cliente(proposta.cliente)
+        dossie = gerar_dossie_cliente(cli)
     except Exception:
         dossie = None
 
-    # Parceiros para comissão
-    parceiros = Cliente.objects.all().order_by("nome_completo")
-
     # Verifica se o usuário tem cargo suficiente para a etapa
     pode_atuar = False
     if etapa_ativa:
-        from usuarios.decorators import cargo_minimo as _  # just for HIERARQUIA check
         HIERARQUIA = {"OPERACIONAL": 1, "CAIXA": 1, "SUPERVISOR": 2, "GERENTE": 3, "DIRETOR": 4}
         nivel_user = HIERARQUIA.get(request.user.cargo, 0)
         nivel_req = HIERARQUIA.get(etapa_ativa.cargo_minimo, 0)
         pode_atuar = nivel_user >= nivel_req
 
-    # Mapa de progresso
+    # Mapa de progresso (a última ocorrência de cada etapa)
     TODAS_ETAPAS = ["CAPTACAO", "DOCUMENTACAO", "ANALISE_CREDITO", "COMITE", "FORMALIZACAO", "LIBERACAO"]
+    ultima_por_etapa = {e.etapa: e for e in todas_etapas}
     progresso = []
     for e in TODAS_ETAPAS:
-        etapa_obj = todas_etapas.filter(etapa=e).last()
+        etapa_obj = ultima_por_etapa.get(e)
         status_class = "secondary"
         if etapa_obj:
             if etapa_obj.ativa:
@@ -350,10 +465,8 @@ def detalhe_proposta(request, proposta_id):
             "status_class": status_class,
         })
 
-    # Documentos do cliente
-    from clientes.models import DocumentoCliente
-    documentos = proposta.cliente.documentos.all()
-    docs_dict = proposta.cliente.documentos_dict
+    # Documentos do cliente (já carregados no prefetch)
+    docs_dict = cli.documentos_dict
     todos_tipos = DocumentoCliente.TIPO_CHOICES
 
     # Monta lista de documentos com status
@@ -378,9 +491,9 @@ def detalhe_proposta(request, proposta_id):
             pendencias_docs.append(f"{ds['nome']}: desatualizado")
 
     # Votos do comitê (se estiver na etapa COMITE)
-    from .models import VotoComite, ContratoFormalizado
-    votos = proposta.votos_comite.select_related("usuario").all()
-    ja_votou = votos.filter(usuario=request.user).exists()
+    from .models import ContratoFormalizado, ChequeGarantia
+    votos = list(proposta.votos_comite.select_related("usuario"))
+    ja_votou = any(v.usuario_id == request.user.id for v in votos)
     is_comite = etapa_ativa and etapa_ativa.etapa == "COMITE"
 
     # Dados completos do cliente para o comitê
@@ -388,7 +501,6 @@ def detalhe_proposta(request, proposta_id):
     contratos_abertos = []
     historico_pagamentos = []
     if is_comite:
-        cli = proposta.cliente
         cliente_completo = cli
 
         # Contratos em aberto
@@ -403,14 +515,16 @@ def detalhe_proposta(request, proposta_id):
         ).select_related("emprestimo").order_by("-data_pagamento")[:30]
 
     # Contrato formalizado (se estiver na FORMALIZACAO)
-    from .models import ContratoFormalizado
     contrato_formal = ContratoFormalizado.objects.filter(proposta=proposta).first()
     is_formalizacao = etapa_ativa and etapa_ativa.etapa == "FORMALIZACAO"
+    if is_formalizacao:
+        prefetch_related_objects([proposta], Prefetch(
+            "cheques_garantia", queryset=ChequeGarantia.objects.select_related("conferido_por")
+        ))
 
     # Dados para auto-preenchimento de cheques
     parcelas_json = "[]"
     if is_formalizacao:
-        from .services import simular
         try:
             _, parc_val, _, _, tabela = simular(
                 proposta.valor_solicitado, proposta.qtd_parcelas,
@@ -424,30 +538,21 @@ def detalhe_proposta(request, proposta_id):
         except Exception:
             parcelas_json = "[]"
 
-    # Garantias
-    garantias = proposta.garantias.select_related(
-        "avalista", "bem_movel", "bem_imovel"
-    ).all()
-
-    # Dados dos avalistas para o comitê (documentos e cadastro)
-    avalistas_detalhes = []
+    # Garantias (no comitê, com documentos e bens dos avalistas)
+    garantias = proposta.garantias.select_related("avalista", "bem_movel", "bem_imovel")
     if is_comite:
-        for g in garantias.filter(tipo="AVALISTA", avalista__isnull=False):
-            av = g.avalista
-            av_docs = av.documentos.all()
-            av_docs_dict = av.documentos_dict
-            avalistas_detalhes.append({
-                "cliente": av,
-                "documentos": av_docs,
-                "docs_dict": av_docs_dict,
-                "bens_moveis": av.bens_moveis.all(),
-                "bens_imoveis": av.bens_imoveis.all(),
-            })
+        garantias = garantias.prefetch_related(
+            "avalista__documentos", "avalista__bens_moveis", "avalista__bens_imoveis"
+        )
+    garantias = list(garantias)
 
     # Checklist da formalização para exibir na liberação
     checklist_formalizacao = []
     if etapa_ativa and etapa_ativa.etapa == "LIBERACAO":
-        etapa_form = todas_etapas.filter(etapa="FORMALIZACAO", resultado="APROVADO").last()
+        etapa_form = next(
+            (e for e in reversed(todas_etapas) if e.etapa == "FORMALIZACAO" and e.resultado == "APROVADO"),
+            None,
+        )
         if etapa_form:
             checklist_formalizacao = etapa_form.checklist.all()
 
@@ -457,8 +562,7 @@ def detalhe_proposta(request, proposta_id):
     score_resultado = None
     is_analise_ou_comite = etapa_ativa and etapa_ativa.etapa in ("ANALISE_CREDITO", "COMITE")
     if is_analise_ou_comite:
-        cli = proposta.cliente
-        from clientes.models import DocumentoCliente, ConsultaCredito
+        from clientes.models import ConsultaCredito
         from .score_credito import calcular_score
 
         # Score de crédito
@@ -480,12 +584,14 @@ def detalhe_proposta(request, proposta_id):
         # Última consulta de crédito
         consulta_credito = ConsultaCredito.objects.filter(
             cliente=cli
-        ).prefetch_related("restricoes", "documento").order_by("-criado_em").first()
+        ).select_related("documento").prefetch_related("restricoes").order_by("-criado_em").first()
 
-        # Busca último comprovante de renda
-        ultimo_comp = DocumentoCliente.objects.filter(
-            cliente=cli, tipo="COMP_RENDA"
-        ).order_by("-ano_referencia", "-mes_referencia").first()
+        # Último comprovante de renda (entre os documentos já carregados)
+        ultimo_comp = max(
+            (d for d in cli.documentos.all() if d.tipo == "COMP_RENDA"),
+            key=lambda d: (d.ano_referencia or 0, d.mes_referencia or 0),
+            default=None,
+        )
 
         renda_bruta = ultimo_comp.renda_bruta if ultimo_comp and ultimo_comp.renda_bruta else None
         renda_liquida = ultimo_comp.renda_liquida if ultimo_comp and ultimo_comp.renda_liquida else None
@@ -540,7 +646,6 @@ def detalhe_proposta(request, proposta_id):
         "checklist": checklist,
         "todas_etapas": todas_etapas,
         "dossie": dossie,
-        "parceiros": parceiros,
         "pode_atuar": pode_atuar,
         "progresso": progresso,
         "docs_status": docs_status,
@@ -555,7 +660,6 @@ def detalhe_proposta(request, proposta_id):
         "contrato_formal": contrato_formal,
         "is_formalizacao": is_formalizacao,
         "parcelas_json": parcelas_json,
-        "clientes": Cliente.objects.all().order_by("nome_completo") if is_formalizacao else [],
         "garantias": garantias,
         "checklist_formalizacao": checklist_formalizacao,
         "analise_renda": analise_renda,
@@ -715,97 +819,27 @@ def marcar_checklist(request, item_id):
 @transaction.atomic
 def _liberar_proposta(request, proposta):
     """
-    Última etapa: gera o contrato, parcelas e movimentações financeiras.
-    Reutiliza a lógica que já existia em analisar_proposta.
+    Última etapa: gera o contrato, parcelas e movimentações financeiras
+    (services_originacao, o mesmo caminho da originação em lote).
     """
-    from .views import to_decimal
-
-    # Simulação Price
-    _, parc_aplicada, total_ctr, ajuste, parcelas_sim = simular(
-        valor_emprestado=proposta.valor_solicitado,
-        qtd_parcelas=proposta.qtd_parcelas,
-        taxa_juros_mensal=proposta.taxa_juros,
-        primeiro_vencimento=proposta.primeiro_vencimento,
-    )
-
-    codigo_novo = f"EMP{timezone.now().strftime('%Y%m%d%H%M%S')}"
-
-    # Cria contrato
-    emprestimo = Emprestimo.objects.create(
-        cliente=proposta.cliente,
-        codigo_contrato=codigo_novo,
-        valor_emprestado=proposta.valor_solicitado,
-        qtd_parcelas=proposta.qtd_parcelas,
-        taxa_juros_mensal=proposta.taxa_juros,
-        primeiro_vencimento=proposta.primeiro_vencimento,
-        valor_parcela_aplicada=parc_aplicada,
-        total_contrato=total_ctr,
-        total_juros=(total_ctr - proposta.valor_solicitado).quantize(Decimal("0.01")),
-        ajuste_arredondamento=ajuste,
-        parceiro=proposta.parceiro,
-        percentual_comissao=proposta.percentual_comissao,
-        tem_multa_atraso=proposta.tem_multa,
-        multa_atraso_percent=proposta.multa_percent,
-        juros_mora_mensal_percent=proposta.juros_mora_percent,
-        status=EmprestimoStatus.ATIVO,
-    )
-
-    # Cria parcelas
-    Parcela.objects.bulk_create([
-        Parcela(
-            emprestimo=emprestimo,
-            numero=p.numero,
-            vencimento=p.vencimento,
-            valor=p.valor,
-            status=ParcelaStatus.ABERTA,
-        )
-        for p in parcelas_sim
-    ])
+    from .services_originacao import originar_contratos, pedido_da_proposta
 
-    # Log de auditoria
-    ContratoLog.objects.create(
-        contrato=emprestimo,
-        acao=ContratoLog.Acao.CRIADO,
-        usuario=request.user,
-        observacao=f"Via Esteira — Proposta #{proposta.id}",
-    )
-
-    # Movimentação financeira: saída do caixa
-    Transacao.objects.create(
-        tipo="EMPRESTIMO_SAIDA",
-        valor=-abs(proposta.valor_solicitado),
-        descricao=f"Liberação {codigo_novo} — {proposta.cliente.nome_completo}",
-        emprestimo=emprestimo,
-        usuario=request.user,
-    )
-
-    # Crédito na conta do cliente
-    conta_cli, _ = ContaCorrente.objects.get_or_create(cliente=proposta.cliente)
-    MovimentacaoConta.objects.create(
-        conta=conta_cli,
-        tipo="CREDITO",
-        origem="EMPRESTIMO",
-        valor=abs(proposta.valor_solicitado),
-        descricao=f"Liberação Empréstimo {codigo_novo}",
-        emprestimo=emprestimo,
-    )
-
-    # Atualiza proposta
-    proposta.status = "APROVADO"
-    proposta.emprestimo_gerado = emprestimo
-    proposta.usuario_aprovador = request.user
-    proposta.data_analise = timezone.now()
-    proposta.save()
+    # Contrato, parcelas, log, saída do caixa, crédito na conta do cliente
+    # e proposta aprovada
+    emprestimo = originar_contratos(
+        [pedido_da_proposta(proposta, f"Via Esteira — Proposta #{proposta.id}")],
+        request.user, deposito_cc=False,
+    )[0]
+    codigo_novo = emprestimo.codigo_contrato
 
     # === RENEGOCIAÇÃO: Liquidar contrato antigo ===
     if proposta.finalidade == "RENEGOCIACAO" and proposta.contrato_renegociado:
         contrato_antigo = proposta.contrato_renegociado
-        parcelas_antigas = contrato_antigo.parcelas.filter(status=ParcelaStatus.ABERTA)
-
-        for p in parcelas_antigas:
-            p.status = ParcelaStatus.LIQUIDADA_RENEGOCIACAO if hasattr(ParcelaStatus, 'LIQUIDADA_RENEGOCIACAO') else ParcelaStatus.PAGA
-            p.data_pagamento = timezone.now()
-            p.save()
+        contrato_antigo.parcelas.filter(status=ParcelaStatus.ABERTA).update(
+            status=ParcelaStatus.LIQUIDADA_RENEGOCIACAO,
+            data_pagamento=timezone.localdate(),
+            atualizado_em=timezone.now(),
+        )
 
         contrato_antigo.status = EmprestimoStatus.RENEGOCIADO
         contrato_antigo.save(update_fields=["status", "atualizado_em"])
@@ -824,304 +858,158 @@ def _liberar_proposta(request, proposta):
 # 5B. FORMALIZAÇÃO — Emissão de Contrato e Nota Promissória
 # ==============================================================================
 
-MESES = {
-    1: "janeiro", 2: "fevereiro", 3: "março", 4: "abril",
-    5: "maio", 6: "junho", 7: "julho", 8: "agosto",
-    9: "setembro", 10: "outubro", 11: "novembro", 12: "dezembro",
-}
-
-
-@login_required
-def emitir_contrato_pdf(request, proposta_id):
-    """Gera o contrato de empréstimo em PDF e registra a emissão."""
-    from django.http import HttpResponse
-    from num2words import num2words
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_JUSTIFY
-    from reportlab.lib import colors
-    from .models import ContratoFormalizado
-
-    proposta = get_object_or_404(PropostaEmprestimo.objects.select_related("cliente"), id=proposta_id)
-    cli = proposta.cliente
-    hoje = timezone.localdate()
+def _dados_cliente(cli, com_cep=True):
+    endereco = f"{cli.logradouro}, {cli.numero}"
+    if cli.complemento:
+        endereco += f" - {cli.complemento}"
+    endereco += f", {cli.bairro}, {cli.cidade}/{cli.uf}"
+    if com_cep:
+        endereco += f" - CEP: {cli.cep}"
+    return {"nome": cli.nome_completo, "cpf": cli.cpf, "endereco": endereco}
 
-    # Cria ou recupera o contrato formalizado
-    contrato_f, criado = ContratoFormalizado.objects.get_or_create(
-        proposta=proposta,
-        defaults={
-            "numero": ContratoFormalizado.proximo_numero(),
-            "ano": hoje.year,
-            "numero_formatado": ContratoFormalizado.gerar_numero_formatado(
-                ContratoFormalizado.proximo_numero(), hoje.year
-            ),
-            "emitido_por": request.user,
-        }
-    )
 
-    if criado or not contrato_f.contrato_emitido:
-        contrato_f.contrato_emitido = True
-        contrato_f.contrato_emitido_em = timezone.now()
-        contrato_f.save()
+def _dados_formalizacao(proposta, numero, data_emissao, com_cep=True):
+    """Dados (só valores simples) do contrato/promissória para emprestimos.documentos."""
+    from dateutil.relativedelta import relativedelta
 
-    # Simulação Price
-    _, parc_aplicada, total_ctr, _, parcelas_sim = simular(
+    _, parc_aplicada, total_ctr, _, _ = simular(
         valor_emprestado=proposta.valor_solicitado,
         qtd_parcelas=proposta.qtd_parcelas,
         taxa_juros_mensal=proposta.taxa_juros,
         primeiro_vencimento=proposta.primeiro_vencimento,
     )
-    total_juros = (total_ctr - proposta.valor_solicitado).quantize(Decimal("0.01"))
-
-    # Valor por extenso
-    val_int = int(proposta.valor_solicitado)
-    val_cents = int((proposta.valor_solicitado % 1) * 100)
-    extenso = num2words(val_int, lang="pt_BR")
-    if val_cents > 0:
-        extenso += f" reais e {num2words(val_cents, lang='pt_BR')} centavos"
-    else:
-        extenso += " reais"
+    return {
+        "numero": numero,
+        "data_emissao": data_emissao,
+        "cliente": _dados_cliente(proposta.cliente, com_cep),
+        "valor": proposta.valor_solicitado,
+        "taxa_juros": proposta.taxa_juros,
+        "qtd_parcelas": proposta.qtd_parcelas,
+        "valor_parcela": parc_aplicada,
+        "total_contrato": total_ctr,
+        "total_juros": (total_ctr - proposta.valor_solicitado).quantize(Decimal("0.01")),
+        "primeiro_vencimento": proposta.primeiro_vencimento,
+        "ultimo_vencimento": proposta.primeiro_vencimento + relativedelta(months=proposta.qtd_parcelas - 1),
+    }
+
+
+def _nome_arquivo(prefixo, numero):
+    return f'{prefixo}_{numero.replace("/", "_").replace(" ", "_")}.pdf'
+
+
+# Documentos da formalização: documento → (construtor, com_cep)
+DOCUMENTOS_FORMALIZACAO = {
+    "contrato": ("contrato_pdf", True),
+    "promissoria": ("promissoria_pdf", False),
+}
 
-    fmt = lambda v: f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    mes_ext = MESES.get(hoje.month, "")
-    data_ext = f"{hoje.day} de {mes_ext} de {hoje.year}"
 
-    # PDF
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="contrato_{contrato_f.numero_formatado.replace("/", "_").replace(" ", "_")}.pdf"'
+def gravar_via(contrato_f, documento, data_emissao):
+    """
+    Renderiza o documento com os dados atuais da proposta e registra a via
+    (caminho no storage e SHA-256 do PDF) no ContratoFormalizado. Não salva
+    o contrato_f: quem chama grava junto com as datas de emissão.
+    """
+    from core.documentos import gerar_documento, sha256_arquivo
+    from . import documentos
 
-    doc = SimpleDocTemplate(response, pagesize=A4, topMargin=20*mm, bottomMargin=20*mm, leftMargin=25*mm, rightMargin=25*mm)
-    styles = getSampleStyleSheet()
-    els = []
+    construtor, com_cep = DOCUMENTOS_FORMALIZACAO[documento]
+    dados = _dados_formalizacao(contrato_f.proposta, contrato_f.numero_formatado, data_emissao, com_cep=com_cep)
+    nome = gerar_documento(documento, getattr(documentos, construtor), dados)
+    setattr(contrato_f, f"{documento}_arquivo", nome)
+    setattr(contrato_f, f"{documento}_sha256", sha256_arquivo(nome))
+    return nome
 
-    st_titulo = ParagraphStyle("T", parent=styles["Title"], fontSize=14, spaceAfter=4)
-    st_sub = ParagraphStyle("S", parent=styles["Normal"], fontSize=10, alignment=TA_CENTER, spaceAfter=12)
-    st_corpo = ParagraphStyle("C", parent=styles["Normal"], fontSize=10, leading=16, alignment=TA_JUSTIFY, spaceAfter=8)
-    st_negrito = ParagraphStyle("N", parent=styles["Normal"], fontSize=10, leading=16, alignment=TA_JUSTIFY, spaceAfter=8, fontName="Helvetica-Bold")
-    st_data = ParagraphStyle("D", parent=styles["Normal"], fontSize=10, alignment=TA_RIGHT, spaceBefore=20)
-    st_assina = ParagraphStyle("A", parent=styles["Normal"], fontSize=10, alignment=TA_CENTER, spaceBefore=40)
 
-    els.append(Paragraph("CONTRATO DE EMPRÉSTIMO", st_titulo))
-    els.append(Paragraph(f"Nº {contrato_f.numero_formatado}", st_sub))
-    els.append(Spacer(1, 5*mm))
+def servir_via(request, contrato_f, documento):
+    """
+    Entrega a via emitida do documento. Na primeira emissão (ou para
+    contratos emitidos antes das vias gravadas) grava a via com a data da
+    primeira emissão; depois disso a reimpressão só lê o arquivo.
 
-    endereco = f"{cli.logradouro}, {cli.numero}"
-    if cli.complemento:
-        endereco += f" - {cli.complemento}"
-    endereco += f", {cli.bairro}, {cli.cidade}/{cli.uf} - CEP: {cli.cep}"
-
-    els.append(Paragraph(
-        f"Pelo presente instrumento particular, de um lado a <b>CREDORA</b>, doravante denominada "
-        f"simplesmente CREDORA, e de outro lado <b>{cli.nome_completo}</b>, inscrito(a) no CPF sob o "
-        f"nº <b>{cli.cpf}</b>, residente e domiciliado(a) em <b>{endereco}</b>, "
-        f"doravante denominado(a) DEVEDOR(A), têm entre si justo e contratado o seguinte:",
-        st_corpo,
-    ))
+    Se a via registrada sumiu do storage, não gera outra com os dados
+    atuais: responde 404 e a via só volta pelo "Reemitir" (gerente).
+    """
+    from django.core.files.storage import default_storage
+    from django.http import HttpResponseNotFound
+    from core.documentos import resposta_pdf
+
+    emitido, emitido_em = ("contrato_emitido", "contrato_emitido_em") if documento == "contrato" \
+        else ("promissoria_emitida", "promissoria_emitida_em")
+    nome = getattr(contrato_f, f"{documento}_arquivo")
+
+    if nome and not default_storage.exists(nome):
+        logger.error(
+            "Via gravada de %s do contrato %s não encontrada (%s).",
+            documento, contrato_f.numero_formatado, nome,
+        )
+        return HttpResponseNotFound(
+            f"A via emitida de {documento} do contrato {contrato_f.numero_formatado} não foi encontrada "
+            f"no armazenamento. Um gerente pode gerar uma nova via pela ação \"Reemitir\" do contrato.",
+            content_type="text/plain; charset=utf-8",
+        )
 
-    # Cláusulas
-    clausulas = [
-        (
-            "CLÁUSULA PRIMEIRA — DO OBJETO",
-            f"A CREDORA concede ao(à) DEVEDOR(A) um empréstimo no valor de "
-            f"<b>{fmt(proposta.valor_solicitado)} ({extenso})</b>, que o(a) DEVEDOR(A) "
-            f"declara ter recebido nesta data, dando plena e irrevogável quitação.",
-        ),
-        (
-            "CLÁUSULA SEGUNDA — DOS JUROS E ENCARGOS",
-            f"Sobre o valor emprestado incidirão juros remuneratórios de <b>{proposta.taxa_juros}% "
-            f"ao mês</b> (tabela Price), totalizando <b>{fmt(total_juros)}</b> de juros "
-            f"e o montante final de <b>{fmt(total_ctr)}</b>.",
-        ),
-        (
-            "CLÁUSULA TERCEIRA — DO PAGAMENTO",
-            f"O(A) DEVEDOR(A) se obriga a pagar o valor total em <b>{proposta.qtd_parcelas} "
-            f"({num2words(proposta.qtd_parcelas, lang='pt_BR')}) parcelas</b> mensais, "
-            f"fixas e consecutivas, no valor de <b>{fmt(parc_aplicada)}</b> cada, "
-            f"com primeiro vencimento em <b>{proposta.primeiro_vencimento.strftime('%d/%m/%Y')}</b>.",
-        ),
-        (
-            "CLÁUSULA QUARTA — DA MORA",
-            "Em caso de atraso no pagamento de qualquer parcela, incidirá multa de <b>2% (dois por cento)</b> "
-            "sobre o valor da parcela em atraso, acrescida de juros de mora de <b>1% (um por cento) ao mês</b>, "
-            "calculados pro rata die.",
-        ),
-        (
-            "CLÁUSULA QUINTA — DO VENCIMENTO ANTECIPADO",
-            "O não pagamento de qualquer parcela em seu vencimento acarretará o vencimento antecipado "
-            "de todas as demais parcelas, tornando-se a dívida integralmente exigível, podendo a CREDORA "
-            "inscrever o nome do(a) DEVEDOR(A) nos órgãos de proteção ao crédito, protestar o título "
-            "em cartório e promover a execução judicial do débito.",
-        ),
-        (
-            "CLÁUSULA SEXTA — DO FORO",
-            "Fica eleito o foro da Comarca de <b>Rio de Janeiro/RJ</b> para dirimir quaisquer questões "
-            "oriundas deste contrato, com renúncia expressa de qualquer outro, por mais privilegiado que seja.",
-        ),
-    ]
+    if not nome:
+        campos = [f"{documento}_arquivo", f"{documento}_sha256"]
+        if not getattr(contrato_f, emitido):
+            setattr(contrato_f, emitido, True)
+            setattr(contrato_f, emitido_em, timezone.now())
+            campos += [emitido, emitido_em]
+        nome = gravar_via(contrato_f, documento, timezone.localdate(getattr(contrato_f, emitido_em)))
+        contrato_f.save(update_fields=campos)
+
+    return resposta_pdf(
+        nome, _nome_arquivo(documento, contrato_f.numero_formatado),
+        etag=getattr(contrato_f, f"{documento}_sha256"), request=request,
+    )
 
-    for titulo, texto in clausulas:
-        els.append(Paragraph(titulo, st_negrito))
-        els.append(Paragraph(texto, st_corpo))
 
-    els.append(Paragraph(
-        "E, por estarem assim justos e contratados, assinam o presente instrumento em "
-        "duas vias de igual teor e forma.",
-        st_corpo,
-    ))
+@login_required
+@documento_pdf
+def emitir_contrato_pdf(request, proposta_id):
+    """Emite o contrato de empréstimo em PDF (ou entrega a via já emitida)."""
+    from .models import ContratoFormalizado
 
-    els.append(Paragraph(f"Rio de Janeiro, {data_ext}.", st_data))
+    proposta = get_object_or_404(PropostaEmprestimo.objects.select_related("cliente"), id=proposta_id)
+    hoje = timezone.localdate()
 
-    # Assinaturas
-    els.append(Spacer(1, 15*mm))
-    assin_data = [
-        [Paragraph("_" * 35, st_assina), Paragraph("_" * 35, st_assina)],
-        [Paragraph("<b>CREDORA</b>", st_assina), Paragraph(f"<b>DEVEDOR(A)</b><br/>{cli.nome_completo}<br/>CPF: {cli.cpf}", st_assina)],
-    ]
-    assin_tab = Table(assin_data, colWidths=[80*mm, 80*mm])
-    assin_tab.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")]))
-    els.append(assin_tab)
-
-    # Testemunhas
-    els.append(Spacer(1, 15*mm))
-    els.append(Paragraph("<b>Testemunhas:</b>", st_corpo))
-    test_data = [
-        [Paragraph("_" * 30, st_assina), Paragraph("_" * 30, st_assina)],
-        [Paragraph("Nome:<br/>CPF:", st_assina), Paragraph("Nome:<br/>CPF:", st_assina)],
-    ]
-    test_tab = Table(test_data, colWidths=[80*mm, 80*mm])
-    els.append(test_tab)
+    # Cria ou recupera o contrato formalizado (o número só é reservado na criação)
+    contrato_f = ContratoFormalizado.objects.filter(proposta=proposta).first()
+    if contrato_f is None:
+        numero = ContratoFormalizado.proximo_numero(hoje.year)
+        contrato_f, _ = ContratoFormalizado.objects.get_or_create(
+            proposta=proposta,
+            defaults={
+                "numero": numero,
+                "ano": hoje.year,
+                "numero_formatado": ContratoFormalizado.gerar_numero_formatado(numero, hoje.year),
+                "emitido_por": request.user,
+            }
+        )
+    contrato_f.proposta = proposta
 
-    doc.build(els)
-    return response
+    return servir_via(request, contrato_f, "contrato")
 
 
 @login_required
+@documento_pdf
 def emitir_promissoria_pdf(request, proposta_id):
-    """Gera a nota promissória em PDF."""
-    from django.http import HttpResponse
-    from num2words import num2words
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_JUSTIFY
-    from reportlab.lib import colors
+    """Emite a nota promissória em PDF (ou entrega a via já emitida)."""
+    from core.documentos import gerar_documento, resposta_pdf
+    from .documentos import promissoria_pdf
     from .models import ContratoFormalizado
 
     proposta = get_object_or_404(PropostaEmprestimo.objects.select_related("cliente"), id=proposta_id)
-    cli = proposta.cliente
-    hoje = timezone.localdate()
 
-    # Recupera contrato formalizado
     contrato_f = ContratoFormalizado.objects.filter(proposta=proposta).first()
     if contrato_f:
-        contrato_f.promissoria_emitida = True
-        contrato_f.promissoria_emitida_em = timezone.now()
-        contrato_f.save()
-        num_contrato = contrato_f.numero_formatado
-    else:
-        num_contrato = "—"
-
-    # Simulação
-    _, parc_aplicada, total_ctr, _, _ = simular(
-        valor_emprestado=proposta.valor_solicitado,
-        qtd_parcelas=proposta.qtd_parcelas,
-        taxa_juros_mensal=proposta.taxa_juros,
-        primeiro_vencimento=proposta.primeiro_vencimento,
-    )
-
-    fmt = lambda v: f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    val_int = int(total_ctr)
-    val_cents = int((total_ctr % 1) * 100)
-    extenso = num2words(val_int, lang="pt_BR")
-    if val_cents > 0:
-        extenso += f" reais e {num2words(val_cents, lang='pt_BR')} centavos"
-    else:
-        extenso += " reais"
-
-    mes_ext = MESES.get(hoje.month, "")
-    data_ext = f"{hoje.day} de {mes_ext} de {hoje.year}"
-
-    # Vencimento da última parcela
-    ultima_parc = proposta.primeiro_vencimento
-    from dateutil.relativedelta import relativedelta
-    ultima_parc = proposta.primeiro_vencimento + relativedelta(months=proposta.qtd_parcelas - 1)
-
-    endereco = f"{cli.logradouro}, {cli.numero}"
-    if cli.complemento:
-        endereco += f" - {cli.complemento}"
-    endereco += f", {cli.bairro}, {cli.cidade}/{cli.uf}"
+        contrato_f.proposta = proposta
+        return servir_via(request, contrato_f, "promissoria")
 
-    # PDF
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="promissoria_{num_contrato.replace("/", "_").replace(" ", "_")}.pdf"'
-
-    doc = SimpleDocTemplate(response, pagesize=A4, topMargin=25*mm, bottomMargin=25*mm, leftMargin=25*mm, rightMargin=25*mm)
-    styles = getSampleStyleSheet()
-    els = []
-
-    st_titulo = ParagraphStyle("T", parent=styles["Title"], fontSize=16, spaceAfter=4, fontName="Helvetica-Bold")
-    st_sub = ParagraphStyle("S", parent=styles["Normal"], fontSize=10, alignment=TA_CENTER, spaceAfter=15)
-    st_corpo = ParagraphStyle("C", parent=styles["Normal"], fontSize=11, leading=18, alignment=TA_JUSTIFY, spaceAfter=10)
-    st_campo = ParagraphStyle("F", parent=styles["Normal"], fontSize=10, leading=16, spaceAfter=4)
-    st_data = ParagraphStyle("D", parent=styles["Normal"], fontSize=10, alignment=TA_RIGHT, spaceBefore=20)
-    st_assina = ParagraphStyle("A", parent=styles["Normal"], fontSize=10, alignment=TA_CENTER, spaceBefore=30)
-
-    # Cabeçalho
-    els.append(Paragraph("NOTA PROMISSÓRIA", st_titulo))
-    els.append(Paragraph(f"Vinculada ao Contrato {num_contrato}", st_sub))
-
-    # Dados em formato de tabela
-    info = [
-        ["Nº:", f"{num_contrato}", "Vencimento:", f"{ultima_parc.strftime('%d/%m/%Y')}"],
-        ["Valor:", f"{fmt(total_ctr)}", "", ""],
-    ]
-    info_tab = Table(info, colWidths=[20*mm, 60*mm, 25*mm, 55*mm])
-    info_tab.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-        ("FONTNAME", (2, 0), (2, -1), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
-        ("BACKGROUND", (2, 0), (2, 0), colors.HexColor("#f0f0f0")),
-        ("TOPPADDING", (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-    ]))
-    els.append(info_tab)
-    els.append(Spacer(1, 8*mm))
-
-    # Corpo
-    els.append(Paragraph(
-        f"No vencimento acima indicado, pagarei por esta única via de NOTA PROMISSÓRIA "
-        f"a quantia de <b>{fmt(total_ctr)} ({extenso})</b> ao portador desta ou à sua ordem.",
-        st_corpo,
-    ))
-
-    els.append(Paragraph(
-        f"Pagável em <b>{proposta.qtd_parcelas} ({num2words(proposta.qtd_parcelas, lang='pt_BR')}) "
-        f"parcelas mensais</b> de <b>{fmt(parc_aplicada)}</b>, a primeira com vencimento em "
-        f"<b>{proposta.primeiro_vencimento.strftime('%d/%m/%Y')}</b>.",
-        st_corpo,
-    ))
-
-    els.append(Spacer(1, 5*mm))
-
-    # Dados do emitente
-    els.append(Paragraph(f"<b>Emitente:</b> {cli.nome_completo}", st_campo))
-    els.append(Paragraph(f"<b>CPF:</b> {cli.cpf}", st_campo))
-    els.append(Paragraph(f"<b>Endereço:</b> {endereco}", st_campo))
-
-    els.append(Paragraph(f"Rio de Janeiro, {data_ext}.", st_data))
-
-    # Assinatura
-    els.append(Spacer(1, 20*mm))
-    els.append(Paragraph("_" * 40, st_assina))
-    els.append(Paragraph(f"<b>{cli.nome_completo}</b><br/>CPF: {cli.cpf}", st_assina))
-
-    doc.build(els)
-    return response
+    # Sem contrato emitido: prévia sem número, que não vale como via
+    dados = _dados_formalizacao(proposta, "—", timezone.localdate(), com_cep=False)
+    nome = gerar_documento("promissoria", promissoria_pdf, dados)
+    return resposta_pdf(nome, _nome_arquivo("promissoria", "—"))
 
 
 # ==============================================================================
@@ -1374,10 +1262,8 @@ def editar_proposta(request, proposta_id):
         except (ValueError, Exception) as e:
             messages.error(request, str(e))
 
-    clientes = Cliente.objects.all().order_by("nome_completo")
     return render(request, "emprestimos/esteira/editar_proposta.html", {
         "proposta": proposta,
-        "clientes": clientes,
         "finalidades": PropostaEmprestimo.FINALIDADE_CHOICES,
     })
 
@@ -1487,16 +1373,16 @@ def gerar_dossie_pdf(request, proposta_id):
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.units import mm
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.styles import ParagraphStyle
     from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
     from reportlab.lib import colors
-    from core.models import ConfiguracaoEmpresa
+    from core.documentos import folha_estilos, logo, timbre
     from clientes.models import ConsultaCredito
     from .models import VotoComite, ContratoFormalizado, ChequeGarantia
 
     proposta = get_object_or_404(PropostaEmprestimo.objects.select_related("cliente"), id=proposta_id)
     cli = proposta.cliente
-    cfg = ConfiguracaoEmpresa.get_config()
+    cfg = timbre()
     hoje = timezone.localdate()
 
     response = HttpResponse(content_type="application/pdf")
@@ -1504,7 +1390,7 @@ def gerar_dossie_pdf(request, proposta_id):
 
     doc = SimpleDocTemplate(response, pagesize=A4, topMargin=20*mm, bottomMargin=20*mm,
                             leftMargin=15*mm, rightMargin=15*mm)
-    styles = getSampleStyleSheet()
+    styles = folha_estilos()
     els = []
 
     st_titulo = ParagraphStyle("Titulo", parent=styles["Heading1"], fontSize=16, alignment=TA_CENTER, spaceAfter=3*mm)
@@ -1514,12 +1400,15 @@ def gerar_dossie_pdf(request, proposta_id):
     st_corpo = ParagraphStyle("Corpo", parent=styles["Normal"], fontSize=9, alignment=TA_JUSTIFY, leading=13, spaceAfter=2*mm)
     st_small = ParagraphStyle("Small", parent=styles["Normal"], fontSize=8, textColor=colors.grey)
 
-    nome_empresa = cfg.nome_fantasia or cfg.nome_empresa or "EMPRESA"
+    nome_empresa = cfg.nome
 
     # === CABEÇALHO ===
+    imagem = logo(cfg, largura_mm=30)
+    if imagem is not None:
+        els.append(imagem)
     els.append(Paragraph(f"<b>{nome_empresa}</b>", ParagraphStyle("Emp", parent=styles["Normal"], fontSize=8, alignment=TA_CENTER)))
     if cfg.cnpj:
-        els.append(Paragraph(f"CNPJ: {cfg.cnpj} — {cfg.endereco_completo}", st_small))
+        els.append(Paragraph(f"CNPJ: {cfg.cnpj} — {cfg.endereco}", st_small))
     els.append(Spacer(1, 3*mm))
     els.append(Paragraph("DOSSIÊ DE PROPOSTA DE CRÉDITO", st_titulo))
     els.append(Paragraph(f"Proposta #{proposta.id} — {hoje.strftime('%d/%m/%Y')}", st_sub))
@@ -1680,10 +1569,8 @@ def gerar_dossie_pdf(request, proposta_id):
 
     # === RODAPÉ ===
     els.append(Spacer(1, 10*mm))
-    if cfg.rodape_linha1:
-        els.append(Paragraph(cfg.rodape_linha1, st_small))
-    if cfg.rodape_linha2:
-        els.append(Paragraph(cfg.rodape_linha2, st_small))
+    for linha in cfg.rodape:
+        els.append(Paragraph(linha, st_small))
 
     doc.build(els)
     return response
@@ -1730,7 +1617,4 @@ def nova_antecipacao(request):
             messages.success(request, f"Proposta de antecipação criada (#{proposta.id}).")
             return redirect("emprestimos:esteira_detalhe", proposta_id=proposta.id)
 
-    clientes = Cliente.objects.all().order_by("nome_completo")
-    return render(request, "emprestimos/esteira/nova_antecipacao.html", {
-        "clientes": clientes,
-    })
+    return render(request, "emprestimos/esteira/nova_antecipacao.html")
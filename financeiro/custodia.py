@@ -0,0 +1,295 @@
+"""
+Transições de status da custódia de cheques.
+
+Cada ação (enviar p/ compensação, compensar, devolver, reapresentar)
+é aplicada em lote: um UPDATE por data de ocorrência nos cheques, um
+INSERT de várias linhas (executemany) nas movimentações da C/C e um
+bulk_update nas contas correntes afetadas.
+A tela de custódia (um cheque) e a importação do arquivo de retorno
+(milhares de cheques) usam o mesmo caminho.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from contas.models import ContaCorrente, MovimentacaoConta
+from .models import ChequeCustodia
+from .retorno_cnab import OCORRENCIAS, chave_cheque, parse_retorno
+
+
+# Ação → (status de origem permitidos, status de destino)
+TRANSICOES = {
+    "enviar_compensacao": ({"EM_CUSTODIA"}, "ENVIADO_COMPENSACAO"),
+    "compensar": ({"EM_CUSTODIA", "ENVIADO_COMPENSACAO"}, "COMPENSADO"),
+    "devolver": ({"EM_CUSTODIA", "ENVIADO_COMPENSACAO"}, "DEVOLVIDO"),
+    "reapresentar": ({"DEVOLVIDO"}, "ENVIADO_COMPENSACAO"),
+}
+
+BATCH_SIZE = 1000
+
+# Colunas gravadas por _inserir_movimentacoes, na ordem das tuplas
+COLUNAS_MOVIMENTACAO = (
+    "conta", "tipo", "origem", "valor", "descricao", "data", "cheque_custodia",
+    "alinea", "estornado", "mov_estorno", "emprestimo", "parcela",
+)
+
+
+class TransicaoConcorrente(ValueError):
+    """Outra operação alterou os cheques no meio da transição (nada foi gravado)."""
+
+
+def motivo_devolucao(alinea="", motivo=""):
+    """Texto gravado no cheque e na C/C quando há devolução."""
+    if not alinea:
+        return motivo
+    descricao = dict(MovimentacaoConta.ALINEA_CHOICES).get(alinea, "")
+    return f"Alínea {alinea}: {descricao}. {motivo}".strip()
+
+
+def _movimentacao(acao, cheque, conta, motivo_completo, alinea):
+    """
+    (tipo, origem, valor, descrição, alínea) da movimentação da C/C e
+    ajusta os saldos da conta em memória.
+    """
+    valor = cheque.valor
+
+    if acao in ("enviar_compensacao", "reapresentar"):
+        conta.saldo_bloqueado += valor
+        if acao == "enviar_compensacao":
+            descricao = f"Cheque {cheque.numero_cheque} ({cheque.banco}) em compensação — BLOQUEADO"
+        else:
+            descricao = f"Cheque {cheque.numero_cheque} REAPRESENTADO — 2ª via — BLOQUEADO"
+        return "CREDITO_BLOQUEADO", "CHEQUE_COMPENSACAO", valor, descricao, ""
+
+    if acao == "compensar":
+        conta.saldo_bloqueado = max(Decimal("0"), conta.saldo_bloqueado - valor)
+        conta.saldo += valor
+        return (
+            "DESBLOQUEIO", "CHEQUE_COMPENSADO", valor,
+            f"Cheque {cheque.numero_cheque} ({cheque.banco}) COMPENSADO — saldo liberado", "",
+        )
+
+    # devolver — não debita saldo real, só estorna o bloqueio e registra
+    conta.saldo_bloqueado = max(Decimal("0"), conta.saldo_bloqueado - valor)
+    return (
+        "DEBITO", "CHEQUE_DEVOLVIDO", Decimal("0"),
+        f"Cheque {cheque.numero_cheque} DEVOLVIDO — {motivo_completo}", alinea,
+    )
+
+
+def _inserir_movimentacoes(linhas):
+    """
+    INSERT das movimentações (tuplas em COLUNAS_MOVIMENTACAO) com
+    executemany, em lotes de BATCH_SIZE: sem instanciar os modelos nem
+    compilar o SQL a cada lote, que era o grosso do tempo da importação.
+    Como no bulk_create, o save() da movimentação não é chamado (os
+    saldos são gravados por aplicar_transicao).
+    """
+    meta = MovimentacaoConta._meta
+    quote = connection.ops.quote_name
+    colunas = ", ".join(quote(meta.get_field(nome).column) for nome in COLUNAS_MOVIMENTACAO)
+    marcadores = ", ".join(["%s"] * len(COLUNAS_MOVIMENTACAO))
+    sql = f"INSERT INTO {quote(meta.db_table)} ({colunas}) VALUES ({marcadores})"
+    with connection.cursor() as cursor:
+        for i in range(0, len(linhas), BATCH_SIZE):
+            cursor.executemany(sql, linhas[i:i + BATCH_SIZE])
+
+
+@transaction.atomic
+def aplicar_transicao(cheques, acao, alinea="", motivo="", datas=None):
+    """
+    Aplica uma ação da custódia a vários cheques de uma vez.
+
+    Cheques cujo status atual não permite a ação são ignorados. O status
+    considerado é o do banco, relido com os cheques travados
+    (select_for_update), não o dos objetos recebidos: o mesmo retorno
+    importado duas vezes, ou uma ação na tela concorrendo com a
+    importação, não movimenta a conta duas vezes.
+    `datas` (opcional) mapeia cheque.pk → data da ocorrência; o padrão é hoje.
+
+    Retorna a lista de cheques efetivamente alterados.
+    """
+    origens, destino = TRANSICOES[acao]
+    hoje = timezone.localdate()
+    datas = datas or {}
+    motivo_completo = motivo_devolucao(alinea, motivo) if acao == "devolver" else ""
+
+    ids = [c.pk for c in cheques]
+    atuais = {}
+    for i in range(0, len(ids), BATCH_SIZE):
+        atuais.update(
+            ChequeCustodia.objects.select_for_update()
+            .filter(pk__in=ids[i:i + BATCH_SIZE])
+            .values_list("pk", "status")
+        )
+    for cheque in cheques:
+        cheque.status = atuais.get(cheque.pk, cheque.status)
+
+    alterados = [c for c in cheques if c.pk in atuais and c.status in origens]
+    if not alterados:
+        return []
+
+    # Um UPDATE ... WHERE id IN (...) por data de ocorrência
+    por_data = defaultdict(list)
+    for cheque in alterados:
+        por_data[datas.get(cheque.pk) or hoje].append(cheque)
+
+    for data, grupo in por_data.items():
+        campos = {"status": destino}
+        if acao in ("enviar_compensacao", "reapresentar"):
+            campos.update(data_envio_compensacao=data, data_devolucao=None, motivo_devolucao="")
+        elif acao == "compensar":
+            campos.update(data_compensacao=data)
+        else:
+            campos.update(data_devolucao=data, motivo_devolucao=motivo_completo)
+
+        ids_grupo = [c.pk for c in grupo]
+        for i in range(0, len(ids_grupo), BATCH_SIZE):
+            lote = ids_grupo[i:i + BATCH_SIZE]
+            # O filtro de status confirma a origem no próprio UPDATE (bancos sem FOR UPDATE)
+            atualizados = ChequeCustodia.objects.filter(pk__in=lote, status__in=origens).update(**campos)
+            if atualizados != len(lote):
+                raise TransicaoConcorrente(
+                    "Cheques alterados por outra operação durante a baixa. Nada foi gravado; tente novamente."
+                )
+        for cheque in grupo:
+            for nome, valor in campos.items():
+                setattr(cheque, nome, valor)
+
+    # Reflexo na conta corrente dos clientes
+    cliente_ids = {c.cliente_id for c in alterados if c.cliente_id}
+    if not cliente_ids:
+        return alterados
+
+    contas = {
+        cc.cliente_id: cc
+        for cc in ContaCorrente.objects.select_for_update().filter(cliente_id__in=cliente_ids)
+    }
+
+    if acao == "devolver":
+        MovimentacaoConta.objects.filter(
+            cheque_custodia__in=[c.pk for c in alterados if c.cliente_id in contas],
+            tipo="CREDITO_BLOQUEADO", estornado=False,
+        ).update(estornado=True)
+
+    agora = timezone.now()
+    data_db = connection.ops.adapt_datetimefield_value(agora)
+    movimentacoes = []
+    for cheque in alterados:
+        conta = contas.get(cheque.cliente_id)
+        if conta is None:
+            continue
+        tipo, origem, valor, descricao, alinea_mov = _movimentacao(acao, cheque, conta, motivo_completo, alinea)
+        movimentacoes.append((
+            conta.pk, tipo, origem, valor, descricao, data_db, cheque.pk,
+            alinea_mov, False, None, cheque.emprestimo_id, None,
+        ))
+
+    if movimentacoes:
+        _inserir_movimentacoes(movimentacoes)
+        for conta in contas.values():
+            conta.atualizado_em = agora
+        ContaCorrente.objects.bulk_update(
+            contas.values(), ["saldo", "saldo_bloqueado", "atualizado_em"],
+            batch_size=BATCH_SIZE,
+        )
+
+    return alterados
+
+
+# ==============================================================================
+# IMPORTAÇÃO DO ARQUIVO DE RETORNO
+# ==============================================================================
+
+@dataclass
+class ResultadoRetorno:
+    lidos: int = 0
+    aplicados: dict = field(default_factory=lambda: defaultdict(int))
+    nao_encontrados: list = field(default_factory=list)
+    ignorados: int = 0
+    erros: list = field(default_factory=list)
+
+    @property
+    def total_aplicados(self):
+        return sum(self.aplicados.values())
+
+
+# Colunas que a importação do retorno lê; aplicar_transicao usa as quatro últimas
+COLUNAS_RETORNO = ("id", "banco", "agencia", "conta", "numero_cheque", "valor", "status", "cliente_id", "emprestimo_id")
+
+
+def _cheques_em_aberto(chaves=None):
+    """
+    (banco, agência, conta, nº) → tupla COLUNAS_RETORNO dos cheques em
+    aberto; com `chaves`, só as que aparecem no arquivo.
+    """
+    linhas = {}
+    for linha in (
+        ChequeCustodia.objects.exclude(status="COMPENSADO")
+        .values_list(*COLUNAS_RETORNO).iterator(chunk_size=5000)
+    ):
+        chave = chave_cheque(*linha[1:5])
+        if chaves is None or chave in chaves:
+            linhas[chave] = linha
+    return linhas
+
+
+def _instanciar_cheques(linhas):
+    """{pk: cheque} a partir das tuplas, só com os campos de COLUNAS_RETORNO."""
+    # from_db recebe os valores na ordem dos campos concretos do modelo
+    ordem = [f.attname for f in ChequeCustodia._meta.concrete_fields if f.attname in COLUNAS_RETORNO]
+    posicao = [COLUNAS_RETORNO.index(nome) for nome in ordem]
+    return {
+        linha[0]: ChequeCustodia.from_db("default", ordem, [linha[i] for i in posicao])
+        for linha in linhas
+    }
+
+
+def processar_retorno(linhas):
+    """
+    Lê o arquivo de retorno, casa cada registro com um cheque da custódia
+    e aplica as transições agrupadas por ação/alínea numa única transação.
+    """
+    resultado = ResultadoRetorno()
+    registros = [(registro, registro.chave) for registro in parse_retorno(linhas, resultado.erros)]
+    em_aberto = _cheques_em_aberto({chave for _, chave in registros})
+
+    grupos = defaultdict(list)   # (acao, alinea) → [pks]
+    datas = {}
+    vistos = set()
+
+    for registro, chave in registros:
+        resultado.lidos += 1
+
+        acao = OCORRENCIAS.get(registro.ocorrencia)
+        if acao is None:
+            resultado.ignorados += 1
+            continue
+
+        linha = em_aberto.get(chave)
+        if linha is None:
+            resultado.nao_encontrados.append(registro)
+            continue
+        pk = linha[0]
+
+        if pk in vistos:
+            resultado.ignorados += 1
+            continue
+        vistos.add(pk)
+
+        alinea = registro.alinea if acao == "devolver" else ""
+        grupos[(acao, alinea)].append(pk)
+        if registro.data:
+            datas[pk] = registro.data
+
+    with transaction.atomic():
+        cheques = _instanciar_cheques(linha for linha in em_aberto.values() if linha[0] in vistos)
+        for (acao, alinea), pks in grupos.items():
+            alterados = aplicar_transicao([cheques[pk] for pk in pks if pk in cheques], acao, alinea=alinea, datas=datas)
+            resultado.aplicados[acao] += len(alterados)
+            resultado.ignorados += len(pks) - len(alterados)
+
+    return resultado
@@ -0,0 +1,62 @@
+"""Exportações do financeiro (ver core.exportacao)."""
+from core.exportacao import Coluna, escolhas, registrar_exportacao
+
+from .models import MovimentacaoCaixa, Transacao
+from .utils import FILTROS_TRANSACAO, filtrar_transacoes
+
+
+def _transacoes(request):
+    """Mesmos filtros da tela do razão, na mesma ordem (data, id)."""
+    filtros = {campo: request.GET.get(campo, "").strip() for campo in FILTROS_TRANSACAO}
+    qs, _ = filtrar_transacoes(Transacao.objects.all(), filtros)
+    return qs.order_by("-data", "-id")
+
+
+def _movimentacoes_caixa(request):
+    qs = MovimentacaoCaixa.objects.all()
+    caixa = request.GET.get("caixa", "")
+    if caixa.isdigit():
+        qs = qs.filter(caixa_id=int(caixa))
+    return qs.order_by("data_hora", "id")
+
+
+registrar_exportacao(
+    "transacoes",
+    titulo="Transações",
+    modulo="FINANCEIRO",
+    queryset=_transacoes,
+    colunas=[
+        Coluna("ID", "id", largura=8),
+        Coluna("Data", "data", largura=17),
+        Coluna("Tipo", "tipo", escolhas(Transacao, "tipo"), largura=25),
+        Coluna("Código", "codigo_operacao__codigo", largura=8),
+        Coluna("Descrição", "descricao", largura=45),
+        Coluna("Contrato", "emprestimo__codigo_contrato"),
+        Coluna("Usuário", "usuario__username"),
+        Coluna("Valor", "valor"),
+        Coluna("Autenticação", "codigo_autenticacao", largura=25),
+    ],
+)
+
+registrar_exportacao(
+    "movimentacoes-caixa",
+    titulo="Movimentações de Caixa",
+    modulo="FINANCEIRO",
+    queryset=_movimentacoes_caixa,
+    colunas=[
+        Coluna("ID", "id", largura=8),
+        Coluna("Data/Hora", "data_hora", largura=17),
+        Coluna("Caixa", "caixa__identificador"),
+        Coluna("Data do Caixa", "caixa__data", largura=12),
+        Coluna("Código", "codigo_operacao__codigo", largura=8),
+        Coluna("Operação", "codigo_operacao__descricao", largura=30),
+        Coluna("Descrição", "descricao", largura=45),
+        Coluna("Cliente", "cliente__nome_completo", largura=35),
+        Coluna("Contrato", "emprestimo__codigo_contrato"),
+        Coluna("Valor", "valor"),
+        Coluna("Afetou Caixa Físico", "afetou_caixa_fisico"),
+        Coluna("Autenticação", "numero_autenticacao"),
+        Coluna("Estornado", "estornado", largura=10),
+        Coluna("Usuário", "usuario__username"),
+    ],
+)
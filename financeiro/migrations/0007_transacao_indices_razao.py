@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emprestimos', '0009_propostaemprestimo_contrato_renegociado_and_more'),
+        ('financeiro', '0006_caixa_identificador_alter_caixa_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'id'], name='financeiro__data_bb71e6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['tipo', 'data', 'id'], name='financeiro__tipo_3fb702_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['codigo_operacao', 'data', 'id'], name='financeiro__codigo__2571cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['emprestimo', 'data', 'id'], name='financeiro__emprest_540b38_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['usuario', 'data', 'id'], name='financeiro__usuario_9ba18c_idx'),
+        ),
+    ]
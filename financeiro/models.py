@@ -1,8 +1,8 @@
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Sum
+from django.db.models import F, Sum
 
 
 class CodigoOperacao(models.Model):
@@ -166,6 +166,16 @@ class Transacao(models.Model):
     transacao_original = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
     codigo_operacao = models.ForeignKey(CodigoOperacao, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        # Índices compostos para a paginação por keyset do razão (data, id)
+        indexes = [
+            models.Index(fields=["data", "id"]),
+            models.Index(fields=["tipo", "data", "id"]),
+            models.Index(fields=["codigo_operacao", "data", "id"]),
+            models.Index(fields=["emprestimo", "data", "id"]),
+            models.Index(fields=["usuario", "data", "id"]),
+        ]
+
     def save(self, *args, **kwargs):
         tipos_saida = ['EMPRESTIMO_SAIDA', 'DESPESA', 'RETIRADA', 'SAQUE_CC', 'ANTECIPACAO']
         if self.tipo in tipos_saida and self.valor > 0:
@@ -185,6 +195,13 @@ def calcular_saldo_atual():
 # TESOURARIA
 # ==============================================================================
 
+# Campos da tesouraria que não mudam depois de criada: ficam em cache no
+# processo; os demais (saldo, status, fechamento) são lidos a cada obter()
+_tesouraria_cache = {}
+CAMPOS_FIXOS_TESOURARIA = ("id", "data", "saldo_abertura", "aberto_por_id", "aberto_em", "criado_em")
+CAMPOS_VARIAVEIS_TESOURARIA = ("saldo_atual", "status", "fechado_por_id", "fechado_em")
+
+
 class Tesouraria(models.Model):
     """Cofre central permanente — distribui e recebe dinheiro dos caixas."""
     data = models.DateField("Data Criação", null=True, blank=True)
@@ -206,7 +223,50 @@ class Tesouraria(models.Model):
     def __str__(self):
         return f"Tesouraria {self.data.strftime('%d/%m/%Y')} — R$ {self.saldo_atual}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.invalidar_cache()
+
+    @classmethod
+    def obter(cls):
+        """
+        Tesouraria singleton (pk=1), ou None se não inicializada.
+
+        Cada chamada devolve uma instância nova: os campos fixos vêm do cache
+        do processo e saldo/status de uma consulta estreita, então o saldo
+        alterado por outro worker (UPDATE com F()) já vem atualizado. O saldo
+        só muda por atualizar_saldo(); outros saves usam update_fields.
+        """
+        fixos = _tesouraria_cache.get("singleton")
+        if fixos is None:
+            linha = cls.objects.filter(pk=1).values_list(*CAMPOS_FIXOS_TESOURARIA, *CAMPOS_VARIAVEIS_TESOURARIA).first()
+            if linha is None:
+                return None
+            fixos = linha[:len(CAMPOS_FIXOS_TESOURARIA)]
+            _tesouraria_cache["singleton"] = fixos
+            variaveis = linha[len(CAMPOS_FIXOS_TESOURARIA):]
+        else:
+            variaveis = cls.objects.filter(pk=fixos[0]).values_list(*CAMPOS_VARIAVEIS_TESOURARIA).first()
+            if variaveis is None:
+                cls.invalidar_cache()
+                return None
+        valores = dict(zip(CAMPOS_FIXOS_TESOURARIA + CAMPOS_VARIAVEIS_TESOURARIA, fixos + tuple(variaveis)))
+        # from_db espera os valores na ordem dos campos do model
+        campos = [f.attname for f in cls._meta.concrete_fields]
+        return cls.from_db(cls.objects.db, campos, [valores[campo] for campo in campos])
+
+    @classmethod
+    def invalidar_cache(cls):
+        _tesouraria_cache.pop("singleton", None)
+
+    def atualizar_saldo(self, delta):
+        """Soma `delta` ao saldo com UPDATE atômico (F()), sem reler o histórico."""
+        Tesouraria.objects.filter(pk=self.pk).update(saldo_atual=F("saldo_atual") + delta)
+        self.invalidar_cache()
+        self.refresh_from_db(fields=["saldo_atual"])
+
     def recalcular_saldo(self):
+        """Recalcula o saldo a partir de todas as movimentações (conferência/ajuste)."""
         total = self.movimentacoes.filter(estornado=False).aggregate(s=Sum("valor"))["s"] or Decimal("0")
         self.saldo_atual = self.saldo_abertura + total
         self.save(update_fields=["saldo_atual"])
@@ -242,7 +302,27 @@ class MovimentacaoTesouraria(models.Model):
     def save(self, *args, **kwargs):
         if self.tipo in ["RETIRADA", "ENVIO_CAIXA"] and self.valor > 0:
             self.valor = self.valor * -1
-        super().save(*args, **kwargs)
+        if self.pk:
+            super().save(*args, **kwargs)
+            return
+        # Nova movimentação: saldo da tesouraria ajustado na mesma transação
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.estornado:
+                self.tesouraria.atualizar_saldo(self.valor)
+
+    @transaction.atomic
+    def estornar(self, usuario):
+        """Marca como estornada e devolve o valor ao saldo. Retorna False se já estornada."""
+        agora = timezone.now()
+        alterou = MovimentacaoTesouraria.objects.filter(pk=self.pk, estornado=False).update(
+            estornado=True, estornado_por=usuario, estornado_em=agora,
+        )
+        if not alterou:
+            return False
+        self.estornado, self.estornado_por, self.estornado_em = True, usuario, agora
+        self.tesouraria.atualizar_saldo(-self.valor)
+        return True
 
 
 # ==============================================================================
@@ -297,6 +377,12 @@ class ChequeCustodia(models.Model):
         from datetime import date
         return self.vencimento < date.today() and self.status == "EM_CUSTODIA"
 
+    @property
+    def chave(self):
+        """Chave banco/agência/conta/nº usada para casar com o arquivo de retorno."""
+        from .retorno_cnab import chave_cheque
+        return chave_cheque(self.banco, self.agencia, self.conta, self.numero_cheque)
+
     @property
     def status_cor(self):
         return {"EM_CUSTODIA": "primary", "ENVIADO_COMPENSACAO": "warning",
@@ -0,0 +1,192 @@
+"""
+Parser de arquivos de retorno da compensação (CNAB 240 / CNAB 400)
+para a custódia de cheques.
+
+O arquivo é lido linha a linha (streaming) — nada é carregado inteiro em
+memória. O layout é detectado pelo tamanho do primeiro registro:
+
+- CNAB 240: registros de detalhe com tipo "3" na posição 008 e segmento
+  de custódia na posição 014.
+- CNAB 400: registros de detalhe com tipo "1" na posição 001.
+
+As posições abaixo seguem a numeração FEBRABAN (1-based, inclusiva) e
+ficam em tabelas para facilitar o ajuste ao layout de cada banco.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class RegistroRetorno:
+    """Registro de detalhe extraído do arquivo de retorno."""
+    linha: int
+    ocorrencia: str
+    banco: str
+    agencia: str
+    conta: str
+    numero_cheque: str
+    valor: Decimal
+    data: Optional[date]
+    alinea: str = ""
+
+    @property
+    def chave(self):
+        return chave_cheque(self.banco, self.agencia, self.conta, self.numero_cheque)
+
+
+# Códigos de ocorrência do retorno → ação da custódia
+OCORRENCIA_ENTRADA_CONFIRMADA = "02"
+OCORRENCIA_COMPENSADO = "06"
+OCORRENCIA_DEVOLVIDO = "10"
+OCORRENCIA_REAPRESENTADO = "12"
+
+OCORRENCIAS = {
+    OCORRENCIA_ENTRADA_CONFIRMADA: "enviar_compensacao",
+    OCORRENCIA_COMPENSADO: "compensar",
+    OCORRENCIA_DEVOLVIDO: "devolver",
+    OCORRENCIA_REAPRESENTADO: "reapresentar",
+}
+
+
+NAO_DIGITO = re.compile(r"\D")
+
+
+def _pos(inicio, fim):
+    """Converte posição FEBRABAN (1-based, inclusiva) em slice."""
+    return slice(inicio - 1, fim)
+
+
+# ==============================================================================
+# LAYOUTS
+# ==============================================================================
+
+LAYOUT_240 = {
+    "tamanho": 240,
+    "tipo_registro": (_pos(8, 8), "3"),
+    "segmento": (_pos(14, 14), "D"),
+    "ocorrencia": _pos(16, 17),
+    "banco": _pos(18, 20),
+    "agencia": _pos(21, 25),
+    "conta": _pos(26, 37),
+    "numero_cheque": _pos(38, 43),
+    "valor": _pos(44, 58),
+    "data": _pos(59, 66),          # DDMMAAAA
+    "alinea": _pos(67, 68),
+}
+
+LAYOUT_400 = {
+    "tamanho": 400,
+    "tipo_registro": (_pos(1, 1), "1"),
+    "segmento": None,
+    "ocorrencia": _pos(109, 110),
+    "data": _pos(111, 116),        # DDMMAA
+    "banco": _pos(117, 119),
+    "agencia": _pos(120, 124),
+    "conta": _pos(125, 136),
+    "numero_cheque": _pos(137, 142),
+    "valor": _pos(153, 165),
+    "alinea": _pos(166, 167),
+}
+
+LAYOUTS = {240: LAYOUT_240, 400: LAYOUT_400}
+
+
+def chave_cheque(banco, agencia, conta, numero_cheque) -> Tuple[str, str, str, str]:
+    """
+    Chave de comparação banco/agência/conta/número.
+
+    Mantém só os dígitos e descarta zeros à esquerda, para que "0341" e
+    "341" ou "12345-6" e "000000123456" sejam equivalentes.
+    """
+    return (_digitos(banco), _digitos(agencia), _digitos(conta), _digitos(numero_cheque))
+
+
+def _digitos(campo: str) -> str:
+    # Campos do arquivo já vêm só com dígitos: o regex fica para os digitados
+    return (campo if campo.isdigit() else NAO_DIGITO.sub("", campo)).lstrip("0")
+
+
+def _parse_data(texto: str) -> Optional[date]:
+    texto = texto.strip()
+    if not texto.isdigit() or int(texto) == 0:
+        return None
+    dia, mes = int(texto[0:2]), int(texto[2:4])
+    ano = int(texto[4:])
+    if len(texto) == 6:
+        ano += 2000
+    return date(ano, mes, dia)
+
+
+def _parse_registro(texto: str, layout: dict, numero_linha: int) -> Optional[RegistroRetorno]:
+    pos_tipo, tipo = layout["tipo_registro"]
+    if texto[pos_tipo] != tipo:
+        return None  # header, trailer ou lote
+    if layout["segmento"] is not None:
+        pos_seg, segmento = layout["segmento"]
+        if texto[pos_seg] != segmento:
+            return None
+
+    valor = texto[layout["valor"]].strip()
+    if not valor.isdigit():
+        raise ValueError(f"valor inválido: {valor!r}")
+
+    return RegistroRetorno(
+        linha=numero_linha,
+        ocorrencia=texto[layout["ocorrencia"]],
+        banco=texto[layout["banco"]],
+        agencia=texto[layout["agencia"]],
+        conta=texto[layout["conta"]],
+        numero_cheque=texto[layout["numero_cheque"]],
+        valor=Decimal(valor).scaleb(-2),
+        data=_parse_data(texto[layout["data"]]),
+        alinea=texto[layout["alinea"]].strip(),
+    )
+
+
+def parse_retorno(
+    linhas: Iterable,
+    erros: Optional[List[Tuple[int, str]]] = None,
+) -> Iterator[RegistroRetorno]:
+    """
+    Lê um arquivo de retorno e gera os registros de detalhe de custódia.
+
+    Args:
+        linhas: iterável de linhas (str ou bytes) — arquivo aberto, upload
+            do Django ou lista sintética.
+        erros: lista opcional que recebe (nº da linha, motivo) para cada
+            registro de detalhe que não pôde ser lido.
+    """
+    layout = None
+
+    for numero_linha, linha in enumerate(linhas, start=1):
+        if isinstance(linha, bytes):
+            linha = linha.decode("latin-1")
+        texto = linha.rstrip("\r\n")
+        if not texto.strip():
+            continue
+
+        if layout is None:
+            layout = LAYOUTS.get(len(texto))
+            if layout is None:
+                raise ValueError(
+                    f"Layout não reconhecido — registro com {len(texto)} posições "
+                    "(esperado 240 ou 400)."
+                )
+
+        if len(texto) != layout["tamanho"]:
+            if erros is not None:
+                erros.append((numero_linha, f"registro com {len(texto)} posições"))
+            continue
+
+        try:
+            registro = _parse_registro(texto, layout, numero_linha)
+        except ValueError as e:
+            if erros is not None:
+                erros.append((numero_linha, str(e)))
+            continue
+
+        if registro is not None:
+            yield registro
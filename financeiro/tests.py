@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from clientes.models import Cliente
+from contas.models import ContaCorrente, MovimentacaoConta
+
+from .custodia import aplicar_transicao, processar_retorno
+from .models import ChequeCustodia
+from .retorno_cnab import LAYOUT_240, LAYOUT_400, chave_cheque, parse_retorno
+
+
+# ==============================================================================
+# ARQUIVOS DE RETORNO SINTÉTICOS
+# ==============================================================================
+
+def _registro(layout, campos):
+    """Linha de tamanho fixo com os campos (já formatados) nas posições do layout."""
+    linha = [" "] * layout["tamanho"]
+    for posicao, texto in campos:
+        assert len(texto) == posicao.stop - posicao.start, (posicao, texto)
+        linha[posicao] = texto
+    return "".join(linha)
+
+
+def detalhe(layout, ocorrencia, cheque, data=None, alinea="", valor=None):
+    """Registro de detalhe do retorno para um ChequeCustodia (ou dict com os mesmos campos)."""
+    obter = cheque.get if isinstance(cheque, dict) else lambda campo: getattr(cheque, campo)
+    valor = obter("valor") if valor is None else valor
+    data = data or date(2030, 1, 15)
+    tamanho = lambda campo: layout[campo].stop - layout[campo].start
+    numerico = lambda campo, texto: str(texto).zfill(tamanho(campo))
+
+    campos = [
+        (layout["tipo_registro"][0], layout["tipo_registro"][1]),
+        (layout["ocorrencia"], ocorrencia),
+        (layout["banco"], numerico("banco", obter("banco"))),
+        (layout["agencia"], numerico("agencia", obter("agencia"))),
+        (layout["conta"], numerico("conta", obter("conta").replace("-", ""))),
+        (layout["numero_cheque"], numerico("numero_cheque", obter("numero_cheque"))),
+        (layout["valor"], numerico("valor", int(Decimal(valor) * 100))),
+        (layout["data"], data.strftime("%d%m%Y" if tamanho("data") == 8 else "%d%m%y")),
+        (layout["alinea"], alinea.ljust(2)),
+    ]
+    if layout["segmento"] is not None:
+        campos.append((layout["segmento"][0], layout["segmento"][1]))
+    return _registro(layout, campos)
+
+
+def arquivo_retorno(layout, detalhes):
+    """Arquivo completo: header, detalhes e trailer (tipos que o parser ignora)."""
+    header = _registro(layout, [(layout["tipo_registro"][0], "0")])
+    trailer = _registro(layout, [(layout["tipo_registro"][0], "9")])
+    return [header + "\r\n"] + [d + "\r\n" for d in detalhes] + [trailer + "\r\n"]
+
+
+# ==============================================================================
+# PARSER
+# ==============================================================================
+
+class ParserRetornoTest(TestCase):
+    CHEQUE = {"banco": "341", "agencia": "0123", "conta": "45678-9", "numero_cheque": "000321", "valor": "1234.56"}
+
+    def test_cnab_240(self):
+        linhas = arquivo_retorno(LAYOUT_240, [
+            detalhe(LAYOUT_240, "06", self.CHEQUE, data=date(2030, 2, 3)),
+            detalhe(LAYOUT_240, "10", self.CHEQUE, alinea="11"),
+        ])
+
+        registros = list(parse_retorno(linhas))
+
+        self.assertEqual([r.ocorrencia for r in registros], ["06", "10"])
+        self.assertEqual([r.linha for r in registros], [2, 3])
+        self.assertEqual(registros[0].valor, Decimal("1234.56"))
+        self.assertEqual(registros[0].data, date(2030, 2, 3))
+        self.assertEqual(registros[1].alinea, "11")
+        self.assertEqual(registros[0].chave, chave_cheque("341", "123", "456789", "321"))
+
+    def test_cnab_400_em_bytes(self):
+        linhas = [
+            linha.encode("latin-1")
+            for linha in arquivo_retorno(LAYOUT_400, [detalhe(LAYOUT_400, "02", self.CHEQUE, data=date(2030, 12, 31))])
+        ]
+
+        registros = list(parse_retorno(linhas))
+
+        self.assertEqual(len(registros), 1)
+        self.assertEqual(registros[0].data, date(2030, 12, 31))
+        self.assertEqual(registros[0].valor, Decimal("1234.56"))
+
+    def test_registros_invalidos_vao_para_erros(self):
+        valido = detalhe(LAYOUT_240, "06", self.CHEQUE)
+        valor_invalido = valido[:LAYOUT_240["valor"].start] + "X" * 15 + valido[LAYOUT_240["valor"].stop:]
+        linhas = arquivo_retorno(LAYOUT_240, [valido, valido[:200], valor_invalido])
+        erros = []
+
+        registros = list(parse_retorno(linhas, erros))
+
+        self.assertEqual(len(registros), 1)
+        self.assertEqual([linha for linha, _ in erros], [3, 4])
+
+    def test_layout_desconhecido(self):
+        with self.assertRaises(ValueError):
+            list(parse_retorno(["X" * 300]))
+
+    def test_chave_ignora_zeros_e_pontuacao(self):
+        self.assertEqual(chave_cheque("0341", "0123", "45678-9", "000321"), chave_cheque("341", "123", "456789", "321"))
+
+
+# ==============================================================================
+# TRANSIÇÕES E IMPORTAÇÃO
+# ==============================================================================
+
+class CustodiaTransicoesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(nome_completo="Cliente", cpf="529.982.247-25", renda_mensal=Decimal("5000"))
+        cls.conta = ContaCorrente.objects.create(cliente=cls.cliente)
+
+    def _cheque(self, numero, valor="100.00", status="EM_CUSTODIA"):
+        return ChequeCustodia.objects.create(
+            banco="341", agencia="0123", conta="45678-9", numero_cheque=str(numero),
+            valor=Decimal(valor), vencimento=date.today() + timedelta(days=10),
+            emitente="Emitente", cliente=self.cliente, status=status,
+        )
+
+    def _saldos(self):
+        self.conta.refresh_from_db()
+        return self.conta.saldo, self.conta.saldo_bloqueado
+
+    def test_envio_e_compensacao(self):
+        cheque = self._cheque(1, "250.00")
+
+        aplicar_transicao([cheque], "enviar_compensacao")
+        self.assertEqual(self._saldos(), (Decimal("0.00"), Decimal("250.00")))
+
+        aplicar_transicao([cheque], "compensar")
+        cheque.refresh_from_db()
+        self.assertEqual(cheque.status, "COMPENSADO")
+        self.assertEqual(self._saldos(), (Decimal("250.00"), Decimal("0.00")))
+
+    def test_status_do_banco_prevalece_sobre_o_objeto(self):
+        cheque = self._cheque(2, "80.00")
+        copia_antiga = ChequeCustodia.objects.get(pk=cheque.pk)
+        aplicar_transicao([cheque], "compensar")
+
+        # Outra requisição com o objeto lido antes da compensação
+        alterados = aplicar_transicao([copia_antiga], "compensar")
+
+        self.assertEqual(alterados, [])
+        self.assertEqual(copia_antiga.status, "COMPENSADO")
+        self.assertEqual(self._saldos(), (Decimal("80.00"), Decimal("0.00")))
+        self.assertEqual(MovimentacaoConta.objects.filter(cheque_custodia=cheque).count(), 1)
+
+    def test_retorno_importado_duas_vezes_movimenta_uma_vez(self):
+        compensado = self._cheque(10, "100.00", status="ENVIADO_COMPENSACAO")
+        devolvido = self._cheque(11, "40.00", status="ENVIADO_COMPENSACAO")
+        self.conta.saldo_bloqueado = Decimal("140.00")
+        self.conta.save()
+        desconhecido = {"banco": "001", "agencia": "1", "conta": "2", "numero_cheque": "3", "valor": "1"}
+        arquivo = arquivo_retorno(LAYOUT_240, [
+            detalhe(LAYOUT_240, "06", compensado, data=date(2030, 3, 1)),
+            detalhe(LAYOUT_240, "10", devolvido, alinea="11"),
+            detalhe(LAYOUT_240, "06", desconhecido),
+            detalhe(LAYOUT_240, "99", compensado),          # ocorrência sem ação
+        ])
+
+        primeiro = processar_retorno(arquivo)
+        segundo = processar_retorno(arquivo)
+
+        self.assertEqual(primeiro.lidos, 4)
+        self.assertEqual(dict(primeiro.aplicados), {"compensar": 1, "devolver": 1})
+        self.assertEqual(len(primeiro.nao_encontrados), 1)
+        self.assertEqual(primeiro.ignorados, 1)
+        self.assertEqual(segundo.total_aplicados, 0)
+
+        compensado.refresh_from_db()
+        devolvido.refresh_from_db()
+        self.assertEqual(compensado.data_compensacao, date(2030, 3, 1))
+        self.assertEqual(devolvido.status, "DEVOLVIDO")
+        self.assertTrue(devolvido.motivo_devolucao.startswith("Alínea 11"))
+        self.assertEqual(self._saldos(), (Decimal("100.00"), Decimal("0.00")))
+        self.assertEqual(MovimentacaoConta.objects.filter(cheque_custodia__in=[compensado, devolvido]).count(), 2)
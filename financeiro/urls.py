@@ -5,6 +5,7 @@ app_name = "financeiro"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("razao/", views.razao, name="razao"),
     path("estornar/<int:transacao_id>/", views.estornar, name="estornar"),
 
     # Caixa
@@ -24,9 +25,11 @@ urlpatterns = [
     # Tesouraria
     path("tesouraria/", views.tesouraria_painel, name="tesouraria_painel"),
     path("tesouraria/lancamento/", views.tesouraria_lancamento, name="tesouraria_lancamento"),
+    path("tesouraria/estornar/<int:mov_id>/", views.tesouraria_estornar, name="tesouraria_estornar"),
 
     # Custódia de cheques
     path("custodia/", views.custodia_painel, name="custodia_painel"),
     path("custodia/entrada/", views.custodia_entrada, name="custodia_entrada"),
     path("custodia/<int:cheque_id>/acao/", views.custodia_acao, name="custodia_acao"),
+    path("custodia/retorno/", views.custodia_importar_retorno, name="custodia_importar_retorno"),
 ]
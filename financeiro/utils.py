@@ -9,4 +9,44 @@ def get_client_ip(request):
         ip = x_forwarded_for.split(',')[0]
     else:
         ip = request.META.get('REMOTE_ADDR')
-    return ip
\ No newline at end of file
+    return ip
+
+FILTROS_TRANSACAO = ("tipo", "codigo_operacao", "contrato", "usuario", "data_inicio", "data_fim")
+
+
+def filtrar_transacoes(queryset, filtros):
+    """
+    Aplica os filtros do razão (tipo, código, contrato, usuário, período)
+    ao queryset de Transacao. Usado pela tela do razão e pela exportação.
+
+    Retorna (queryset, data_invalida).
+    """
+    from datetime import date, datetime, time, timedelta
+    from django.utils import timezone
+
+    tipo = filtros.get("tipo", "")
+    codigo = filtros.get("codigo_operacao", "")
+    contrato = filtros.get("contrato", "").strip()
+    usuario = filtros.get("usuario", "")
+
+    if tipo:
+        queryset = queryset.filter(tipo=tipo)
+    if codigo.isdigit():
+        queryset = queryset.filter(codigo_operacao_id=int(codigo))
+    if contrato:
+        queryset = queryset.filter(emprestimo__codigo_contrato=contrato)
+    if usuario.isdigit():
+        queryset = queryset.filter(usuario_id=int(usuario))
+
+    # Período como intervalo de datetime (usa o índice; __date não usaria)
+    try:
+        if filtros.get("data_inicio"):
+            inicio = date.fromisoformat(filtros["data_inicio"])
+            queryset = queryset.filter(data__gte=timezone.make_aware(datetime.combine(inicio, time.min)))
+        if filtros.get("data_fim"):
+            fim = date.fromisoformat(filtros["data_fim"]) + timedelta(days=1)
+            queryset = queryset.filter(data__lt=timezone.make_aware(datetime.combine(fim, time.min)))
+    except ValueError:
+        return queryset, True
+
+    return queryset, False
@@ -6,11 +6,10 @@ from django.contrib.auth import authenticate
 from django.contrib import messages
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q, Sum
+from django.db.models import Sum
 from django.http import JsonResponse
 
 from .models import Transacao, CodigoOperacao, Caixa, MovimentacaoCaixa, calcular_saldo_atual
-from clientes.models import Cliente
 from contas.models import ContaCorrente, MovimentacaoConta
 
 
@@ -56,17 +55,77 @@ def index(request):
     transacoes = Transacao.objects.select_related("codigo_operacao", "usuario").order_by("-data")[:50]
     saldo = calcular_saldo_atual()
     codigos = CodigoOperacao.objects.filter(ativo=True).order_by("codigo")
-    clientes = Cliente.objects.all().order_by("nome_completo")
 
     return render(request, "financeiro/index.html", {
         "transacoes": transacoes,
         "saldo_atual": saldo,
         "codigos_operacao": codigos,
-        "clientes": clientes,
         "TIPO_CHOICES": Transacao.TIPO_CHOICES,
     })
 
 
+@login_required
+def razao(request):
+    """Razão de transações — filtros no servidor e paginação por keyset (data, id)."""
+    from urllib.parse import urlencode
+    from django.contrib.auth import get_user_model
+    from django.db.models import Case, F, RowRange, Value, When, Window
+    from core.paginacao import paginar_keyset
+    from .utils import FILTROS_TRANSACAO, filtrar_transacoes
+
+    filtros = {campo: request.GET.get(campo, "").strip() for campo in FILTROS_TRANSACAO}
+
+    qs, data_invalida = filtrar_transacoes(
+        Transacao.objects.select_related("codigo_operacao", "usuario", "emprestimo"), filtros,
+    )
+    if data_invalida:
+        messages.error(request, "Data inválida no filtro.")
+
+    # Totais corridos da página calculados no banco (window functions)
+    ordem_janela = [F("data").desc(), F("id").desc()]
+    corrido = RowRange(start=None, end=0)
+    qs = qs.annotate(
+        acumulado=Window(Sum("valor"), order_by=ordem_janela, frame=corrido),
+        entradas_acumuladas=Window(
+            Sum(Case(When(valor__gt=0, then=F("valor")), default=Value(Decimal("0.00")))),
+            order_by=ordem_janela, frame=corrido,
+        ),
+        saidas_acumuladas=Window(
+            Sum(Case(When(valor__lt=0, then=F("valor")), default=Value(Decimal("0.00")))),
+            order_by=ordem_janela, frame=corrido,
+        ),
+    )
+
+    pagina = paginar_keyset(
+        qs, ["-data", "-id"],
+        apos=request.GET.get("apos"), antes=request.GET.get("antes"),
+        por_pagina=50,
+    )
+
+    totais_pagina = {"entradas": Decimal("0.00"), "saidas": Decimal("0.00"), "liquido": Decimal("0.00")}
+    if pagina.itens:
+        ultima = pagina.itens[-1]
+        totais_pagina = {
+            "entradas": ultima.entradas_acumuladas,
+            "saidas": ultima.saidas_acumuladas,
+            "liquido": ultima.acumulado,
+        }
+
+    # Querystring dos filtros, reaproveitada nos links de paginação
+    filtros_qs = urlencode({k: v for k, v in filtros.items() if v})
+
+    return render(request, "financeiro/razao.html", {
+        "pagina": pagina,
+        "transacoes": pagina.itens,
+        "totais_pagina": totais_pagina,
+        "filtros": filtros,
+        "filtros_qs": filtros_qs,
+        "TIPO_CHOICES": Transacao.TIPO_CHOICES,
+        "codigos_operacao": CodigoOperacao.objects.filter(ativo=True).order_by("codigo"),
+        "usuarios": get_user_model().objects.filter(is_active=True).order_by("username"),
+    })
+
+
 @login_required
 def estornar(request, transacao_id):
     if request.method == "POST":
@@ -121,7 +180,7 @@ def caixa_abrir(request):
     from .models import Tesouraria, MovimentacaoTesouraria
     hoje = timezone.localdate()
 
-    tesouraria = Tesouraria.objects.filter(pk=1).first()
+    tesouraria = Tesouraria.obter()
     if not tesouraria:
         messages.error(request, "Tesouraria não inicializada. Acesse a tesouraria primeiro.")
         return redirect("financeiro:tesouraria_painel")
@@ -158,7 +217,6 @@ def caixa_abrir(request):
             descricao=f"Envio p/ {identificador} — {request.user.get_full_name() or request.user.username}",
             caixa_destino=caixa, usuario=request.user,
         )
-        tesouraria.recalcular_saldo()
 
         messages.success(request, f"{identificador} aberto com R$ {saldo:.2f} da tesouraria.")
         return redirect("financeiro:caixa_painel")
@@ -274,15 +332,12 @@ def caixa_lancamento(request):
         afetou_caixa_fisico=False, estornado=False,
     ).aggregate(s=Sum("valor"))["s"] or Decimal("0.00")
 
-    clientes = Cliente.objects.all().order_by("nome_completo")
-
     return render(request, "financeiro/caixa_lancamento.html", {
         "caixa": caixa,
         "codigos": codigos,
         "movimentacoes": movimentacoes,
         "saldo_fisico": saldo_fisico,
         "total_eletronico": total_eletronico,
-        "clientes": clientes,
         "hoje": hoje,
     })
 
@@ -336,7 +391,7 @@ def caixa_fechar(request, caixa_id=None):
         })
 
     caixa = get_object_or_404(Caixa, id=caixa_id, status="ABERTO")
-    tesouraria = Tesouraria.objects.filter(pk=1).first()
+    tesouraria = Tesouraria.obter()
     saldo_fisico = caixa.saldo_fisico_calculado
 
     if request.method == "POST":
@@ -374,7 +429,6 @@ def caixa_fechar(request, caixa_id=None):
                 descricao=f"Recebimento {caixa.identificador} — {request.user.get_full_name() or request.user.username}",
                 caixa_destino=caixa, usuario=request.user,
             )
-            tesouraria.recalcular_saldo()
 
         if abs(diferenca) < Decimal("0.01"):
             messages.success(request, f"{caixa.identificador} fechado — sem diferença. R$ {saldo_conferido:.2f} devolvido à tesouraria.")
@@ -460,16 +514,8 @@ def caixa_historico(request):
 @login_required
 def buscar_cliente_ajax(request):
     """Busca clientes por nome/CPF para o lançamento."""
-    q = request.GET.get("q", "")
-    if len(q) < 2:
-        return JsonResponse({"resultados": []})
-    clientes = Cliente.objects.filter(
-        Q(nome_completo__icontains=q) | Q(cpf__icontains=q)
-    )[:10]
-    return JsonResponse({"resultados": [
-        {"id": c.id, "nome": c.nome_completo, "cpf": c.cpf}
-        for c in clientes
-    ]})
+    from clientes.busca import autocompletar
+    return JsonResponse({"resultados": autocompletar(request.GET.get("q", ""), limite=10)})
 
 
 # ==============================================================================
@@ -483,14 +529,15 @@ def tesouraria_painel(request):
     hoje = timezone.localdate()
 
     # Tesouraria é singleton — cria se não existir
-    tesouraria, criada = Tesouraria.objects.get_or_create(
-        pk=1, defaults={
-            "data": hoje, "saldo_abertura": Decimal("0.00"),
-            "saldo_atual": Decimal("0.00"), "status": "ABERTA",
-            "aberto_por": request.user, "aberto_em": timezone.now(),
-        }
-    )
-    tesouraria.recalcular_saldo()
+    tesouraria = Tesouraria.obter()
+    if tesouraria is None:
+        tesouraria, criada = Tesouraria.objects.get_or_create(
+            pk=1, defaults={
+                "data": hoje, "saldo_abertura": Decimal("0.00"),
+                "saldo_atual": Decimal("0.00"), "status": "ABERTA",
+                "aberto_por": request.user, "aberto_em": timezone.now(),
+            }
+        )
 
     caixas_abertos = Caixa.objects.filter(data=hoje, status="ABERTO")
 
@@ -516,7 +563,7 @@ def tesouraria_lancamento(request):
     """Registra movimentação na tesouraria."""
     from .models import Tesouraria, MovimentacaoTesouraria
 
-    tesouraria = Tesouraria.objects.filter(pk=1).first()
+    tesouraria = Tesouraria.obter()
     if not tesouraria:
         messages.error(request, "Tesouraria não inicializada.")
         return redirect("financeiro:tesouraria_painel")
@@ -538,13 +585,35 @@ def tesouraria_lancamento(request):
         if caixa_id:
             mov.caixa_destino_id = int(caixa_id)
         mov.save()
-        tesouraria.recalcular_saldo()
 
         messages.success(request, f"{mov.get_tipo_display()}: R$ {abs(mov.valor):.2f}")
 
     return redirect("financeiro:tesouraria_painel")
 
 
+@login_required
+def tesouraria_estornar(request, mov_id):
+    """Estorna uma movimentação da tesouraria (com senha)."""
+    from .models import MovimentacaoTesouraria
+
+    mov = get_object_or_404(MovimentacaoTesouraria, id=mov_id)
+
+    if request.method == "POST":
+        senha = request.POST.get("senha", "")
+        user = authenticate(username=request.user.username, password=senha)
+        if not user:
+            messages.error(request, "Senha inválida.")
+            return redirect("financeiro:tesouraria_painel")
+
+        if not mov.estornar(request.user):
+            messages.warning(request, "Já estornado.")
+            return redirect("financeiro:tesouraria_painel")
+
+        messages.success(request, f"{mov.get_tipo_display()} de R$ {abs(mov.valor):.2f} estornado.")
+
+    return redirect("financeiro:tesouraria_painel")
+
+
 # ==============================================================================
 # CUSTÓDIA DE CHEQUES
 # ==============================================================================
@@ -604,122 +673,77 @@ def custodia_entrada(request):
 def custodia_acao(request, cheque_id):
     """Muda status do cheque com integração à conta corrente do cliente."""
     from .models import ChequeCustodia
-    from contas.models import ContaCorrente, MovimentacaoConta
+    from .custodia import TRANSICOES, TransicaoConcorrente, aplicar_transicao
 
     cheque = get_object_or_404(ChequeCustodia, id=cheque_id)
     acao = request.POST.get("acao", "")
 
-    if acao == "enviar_compensacao":
-        cheque.status = "ENVIADO_COMPENSACAO"
-        cheque.data_envio_compensacao = timezone.localdate()
-        cheque.save()
+    if acao not in TRANSICOES:
+        return redirect("financeiro:custodia_painel")
 
-        # Credita na C/C como saldo BLOQUEADO
-        if cheque.cliente:
-            try:
-                cc = ContaCorrente.objects.get(cliente=cheque.cliente)
-                MovimentacaoConta.objects.create(
-                    conta=cc, tipo="CREDITO_BLOQUEADO",
-                    origem="CHEQUE_COMPENSACAO",
-                    valor=cheque.valor,
-                    descricao=f"Cheque {cheque.numero_cheque} ({cheque.banco}) em compensação — BLOQUEADO",
-                    cheque_custodia=cheque,
-                    emprestimo=cheque.emprestimo,
-                )
-            except ContaCorrente.DoesNotExist:
-                pass
+    if acao == "reapresentar" and cheque.status != "DEVOLVIDO":
+        messages.error(request, "Só é possível reapresentar cheques devolvidos.")
+        return redirect("financeiro:custodia_painel")
 
-        messages.info(request, f"Cheque {cheque.numero_cheque} enviado para compensação. Saldo bloqueado na C/C.")
+    alinea = request.POST.get("alinea", "") if acao == "devolver" else ""
+    try:
+        alterados = aplicar_transicao(
+            [cheque], acao, alinea=alinea, motivo=request.POST.get("motivo", ""),
+        )
+    except TransicaoConcorrente as e:
+        messages.error(request, str(e))
+        return redirect("financeiro:custodia_painel")
+    if not alterados:
+        messages.error(request, f"Ação não permitida para cheque com status {cheque.get_status_display()}.")
+        return redirect("financeiro:custodia_painel")
 
+    if acao == "enviar_compensacao":
+        messages.info(request, f"Cheque {cheque.numero_cheque} enviado para compensação. Saldo bloqueado na C/C.")
     elif acao == "compensar":
-        cheque.status = "COMPENSADO"
-        cheque.data_compensacao = timezone.localdate()
-        cheque.save()
-
-        # Desbloqueia e credita na C/C
-        if cheque.cliente:
-            try:
-                cc = ContaCorrente.objects.get(cliente=cheque.cliente)
-                MovimentacaoConta.objects.create(
-                    conta=cc, tipo="DESBLOQUEIO",
-                    origem="CHEQUE_COMPENSADO",
-                    valor=cheque.valor,
-                    descricao=f"Cheque {cheque.numero_cheque} ({cheque.banco}) COMPENSADO — saldo liberado",
-                    cheque_custodia=cheque,
-                    emprestimo=cheque.emprestimo,
-                )
-            except ContaCorrente.DoesNotExist:
-                pass
-
         messages.success(request, f"Cheque {cheque.numero_cheque} compensado. Saldo creditado na C/C.")
-
     elif acao == "devolver":
-        alinea = request.POST.get("alinea", "")
-        motivo = request.POST.get("motivo", "")
-        motivo_completo = f"Alínea {alinea}: {dict(MovimentacaoConta.ALINEA_CHOICES).get(alinea, '')}. {motivo}".strip() if alinea else motivo
-
-        cheque.status = "DEVOLVIDO"
-        cheque.data_devolucao = timezone.localdate()
-        cheque.motivo_devolucao = motivo_completo
-        cheque.save()
-
-        # Estorna o saldo bloqueado
-        if cheque.cliente:
-            try:
-                cc = ContaCorrente.objects.get(cliente=cheque.cliente)
-                # Busca a movimentação bloqueada original
-                mov_bloq = MovimentacaoConta.objects.filter(
-                    cheque_custodia=cheque, tipo="CREDITO_BLOQUEADO", estornado=False
-                ).first()
-                if mov_bloq:
-                    mov_bloq.estornado = True
-                    mov_bloq.save()
-
-                # Remove do saldo bloqueado
-                cc.saldo_bloqueado = max(Decimal("0"), cc.saldo_bloqueado - cheque.valor)
-                cc.save()
-
-                # Registra o estorno
-                MovimentacaoConta.objects.create(
-                    conta=cc, tipo="DEBITO",
-                    origem="CHEQUE_DEVOLVIDO",
-                    valor=Decimal("0"),  # não debita saldo real, só registra
-                    descricao=f"Cheque {cheque.numero_cheque} DEVOLVIDO — {motivo_completo}",
-                    cheque_custodia=cheque,
-                    alinea=alinea,
-                    emprestimo=cheque.emprestimo,
-                )
-            except ContaCorrente.DoesNotExist:
-                pass
-
         messages.warning(request, f"Cheque {cheque.numero_cheque} devolvido. Alínea: {alinea}. Saldo bloqueado estornado.")
+    else:
+        messages.info(request, f"Cheque {cheque.numero_cheque} reapresentado. Saldo bloqueado novamente.")
 
-    elif acao == "reapresentar":
-        if cheque.status != "DEVOLVIDO":
-            messages.error(request, "Só é possível reapresentar cheques devolvidos.")
-            return redirect("financeiro:custodia_painel")
-
-        cheque.status = "ENVIADO_COMPENSACAO"
-        cheque.data_envio_compensacao = timezone.localdate()
-        cheque.data_devolucao = None
-        cheque.motivo_devolucao = ""
-        cheque.save()
+    return redirect("financeiro:custodia_painel")
 
-        # Bloqueia novamente na C/C
-        if cheque.cliente:
-            try:
-                cc = ContaCorrente.objects.get(cliente=cheque.cliente)
-                MovimentacaoConta.objects.create(
-                    conta=cc, tipo="CREDITO_BLOQUEADO",
-                    origem="CHEQUE_COMPENSACAO",
-                    valor=cheque.valor,
-                    descricao=f"Cheque {cheque.numero_cheque} REAPRESENTADO — 2ª via — BLOQUEADO",
-                    cheque_custodia=cheque,
-                    emprestimo=cheque.emprestimo,
-                )
-            except ContaCorrente.DoesNotExist:
-                pass
 
-        messages.info(request, f"Cheque {cheque.numero_cheque} reapresentado. Saldo bloqueado novamente.")
+@login_required
+def custodia_importar_retorno(request):
+    """Importa arquivo de retorno da compensação (CNAB 240/400) e baixa os cheques em lote."""
+    from .custodia import processar_retorno
+
+    if request.method != "POST":
+        return redirect("financeiro:custodia_painel")
+
+    arquivo = request.FILES.get("arquivo")
+    if not arquivo:
+        messages.error(request, "Selecione o arquivo de retorno.")
+        return redirect("financeiro:custodia_painel")
+
+    try:
+        resultado = processar_retorno(arquivo)
+    except ValueError as e:
+        messages.error(request, f"Erro ao ler o arquivo: {e}")
+        return redirect("financeiro:custodia_painel")
+
+    aplicados = resultado.aplicados
+    messages.success(request, (
+        f"Retorno processado: {resultado.lidos} registros. "
+        f"{aplicados['compensar']} compensados, {aplicados['devolver']} devolvidos, "
+        f"{aplicados['enviar_compensacao'] + aplicados['reapresentar']} em compensação."
+    ))
+    if resultado.nao_encontrados:
+        exemplos = ", ".join(
+            f"linha {r.linha} (ch. {r.numero_cheque.lstrip('0')})"
+            for r in resultado.nao_encontrados[:5]
+        )
+        messages.warning(request, f"{len(resultado.nao_encontrados)} cheques não encontrados na custódia: {exemplos}.")
+    if resultado.ignorados:
+        messages.info(request, f"{resultado.ignorados} registros ignorados (ocorrência sem ação ou status já baixado).")
+    if resultado.erros:
+        linhas = ", ".join(str(linha) for linha, _ in resultado.erros[:10])
+        messages.error(request, f"{len(resultado.erros)} registros inválidos — linhas: {linhas}.")
 
     return redirect("financeiro:custodia_painel")
@@ -32,7 +32,11 @@ class ContratoRecebivelForm(forms.ModelForm):
 
     class Meta:
         model = ContratoRecebivel
-        fields = ['cliente', 'taxa_desconto']
+        fields = ['cliente', 'taxa_desconto', 'modalidade_desconto', 'base_dias']
+        widgets = {
+            'modalidade_desconto': forms.Select(attrs={'class': 'form-select'}),
+            'base_dias': forms.Select(attrs={'class': 'form-select'}),
+        }
 
     def clean_taxa_desconto(self):
         return limpar_valor_formatado(self.cleaned_data['taxa_desconto'])
@@ -86,7 +90,11 @@ class RenegociacaoForm(forms.ModelForm):
     )
     class Meta:
         model = ContratoRecebivel
-        fields = ['taxa_desconto']
+        fields = ['taxa_desconto', 'modalidade_desconto', 'base_dias']
+        widgets = {
+            'modalidade_desconto': forms.Select(attrs={'class': 'form-select'}),
+            'base_dias': forms.Select(attrs={'class': 'form-select'}),
+        }
 
     def clean_taxa_desconto(self):
         return limpar_valor_formatado(self.cleaned_data['taxa_desconto'])
\ No newline at end of file
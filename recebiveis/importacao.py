@@ -0,0 +1,258 @@
+"""
+Importação em lote de recebíveis (cheques, NFs, agenda de cartão).
+
+Dois layouts, detectados pelo cabeçalho:
+
+- CSV do sistema (separador ';' ou ','): tipo;numero;vencimento;valor
+  (o cabeçalho é opcional; sem a coluna tipo, vale o tipo escolhido
+  na tela);
+- agenda/extrato de liquidação da adquirente (Cielo, Rede, Stone,
+  GetNet...) exportado em CSV: as colunas são reconhecidas pelo nome
+  (data de pagamento/prevista, valor líquido, NSU/autorização,
+  parcela). Todos os itens entram como 'cartao'.
+
+O arquivo é lido em streaming e cada linha é validada em memória
+(data, valor, vencimento não anterior ao contrato, número repetido no
+arquivo ou já lançado no contrato — uma única consulta). Nada é gravado
+aqui: ler_arquivo() devolve as linhas válidas e as rejeitadas, a tela
+mostra a prévia (precificar_contrato sobre os itens ainda não salvos)
+e só a confirmação chama services.adicionar_itens (um INSERT em lote e
+um ajuste dos totais).
+"""
+import csv
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import List
+
+from .forms import limpar_valor_formatado
+from .models import ItemRecebivel
+
+
+# Acima disso o arquivo é recusado (a prévia fica na sessão)
+MAX_ITENS = 5000
+
+# max_digits=15, decimal_places=2 de ItemRecebivel.valor
+VALOR_MAXIMO = Decimal(10) ** 13
+
+TIPOS = {codigo for codigo, _ in ItemRecebivel.TIPO_CHOICES}
+FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%Y%m%d", "%d%m%Y")
+
+# Nomes de coluna aceitos (sem acento, minúsculos) → campo
+COLUNAS = {
+    "tipo": "tipo",
+    "numero": "numero", "documento": "numero", "nsu": "numero", "nsu/doc": "numero",
+    "codigo de autorizacao": "numero", "autorizacao": "numero", "numero do cheque": "numero",
+    "numero da nota": "numero", "nota fiscal": "numero", "id da transacao": "numero",
+    "vencimento": "vencimento", "data de vencimento": "vencimento",
+    "data de pagamento": "vencimento", "data prevista de pagamento": "vencimento",
+    "data prevista": "vencimento", "previsao de pagamento": "vencimento",
+    "data de liquidacao": "vencimento", "data do credito": "vencimento",
+    "valor": "valor", "valor liquido": "valor", "valor liquido da parcela": "valor",
+    "valor a receber": "valor", "valor da parcela": "valor",
+    "parcela": "parcela", "plano": "parcela",
+}
+# Colunas que só aparecem nos arquivos das adquirentes
+COLUNAS_ADQUIRENTE = {
+    "nsu", "nsu/doc", "codigo de autorizacao", "autorizacao", "id da transacao",
+    "valor liquido", "valor liquido da parcela", "data prevista de pagamento",
+    "previsao de pagamento", "bandeira", "plano", "parcela",
+}
+# Layout do sistema quando o arquivo vem sem cabeçalho
+POSICOES_PADRAO = {"tipo": 0, "numero": 1, "vencimento": 2, "valor": 3}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+@dataclass
+class LinhaImportada:
+    linha: int
+    tipo: str
+    numero: str
+    vencimento: date
+    valor: Decimal
+
+    def como_item(self):
+        """ItemRecebivel ainda não salvo (para a prévia e o bulk_create)."""
+        return ItemRecebivel(tipo=self.tipo, numero=self.numero, vencimento=self.vencimento, valor=self.valor)
+
+
+@dataclass
+class LeituraArquivo:
+    layout: str = ""
+    validas: List[LinhaImportada] = field(default_factory=list)
+    rejeitadas: List[tuple] = field(default_factory=list)   # (linha, motivo)
+
+    @property
+    def lidas(self):
+        return len(self.validas) + len(self.rejeitadas)
+
+
+# ==============================================================================
+# VALIDAÇÃO EM MEMÓRIA
+# ==============================================================================
+
+def _normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", texto.strip().strip('"').lower())
+
+
+def _data(valor):
+    valor = (valor or "").strip()
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise LinhaInvalida(f"data inválida: {valor!r}")
+
+
+def _valor(valor):
+    try:
+        resultado = limpar_valor_formatado((valor or "").strip())
+    except InvalidOperation:
+        raise LinhaInvalida(f"valor inválido: {valor!r}")
+    # Decimal aceita "NaN" e "Infinity": a comparação/quantize abaixo levantariam InvalidOperation
+    if not resultado.is_finite():
+        raise LinhaInvalida(f"valor inválido: {valor!r}")
+    if resultado <= 0:
+        raise LinhaInvalida(f"valor deve ser positivo: {valor!r}")
+    if resultado >= VALOR_MAXIMO:
+        raise LinhaInvalida(f"valor acima do limite: {valor!r}")
+    return resultado.quantize(Decimal("0.01"))
+
+
+def _mapear_cabecalho(colunas):
+    """{campo: índice} se a linha for um cabeçalho reconhecível, senão None."""
+    posicoes = {}
+    for i, nome in enumerate(colunas):
+        campo = COLUNAS.get(_normalizar(nome))
+        if campo and campo not in posicoes:
+            posicoes[campo] = i
+    if {"vencimento", "valor"} <= posicoes.keys():
+        return posicoes
+    return None
+
+
+def validar_linha(colunas, posicoes, tipo_padrao, data_base):
+    """Converte as colunas de uma linha nos campos do item (ou LinhaInvalida)."""
+    def coluna(campo):
+        i = posicoes.get(campo)
+        return colunas[i].strip() if i is not None and i < len(colunas) else ""
+
+    tipo = _normalizar(coluna("tipo")).replace(" ", "_") or tipo_padrao
+    if tipo not in TIPOS:
+        raise LinhaInvalida(f"tipo inválido: {coluna('tipo')!r}")
+
+    vencimento = _data(coluna("vencimento"))
+    if vencimento < data_base:
+        raise LinhaInvalida(f"vencimento {vencimento:%d/%m/%Y} anterior à data do contrato")
+
+    numero = coluna("numero")
+    if coluna("parcela"):
+        # Agenda de cartão: a mesma venda (NSU) aparece uma vez por parcela
+        numero = f"{numero}-{coluna('parcela')}" if numero else coluna("parcela")
+    if not numero:
+        raise LinhaInvalida("número/NSU em branco")
+    limite = ItemRecebivel._meta.get_field("numero").max_length
+    if len(numero) > limite:
+        raise LinhaInvalida(f"número com mais de {limite} caracteres")
+
+    return tipo, numero, vencimento, _valor(coluna("valor"))
+
+
+# ==============================================================================
+# LEITURA
+# ==============================================================================
+
+def ler_arquivo(linhas, contrato, tipo_padrao="cheque"):
+    """
+    Lê e valida um arquivo de recebíveis para o contrato, sem gravar nada.
+
+    Args:
+        linhas: arquivo texto aberto (ou qualquer iterável de str).
+        tipo_padrao: tipo dos itens quando o arquivo não tem a coluna tipo.
+
+    Returns:
+        LeituraArquivo com as linhas válidas e as rejeitadas (com o motivo).
+    """
+    linhas = iter(linhas)
+    primeira = next(linhas, "")
+    separador = ";" if primeira.count(";") >= primeira.count(",") else ","
+    leitor = csv.reader(_encadear(primeira, linhas), delimiter=separador)
+
+    leitura = LeituraArquivo()
+    cabecalho = next(leitor, None)
+    posicoes = _mapear_cabecalho(cabecalho or [])
+    if posicoes is None:
+        posicoes, pendente = dict(POSICOES_PADRAO), cabecalho
+        leitura.layout = "padrão (sem cabeçalho)"
+    else:
+        pendente = None
+        adquirente = "tipo" not in posicoes and any(_normalizar(c) in COLUNAS_ADQUIRENTE for c in cabecalho)
+        leitura.layout = "agenda da adquirente" if adquirente else "CSV com cabeçalho"
+        if adquirente:
+            tipo_padrao = "cartao"
+
+    data_base = contrato.data_criacao
+    if isinstance(data_base, datetime):
+        data_base = data_base.date()
+    vistos = {}   # número → linha em que apareceu primeiro
+
+    def processar(numero_linha, colunas):
+        if not any(c.strip() for c in colunas):
+            return
+        try:
+            tipo, numero, vencimento, valor = validar_linha(colunas, posicoes, tipo_padrao, data_base)
+            if numero in vistos:
+                raise LinhaInvalida(f"número repetido no arquivo (linha {vistos[numero]})")
+        except LinhaInvalida as e:
+            leitura.rejeitadas.append((numero_linha, str(e)))
+            return
+        vistos[numero] = numero_linha
+        leitura.validas.append(LinhaImportada(numero_linha, tipo, numero, vencimento, valor))
+        if len(leitura.validas) > MAX_ITENS:
+            raise ValueError(f"Arquivo com mais de {MAX_ITENS} itens: divida em partes.")
+
+    if pendente is not None:
+        processar(1, pendente)
+    for colunas in leitor:
+        processar(leitor.line_num, colunas)
+
+    # Números que já estão no contrato: uma consulta para o arquivo inteiro
+    ja_lancados = set(
+        contrato.itens.filter(numero__in=list(vistos)).values_list("numero", flat=True)
+    ) if vistos else set()
+    if ja_lancados:
+        leitura.rejeitadas += [
+            (l.linha, f"número {l.numero} já lançado no contrato") for l in leitura.validas if l.numero in ja_lancados
+        ]
+        leitura.validas = [l for l in leitura.validas if l.numero not in ja_lancados]
+        leitura.rejeitadas.sort()
+
+    return leitura
+
+
+def _encadear(primeira, resto):
+    yield primeira
+    yield from resto
+
+
+# ==============================================================================
+# PRÉVIA NA SESSÃO
+# ==============================================================================
+
+def para_sessao(linhas):
+    """Linhas válidas em formato JSON (a sessão não guarda date/Decimal)."""
+    return [[l.linha, l.tipo, l.numero, l.vencimento.isoformat(), str(l.valor)] for l in linhas]
+
+
+def da_sessao(dados):
+    return [
+        LinhaImportada(linha, tipo, numero, date.fromisoformat(vencimento), Decimal(valor))
+        for linha, tipo, numero, vencimento, valor in dados
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recebiveis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratorecebivel',
+            name='base_dias',
+            field=models.CharField(choices=[('corridos', 'Dias corridos (mês de 30 dias)'), ('uteis', 'Dias úteis (mês de 21 dias úteis)')], default='corridos', max_length=10, verbose_name='Contagem de Prazo'),
+        ),
+        migrations.AddField(
+            model_name='contratorecebivel',
+            name='modalidade_desconto',
+            field=models.CharField(choices=[('simples', 'Desconto simples'), ('composto', 'Desconto composto')], default='simples', max_length=10, verbose_name='Modalidade de Desconto'),
+        ),
+    ]
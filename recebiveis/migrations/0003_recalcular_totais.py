@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def recalcular_totais(apps, schema_editor):
+    """
+    Totais gravados antes dos descontos por item arredondados ao centavo
+    ficam com resíduo de fração de centavo, que os ajustes incrementais
+    (ajustar_valores) carregariam para sempre: recalcula todos do zero.
+    """
+    from recebiveis.precificacao import precificar
+
+    ContratoRecebivel = apps.get_model("recebiveis", "ContratoRecebivel")
+    ItemRecebivel = apps.get_model("recebiveis", "ItemRecebivel")
+
+    for contrato in ContratoRecebivel.objects.iterator(chunk_size=500):
+        itens = ItemRecebivel.objects.filter(contrato_id=contrato.pk).only("valor", "vencimento")
+        preco = precificar(
+            itens, contrato.taxa_desconto, contrato.data_criacao,
+            modalidade=contrato.modalidade_desconto, base_dias=contrato.base_dias,
+        )
+        if (contrato.valor_bruto, contrato.valor_liquido) != (preco.valor_bruto, preco.valor_liquido):
+            ContratoRecebivel.objects.filter(pk=contrato.pk).update(
+                valor_bruto=preco.valor_bruto, valor_liquido=preco.valor_liquido,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recebiveis', '0002_convencoes_desconto'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_totais, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
 from django.utils import timezone
 from clientes.models import Cliente
-from django.db.models import Sum
+from django.db.models import F
 from decimal import Decimal
+from .precificacao import (
+    BASE_DIAS_CHOICES, CORRIDOS, MODALIDADE_CHOICES, SIMPLES, precificar, precificar_contrato,
+)
 from .utils import gerar_id_recebivel
 
 class ContratoRecebivel(models.Model):
@@ -17,6 +20,10 @@ class ContratoRecebivel(models.Model):
     contrato_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='simulado')
     taxa_desconto = models.DecimalField(max_digits=5, decimal_places=2, default=0.05)
+    modalidade_desconto = models.CharField(
+        "Modalidade de Desconto", max_length=10, choices=MODALIDADE_CHOICES, default=SIMPLES,
+    )
+    base_dias = models.CharField("Contagem de Prazo", max_length=10, choices=BASE_DIAS_CHOICES, default=CORRIDOS)
     valor_bruto = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     valor_liquido = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     data_criacao = models.DateField(default=timezone.now)
@@ -27,28 +34,40 @@ class ContratoRecebivel(models.Model):
             self.contrato_id = gerar_id_recebivel(prefixo="REC")
         super().save(*args, **kwargs)
 
-    def calcular_valores(self):
-        self.valor_bruto = Decimal('0.00')
-        total_desconto = Decimal('0.00')
-        taxa_percentual = self.taxa_desconto / Decimal('100')
-        
-        itens = self.itens.all()
-        if not itens:
-            self.valor_liquido = Decimal('0.00')
-            self.save()
+    def desconto_item(self, valor, vencimento):
+        """Desconto de um item com a taxa e as convenções do contrato (ver precificacao)."""
+        return precificar(
+            [(valor, vencimento)], self.taxa_desconto, self.data_criacao,
+            modalidade=self.modalidade_desconto, base_dias=self.base_dias,
+        ).desconto
+
+    def ajustar_valores(self, delta_bruto, delta_desconto):
+        """
+        Soma a variação de um ou mais itens aos totais, com F() (sem reler os
+        itens). Usado pelo save()/delete() do item e pela API em lote.
+        """
+        if not delta_bruto and not delta_desconto:
             return
+        delta_liquido = delta_bruto - delta_desconto
+        ContratoRecebivel.objects.filter(pk=self.pk).update(
+            valor_bruto=F('valor_bruto') + delta_bruto,
+            valor_liquido=F('valor_liquido') + delta_liquido,
+        )
+        self.valor_bruto = Decimal(str(self.valor_bruto)) + delta_bruto
+        self.valor_liquido = Decimal(str(self.valor_liquido)) + delta_liquido
+
+    def calcular_valores(self):
+        """
+        Recalcula os totais do zero a partir dos itens (uma passada do motor
+        de precificação). Só é necessário quando muda a taxa, a convenção ou
+        a data do contrato; inclusões, alterações e exclusões de itens já
+        ajustam os totais pela diferença.
+        """
+        preco = precificar_contrato(self)
+        self.valor_bruto = preco.valor_bruto
+        self.valor_liquido = preco.valor_liquido
+        self.save(update_fields=['valor_bruto', 'valor_liquido'])
 
-        for item in itens:
-            self.valor_bruto += item.valor
-            dias = (item.vencimento - self.data_criacao).days
-            if dias < 0: dias = 0
-            fator_tempo = Decimal(dias) / Decimal('30')
-            desconto_item = item.valor * taxa_percentual * fator_tempo
-            total_desconto += desconto_item
-
-        self.valor_liquido = self.valor_bruto - total_desconto
-        self.save()
-        
     def atualizar_status(self):
         """Verifica se todos os itens estão pagos para liquidar o contrato."""
         if self.status == 'simulado':
@@ -57,7 +76,8 @@ class ContratoRecebivel(models.Model):
         itens = self.itens.all()
         if itens.exists() and not itens.filter(status='aberto').exists():
             self.status = 'liquidado'
-            self.save()
+            # Só o status: os totais são mantidos por F() e não podem ser sobrescritos
+            self.save(update_fields=['status'])
 
     class Meta:
         app_label = 'recebiveis'
@@ -89,9 +109,51 @@ class ItemRecebivel(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_ITEM_CHOICES, default='aberto')
     data_pagamento = models.DateField(null=True, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Valores lidos do banco: o save() ajusta os totais do contrato pela diferença
+        carregados = dict(zip(field_names, values))
+        if {'contrato_id', 'valor', 'vencimento'} <= carregados.keys():
+            instancia._valores_salvos = (carregados['contrato_id'], carregados['valor'], carregados['vencimento'])
+        return instancia
+
+    @staticmethod
+    def _contribuicao(contrato, valor, vencimento):
+        """(bruto, desconto) que o item soma aos totais do contrato."""
+        return Decimal(str(valor)), contrato.desconto_item(valor, vencimento)
+
     def save(self, *args, **kwargs):
+        novo = self._state.adding
+        anterior = None if novo else getattr(self, '_valores_salvos', None)
+        atual = (self.contrato_id, self.valor, self.vencimento)
         super().save(*args, **kwargs)
-        self.contrato.calcular_valores()
+        self._valores_salvos = atual
+
+        if anterior == atual:
+            # Baixa (status/data de pagamento) não muda os totais: nenhum UPDATE no contrato
+            return
+        if not novo and anterior is None:
+            # Item sem os valores originais (ex.: carregado com only()): recálculo completo
+            self.contrato.calcular_valores()
+            return
+        bruto, desconto = self._contribuicao(self.contrato, self.valor, self.vencimento)
+        if anterior is not None:
+            contrato_anterior = self.contrato if anterior[0] == self.contrato_id else ContratoRecebivel.objects.get(pk=anterior[0])
+            bruto_ant, desconto_ant = self._contribuicao(contrato_anterior, anterior[1], anterior[2])
+            if contrato_anterior is self.contrato:
+                bruto, desconto = bruto - bruto_ant, desconto - desconto_ant
+            else:
+                contrato_anterior.ajustar_valores(-bruto_ant, -desconto_ant)
+        self.contrato.ajustar_valores(bruto, desconto)
+
+    def delete(self, *args, **kwargs):
+        contrato = self.contrato
+        _, valor, vencimento = getattr(self, '_valores_salvos', None) or (self.contrato_id, self.valor, self.vencimento)
+        resultado = super().delete(*args, **kwargs)
+        bruto, desconto = self._contribuicao(contrato, valor, vencimento)
+        contrato.ajustar_valores(-bruto, -desconto)
+        return resultado
 
     class Meta:
         app_label = 'recebiveis'
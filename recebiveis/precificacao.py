@@ -0,0 +1,221 @@
+"""
+Precificação de recebíveis (cheques, NFs, cartão) em lote.
+
+precificar() recebe todos os itens de uma vez e devolve o detalhamento
+por item (dias, fator, desconto, líquido) e os totais, sem gravar nada.
+O fator de desconto depende só do vencimento, então é calculado uma vez
+por data distinta: uma agenda de cartão com 300 parcelas em 12 datas faz
+12 cálculos de fator, não 300.
+
+Convenções (ContratoRecebivel.modalidade_desconto / base_dias):
+
+- simples:  desconto = valor × taxa × prazo          (desconto comercial)
+- composto: desconto = valor × (1 − (1 + taxa)^−prazo)
+- corridos: prazo = dias corridos / 30
+- uteis:    vencimento em fim de semana/feriado vai para o próximo dia
+            útil e prazo = dias úteis / 21 (252 ao ano)
+
+    from recebiveis.precificacao import precificar_contrato
+
+    preco = precificar_contrato(contrato)
+    preco.valor_liquido, preco.itens[0].desconto
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from typing import List
+
+
+SIMPLES, COMPOSTO = "simples", "composto"
+CORRIDOS, UTEIS = "corridos", "uteis"
+
+MODALIDADE_CHOICES = (
+    (SIMPLES, "Desconto simples"),
+    (COMPOSTO, "Desconto composto"),
+)
+BASE_DIAS_CHOICES = (
+    (CORRIDOS, "Dias corridos (mês de 30 dias)"),
+    (UTEIS, "Dias úteis (mês de 21 dias úteis)"),
+)
+
+DIAS_MES = {CORRIDOS: Decimal("30"), UTEIS: Decimal("21")}
+CENTAVO = Decimal("0.01")
+
+
+# ==============================================================================
+# CALENDÁRIO (feriados nacionais)
+# ==============================================================================
+
+def _pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    w = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * w) // 451
+    mes = (h + w - 7 * m + 114) // 31
+    dia = (h + w - 7 * m + 114) % 31 + 1
+    return date(ano, mes, dia)
+
+
+@lru_cache(maxsize=64)
+def feriados_nacionais(ano):
+    """Feriados nacionais (e pontos bancários de Carnaval/Corpus Christi) do ano, ordenados."""
+    pascoa = _pascoa(ano)
+    fixos = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 25)]
+    moveis = [pascoa - timedelta(days=48), pascoa - timedelta(days=47),
+              pascoa - timedelta(days=2), pascoa + timedelta(days=60)]
+    return tuple(sorted({date(ano, m, d) for m, d in fixos} | set(moveis)))
+
+
+def _feriados_em_dia_util(inicio, fim):
+    """Feriados de segunda a sexta no intervalo [inicio, fim)."""
+    total = 0
+    for ano in range(inicio.year, fim.year + 1):
+        feriados = feriados_nacionais(ano)
+        total += sum(
+            1 for f in feriados[bisect_left(feriados, inicio):bisect_left(feriados, fim)]
+            if f.weekday() < 5
+        )
+    return total
+
+
+def eh_dia_util(dia):
+    feriados = feriados_nacionais(dia.year)
+    i = bisect_right(feriados, dia)
+    return dia.weekday() < 5 and not (i and feriados[i - 1] == dia)
+
+
+def proximo_dia_util(dia):
+    """O próprio dia, se útil; senão o próximo dia útil."""
+    while not eh_dia_util(dia):
+        dia += timedelta(days=1)
+    return dia
+
+
+def dias_uteis(inicio, fim):
+    """Dias úteis em (inicio, fim], sem percorrer dia a dia."""
+    if fim <= inicio:
+        return 0
+    # Dias de semana em [inicio+1, fim]: semanas cheias + resto
+    dias = (fim - inicio).days
+    semanas, resto = divmod(dias, 7)
+    uteis = semanas * 5
+    dia_semana = (inicio.weekday() + 1) % 7
+    for j in range(resto):
+        if (dia_semana + j) % 7 < 5:
+            uteis += 1
+    return uteis - _feriados_em_dia_util(inicio + timedelta(days=1), fim + timedelta(days=1))
+
+
+# ==============================================================================
+# PRECIFICAÇÃO
+# ==============================================================================
+
+@dataclass(frozen=True)
+class ItemPrecificado:
+    id: object
+    numero: str
+    valor: Decimal
+    vencimento: date
+    vencimento_ajustado: date
+    dias: int
+    fator: Decimal
+    desconto: Decimal
+
+    @property
+    def liquido(self):
+        return self.valor - self.desconto
+
+
+@dataclass
+class Precificacao:
+    itens: List[ItemPrecificado] = field(default_factory=list)
+    valor_bruto: Decimal = Decimal("0.00")
+    desconto: Decimal = Decimal("0.00")
+
+    @property
+    def valor_liquido(self):
+        return self.valor_bruto - self.desconto
+
+    @property
+    def prazo_medio(self):
+        """Prazo médio em dias, ponderado pelo valor."""
+        if not self.valor_bruto:
+            return 0
+        ponderado = sum(i.valor * i.dias for i in self.itens)
+        return int((ponderado / self.valor_bruto).to_integral_value(ROUND_HALF_UP))
+
+
+def _data(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def precificar(itens, taxa_mensal, data_base, modalidade=SIMPLES, base_dias=CORRIDOS):
+    """
+    Precifica todos os itens numa passada.
+
+    Args:
+        itens: objetos com .valor/.vencimento (e opcionalmente .id/.numero),
+            ou tuplas (valor, vencimento).
+        taxa_mensal: taxa em % ao mês (ex.: Decimal("5.00")).
+        data_base: data da operação (início da contagem de dias).
+
+    Returns:
+        Precificacao com o detalhamento por item (descontos arredondados
+        ao centavo, um a um) e os totais.
+    """
+    taxa = Decimal(str(taxa_mensal)) / Decimal("100")
+    data_base = _data(data_base)
+    dias_mes = DIAS_MES[base_dias]
+    fatores = {}
+
+    def fator(vencimento):
+        if vencimento not in fatores:
+            if base_dias == UTEIS:
+                ajustado = proximo_dia_util(vencimento)
+                dias = dias_uteis(data_base, ajustado)
+            else:
+                ajustado = vencimento
+                dias = max(0, (vencimento - data_base).days)
+            prazo = Decimal(dias) / dias_mes
+            if modalidade == COMPOSTO and dias:
+                f = Decimal(1) - (Decimal(1) + taxa) ** -prazo
+            else:
+                f = taxa * prazo
+            fatores[vencimento] = (ajustado, dias, f)
+        return fatores[vencimento]
+
+    resultado = Precificacao()
+    for item in itens:
+        if isinstance(item, tuple):
+            valor, vencimento, ident, numero = item[0], item[1], None, ""
+        else:
+            valor, vencimento = item.valor, item.vencimento
+            ident, numero = getattr(item, "id", None), getattr(item, "numero", "")
+        valor = Decimal(str(valor))
+        ajustado, dias, f = fator(vencimento)
+        desconto = (valor * f).quantize(CENTAVO, ROUND_HALF_UP)
+        resultado.itens.append(ItemPrecificado(ident, numero, valor, vencimento, ajustado, dias, f, desconto))
+        resultado.valor_bruto += valor
+        resultado.desconto += desconto
+    return resultado
+
+
+def precificar_contrato(contrato, itens=None):
+    """
+    Precifica os itens do contrato (uma leitura, sem gravar nada) com a
+    taxa e as convenções do contrato. `itens` permite precificar uma lista
+    ainda não gravada (ex.: prévia de importação).
+    """
+    if itens is None:
+        itens = contrato.itens.order_by("vencimento", "id").only("id", "contrato", "numero", "valor", "vencimento")
+    return precificar(
+        itens, contrato.taxa_desconto, contrato.data_criacao,
+        modalidade=contrato.modalidade_desconto, base_dias=contrato.base_dias,
+    )
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import transaction
 from .models import ContratoRecebivel
 from .forms import RenegociacaoForm, ItemRecebivelForm
 from .services import registrar_financeiro_ajuste
@@ -13,9 +14,12 @@ def renegociar_contrato(request, contrato_id):
     if request.method == 'POST':
         form = RenegociacaoForm(request.POST, instance=contrato)
         if form.is_valid():
-            form.save()
-            contrato.status = 'renegociado'
-            contrato.calcular_valores()
+            with transaction.atomic():
+                contrato = form.save(commit=False)
+                contrato.status = 'renegociado'
+                # calcular_valores() grava só os totais: taxa, convenções e status vão aqui
+                contrato.save(update_fields=['taxa_desconto', 'modalidade_desconto', 'base_dias', 'status'])
+                contrato.calcular_valores()
             registrar_financeiro_ajuste(contrato)  # Registra ajuste no livro caixa
             messages.success(request, 'Contrato renegociado com sucesso.')
             return redirect('simular_contrato', contrato_id=contrato.id)
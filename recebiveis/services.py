@@ -1,6 +1,9 @@
 from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum
 from django.utils import timezone
 from financeiro.models import Transacao
+from .precificacao import precificar_contrato
 
 def registrar_financeiro(contrato):
     """
@@ -26,4 +29,51 @@ def registrar_financeiro_ajuste(contrato):
     Registra ajustes financeiros de renegociação, se necessário.
     """
     # Mantido vazio para uso futuro, evitando erros de importação
-    pass
\ No newline at end of file
+    pass
+
+
+# ==============================================================================
+# ITENS EM LOTE (ex.: contrato com centenas de cheques)
+# ==============================================================================
+
+@transaction.atomic
+def adicionar_itens(contrato, itens):
+    """
+    Inclui vários itens de uma vez: um INSERT em lote e um único ajuste
+    dos totais do contrato (o save() de cada item não é chamado).
+    """
+    from .models import ItemRecebivel
+
+    for item in itens:
+        item.contrato = contrato
+    criados = ItemRecebivel.objects.bulk_create(itens, batch_size=500)
+
+    # Uma passada do motor de precificação sobre o lote inteiro
+    preco = precificar_contrato(contrato, criados)
+    contrato.ajustar_valores(preco.valor_bruto, preco.desconto)
+    return criados
+
+
+@transaction.atomic
+def liquidar_itens(contrato, itens=None, data_pagamento=None):
+    """
+    Dá baixa nos itens em aberto do contrato (todos, ou só `itens`) com um
+    único UPDATE e liquida o contrato se não sobrar item aberto.
+
+    Returns:
+        (quantidade, total bruto) dos itens baixados.
+    """
+    from .models import ContratoRecebivel
+
+    # Trava o contrato: duas baixas simultâneas não somam o mesmo item duas vezes
+    ContratoRecebivel.objects.select_for_update().filter(pk=contrato.pk).first()
+
+    abertos = contrato.itens.filter(status='aberto')
+    if itens is not None:
+        abertos = abertos.filter(pk__in=[getattr(i, 'pk', i) for i in itens])
+
+    resumo = abertos.aggregate(qtd=Count('id'), total=Sum('valor'))
+    if resumo['qtd']:
+        abertos.update(status='pago', data_pagamento=data_pagamento or timezone.localdate())
+        contrato.atualizar_status()
+    return resumo['qtd'], resumo['total'] or Decimal('0.00')
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import importlib
+import io
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory, TestCase
+
+from clientes.models import Cliente
+
+from .importacao import ler_arquivo
+from .models import ContratoRecebivel, ItemRecebivel
+from .precificacao import precificar_contrato
+from .renegociacao import renegociar_contrato
+from .services import adicionar_itens, liquidar_itens
+
+
+class ImportacaoItensTest(TestCase):
+    """
+    ler_arquivo() nunca pode deixar escapar uma exceção por causa do
+    conteúdo de uma linha: toda linha ruim vira uma rejeitada com motivo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(nome_completo="Cedente", cpf="529.982.247-25", renda_mensal=Decimal("5000"))
+        cls.contrato = ContratoRecebivel.objects.create(cliente=cliente, data_criacao=date(2025, 1, 10))
+        ItemRecebivel.objects.create(
+            contrato=cls.contrato, tipo="cheque", numero="900", vencimento=date(2025, 3, 1), valor=Decimal("50"),
+        )
+
+    def _ler(self, *linhas):
+        arquivo = io.StringIO("tipo;numero;vencimento;valor\n" + "\n".join(linhas) + "\n")
+        return ler_arquivo(arquivo, self.contrato)
+
+    def test_linha_valida(self):
+        leitura = self._ler("cheque;1;01/02/2030;1.500,25")
+
+        self.assertEqual(leitura.rejeitadas, [])
+        self.assertEqual(len(leitura.validas), 1)
+        self.assertEqual(leitura.validas[0].valor, Decimal("1500.25"))
+        self.assertEqual(leitura.validas[0].vencimento, date(2030, 2, 1))
+
+    def test_valores_nao_finitos_sao_rejeitados(self):
+        leitura = self._ler(
+            "cheque;1;01/01/2030;NaN",
+            "cheque;2;01/01/2030;Infinity",
+            "cheque;3;01/01/2030;-inf",
+            "cheque;4;01/01/2030;sNaN",
+        )
+
+        self.assertEqual(leitura.validas, [])
+        self.assertEqual([linha for linha, _ in leitura.rejeitadas], [2, 3, 4, 5])
+        for _, motivo in leitura.rejeitadas:
+            self.assertIn("valor inválido", motivo)
+
+    def test_motivos_de_rejeicao(self):
+        leitura = self._ler(
+            "cheque;10;01/01/2030;abc",           # valor inválido
+            "cheque;11;01/01/2030;-5",            # valor negativo
+            "cheque;12;01/01/2030;1E+20",         # acima do campo
+            "cheque;13;31/02/2030;10",            # data inválida
+            "cheque;14;01/01/2024;10",            # antes do contrato
+            "boleto;15;01/01/2030;10",            # tipo inválido
+            "cheque;;01/01/2030;10",              # sem número
+            "cheque;16;01/01/2030;10",
+            "cheque;16;02/01/2030;10",            # repetido no arquivo
+            "cheque;900;01/01/2030;10",           # já lançado no contrato
+        )
+
+        motivos = dict(leitura.rejeitadas)
+        self.assertEqual([l.numero for l in leitura.validas], ["16"])
+        self.assertIn("valor inválido", motivos[2])
+        self.assertIn("positivo", motivos[3])
+        self.assertIn("limite", motivos[4])
+        self.assertIn("data inválida", motivos[5])
+        self.assertIn("anterior à data do contrato", motivos[6])
+        self.assertIn("tipo inválido", motivos[7])
+        self.assertIn("em branco", motivos[8])
+        self.assertIn("repetido no arquivo (linha 9)", motivos[10])
+        self.assertIn("já lançado", motivos[11])
+
+
+class RenegociacaoTest(TestCase):
+
+    def setUp(self):
+        cliente = Cliente.objects.create(nome_completo="Cedente", cpf="529.982.247-25", renda_mensal=Decimal("5000"))
+        self.contrato = ContratoRecebivel.objects.create(
+            cliente=cliente, status="ativo", taxa_desconto=Decimal("5.00"), data_criacao=date(2025, 1, 10),
+        )
+        ItemRecebivel.objects.create(
+            contrato=self.contrato, tipo="cheque", numero="1", vencimento=date(2025, 2, 9), valor=Decimal("1000"),
+        )
+
+    def _post(self, dados):
+        request = RequestFactory().post("/", dados)
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return renegociar_contrato(request, self.contrato.pk)
+
+    def test_renegociacao_grava_status_taxa_e_totais(self):
+        resposta = self._post({"taxa_desconto": "2,00", "modalidade_desconto": "simples", "base_dias": "corridos"})
+
+        self.assertEqual(resposta.status_code, 302)
+        self.contrato.refresh_from_db()
+        self.assertEqual(self.contrato.status, "renegociado")
+        self.assertEqual(self.contrato.taxa_desconto, Decimal("2.00"))
+        self.assertEqual(self.contrato.valor_bruto, Decimal("1000.00"))
+        self.assertEqual(self.contrato.valor_liquido, Decimal("980.00"))     # 30 dias a 2% a.m.
+
+
+class TotaisIncrementaisTest(TestCase):
+    """Cada caminho incremental deve deixar os totais iguais a um recálculo do zero."""
+
+    def setUp(self):
+        cliente = Cliente.objects.create(nome_completo="Cedente", cpf="529.982.247-25", renda_mensal=Decimal("5000"))
+        # Taxa que gera frações de centavo em quase todo desconto
+        criar = lambda: ContratoRecebivel.objects.create(
+            cliente=cliente, status="ativo", taxa_desconto=Decimal("3.37"), data_criacao=date(2025, 1, 10),
+        )
+        self.contrato, self.outro = criar(), criar()
+
+    def _item(self, contrato, numero, valor, vencimento=date(2025, 3, 17)):
+        return ItemRecebivel.objects.create(
+            contrato=contrato, tipo="cheque", numero=numero, vencimento=vencimento, valor=Decimal(valor),
+        )
+
+    def assertTotaisConferem(self, *contratos):
+        for contrato in contratos:
+            contrato.refresh_from_db()
+            preco = precificar_contrato(contrato)
+            self.assertEqual(
+                (contrato.valor_bruto, contrato.valor_liquido), (preco.valor_bruto, preco.valor_liquido),
+            )
+
+    def test_inclusao(self):
+        for i, valor in enumerate(["101.01", "333.33", "0.07"]):
+            self._item(self.contrato, str(i), valor, date(2025, 2, 1 + i * 7))
+
+        self.assertTotaisConferem(self.contrato)
+        self.assertEqual(self.contrato.valor_bruto, Decimal("434.41"))
+
+    def test_inclusao_em_lote(self):
+        adicionar_itens(self.contrato, [
+            ItemRecebivel(tipo="cheque", numero=str(i), vencimento=date(2025, 2, 1 + i), valor=Decimal("77.77"))
+            for i in range(20)
+        ])
+
+        self.assertTotaisConferem(self.contrato)
+
+    def test_alteracao_de_valor_e_vencimento(self):
+        item = self._item(self.contrato, "1", "500.00")
+        self._item(self.contrato, "2", "250.55")
+
+        item = ItemRecebivel.objects.get(pk=item.pk)
+        item.valor = Decimal("499.99")
+        item.vencimento = date(2025, 4, 2)
+        item.save()
+
+        self.assertTotaisConferem(self.contrato)
+
+    def test_troca_de_contrato(self):
+        item = self._item(self.contrato, "1", "123.45")
+        self._item(self.outro, "2", "10.00")
+
+        item = ItemRecebivel.objects.get(pk=item.pk)
+        item.contrato = self.outro
+        item.save()
+
+        self.assertTotaisConferem(self.contrato, self.outro)
+        self.assertEqual(self.contrato.valor_bruto, Decimal("0.00"))
+        self.assertEqual(self.contrato.valor_liquido, Decimal("0.00"))
+
+    def test_exclusao(self):
+        self._item(self.contrato, "1", "999.99")
+        ItemRecebivel.objects.get(pk=self._item(self.contrato, "2", "0.33").pk).delete()
+
+        self.assertTotaisConferem(self.contrato)
+
+    def test_liquidacao_nao_altera_totais(self):
+        itens = [self._item(self.contrato, str(i), "45.67") for i in range(3)]
+        self.contrato.refresh_from_db()
+        antes = (self.contrato.valor_bruto, self.contrato.valor_liquido)
+
+        self.assertEqual(liquidar_itens(self.contrato, itens[:1]), (1, Decimal("45.67")))
+        self.assertEqual(self.contrato.status, "ativo")
+        self.assertEqual(liquidar_itens(self.contrato), (2, Decimal("91.34")))
+
+        self.contrato.refresh_from_db()
+        self.assertEqual(self.contrato.status, "liquidado")
+        self.assertEqual((self.contrato.valor_bruto, self.contrato.valor_liquido), antes)
+        self.assertTotaisConferem(self.contrato)
+
+    def test_migracao_remove_residuo_dos_totais_antigos(self):
+        self._item(self.contrato, "1", "100.00")
+        ContratoRecebivel.objects.filter(pk=self.contrato.pk).update(valor_liquido=Decimal("96.12"))  # resíduo antigo
+        migracao = importlib.import_module("recebiveis.migrations.0003_recalcular_totais")
+
+        migracao.recalcular_totais(apps, None)
+
+        self.assertTotaisConferem(self.contrato)
@@ -10,6 +10,7 @@ urlpatterns = [
     path('adicionar-item/<int:contrato_id>/', views.adicionar_item, name='adicionar_item'),
     path('editar-item/<int:item_id>/', views.editar_item, name='editar_item'),
     path('excluir-item/<int:item_id>/', views.excluir_item, name='excluir_item'),
+    path('importar-itens/<int:contrato_id>/', views.importar_itens, name='importar_itens'),
     
     # === NOVA ROTA: Exclusão de Contrato (Apenas Simulação) ===
     path('excluir-contrato/<int:contrato_id>/', views.excluir_contrato, name='excluir_contrato'),
@@ -7,6 +7,8 @@ from django.db.models import Sum
 
 from .models import ContratoRecebivel, ItemRecebivel
 from .forms import ContratoRecebivelForm, ItemRecebivelForm, AtivacaoForm
+from .precificacao import precificar_contrato
+from .services import liquidar_itens
 from financeiro.models import Transacao, calcular_saldo_atual
 from contas.models import ContaCorrente, MovimentacaoConta
 
@@ -42,19 +44,13 @@ def adicionar_item(request, contrato_id):
     """
     contrato = get_object_or_404(ContratoRecebivel, id=contrato_id)
     
-    # Recalcula valores sempre que entra na tela para garantir consistência
-    contrato.calcular_valores()
-    
     if request.method == 'POST':
         form = ItemRecebivelForm(request.POST)
         if form.is_valid():
             try:
                 item = form.save(commit=False)
                 item.contrato = contrato
-                item.save()
-                
-                # Atualiza totais do contrato
-                contrato.calcular_valores()
+                item.save()  # ajusta os totais do contrato pela diferença
                 
                 messages.success(request, 'Item adicionado com sucesso.')
                 return redirect('adicionar_item', contrato_id=contrato.id)
@@ -72,8 +68,7 @@ def editar_item(request, item_id):
     if request.method == 'POST':
         form = ItemRecebivelForm(request.POST, instance=item)
         if form.is_valid():
-            form.save()
-            item.contrato.calcular_valores()
+            form.save()  # ajusta os totais do contrato pela diferença
             messages.success(request, 'Item atualizado.')
         else:
             messages.error(request, 'Erro ao atualizar item. Verifique os valores.')
@@ -85,12 +80,90 @@ def excluir_item(request, item_id):
     contrato = item.contrato
     
     if request.method == 'POST':
-        item.delete()
-        contrato.calcular_valores()
+        item.delete()  # desconta o item dos totais do contrato
         messages.success(request, 'Item removido.')
     
     return redirect('adicionar_item', contrato_id=contrato.id)
 
+def importar_itens(request, contrato_id):
+    """
+    Importa os itens de um CSV (cheques/NFs) ou da agenda da adquirente.
+    O upload só valida e guarda a prévia na sessão; os itens entram no
+    contrato (um INSERT em lote) quando a prévia é confirmada.
+    """
+    import io
+    from .importacao import da_sessao, ler_arquivo, para_sessao
+    from .services import adicionar_itens
+
+    contrato = get_object_or_404(ContratoRecebivel.objects.select_related('cliente'), id=contrato_id)
+    chave = f'importacao_recebiveis_{contrato.id}'
+
+    if contrato.status != 'simulado':
+        messages.error(request, 'Só é possível importar itens em contratos em simulação.')
+        request.session.pop(chave, None)
+        return redirect('adicionar_item', contrato_id=contrato.id)
+
+    if request.method == 'POST':
+        acao = request.POST.get('acao')
+
+        if acao == 'confirmar':
+            pendente = request.session.pop(chave, None)
+            if not pendente:
+                messages.error(request, 'Nenhuma importação pendente. Envie o arquivo novamente.')
+                return redirect('importar_itens', contrato_id=contrato.id)
+            try:
+                criados = adicionar_itens(contrato, [l.como_item() for l in da_sessao(pendente['linhas'])])
+            except Exception as e:
+                messages.error(request, f"Erro ao importar itens: {e}")
+                return redirect('importar_itens', contrato_id=contrato.id)
+            messages.success(request, f'{len(criados)} itens importados.')
+            return redirect('adicionar_item', contrato_id=contrato.id)
+
+        if acao == 'cancelar':
+            request.session.pop(chave, None)
+            return redirect('importar_itens', contrato_id=contrato.id)
+
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo or not arquivo.name.lower().endswith(('.csv', '.txt')):
+            messages.error(request, 'Envie um arquivo .csv ou .txt.')
+            return redirect('importar_itens', contrato_id=contrato.id)
+
+        linhas = io.TextIOWrapper(arquivo.file, encoding='utf-8-sig', newline='')
+        try:
+            leitura = ler_arquivo(linhas, contrato, tipo_padrao=request.POST.get('tipo_padrao') or 'cheque')
+        except UnicodeDecodeError:
+            messages.error(request, 'Arquivo não está em UTF-8. Salve o CSV como "CSV UTF-8" e tente novamente.')
+            return redirect('importar_itens', contrato_id=contrato.id)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('importar_itens', contrato_id=contrato.id)
+
+        if not leitura.validas:
+            request.session.pop(chave, None)
+            messages.warning(request, f'Nenhum item válido no arquivo ({len(leitura.rejeitadas)} linhas rejeitadas).')
+        else:
+            request.session[chave] = {
+                'arquivo': arquivo.name,
+                'layout': leitura.layout,
+                'linhas': para_sessao(leitura.validas),
+                'rejeitadas': leitura.rejeitadas[:200],
+                'total_rejeitadas': len(leitura.rejeitadas),
+            }
+        return redirect('importar_itens', contrato_id=contrato.id)
+
+    contexto = {'contrato': contrato, 'tipos': ItemRecebivel.TIPO_CHOICES}
+    pendente = request.session.get(chave)
+    if pendente:
+        # Prévia: uma passada do motor sobre os itens do arquivo (nada gravado)
+        preco = precificar_contrato(contrato, [l.como_item() for l in da_sessao(pendente['linhas'])])
+        contexto.update({
+            'pendente': pendente,
+            'preco': preco,
+            'bruto_final': contrato.valor_bruto + preco.valor_bruto,
+            'liquido_final': contrato.valor_liquido + preco.valor_liquido,
+        })
+    return render(request, 'recebiveis/importar.html', contexto)
+
 # === NOVA FUNÇÃO: EXCLUIR CONTRATO ===
 def excluir_contrato(request, contrato_id):
     """
@@ -113,15 +186,15 @@ def excluir_contrato(request, contrato_id):
     return redirect('lista_contratos')
 
 def simular_contrato(request, contrato_id):
-    contrato = get_object_or_404(ContratoRecebivel, id=contrato_id)
-    contrato.calcular_valores()
+    contrato = get_object_or_404(ContratoRecebivel.objects.select_related('cliente'), id=contrato_id)
     
-    # Cálculo para exibição apenas
-    valor_do_desconto = contrato.valor_bruto - contrato.valor_liquido
+    # Tela só de leitura: precifica os itens numa passada, sem gravar nada
+    preco = precificar_contrato(contrato)
     
     return render(request, 'recebiveis/simulacao.html', {
         'contrato': contrato, 
-        'valor_do_desconto': valor_do_desconto
+        'preco': preco,
+        'valor_do_desconto': preco.desconto,
     })
 
 def ativar_contrato(request, contrato_id):
@@ -132,7 +205,6 @@ def ativar_contrato(request, contrato_id):
     3. Se houver Saque Inicial (dinheiro na mão), debita da conta e registra saída do caixa.
     """
     contrato = get_object_or_404(ContratoRecebivel, id=contrato_id)
-    contrato.calcular_valores() # Garante valores frescos
 
     if contrato.status != 'simulado':
         messages.warning(request, 'Este contrato já foi ativado.')
@@ -158,10 +230,13 @@ def ativar_contrato(request, contrato_id):
 
                 try:
                     with transaction.atomic():
-                        # 1. Atualiza Status do Contrato
+                        # 1. Preço final (uma passada sobre os itens) e status do contrato
+                        preco = precificar_contrato(contrato)
+                        contrato.valor_bruto = preco.valor_bruto
+                        contrato.valor_liquido = preco.valor_liquido
                         contrato.status = 'ativo'
                         contrato.data_ativacao = timezone.now()
-                        contrato.save()
+                        contrato.save(update_fields=['status', 'data_ativacao', 'valor_bruto', 'valor_liquido'])
                         
                         # 2. Gestão da Conta Corrente do Cliente
                         conta, _ = ContaCorrente.objects.get_or_create(cliente=contrato.cliente)
@@ -256,23 +331,17 @@ def liquidar_contrato(request, contrato_id):
             messages.warning(request, 'Contrato já está totalmente liquidado.')
             return redirect('lista_contratos')
             
-        itens_abertos = contrato.itens.filter(status='aberto')
-        if not itens_abertos.exists():
-            messages.info(request, 'Não há itens em aberto para liquidar.')
-            return redirect('lista_contratos')
-
         try:
             with transaction.atomic():
-                total_liquidado = Decimal('0.00')
-                
-                for item in itens_abertos:
-                    item.status = 'pago'
-                    item.data_pagamento = timezone.now()
-                    item.save()
-                    total_liquidado += item.valor
-                
-                contrato.status = 'liquidado'
-                contrato.save()
+                # Baixa de todos os itens abertos num único UPDATE
+                qtd, total_liquidado = liquidar_itens(contrato)
+                if not qtd:
+                    messages.info(request, 'Não há itens em aberto para liquidar.')
+                    return redirect('lista_contratos')
+
+                if contrato.status != 'liquidado':
+                    contrato.status = 'liquidado'
+                    contrato.save(update_fields=['status'])
 
                 # Registra Entrada Única no Caixa
                 Transacao.objects.create(
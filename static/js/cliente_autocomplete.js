@@ -0,0 +1,62 @@
+/*
+ * Autocomplete de clientes (Select2 + AJAX em clientes:autocomplete).
+ *
+ * Uso: <select name="cliente_id" class="form-select cliente-autocomplete">
+ *        <option value=""></option>
+ *        {% if selecionado %}<option value="{{ selecionado.id }}" selected>...</option>{% endif %}
+ *      </select>
+ *
+ * Só a opção já selecionada vem do servidor; as demais são buscadas
+ * conforme o usuário digita. Dentro de modal, o dropdown é preso ao modal.
+ * Para listas próprias (ex.: avalistas) use buscarClientes(q, callback).
+ */
+(function ($) {
+  function url() {
+    return window.URL_AUTOCOMPLETE_CLIENTES || '/clientes/autocomplete/';
+  }
+
+  window.buscarClientes = function (q, callback) {
+    return $.getJSON(url(), {q: q}, function (data) {
+      callback(data.resultados || []);
+    });
+  };
+
+  window.opcoesAutocompleteCliente = function ($select, extra) {
+    var $modal = $select.closest('.modal');
+    var placeholder = $select.data('placeholder') || 'Digite o nome ou CPF do cliente...';
+    return $.extend({
+      theme: 'bootstrap-5',
+      width: '100%',
+      placeholder: placeholder,
+      allowClear: !$select.prop('required'),
+      minimumInputLength: 2,
+      dropdownParent: $modal.length ? $modal : $(document.body),
+      ajax: {
+        url: url(),
+        dataType: 'json',
+        delay: 250,
+        cache: true,
+        data: function (params) { return {q: params.term}; },
+        processResults: function (data) { return {results: data.resultados || []}; }
+      },
+      language: {
+        inputTooShort: function () { return 'Digite ao menos 2 letras do nome ou números do CPF'; },
+        noResults: function () { return 'Nenhum cliente encontrado'; },
+        searching: function () { return 'Buscando...'; },
+        errorLoading: function () { return 'Erro ao buscar clientes'; }
+      }
+    }, extra || {});
+  };
+
+  window.iniciarAutocompleteCliente = function (elementos, extra) {
+    $(elementos).each(function () {
+      var $select = $(this);
+      if ($select.hasClass('select2-hidden-accessible')) return;
+      $select.select2(window.opcoesAutocompleteCliente($select, extra));
+    });
+  };
+
+  $(function () {
+    window.iniciarAutocompleteCliente('select.cliente-autocomplete');
+  });
+})(jQuery);
@@ -1,5 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils.functional import cached_property
+
+
+NIVEIS_ACESSO = {"NENHUM": 0, "VISUALIZAR": 1, "OPERAR": 2, "GERENCIAR": 3}
 
 
 class Empresa(models.Model):
@@ -78,21 +82,30 @@ class Usuario(AbstractUser):
     def is_diretor(self):
         return self.cargo == self.Cargo.DIRETOR
 
-    def tem_permissao(self, modulo, nivel_minimo="VISUALIZAR"):
-        """Verifica se o usuário tem permissão para um módulo."""
-        # Diretor tem acesso total
+    @cached_property
+    def permissoes(self):
+        """
+        {módulo: nível numérico (0 a 3)} de todos os módulos, lido numa
+        consulta na primeira verificação e guardado na instância — o
+        request.user dura um request, então menu, decorators e views
+        consultam um dict. Nos templates: {% if user.permissoes.COBRANCA %}
+        (tem acesso) ou {% if user.permissoes.USUARIOS >= 3 %} (gerencia).
+        """
         if self.is_diretor or self.is_superuser:
-            return True
+            return {modulo: NIVEIS_ACESSO["GERENCIAR"] for modulo, _ in PermissaoModulo.MODULO_CHOICES}
+        niveis = {modulo: 0 for modulo, _ in PermissaoModulo.MODULO_CHOICES}
+        if self.pk:
+            for modulo, nivel in self.permissoes_modulo.values_list("modulo", "nivel"):
+                niveis[modulo] = NIVEIS_ACESSO.get(nivel, 0)
+        return niveis
 
-        niveis = {"NENHUM": 0, "VISUALIZAR": 1, "OPERAR": 2, "GERENCIAR": 3}
-        nivel_req = niveis.get(nivel_minimo, 0)
+    def limpar_cache_permissoes(self):
+        """Descarta o mapa de permissões (após alterar cargo ou PermissaoModulo)."""
+        self.__dict__.pop("permissoes", None)
 
-        perm = self.permissoes_modulo.filter(modulo=modulo).first()
-        if not perm:
-            return False
-
-        nivel_user = niveis.get(perm.nivel, 0)
-        return nivel_user >= nivel_req
+    def tem_permissao(self, modulo, nivel_minimo="VISUALIZAR"):
+        """Verifica se o usuário tem permissão para um módulo (diretor tem acesso total)."""
+        return self.permissoes.get(modulo, 0) >= NIVEIS_ACESSO.get(nivel_minimo, 0)
 
     def tem_alcada(self, valor):
         """Verifica alçada de aprovação por valor."""
@@ -70,7 +70,9 @@ def listar_usuarios(request):
         messages.error(request, "Sem permissão para acessar gestão de usuários.")
         return redirect("dashboard")
 
-    usuarios = Usuario.objects.filter(is_superuser=False).order_by("first_name", "username")
+    usuarios = Usuario.objects.filter(is_superuser=False).prefetch_related("permissoes_modulo").order_by(
+        "first_name", "username"
+    )
 
     busca = request.GET.get("q", "")
     if busca:
@@ -175,6 +177,9 @@ def editar_usuario(request, user_id):
             if not created:
                 perm.nivel = nivel
                 perm.save()
+        user.limpar_cache_permissoes()
+        if user.pk == request.user.pk:
+            request.user.limpar_cache_permissoes()
 
         messages.success(request, f"Usuário '{user.username}' atualizado.")
         return redirect("usuarios:listar")